@@ -5,12 +5,16 @@ Uses REST API directly to avoid dependency conflicts
 
 import os
 import logging
+import numpy as np
 import pandas as pd
 import requests
 from datetime import datetime, timedelta
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, Callable, Iterator, List
 import time
 from functools import wraps
+from operator import itemgetter
+
+from rate_limiter import get_rate_limiter
 
 # Load environment variables (optional)
 try:
@@ -39,46 +43,120 @@ class AlpacaConfig:
     # Rate limiting settings
     MAX_RETRIES = 3
     RETRY_DELAY = 1.0  # seconds
-    RATE_LIMIT_DELAY = 0.1  # seconds between requests
+    # Request pacing is handled by the shared limiter in rate_limiter.py
     
     # Data settings
     MAX_DAYS_HISTORY = 365
     TIMEOUT = 30  # seconds
+    PAGE_SIZE = 10000  # bars per page, the API maximum
+    MAX_SYMBOLS_PER_REQUEST = 100  # keeps multi-symbol query strings well under URL limits
+
+def is_transient_error(error: Exception) -> bool:
+    """Check whether a failed request may succeed when retried"""
+    if isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout)):
+        return True
+    if isinstance(error, requests.exceptions.HTTPError) and error.response is not None:
+        # Rate limits and server-side failures; other 4xx (bad symbol or credentials) will not change
+        return error.response.status_code == 429 or error.response.status_code >= 500
+    return False
 
 def retry_on_error(max_retries: int = 3, delay: float = 1.0):
-    """Decorator to retry API calls on failure"""
+    """
+    Decorator to retry API calls on transient failures
+    
+    Rate limits (429), server errors (5xx), connection errors and timeouts are
+    retried with exponential backoff. Any other error is raised immediately,
+    and there is no wait after the final attempt.
+    """
     def decorator(func):
         @wraps(func)
         def wrapper(*args, **kwargs):
-            last_exception = None
-            
             for attempt in range(max_retries):
                 try:
                     return func(*args, **kwargs)
-                except requests.exceptions.HTTPError as e:
-                    last_exception = e
-                    if e.response.status_code == 429:  # Rate limit
-                        wait_time = delay * (2 ** attempt)
-                        logger.warning(f"Rate limit hit on attempt {attempt + 1}. Retrying in {wait_time}s...")
-                        time.sleep(wait_time)
-                    elif attempt < max_retries - 1:
-                        wait_time = delay * (2 ** attempt)
-                        logger.warning(f"HTTP error {e.response.status_code} on attempt {attempt + 1}: {str(e)}. Retrying in {wait_time}s...")
-                        time.sleep(wait_time)
-                    else:
-                        logger.error(f"HTTP error after {max_retries} attempts: {str(e)}")
                 except Exception as e:
-                    last_exception = e
-                    logger.error(f"Unexpected error on attempt {attempt + 1}: {str(e)}")
-                    if attempt < max_retries - 1:
-                        time.sleep(delay)
-                    
-            # If all retries failed, raise the last exception
-            raise last_exception
+                    if not is_transient_error(e):
+                        raise
+                    if attempt == max_retries - 1:
+                        logger.error(f"Request failed after {max_retries} attempts: {str(e)}")
+                        raise
+                    wait_time = delay * (2 ** attempt)
+                    logger.warning(f"Transient error on attempt {attempt + 1}: {str(e)}. Retrying in {wait_time}s...")
+                    time.sleep(wait_time)
             
         return wrapper
     return decorator
 
+# Timestamp, open, high, low, close and volume of a raw API bar
+RAW_BAR_FIELDS = itemgetter('t', 'o', 'h', 'l', 'c', 'v')
+
+def _parse_timestamps(timestamps: tuple) -> pd.DatetimeIndex:
+    """Parse bar timestamps into a UTC index, fast for RFC 3339 'Z' strings"""
+    if all(isinstance(ts, str) and ts.endswith('Z') for ts in timestamps):
+        # NumPy parses naive ISO strings far faster than pandas' generic parser
+        values = np.array([ts[:-1] for ts in timestamps], dtype='datetime64[ns]')
+        return pd.DatetimeIndex(values, name='timestamp').tz_localize('UTC')
+    return pd.DatetimeIndex(pd.to_datetime(timestamps), name='timestamp')
+
+def bars_to_frame(bars: List[Any], fields: Callable[[Any], tuple] = RAW_BAR_FIELDS) -> Optional[pd.DataFrame]:
+    """
+    Convert bars to a yfinance-compatible DataFrame column by column
+
+    Each field is pulled out of the bars once and written into a typed NumPy
+    column, without building an intermediate dict per bar or re-coercing
+    the columns afterwards. Bars with a missing price are dropped, a missing
+    volume counts as 0, and bars are sorted only if they arrive out of order.
+
+    Args:
+        bars: Raw bar dicts, or SDK bar objects with a matching ``fields``
+        fields: Returns (timestamp, open, high, low, close, volume) for a bar
+
+    Returns:
+        DataFrame with columns Open, High, Low, Close, Volume indexed by
+        timestamp, or None when no usable bars remain
+    """
+    if not bars:
+        return None
+
+    timestamps, opens, highs, lows, closes, volumes = zip(*map(fields, bars))
+
+    # One (4, bars) block; None becomes NaN
+    prices = np.array((opens, highs, lows, closes), dtype=np.float64)
+    volume = np.array(volumes, dtype=np.float64)
+    index = _parse_timestamps(timestamps)
+
+    usable = ~np.isnan(prices).any(axis=0)
+    if not usable.all():
+        prices, volume, index = prices[:, usable], volume[usable], index[usable]
+        if not len(index):
+            return None
+
+    if not index.is_monotonic_increasing:
+        order = np.argsort(index.values, kind='stable')
+        prices, volume, index = prices[:, order], volume[order], index[order]
+
+    df = pd.DataFrame(prices.T, index=index, columns=['Open', 'High', 'Low', 'Close'])
+    df['Volume'] = np.nan_to_num(volume).astype(np.int64)
+    return df
+
+def concat_pages(frames: List[pd.DataFrame]) -> Optional[pd.DataFrame]:
+    """
+    Join converted bar pages into one DataFrame
+
+    Pages arrive in time order, but a bar repeated on a page boundary or pages
+    of a multi-symbol response are tolerated by sorting and keeping the last
+    copy of each timestamp.
+    """
+    frames = [frame for frame in frames if frame is not None and not frame.empty]
+    if not frames:
+        return None
+    df = frames[0] if len(frames) == 1 else pd.concat(frames)
+    if not df.index.is_monotonic_increasing:
+        df = df.sort_index()
+    if df.index.has_duplicates:
+        df = df[~df.index.duplicated(keep='last')]
+    return df
+
 class AlpacaDataClient:
     """Client for fetching stock data from Alpaca API using REST"""
     
@@ -100,6 +178,9 @@ class AlpacaDataClient:
             'Content-Type': 'application/json'
         })
         
+        # Token bucket shared with every other Alpaca client in the process
+        self.rate_limiter = get_rate_limiter()
+        
         logger.info("Alpaca data client initialized successfully")
     
     def validate_symbol(self, symbol: str) -> bool:
@@ -115,64 +196,148 @@ class AlpacaDataClient:
         return symbol.isalnum()
     
     @retry_on_error(max_retries=AlpacaConfig.MAX_RETRIES, delay=AlpacaConfig.RETRY_DELAY)
-    def get_stock_data(self, symbol: str, start_date: Optional[str] = None, 
-                      end_date: Optional[str] = None) -> Optional[pd.DataFrame]:
+    def _get_page(self, url: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Fetch one page of a bars response, retrying rate limits and errors"""
+        # Rate limiting
+        self.rate_limiter.acquire()
+        
+        response = self.session.get(url, params=params, timeout=AlpacaConfig.TIMEOUT)
+        self.rate_limiter.update_from_headers(response.headers)
+        response.raise_for_status()
+        return response.json()
+    
+    def _default_dates(self, start_date: Optional[str], end_date: Optional[str]) -> tuple:
+        """Fill in the default history window for missing dates"""
+        if not start_date:
+            start_date = (datetime.now() - timedelta(days=AlpacaConfig.MAX_DAYS_HISTORY)).strftime('%Y-%m-%d')
+        if not end_date:
+            end_date = datetime.now().strftime('%Y-%m-%d')
+        return start_date, end_date
+    
+    def iter_bar_pages(self, symbol: str, start_date: Optional[str] = None,
+                       end_date: Optional[str] = None, timeframe: str = '1Day') -> Iterator[pd.DataFrame]:
         """
-        Fetch stock data from Alpaca API
+        Stream the bars of one symbol page by page
+        
+        Follows ``next_page_token`` until the range is exhausted. Each page is
+        converted as soon as it arrives and its raw JSON is dropped before the
+        next page is requested.
         
         Args:
             symbol: Stock symbol (e.g., 'AAPL')
             start_date: Start date in 'YYYY-MM-DD' format
             end_date: End date in 'YYYY-MM-DD' format
+            timeframe: Bar timeframe, e.g. '1Day', '1Hour' or '1Min'
             
-        Returns:
-            DataFrame with OHLCV data compatible with yfinance format
+        Yields:
+            yfinance-compatible DataFrames, one per non-empty page
         """
-        if not self.validate_symbol(symbol):
-            logger.warning(f"Invalid symbol format: {symbol}")
-            return None
-        
         symbol = symbol.upper().strip()
+        start_date, end_date = self._default_dates(start_date, end_date)
         
-        # Set default dates if not provided
-        if not start_date:
-            start_date = (datetime.now() - timedelta(days=AlpacaConfig.MAX_DAYS_HISTORY)).strftime('%Y-%m-%d')
-        if not end_date:
-            end_date = datetime.now().strftime('%Y-%m-%d')
+        # Build API URL - use data endpoint, not trading endpoint
+        url = f"{self.base_url}/v2/stocks/{symbol}/bars"
+        params = {
+            'timeframe': timeframe,
+            'start': start_date,
+            'end': end_date,
+            'limit': AlpacaConfig.PAGE_SIZE,
+            'adjustment': 'raw'
+        }
         
-        try:
-            # Rate limiting
-            time.sleep(AlpacaConfig.RATE_LIMIT_DELAY)
+        pages = 0
+        while True:
+            data = self._get_page(url, params)
+            pages += 1
             
-            # Build API URL - use data endpoint, not trading endpoint
-            url = f"{self.base_url}/v2/stocks/{symbol}/bars"
+            df = self._convert_to_yfinance_format(data.get('bars') or [])
+            if df is not None and not df.empty:
+                yield df
             
+            page_token = data.get('next_page_token')
+            if not page_token:
+                break
+            params = {**params, 'page_token': page_token}
+        
+        logger.debug(f"Read {pages} page(s) of {timeframe} bars for {symbol}")
+    
+    def iter_multi_bar_pages(self, symbols: List[str], start_date: Optional[str] = None,
+                             end_date: Optional[str] = None,
+                             timeframe: str = '1Day') -> Iterator[Dict[str, pd.DataFrame]]:
+        """
+        Stream multi-symbol bars responses page by page
+        
+        Symbols are requested MAX_SYMBOLS_PER_REQUEST at a time and every chunk
+        follows ``next_page_token``. A symbol's bars may span several pages.
+        
+        Args:
+            symbols: Validated, upper-case stock symbols
+            start_date: Start date in 'YYYY-MM-DD' format
+            end_date: End date in 'YYYY-MM-DD' format
+            timeframe: Bar timeframe, e.g. '1Day', '1Hour' or '1Min'
+            
+        Yields:
+            Dictionaries mapping symbols to the DataFrame of bars on one page
+        """
+        start_date, end_date = self._default_dates(start_date, end_date)
+        url = f"{self.base_url}/v2/stocks/bars"
+        
+        for i in range(0, len(symbols), AlpacaConfig.MAX_SYMBOLS_PER_REQUEST):
+            chunk = symbols[i:i + AlpacaConfig.MAX_SYMBOLS_PER_REQUEST]
             params = {
-                'timeframe': '1Day',
+                'symbols': ','.join(chunk),
+                'timeframe': timeframe,
                 'start': start_date,
                 'end': end_date,
-                'limit': 10000,
+                'limit': AlpacaConfig.PAGE_SIZE,
                 'adjustment': 'raw'
             }
             
-            logger.debug(f"Fetching data for {symbol} from {start_date} to {end_date}")
-            
-            # Make API request
-            response = self.session.get(url, params=params, timeout=AlpacaConfig.TIMEOUT)
-            response.raise_for_status()
-            
-            data = response.json()
+            while True:
+                data = self._get_page(url, params)
+                
+                page = {}
+                for symbol, bars in (data.get('bars') or {}).items():
+                    df = self._convert_to_yfinance_format(bars)
+                    if df is not None and not df.empty:
+                        page[symbol] = df
+                if page:
+                    yield page
+                
+                page_token = data.get('next_page_token')
+                if not page_token:
+                    break
+                params = {**params, 'page_token': page_token}
+    
+    def get_stock_data(self, symbol: str, start_date: Optional[str] = None, 
+                      end_date: Optional[str] = None, timeframe: str = '1Day') -> Optional[pd.DataFrame]:
+        """
+        Fetch stock data from Alpaca API
+        
+        Args:
+            symbol: Stock symbol (e.g., 'AAPL')
+            start_date: Start date in 'YYYY-MM-DD' format
+            end_date: End date in 'YYYY-MM-DD' format
+            timeframe: Bar timeframe, e.g. '1Day', '1Hour' or '1Min'
             
-            # Check if we have bars data
-            if 'bars' not in data or not data['bars']:
-                logger.warning(f"No bars data returned for symbol: {symbol}")
-                return None
+        Returns:
+            DataFrame with OHLCV data compatible with yfinance format
+        """
+        if not self.validate_symbol(symbol):
+            logger.warning(f"Invalid symbol format: {symbol}")
+            return None
+        
+        symbol = symbol.upper().strip()
+        start_date, end_date = self._default_dates(start_date, end_date)
+        
+        try:
+            logger.debug(f"Fetching data for {symbol} from {start_date} to {end_date}")
             
-            # Convert to DataFrame compatible with yfinance format
-            df = self._convert_to_yfinance_format(data['bars'])
+            # Convert to DataFrame compatible with yfinance format, page by page
+            df = concat_pages(list(self.iter_bar_pages(symbol, start_date, end_date, timeframe)))
             
             if df is None or df.empty:
-                logger.warning(f"Empty dataset for symbol: {symbol}")
+                logger.warning(f"No bars data returned for symbol: {symbol}")
                 return None
                 
             logger.info(f"Successfully fetched {len(df)} records for {symbol}")
@@ -185,6 +350,54 @@ class AlpacaDataClient:
             logger.error(f"Unexpected error fetching data for {symbol}: {str(e)}")
             return None
     
+    def get_stocks_data(self, symbols: List[str], start_date: Optional[str] = None,
+                        end_date: Optional[str] = None, timeframe: str = '1Day') -> Dict[str, pd.DataFrame]:
+        """
+        Fetch stock data for many symbols using paginated multi-symbol requests
+        
+        Args:
+            symbols: List of stock symbols
+            start_date: Start date in 'YYYY-MM-DD' format
+            end_date: End date in 'YYYY-MM-DD' format
+            timeframe: Bar timeframe, e.g. '1Day', '1Hour' or '1Min'
+            
+        Returns:
+            Dictionary mapping symbols to yfinance-compatible DataFrames, in
+            the order of ``symbols``. Symbols that are invalid or returned no
+            bars are omitted.
+        """
+        valid_symbols = []
+        for symbol in symbols:
+            if not self.validate_symbol(symbol):
+                logger.warning(f"Invalid symbol format: {symbol}")
+                continue
+            symbol = symbol.upper().strip()
+            if symbol not in valid_symbols:
+                valid_symbols.append(symbol)
+        
+        results = {}
+        for i in range(0, len(valid_symbols), AlpacaConfig.MAX_SYMBOLS_PER_REQUEST):
+            chunk = valid_symbols[i:i + AlpacaConfig.MAX_SYMBOLS_PER_REQUEST]
+            pages = {}
+            try:
+                for page in self.iter_multi_bar_pages(chunk, start_date, end_date, timeframe):
+                    for symbol, df in page.items():
+                        pages.setdefault(symbol, []).append(df)
+            except Exception as e:
+                # A partly read chunk would leave truncated histories, so drop it
+                logger.error(f"Error fetching data for {len(chunk)} symbols ({chunk[0]}..{chunk[-1]}): {str(e)}")
+                continue
+            
+            for symbol in chunk:
+                df = concat_pages(pages.pop(symbol, []))
+                if df is None:
+                    logger.warning(f"No bars data returned for symbol: {symbol}")
+                    continue
+                results[symbol] = df
+        
+        logger.info(f"Successfully fetched data for {len(results)}/{len(valid_symbols)} symbols")
+        return results
+    
     def _convert_to_yfinance_format(self, bars: List[Dict]) -> Optional[pd.DataFrame]:
         """
         Convert Alpaca bars to yfinance-compatible DataFrame format
@@ -196,50 +409,8 @@ class AlpacaDataClient:
             DataFrame with columns: Open, High, Low, Close, Volume
         """
         try:
-            if not bars:
-                return None
-            
-            # Extract data from bars
-            data = []
-            for bar in bars:
-                data.append({
-                    'timestamp': bar['t'],
-                    'Open': float(bar['o']),
-                    'High': float(bar['h']),
-                    'Low': float(bar['l']),
-                    'Close': float(bar['c']),
-                    'Volume': int(bar['v']) if bar['v'] else 0
-                })
-            
-            if not data:
-                return None
-            
-            # Create DataFrame
-            df = pd.DataFrame(data)
-            df['timestamp'] = pd.to_datetime(df['timestamp'])
-            df.set_index('timestamp', inplace=True)
-            
-            # Sort by date
-            df = df.sort_index()
-            
-            # Ensure all required columns are present and properly typed
-            required_columns = ['Open', 'High', 'Low', 'Close', 'Volume']
-            for col in required_columns:
-                if col not in df.columns:
-                    logger.error(f"Missing required column: {col}")
-                    return None
-                
-                # Ensure numeric types
-                if col == 'Volume':
-                    df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0).astype(int)
-                else:
-                    df[col] = pd.to_numeric(df[col], errors='coerce')
-            
-            # Remove any rows with NaN values
-            df = df.dropna()
-            
-            if df.empty:
-                logger.warning("DataFrame is empty after cleaning")
+            df = bars_to_frame(bars)
+            if df is None:
                 return None
             
             logger.debug(f"Converted {len(df)} bars to yfinance format")
@@ -0,0 +1,241 @@
+"""
+Asyncio Alpaca API client for fetching stock market data
+
+Same REST endpoints and DataFrame format as ``AlpacaDataClient``, but bar
+requests run concurrently over one pooled keep-alive connection set, so a
+full-universe refresh is bounded by the rate limit instead of by one round
+trip per symbol. Requires the optional ``aiohttp`` package.
+
+Classes:
+    AsyncAlpacaDataClient: Concurrent bar fetching with a concurrency cap
+
+Functions:
+    is_transient_error: Check whether a failed request may succeed when retried
+    fetch_multiple_stocks_data: Run a concurrent multi-symbol fetch from sync code
+"""
+
+import os
+import asyncio
+import logging
+import pandas as pd
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from alpaca_client import AlpacaConfig, AlpacaDataClient, concat_pages
+from rate_limiter import get_rate_limiter
+
+try:
+    import aiohttp
+except ImportError:
+    # aiohttp is optional - only needed for the asyncio client
+    aiohttp = None
+
+logger = logging.getLogger(__name__)
+
+# Maximum number of bar requests in flight at once
+MAX_CONCURRENCY = int(os.getenv('ALPACA_MAX_CONCURRENCY', '16'))
+
+
+def is_transient_error(error: Exception) -> bool:
+    """Check whether a failed request may succeed when retried, as in ``alpaca_client``"""
+    if isinstance(error, (aiohttp.ClientConnectionError, asyncio.TimeoutError)):
+        return True
+    if isinstance(error, aiohttp.ClientResponseError):
+        # Rate limits and server-side failures; other 4xx (bad symbol or credentials) will not change
+        return error.status == 429 or error.status >= 500
+    return False
+
+
+class AsyncAlpacaDataClient:
+    """
+    Asyncio client for fetching stock data from Alpaca API using REST.
+
+    Use as an async context manager (or call ``close``) so the pooled
+    connections are released. Request starts are paced by the rate limiter
+    shared with the blocking client, but unlike the blocking client the
+    requests themselves overlap.
+
+    Attributes:
+        max_concurrency (int): Maximum number of requests in flight
+    """
+
+    # Symbol validation and bar conversion are shared with the blocking client
+    validate_symbol = AlpacaDataClient.validate_symbol
+    _convert_to_yfinance_format = AlpacaDataClient._convert_to_yfinance_format
+
+    def __init__(self, max_concurrency: int = MAX_CONCURRENCY) -> None:
+        if aiohttp is None:
+            raise ImportError("aiohttp is required for AsyncAlpacaDataClient")
+
+        self.api_key = AlpacaConfig.API_KEY
+        self.secret_key = AlpacaConfig.SECRET_KEY
+        self.base_url = AlpacaConfig.BASE_URL
+
+        # Validate credentials
+        if not self.api_key or not self.secret_key:
+            raise ValueError("Alpaca API credentials not configured")
+
+        self.max_concurrency = max(1, max_concurrency)
+        self._session = None
+        self._semaphore = None
+        self.rate_limiter = get_rate_limiter()
+
+    async def __aenter__(self) -> 'AsyncAlpacaDataClient':
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    def _get_session(self) -> 'aiohttp.ClientSession':
+        """Create the pooled session lazily, inside the running event loop"""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.max_concurrency, keepalive_timeout=30)
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                headers={
+                    'APCA-API-KEY-ID': self.api_key,
+                    'APCA-API-SECRET-KEY': self.secret_key,
+                    'Content-Type': 'application/json'
+                },
+                timeout=aiohttp.ClientTimeout(total=AlpacaConfig.TIMEOUT)
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._session
+
+    async def close(self) -> None:
+        """Close the pooled connections"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def _throttle(self) -> None:
+        """Wait for a token from the shared rate limiter without blocking the loop"""
+        wait = self.rate_limiter.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    async def _get_json(self, url: str, params: Dict) -> Dict:
+        """GET a JSON document, retrying transient failures with backoff"""
+        session = self._get_session()
+
+        for attempt in range(AlpacaConfig.MAX_RETRIES):
+            try:
+                async with self._semaphore:
+                    await self._throttle()
+                    async with session.get(url, params=params) as response:
+                        self.rate_limiter.update_from_headers(response.headers)
+                        response.raise_for_status()
+                        return await response.json()
+            except Exception as e:
+                if not is_transient_error(e):
+                    raise
+                if attempt == AlpacaConfig.MAX_RETRIES - 1:
+                    logger.error(f"Request failed after {AlpacaConfig.MAX_RETRIES} attempts: {str(e)}")
+                    raise
+                wait_time = AlpacaConfig.RETRY_DELAY * (2 ** attempt)
+                logger.warning(f"Transient error on attempt {attempt + 1}: {str(e)}. Retrying in {wait_time}s...")
+                await asyncio.sleep(wait_time)
+
+    async def get_stock_data(self, symbol: str, start_date: Optional[str] = None,
+                             end_date: Optional[str] = None, timeframe: str = '1Day') -> Optional[pd.DataFrame]:
+        """
+        Fetch stock data from Alpaca API, following ``next_page_token``
+
+        Args:
+            symbol: Stock symbol (e.g., 'AAPL')
+            start_date: Start date in 'YYYY-MM-DD' format
+            end_date: End date in 'YYYY-MM-DD' format
+            timeframe: Bar timeframe, e.g. '1Day', '1Hour' or '1Min'
+
+        Returns:
+            DataFrame with OHLCV data compatible with yfinance format
+        """
+        if not self.validate_symbol(symbol):
+            logger.warning(f"Invalid symbol format: {symbol}")
+            return None
+
+        symbol = symbol.upper().strip()
+
+        # Set default dates if not provided
+        if not start_date:
+            start_date = (datetime.now() - timedelta(days=AlpacaConfig.MAX_DAYS_HISTORY)).strftime('%Y-%m-%d')
+        if not end_date:
+            end_date = datetime.now().strftime('%Y-%m-%d')
+
+        url = f"{self.base_url}/v2/stocks/{symbol}/bars"
+        params = {
+            'timeframe': timeframe,
+            'start': start_date,
+            'end': end_date,
+            'limit': AlpacaConfig.PAGE_SIZE,
+            'adjustment': 'raw'
+        }
+
+        try:
+            logger.debug(f"Fetching data for {symbol} from {start_date} to {end_date}")
+
+            # Pages are converted as they arrive rather than buffered as JSON
+            frames = []
+            while True:
+                data = await self._get_json(url, params)
+                frames.append(self._convert_to_yfinance_format(data.get('bars') or []))
+
+                page_token = data.get('next_page_token')
+                if not page_token:
+                    break
+                params = {**params, 'page_token': page_token}
+
+            df = concat_pages(frames)
+            if df is None or df.empty:
+                logger.warning(f"No bars data returned for symbol: {symbol}")
+                return None
+
+            logger.info(f"Successfully fetched {len(df)} records for {symbol}")
+            return df
+
+        except Exception as e:
+            logger.error(f"Error fetching data for {symbol}: {str(e)}")
+            return None
+
+    async def get_multiple_stocks_data(self, symbols: List[str], start_date: Optional[str] = None,
+                                       end_date: Optional[str] = None) -> Dict[str, pd.DataFrame]:
+        """
+        Fetch data for multiple stocks concurrently
+
+        Args:
+            symbols: List of stock symbols
+            start_date: Start date in 'YYYY-MM-DD' format
+            end_date: End date in 'YYYY-MM-DD' format
+
+        Returns:
+            Dictionary mapping symbols to DataFrames, in the order of ``symbols``
+        """
+        frames = await asyncio.gather(*(self.get_stock_data(symbol, start_date, end_date) for symbol in symbols))
+
+        results = {}
+        for symbol, data in zip(symbols, frames):
+            if data is not None:
+                results[symbol] = data
+            else:
+                logger.warning(f"No data available for {symbol}")
+
+        logger.info(f"Successfully fetched data for {len(results)}/{len(symbols)} symbols")
+        return results
+
+
+def fetch_multiple_stocks_data(symbols: List[str], start_date: Optional[str] = None,
+                               end_date: Optional[str] = None,
+                               max_concurrency: int = MAX_CONCURRENCY) -> Dict[str, pd.DataFrame]:
+    """
+    Fetch data for multiple stocks concurrently from synchronous code
+
+    Runs its own event loop, so it must not be called from inside one.
+
+    Returns:
+        Dictionary mapping symbols to DataFrames
+    """
+    async def run() -> Dict[str, pd.DataFrame]:
+        async with AsyncAlpacaDataClient(max_concurrency) as client:
+            return await client.get_multiple_stocks_data(symbols, start_date, end_date)
+
+    return asyncio.run(run())
@@ -7,6 +7,10 @@ existing candlestick pattern detection systems.
 
 Classes:
     AlpacaSDKClient: Main client for fetching stock data from Alpaca API
+    RateLimitedAdapter: Transport adapter pacing each HTTP request through the rate limiter
+
+Constants:
+    MAX_SYMBOLS_PER_REQUEST: Symbols sent per multi-symbol bars request
 
 Functions:
     get_alpaca_client: Factory function returning singleton client instance
@@ -15,15 +19,20 @@ Functions:
 import os
 import logging
 import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
 from datetime import datetime, timedelta
-from typing import Optional, List
-import time
+from operator import attrgetter
+from typing import Any, Optional, List, Dict
 
 # Official alpaca-py SDK imports
 from alpaca.data.historical import StockHistoricalDataClient
 from alpaca.data.requests import StockBarsRequest
 from alpaca.data.timeframe import TimeFrame
 
+from alpaca_client import RAW_BAR_FIELDS, bars_to_frame
+from rate_limiter import get_rate_limiter
+
 # Load environment variables (optional)
 try:
     from dotenv import load_dotenv
@@ -34,6 +43,36 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+# Multi-symbol bars requests are chunked to keep query strings well under URL limits
+MAX_SYMBOLS_PER_REQUEST = 100
+
+# Timestamp, open, high, low, close and volume of an SDK Bar model
+MODEL_BAR_FIELDS = attrgetter('timestamp', 'open', 'high', 'low', 'close', 'volume')
+
+
+class RateLimitedAdapter(HTTPAdapter):
+    """
+    Transport adapter taking a rate-limiter token before every HTTP request.
+    
+    The SDK follows next_page_token (and retries 429s) inside a single
+    get_stock_bars call, so pacing at the call level would let multi-page
+    requests bypass the bucket. Mounted on the SDK's session, this adapter
+    paces each request actually sent and reports its rate-limit headers.
+    
+    Attributes:
+        rate_limiter (TokenBucket): Limiter shared with the other Alpaca clients
+    """
+    
+    def __init__(self, rate_limiter, **kwargs) -> None:
+        self.rate_limiter = rate_limiter
+        super().__init__(**kwargs)
+    
+    def send(self, request, **kwargs):
+        self.rate_limiter.acquire()
+        response = super().send(request, **kwargs)
+        self.rate_limiter.update_from_headers(response.headers)
+        return response
+
 
 class AlpacaSDKClient:
     """
@@ -47,6 +86,7 @@ class AlpacaSDKClient:
         api_key (str): Alpaca API key from environment variables
         secret_key (str): Alpaca secret key from environment variables
         client (StockHistoricalDataClient): Official Alpaca SDK client instance
+        rate_limiter (TokenBucket): Rate limiter shared with the other Alpaca clients
     
     Raises:
         ValueError: If API credentials are not configured in environment variables
@@ -69,11 +109,36 @@ class AlpacaSDKClient:
         if not self.api_key or not self.secret_key:
             raise ValueError("Alpaca API credentials not configured")
         
-        # Initialize the official SDK client
-        self.client = StockHistoricalDataClient(self.api_key, self.secret_key)
+        # Initialize the official SDK client. Raw data mode returns the API's bar
+        # dicts as-is instead of building a pydantic model for every bar.
+        self.client = StockHistoricalDataClient(self.api_key, self.secret_key, raw_data=True)
+        
+        # The SDK pages through results on its own, so every request it sends
+        # takes a token from (and reports its headers to) the shared limiter
+        self.rate_limiter = get_rate_limiter()
+        session = getattr(self.client, '_session', None)
+        self._paces_requests = isinstance(session, requests.Session)
+        if self._paces_requests:
+            adapter = RateLimitedAdapter(self.rate_limiter)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+        else:
+            logger.warning("Alpaca SDK session not found; rate limiting per call, not per page")
         
         logger.info("Alpaca SDK client initialized successfully")
     
+    def _acquire_for_call(self) -> None:
+        """Take one token per SDK call when its requests cannot be paced one by one"""
+        if not self._paces_requests:
+            self.rate_limiter.acquire()
+    
+    @staticmethod
+    def _bars_by_symbol(bars: Any) -> Dict[str, List]:
+        """Return the bars per symbol of a raw-data response or a BarSet"""
+        if isinstance(bars, dict):
+            return bars
+        return bars.data or {}
+    
     def validate_symbol(self, symbol: str) -> bool:
         """Validate stock symbol format"""
         if not symbol or not isinstance(symbol, str):
@@ -123,14 +188,15 @@ class AlpacaSDKClient:
             logger.debug(f"Fetching data for {symbol} from {start_date} to {end_date}")
             
             # Make API request using official SDK
-            bars = self.client.get_stock_bars(request_params)
+            self._acquire_for_call()
+            bars = self._bars_by_symbol(self.client.get_stock_bars(request_params))
             
-            if not bars.data or symbol not in bars.data:
+            if symbol not in bars:
                 logger.warning(f"No bars data returned for symbol: {symbol}")
                 return None
             
             # Convert to DataFrame compatible with yfinance format
-            df = self._convert_to_yfinance_format(bars.data[symbol])
+            df = self._convert_to_yfinance_format(bars[symbol])
             
             if df is None or df.empty:
                 logger.warning(f"Empty dataset for symbol: {symbol}")
@@ -143,12 +209,81 @@ class AlpacaSDKClient:
             logger.error(f"Error fetching data for {symbol}: {str(e)}")
             return None
     
+    def get_stocks_data(self, symbols: List[str], start_date: Optional[str] = None,
+                        end_date: Optional[str] = None) -> Dict[str, pd.DataFrame]:
+        """
+        Fetch stock data for many symbols using multi-symbol bars requests
+        
+        The universe is split into chunks of MAX_SYMBOLS_PER_REQUEST symbols and
+        each chunk is fetched with a single StockBarsRequest. The SDK follows
+        next_page_token until every page of the combined response is read.
+        
+        Args:
+            symbols: List of stock symbols
+            start_date: Start date in 'YYYY-MM-DD' format
+            end_date: End date in 'YYYY-MM-DD' format
+            
+        Returns:
+            Dictionary mapping symbols to yfinance-compatible DataFrames.
+            Symbols that are invalid or returned no bars are omitted.
+        """
+        valid_symbols = []
+        for symbol in symbols:
+            if not self.validate_symbol(symbol):
+                logger.warning(f"Invalid symbol format: {symbol}")
+                continue
+            symbol = symbol.upper().strip()
+            if symbol not in valid_symbols:
+                valid_symbols.append(symbol)
+        
+        # Set default dates if not provided
+        if not start_date:
+            start_date = (datetime.now() - timedelta(days=365)).strftime('%Y-%m-%d')
+        if not end_date:
+            end_date = datetime.now().strftime('%Y-%m-%d')
+        
+        results = {}
+        for i in range(0, len(valid_symbols), MAX_SYMBOLS_PER_REQUEST):
+            chunk = valid_symbols[i:i + MAX_SYMBOLS_PER_REQUEST]
+            try:
+                request_params = StockBarsRequest(
+                    symbol_or_symbols=chunk,
+                    timeframe=TimeFrame.Day,
+                    start=datetime.strptime(start_date, '%Y-%m-%d'),
+                    end=datetime.strptime(end_date, '%Y-%m-%d')
+                )
+                
+                logger.debug(f"Fetching data for {len(chunk)} symbols from {start_date} to {end_date}")
+                
+                self._acquire_for_call()
+                data = self._bars_by_symbol(self.client.get_stock_bars(request_params))
+                
+                # Split the combined response into per-symbol DataFrames
+                for symbol in chunk:
+                    if symbol not in data:
+                        logger.warning(f"No bars data returned for symbol: {symbol}")
+                        continue
+                    
+                    df = self._convert_to_yfinance_format(data[symbol])
+                    if df is None or df.empty:
+                        logger.warning(f"Empty dataset for symbol: {symbol}")
+                        continue
+                    
+                    results[symbol] = df
+                    
+            except Exception as e:
+                logger.error(f"Error fetching data for {len(chunk)} symbols ({chunk[0]}..{chunk[-1]}): {str(e)}")
+                continue
+        
+        logger.info(f"Successfully fetched data for {len(results)}/{len(valid_symbols)} symbols")
+        return results
+    
     def _convert_to_yfinance_format(self, bars: List) -> Optional[pd.DataFrame]:
         """
         Convert Alpaca bars to yfinance-compatible DataFrame format
         
         Args:
-            bars: Bars from Alpaca SDK
+            bars: Raw bar dicts from the SDK's raw data mode, or SDK Bar models
             
         Returns:
             DataFrame with columns: Open, High, Low, Close, Volume
@@ -157,47 +292,9 @@ class AlpacaSDKClient:
             if not bars:
                 return None
             
-            # Extract data from bars
-            data = []
-            for bar in bars:
-                data.append({
-                    'timestamp': bar.timestamp,
-                    'Open': float(bar.open),
-                    'High': float(bar.high),
-                    'Low': float(bar.low),
-                    'Close': float(bar.close),
-                    'Volume': int(bar.volume) if bar.volume else 0
-                })
-            
-            if not data:
-                return None
-            
-            # Create DataFrame
-            df = pd.DataFrame(data)
-            df['timestamp'] = pd.to_datetime(df['timestamp'])
-            df.set_index('timestamp', inplace=True)
-            
-            # Sort by date
-            df = df.sort_index()
-            
-            # Ensure all required columns are present and properly typed
-            required_columns = ['Open', 'High', 'Low', 'Close', 'Volume']
-            for col in required_columns:
-                if col not in df.columns:
-                    logger.error(f"Missing required column: {col}")
-                    return None
-                
-                # Ensure numeric types
-                if col == 'Volume':
-                    df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0).astype(int)
-                else:
-                    df[col] = pd.to_numeric(df[col], errors='coerce')
-            
-            # Remove any rows with NaN values
-            df = df.dropna()
-            
-            if df.empty:
-                logger.warning("DataFrame is empty after cleaning")
+            fields = RAW_BAR_FIELDS if isinstance(bars[0], dict) else MODEL_BAR_FIELDS
+            df = bars_to_frame(bars, fields)
+            if df is None:
                 return None
             
             logger.debug(f"Converted {len(df)} bars to yfinance format")
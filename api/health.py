@@ -1,52 +1,54 @@
 """
 API endpoint for health checks
 """
+import os
 import json
 import logging
 from datetime import datetime
-from alpaca_client_sdk import get_alpaca_client
+from typing import Any, Dict
+from bar_cache import get_bar_cache
+from bar_store import get_bar_store
+from health_probe import get_health_probe
+from lazy_imports import lazy_import
+from signal_matrix import get_signal_matrix
+from universe import load_universe
 
-logger = logging.getLogger(__name__)
+# The SDK and client are only loaded by the background probe, not by the health check itself
+alpaca_client_sdk = lazy_import('alpaca_client_sdk')
 
-def load_symbols():
-    """Load symbols for health check"""
-    import os
-    import csv
-    
-    default_symbols = {
-        'AAPL': {'company': 'Apple Inc.'},
-        'GOOGL': {'company': 'Alphabet Inc.'},
-        'MSFT': {'company': 'Microsoft Corporation'}
-    }
-    
-    try:
-        symbols_file = 'datasets/symbols.csv'
-        if not os.path.exists(symbols_file):
-            return default_symbols
-            
-        stocks = {}
-        with open(symbols_file, 'r', encoding='utf-8') as f:
-            reader = csv.reader(f)
-            for row in reader:
-                if len(row) >= 2 and row[0].strip() and row[1].strip():
-                    symbol = row[0].strip().upper()
-                    company = row[1].strip()
-                    stocks[symbol] = {'company': company}
-                    
-        return stocks if stocks else default_symbols
-        
-    except Exception:
-        return default_symbols
+logger = logging.getLogger(__name__)
 
 def test_alpaca_connection():
     """Test Alpaca API connection"""
     try:
-        client = get_alpaca_client()
+        client = alpaca_client_sdk.get_alpaca_client()
         return client.test_connection()
     except Exception as e:
         logger.error(f"Error testing Alpaca connection: {str(e)}")
         return False
 
+def check_storage() -> Dict[str, Any]:
+    """Report readiness of the bar cache, bar store and signal matrix"""
+    try:
+        store = get_bar_store()
+        bar_store_status = 'ok' if os.access(store.root, os.W_OK) else 'read_only'
+    except Exception as e:
+        logger.warning(f"Bar store unavailable: {str(e)}")
+        bar_store_status = 'unavailable'
+    
+    matrix = get_signal_matrix()
+    if matrix is None:
+        matrix_status = 'missing'
+    else:
+        matrix_status = 'ok' if matrix.is_fresh() else 'stale'
+    
+    return {
+        'bar_cache': get_bar_cache().stats(),
+        'bar_store': bar_store_status,
+        'signal_matrix': matrix_status,
+        'signal_matrix_generated_at': matrix.generated_at if matrix is not None else None
+    }
+
 def handler(request):
     """
     Vercel serverless function handler for health check
@@ -55,18 +57,16 @@ def handler(request):
     if request.method == 'GET':
         try:
             # Check if symbols are available
-            symbols = load_symbols()
-            symbols_status = 'ok' if symbols else 'error'
+            symbols = load_universe()
+            symbols_status = 'ok' if len(symbols) else 'error'
             
-            # Check Alpaca API connection
-            alpaca_status = 'ok'
+            # Check Alpaca API connection from the cached probe, which is
+            # refreshed in the background once its result expires
             try:
-                if test_alpaca_connection():
-                    alpaca_status = 'ok'
-                else:
-                    alpaca_status = 'error'
-            except Exception:
-                alpaca_status = 'error'
+                probe = get_health_probe(test_alpaca_connection).status()
+            except Exception as e:
+                probe = {'status': 'error', 'error': str(e)}
+            alpaca_status = probe['status']
             
             # Check patterns import
             patterns_status = 'ok'
@@ -76,8 +76,11 @@ def handler(request):
             except Exception:
                 patterns_status = 'error'
             
-            # Determine overall status
-            all_ok = symbols_status == 'ok' and alpaca_status == 'ok' and patterns_status == 'ok'
+            # Cache and store readiness; scans fall back to live fetches without them
+            storage = check_storage()
+            
+            # Determine overall status; a first probe still in flight is not a failure
+            all_ok = symbols_status == 'ok' and alpaca_status in ('ok', 'pending') and patterns_status == 'ok'
             overall_status = 'healthy' if all_ok else 'degraded'
             
             return {
@@ -93,10 +96,15 @@ def handler(request):
                     'checks': {
                         'symbols': symbols_status,
                         'alpaca_api': alpaca_status,
-                        'patterns': patterns_status
+                        'patterns': patterns_status,
+                        'bar_store': storage['bar_store'],
+                        'signal_matrix': storage['signal_matrix']
                     },
+                    'alpaca_probe': probe,
+                    'bar_cache': storage['bar_cache'],
                     'metadata': {
                         'symbols_count': len(symbols),
+                        'signal_matrix_generated_at': storage['signal_matrix_generated_at'],
                         'timestamp': datetime.now().isoformat(),
                         'version': '2.0.0-react'
                     }
@@ -0,0 +1,217 @@
+"""
+API endpoint for asynchronous scan jobs - Secured
+
+POST submits a scan over up to MAX_JOB_SYMBOLS symbols and answers at once
+with a job id; the scan runs on the local job runner. GET with ``id`` polls
+the job's progress and the result rows after the ``after`` cursor, or streams
+them as NDJSON with ``stream=1``.
+"""
+import json
+import logging
+import os
+import re
+import time
+import hashlib
+from typing import Dict, Iterator, List
+
+from api.scan import (MAX_REQUEST_SIZE, REQUEST_TIMEOUT, PatternAnalyzer, StockDataManager,
+                      get_security_headers, get_stream_headers, iter_scan_rows, load_symbols,
+                      parse_patterns, scan_matrix, wants_stream)
+from request_limiter import get_request_limiter
+from scan_jobs import ACTIVE_STATUSES, JobStore, get_job_runner, get_job_store
+from signal_matrix import get_signal_matrix
+
+logger = logging.getLogger(__name__)
+
+# Jobs are not bound by the request deadline, so they may cover the whole universe
+MAX_JOB_SYMBOLS = max(1, int(os.getenv('SCAN_JOB_MAX_SYMBOLS', '1000')))
+
+# Result rows returned per poll
+MAX_RESULTS_PER_POLL = 1000
+
+# Streams end before the request deadline; clients reconnect with the last cursor
+STREAM_MAX_SECONDS = max(1, REQUEST_TIMEOUT - 5)
+STREAM_POLL_INTERVAL = 0.5
+
+# Rate limiting: submissions are as expensive as scans, polls are cheap reads
+RATE_LIMIT_WINDOW = 300  # 5 minutes
+MAX_SUBMISSIONS_PER_WINDOW = 10
+MAX_POLLS_PER_WINDOW = 600
+
+JOB_ID_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+
+def scan_job(symbols: List[str], patterns: List[str]) -> Iterator[List[Dict]]:
+    """Scan function executed by the job runner, yielding rows per completed symbol"""
+    stocks = load_symbols()
+    pattern_analyzer = PatternAnalyzer()
+
+    matrix = get_signal_matrix()
+    if matrix is not None and matrix.is_fresh() and matrix.covers(symbols, patterns):
+        for symbol in symbols:
+            yield scan_matrix(matrix, pattern_analyzer, stocks, [symbol], patterns)
+        return
+
+    yield from iter_scan_rows(StockDataManager(), pattern_analyzer, stocks, symbols, patterns)
+
+def error_response(status_code: int, message: str) -> Dict:
+    """Build a JSON error response"""
+    return {
+        'statusCode': status_code,
+        'headers': get_security_headers(),
+        'body': json.dumps({
+            'status': 'error',
+            'message': message
+        })
+    }
+
+def stream_job(store: JobStore, job_id: str, after: int = 0,
+               max_seconds: float = STREAM_MAX_SECONDS,
+               poll_interval: float = STREAM_POLL_INTERVAL) -> Iterator[str]:
+    """
+    Stream a job's result rows as NDJSON lines while it runs
+
+    Emits ``{"type": "result", "seq": cursor, "data": row}`` per row, then a
+    ``{"type": "summary", ...}`` trailer once the job has finished, or a
+    ``{"type": "status", ...}`` line with ``next_cursor`` when ``max_seconds``
+    have passed so the client can resume from there.
+    """
+    deadline = time.monotonic() + max_seconds
+    try:
+        while True:
+            # Read the status first, so rows written before it finished are all sent
+            job = store.get(job_id)
+            while True:
+                rows = store.results(job_id, after, MAX_RESULTS_PER_POLL)
+                for item in rows:
+                    after = item['seq']
+                    yield json.dumps({'type': 'result', 'seq': item['seq'], 'data': item['row']}) + '\n'
+                if len(rows) < MAX_RESULTS_PER_POLL:
+                    break
+
+            if job['status'] not in ACTIVE_STATUSES:
+                yield json.dumps({'type': 'summary', 'data': job, 'next_cursor': after}) + '\n'
+                return
+            if time.monotonic() >= deadline:
+                yield json.dumps({'type': 'status', 'data': job, 'next_cursor': after}) + '\n'
+                return
+            time.sleep(poll_interval)
+
+    except Exception as e:
+        logger.error(f"Error streaming scan job {job_id}: {str(e)}")
+        yield json.dumps({
+            'type': 'error',
+            'message': 'Internal server error',
+            'error_id': hashlib.md5(str(e).encode()).hexdigest()[:8]  # Safe error reference
+        }) + '\n'
+
+def submit_job(request) -> Dict:
+    """Validate a submission and queue its scan"""
+    try:
+        body = json.loads(request.body or '{}')
+        raw_patterns = body.get('patterns') or str(body.get('pattern', ''))
+        symbols_limit = min(int(body.get('limit', MAX_JOB_SYMBOLS)), MAX_JOB_SYMBOLS)
+    except (json.JSONDecodeError, ValueError, TypeError, AttributeError):
+        return error_response(400, 'Invalid request format')
+
+    patterns, error_message = parse_patterns(raw_patterns)
+    if error_message:
+        return error_response(400, error_message)
+    if symbols_limit < 1:
+        return error_response(400, 'Invalid request format')
+
+    symbols = list(load_symbols().keys())[:symbols_limit]
+    job_id = get_job_runner(scan_job).submit(symbols, patterns)
+    if job_id is None:
+        return error_response(503, 'Too many scan jobs in progress. Please try again later.')
+
+    return {
+        'statusCode': 202,
+        'headers': get_security_headers(),
+        'body': json.dumps({
+            'status': 'success',
+            'data': {
+                **get_job_store().get(job_id),
+                'poll_url': f"/api/jobs?id={job_id}"
+            }
+        })
+    }
+
+def poll_job(request) -> Dict:
+    """Report a job's progress and the result rows after the requested cursor"""
+    job_id = str(request.args.get('id', ''))
+    if not JOB_ID_PATTERN.match(job_id):
+        return error_response(400, 'Invalid job id')
+    try:
+        after = max(0, int(request.args.get('after', 0)))
+    except (ValueError, TypeError):
+        return error_response(400, 'Invalid cursor')
+
+    store = get_job_store()
+    job = store.get(job_id)
+    if job is None:
+        return error_response(404, 'Job not found')
+
+    if wants_stream(request, request.args.get('stream', '')):
+        return {
+            'statusCode': 200,
+            'headers': get_stream_headers(),
+            'body': stream_job(store, job_id, after)
+        }
+
+    rows = store.results(job_id, after, MAX_RESULTS_PER_POLL)
+    return {
+        'statusCode': 200,
+        'headers': get_security_headers(),
+        'body': json.dumps({
+            'status': 'success',
+            'data': {
+                **job,
+                'results': [item['row'] for item in rows],
+                'next_cursor': rows[-1]['seq'] if rows else after
+            }
+        })
+    }
+
+def handler(request):
+    """
+    Vercel serverless function handler for scan jobs - Secured
+    """
+    client_ip = getattr(request, 'remote_addr', 'unknown')
+
+    if request.method == 'OPTIONS':
+        return {
+            'statusCode': 200,
+            'headers': get_security_headers(),
+            'body': ''
+        }
+
+    if request.method not in ['GET', 'POST']:
+        return error_response(405, 'Method not allowed')
+
+    if hasattr(request, 'body') and request.body and len(request.body) > MAX_REQUEST_SIZE:
+        return error_response(413, 'Request entity too large')
+
+    if request.method == 'POST':
+        limiter = get_request_limiter('jobs', MAX_SUBMISSIONS_PER_WINDOW, RATE_LIMIT_WINDOW)
+    else:
+        limiter = get_request_limiter('jobs-poll', MAX_POLLS_PER_WINDOW, RATE_LIMIT_WINDOW)
+    if not limiter.allow(client_ip):
+        return error_response(429, 'Rate limit exceeded. Please try again later.')
+
+    try:
+        if request.method == 'POST':
+            return submit_job(request)
+        return poll_job(request)
+
+    except Exception as e:
+        # Log error but don't expose details to client
+        logger.error(f"Error in jobs endpoint: {str(e)}")
+        return {
+            'statusCode': 500,
+            'headers': get_security_headers(),
+            'body': json.dumps({
+                'status': 'error',
+                'message': 'Internal server error',
+                'error_id': hashlib.md5(str(e).encode()).hexdigest()[:8]  # Safe error reference
+            })
+        }
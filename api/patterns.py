@@ -3,34 +3,16 @@ API endpoint for getting available candlestick patterns - Secured
 """
 import json
 from patterns import candlestick_patterns
-import time
+from request_limiter import get_request_limiter
 import hashlib
 
-# Simple rate limiting
-REQUEST_CACHE = {}
+# Rate limiting, counted by request_limiter
 RATE_LIMIT_WINDOW = 60  # 1 minute
 MAX_REQUESTS_PER_WINDOW = 20
 
 def check_rate_limit(client_ip: str) -> bool:
-    """Simple rate limiting for serverless environment"""
-    current_time = time.time()
-    
-    # Clean old entries
-    for ip in list(REQUEST_CACHE.keys()):
-        REQUEST_CACHE[ip] = [req_time for req_time in REQUEST_CACHE[ip] 
-                            if current_time - req_time < RATE_LIMIT_WINDOW]
-        if not REQUEST_CACHE[ip]:
-            del REQUEST_CACHE[ip]
-    
-    # Check current IP
-    if client_ip not in REQUEST_CACHE:
-        REQUEST_CACHE[client_ip] = []
-    
-    if len(REQUEST_CACHE[client_ip]) >= MAX_REQUESTS_PER_WINDOW:
-        return False
-    
-    REQUEST_CACHE[client_ip].append(current_time)
-    return True
+    """Sliding-window rate limit per client, shared across workers when configured"""
+    return get_request_limiter('patterns', MAX_REQUESTS_PER_WINDOW, RATE_LIMIT_WINDOW).allow(client_ip)
 
 def get_security_headers():
     """Get security headers for API responses"""
@@ -1,41 +1,71 @@
 """
 API endpoint for pattern scanning - Secured version
 """
+from __future__ import annotations
+
 import json
 import logging
-import pandas as pd
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Union
+from typing import Dict, Iterator, List, Optional, Tuple, Union
 import os
-import csv
 import re
 import time
 import hashlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 # Import business logic modules
 from patterns import candlestick_patterns
-from alpaca_client_sdk import get_alpaca_client
+from pattern_engine import (CandleFeatures, align_panel, align_tails, detect_pattern, evaluate_patterns,
+                            get_window)
+from bar_store import get_bar_store
+from bar_cache import get_bar_cache
+from signal_matrix import SignalMatrix, get_signal_matrix
+from process_pool import evaluate_sharded
+from request_limiter import get_request_limiter
+from universe import load_universe
+from lazy_imports import lazy_import
+
+# Heavy modules load on first use, so matrix-backed and rejected requests skip them
+pd = lazy_import('pandas')
+alpaca_client_sdk = lazy_import('alpaca_client_sdk')
 
 logger = logging.getLogger(__name__)
 
 # Security constants
-MAX_SYMBOLS_LIMIT = 50  # Maximum symbols to process per request
+MAX_SYMBOLS_LIMIT = 50  # Maximum symbols to process per request; larger scans go through api/jobs
 MAX_REQUEST_SIZE = 1024  # Maximum request body size in bytes
 REQUEST_TIMEOUT = 30  # Request timeout in seconds
 
-# Rate limiting storage (simple in-memory for serverless)
-REQUEST_CACHE = {}
+# Concurrency settings - symbols are fetched and analyzed on a bounded thread pool
+# so upstream I/O for different symbols overlaps. Set to 1 for serial scans.
+SCAN_MAX_WORKERS = max(1, int(os.getenv('SCAN_MAX_WORKERS', '8')))
+
+# Rate limiting, counted by request_limiter
 RATE_LIMIT_WINDOW = 300  # 5 minutes
 MAX_REQUESTS_PER_WINDOW = 10
 
+def map_bounded(func, items: List, max_workers: Optional[int] = None, thread_name_prefix: str = 'fetch') -> List:
+    """Apply ``func`` to every item on a thread pool of up to SCAN_MAX_WORKERS threads, keeping input order"""
+    workers = max(1, min(max_workers or SCAN_MAX_WORKERS, len(items)))
+    if workers == 1:
+        return [func(item) for item in items]
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix=thread_name_prefix) as executor:
+        return list(executor.map(func, items))
+
 class StockDataManager:
     """Manages stock data operations"""
     
     def __init__(self):
-        self._cache = {}
-        self._alpaca_client = get_alpaca_client()
+        # Process-level cache, so warm instances reuse bars fetched by earlier requests
+        self._cache = get_bar_cache()
+        self._alpaca_client = None  # Created on first fetch, see alpaca_client
         self._use_alpaca = True
         self._use_yfinance_fallback = True
+        self._bar_store = None
+        try:
+            self._bar_store = get_bar_store()
+        except Exception as e:
+            logger.warning(f"Bar store unavailable, fetching full history: {str(e)}")
 
     def validate_symbol(self, symbol: str) -> bool:
         """Validate stock symbol format"""
@@ -58,11 +88,40 @@ class StockDataManager:
         if not end_date:
             end_date = datetime.now().strftime('%Y-%m-%d')
         
+        symbol = symbol.strip().upper()
+        cache_key = (symbol, start_date, end_date, self.data_source)
+        data = self._cache.get(cache_key)
+        if data is not None:
+            return data
+        
+        if self._bar_store is not None:
+            data = self._get_stored_data([symbol], start_date, end_date).get(symbol)
+        else:
+            data = self._fetch_stock_data(symbol, start_date, end_date)
+        
+        if data is not None:
+            self._cache.put(cache_key, data)
+        return data
+
+    @property
+    def alpaca_client(self):
+        """Alpaca client, created when bars are first fetched upstream"""
+        if self._alpaca_client is None:
+            self._alpaca_client = alpaca_client_sdk.get_alpaca_client()
+        return self._alpaca_client
+
+    @property
+    def data_source(self) -> str:
+        """Name of the primary data source, part of every cache key"""
+        return 'alpaca' if self._use_alpaca else 'yfinance'
+
+    def _fetch_stock_data(self, symbol: str, start_date: str, end_date: str) -> Optional[pd.DataFrame]:
+        """Fetch stock data from Alpaca with yfinance fallback"""
         # Try Alpaca API first
         if self._use_alpaca:
             try:
                 logger.debug(f"Fetching data for {symbol} from Alpaca API")
-                data = self._alpaca_client.get_stock_data(symbol, start_date, end_date)
+                data = self.alpaca_client.get_stock_data(symbol, start_date, end_date)
                 if data is not None and not data.empty:
                     logger.info(f"Successfully fetched {len(data)} records for {symbol} from Alpaca")
                     return data
@@ -73,19 +132,142 @@ class StockDataManager:
         
         # Fallback to yfinance if available
         if self._use_yfinance_fallback:
+            data = self._get_yfinance_data(symbol, start_date, end_date)
+            if data is not None:
+                return data
+        
+        logger.error(f"Failed to fetch data for {symbol} from all sources")
+        return None
+
+    def get_stocks_data(self, symbols: List[str], start_date: Optional[str] = None,
+                        end_date: Optional[str] = None) -> Dict[str, pd.DataFrame]:
+        """Fetch stock data for many symbols, batching Alpaca requests"""
+        symbols = [symbol.strip().upper() for symbol in symbols if self.validate_symbol(symbol)]
+        
+        if not start_date:
+            start_date = (datetime.now() - timedelta(days=365)).strftime('%Y-%m-%d')
+        if not end_date:
+            end_date = datetime.now().strftime('%Y-%m-%d')
+        
+        results = {}
+        missing = []
+        for symbol in symbols:
+            data = self._cache.get((symbol, start_date, end_date, self.data_source))
+            if data is not None:
+                results[symbol] = data
+            else:
+                missing.append(symbol)
+        
+        if missing:
+            if self._bar_store is not None:
+                fetched = self._get_stored_data(missing, start_date, end_date)
+            else:
+                fetched = self._fetch_stocks_data(missing, start_date, end_date)
+            
+            for symbol, data in fetched.items():
+                self._cache.put((symbol, start_date, end_date, self.data_source), data)
+            results.update(fetched)
+        
+        # Keep the requested symbol order
+        return {symbol: results[symbol] for symbol in symbols if symbol in results}
+
+    def _fetch_stocks_data(self, symbols: List[str], start_date: str, end_date: str) -> Dict[str, pd.DataFrame]:
+        """Fetch stock data for many symbols from Alpaca with yfinance fallback"""
+        results = {}
+        
+        # Try Alpaca API first with multi-symbol requests
+        if self._use_alpaca and symbols:
             try:
-                import yfinance as yf
-                logger.debug(f"Falling back to yfinance for {symbol}")
-                data = yf.download(symbol, start=start_date, end=end_date, progress=False)
-                if data is not None and not data.empty:
-                    logger.info(f"Successfully fetched {len(data)} records for {symbol} from yfinance fallback")
-                    return data
-                else:
-                    logger.warning(f"No data returned from yfinance for symbol: {symbol}")
+                logger.debug(f"Fetching data for {len(symbols)} symbols from Alpaca API")
+                results = self.alpaca_client.get_stocks_data(symbols, start_date, end_date)
             except Exception as e:
-                logger.error(f"Error downloading data from yfinance for {symbol}: {str(e)}")
+                logger.error(f"Error fetching bulk data from Alpaca: {str(e)}")
         
-        logger.error(f"Failed to fetch data for {symbol} from all sources")
+        # Fallback to yfinance, one download per symbol Alpaca did not return, overlapped
+        if self._use_yfinance_fallback:
+            remaining = [symbol for symbol in symbols if symbol not in results]
+            downloads = map_bounded(lambda symbol: self._get_yfinance_data(symbol, start_date, end_date), remaining)
+            for symbol, data in zip(remaining, downloads):
+                if data is not None:
+                    results[symbol] = data
+        
+        missing = len(symbols) - len(results)
+        if missing:
+            logger.warning(f"Failed to fetch data for {missing}/{len(symbols)} symbols from all sources")
+        return results
+
+    def _get_stored_data(self, symbols: List[str], start_date: str, end_date: str) -> Dict[str, pd.DataFrame]:
+        """
+        Serve bars from the local bar store, fetching only what is missing
+        
+        Symbols are grouped by the date their fetch has to start from, so the
+        trailing deltas for a whole universe synced on the same day go out as
+        one batched request. Groups, and the per-symbol store reads and
+        writes, run on the SCAN_MAX_WORKERS thread pool; each symbol has its
+        own store file.
+        """
+        groups = {}
+        syncs = map_bounded(lambda symbol: self._bar_store.sync_range(symbol, start_date, end_date), symbols)
+        for symbol, sync in zip(symbols, syncs):
+            if sync is not None:
+                groups.setdefault(sync, []).append(symbol)
+        
+        def fetch_group(item) -> Dict[str, pd.DataFrame]:
+            (fetch_start, is_delta), group = item
+            if len(group) == 1:
+                data = self._fetch_stock_data(group[0], fetch_start, end_date)
+                group_data = {group[0]: data} if data is not None else {}
+            else:
+                group_data = self._fetch_stocks_data(group, fetch_start, end_date)
+            
+            full = {}
+            for symbol in group:
+                data = group_data.get(symbol)
+                # Nothing is recorded on failure so the range is retried next time
+                if data is None:
+                    continue
+                if not is_delta:
+                    full[symbol] = data
+                try:
+                    self._bar_store.update(symbol, data, fetch_start, end_date, is_delta)
+                except Exception as e:
+                    logger.warning(f"Could not update bar store for {symbol}: {str(e)}")
+            return full
+        
+        # Full fetches stay usable even if the store cannot be written
+        fetched = {}
+        for full in map_bounded(fetch_group, list(groups.items())):
+            fetched.update(full)
+        
+        def read_symbol(symbol: str) -> Optional[pd.DataFrame]:
+            data = None
+            try:
+                data = self._bar_store.read(symbol, start_date, end_date)
+            except Exception as e:
+                logger.warning(f"Could not read bar store for {symbol}: {str(e)}")
+            if data is None:
+                data = fetched.get(symbol)
+            return data
+        
+        results = {}
+        for symbol, data in zip(symbols, map_bounded(read_symbol, symbols)):
+            if data is not None and not data.empty:
+                results[symbol] = data
+        return results
+
+    def _get_yfinance_data(self, symbol: str, start_date: str, end_date: str) -> Optional[pd.DataFrame]:
+        """Fetch stock data from yfinance, returning None when unavailable"""
+        try:
+            import yfinance as yf
+            logger.debug(f"Falling back to yfinance for {symbol}")
+            data = yf.download(symbol, start=start_date, end=end_date, progress=False)
+            if data is not None and not data.empty:
+                logger.info(f"Successfully fetched {len(data)} records for {symbol} from yfinance fallback")
+                return data
+            else:
+                logger.warning(f"No data returned from yfinance for symbol: {symbol}")
+        except Exception as e:
+            logger.error(f"Error downloading data from yfinance for {symbol}: {str(e)}")
         return None
 
 class PatternAnalyzer:
@@ -93,28 +275,15 @@ class PatternAnalyzer:
     
     @staticmethod
     def process_pattern(df: pd.DataFrame, pattern: str) -> Optional[pd.Series]:
-        """Process a single pattern"""
+        """Process a single pattern with the native NumPy pattern engine"""
         try:
-            # Import pandas_ta here to avoid import at module level
-            import pandas_ta as ta
-            
-            # Convert pattern name to pandas-ta format (e.g., CDLDOJI -> cdl_doji)
-            pattern_name = pattern.replace('CDL', 'cdl_').lower()
-            
-            # Get the pattern function from pandas-ta
-            pattern_func = getattr(ta, pattern_name, None)
-            if pattern_func:
-                result = pattern_func(df['Open'], df['High'], df['Low'], df['Close'])
-                # If TA-Lib is not installed, pandas_ta returns None
-                if result is None:
-                    logger.warning(f"Pattern detection requires TA-Lib installation: {pattern}")
-                    # Return a Series of zeros as fallback
-                    return pd.Series([0] * len(df), index=df.index)
-                return result
-            else:
-                logger.warning(f"Pattern function not found: {pattern_name}")
-                # Return a Series of zeros as fallback
-                return pd.Series([0] * len(df), index=df.index)
+            result = detect_pattern(df['Open'].to_numpy(), df['High'].to_numpy(),
+                                    df['Low'].to_numpy(), df['Close'].to_numpy(), pattern)
+            return pd.Series(result, index=df.index, name=pattern)
+        except ValueError:
+            logger.warning(f"Pattern function not found: {pattern}")
+            # Return a Series of zeros as fallback
+            return pd.Series([0] * len(df), index=df.index)
         except Exception as e:
             logger.error(f"Error processing pattern {pattern}: {str(e)}")
             # Return a Series of zeros as fallback
@@ -122,20 +291,90 @@ class PatternAnalyzer:
 
     @staticmethod
     def batch_process_patterns(df: pd.DataFrame, patterns: List[str]) -> Dict[str, pd.Series]:
-        """Process multiple patterns in batch"""
+        """Process multiple patterns in batch, computing candle features once"""
         results = {}
         
         # Check for minimum data requirements
         if len(df) < 5:
             logger.warning(f"Insufficient data for pattern analysis: {len(df)} candles (minimum 5 required)")
             return results
+        
+        try:
+            features = CandleFeatures(df['Open'].to_numpy(), df['High'].to_numpy(),
+                                      df['Low'].to_numpy(), df['Close'].to_numpy())
+            signals = evaluate_patterns(features, patterns)
+        except Exception as e:
+            logger.error(f"Error processing patterns: {str(e)}")
+            signals = {}
             
         for pattern in patterns:
-            result = PatternAnalyzer.process_pattern(df, pattern)
-            if result is not None:
-                results[pattern] = result
+            if pattern in signals:
+                results[pattern] = pd.Series(signals[pattern], index=df.index, name=pattern)
+            else:
+                # Return a Series of zeros as fallback
+                results[pattern] = pd.Series([0] * len(df), index=df.index)
         return results
 
+    @staticmethod
+    def process_panel(frames: Dict[str, pd.DataFrame], pattern: str) -> Optional[pd.DataFrame]:
+        """
+        Process a pattern for many symbols in one vectorized pass
+        
+        The symbols' bars are aligned into a (symbols x days) panel and the
+        pattern is evaluated on the whole panel at once. Each row holds the
+        same values as ``process_pattern`` on that symbol alone, with 0 on days
+        the symbol has no bar.
+        
+        Returns:
+            DataFrame of signals indexed by symbol with one column per date,
+            or None if the pattern could not be processed
+        """
+        return PatternAnalyzer.process_panel_patterns(frames, [pattern]).get(pattern)
+
+    @staticmethod
+    def process_panel_patterns(frames: Dict[str, pd.DataFrame], patterns: List[str]) -> Dict[str, pd.DataFrame]:
+        """
+        Process multiple patterns for many symbols in one vectorized pass
+        
+        Candle features of the aligned panel are computed once and shared by
+        every pattern. Large panels are sharded across worker processes when
+        PATTERN_PROCESS_WORKERS is set.
+        
+        Returns:
+            Dictionary mapping each processed pattern to its signal DataFrame
+            indexed by symbol with one column per date; unknown patterns are
+            left out
+        """
+        try:
+            symbols, dates, ohlc = align_panel(frames)
+            signals = evaluate_sharded(ohlc, patterns)
+            return {pattern: pd.DataFrame(result, index=symbols, columns=dates)
+                    for pattern, result in signals.items()}
+        except Exception as e:
+            logger.error(f"Error processing pattern panel: {str(e)}")
+        return {}
+
+    @staticmethod
+    def process_latest(frames: Dict[str, pd.DataFrame], patterns: List[str]) -> Optional[pd.DataFrame]:
+        """
+        Process patterns on each symbol's latest bar only
+        
+        Only the trailing bars the patterns' definitions and averages need are
+        evaluated, so the cost no longer grows with the length of history.
+        Values equal the last bar of ``batch_process_patterns``.
+        
+        Returns:
+            DataFrame of latest signals indexed by symbol with one column per
+            processed pattern, or None if the patterns could not be processed
+        """
+        try:
+            symbols, ohlc = align_tails(frames, get_window(patterns))
+            signals = {pattern: result[:, -1] for pattern, result in evaluate_sharded(ohlc, patterns, days=1).items()}
+            return pd.DataFrame(signals, index=symbols, columns=[p for p in patterns if p in signals])
+        except Exception as e:
+            logger.error(f"Error processing latest patterns: {str(e)}")
+        return None
+
     @staticmethod
     def get_pattern_signal(result: float) -> Optional[str]:
         """Get pattern signal based on result value"""
@@ -146,47 +385,8 @@ class PatternAnalyzer:
         return None
 
 def load_symbols() -> Dict[str, Dict[str, str]]:
-    """Load stock symbols from CSV file with fallback"""
-    stocks = {}
-    
-    # Default symbols if file is not available
-    default_symbols = {
-        'AAPL': {'company': 'Apple Inc.'},
-        'GOOGL': {'company': 'Alphabet Inc.'},
-        'MSFT': {'company': 'Microsoft Corporation'},
-        'AMZN': {'company': 'Amazon.com Inc.'},
-        'TSLA': {'company': 'Tesla Inc.'},
-        'META': {'company': 'Meta Platforms Inc.'},
-        'NVDA': {'company': 'NVIDIA Corporation'},
-        'NFLX': {'company': 'Netflix Inc.'},
-        'SPY': {'company': 'SPDR S&P 500 ETF'},
-        'QQQ': {'company': 'Invesco QQQ Trust'}
-    }
-    
-    try:
-        symbols_file = 'datasets/symbols.csv'
-        if not os.path.exists(symbols_file):
-            logger.warning(f"Symbols file not found: {symbols_file} - using default symbols")
-            return default_symbols
-            
-        with open(symbols_file, 'r', encoding='utf-8') as f:
-            reader = csv.reader(f)
-            for row_num, row in enumerate(reader, 1):
-                try:
-                    if len(row) >= 2 and row[0].strip() and row[1].strip():
-                        symbol = row[0].strip().upper()
-                        company = row[1].strip()
-                        stocks[symbol] = {'company': company}
-                except Exception as e:
-                    logger.warning(f"Error processing row {row_num} in symbols file: {str(e)}")
-                    continue
-                    
-        logger.info(f"Loaded {len(stocks)} symbols from file")
-        return stocks if stocks else default_symbols
-        
-    except Exception as e:
-        logger.warning(f"Error loading symbols file: {str(e)} - using default symbols")
-        return default_symbols
+    """Load stock symbols from the shared universe"""
+    return load_universe().as_dict()
 
 def validate_request_size(request) -> bool:
     """Validate request size to prevent DoS attacks"""
@@ -196,25 +396,8 @@ def validate_request_size(request) -> bool:
     return True
 
 def check_rate_limit(client_ip: str) -> bool:
-    """Simple rate limiting for serverless environment"""
-    current_time = time.time()
-    
-    # Clean old entries
-    for ip in list(REQUEST_CACHE.keys()):
-        REQUEST_CACHE[ip] = [req_time for req_time in REQUEST_CACHE[ip] 
-                            if current_time - req_time < RATE_LIMIT_WINDOW]
-        if not REQUEST_CACHE[ip]:
-            del REQUEST_CACHE[ip]
-    
-    # Check current IP
-    if client_ip not in REQUEST_CACHE:
-        REQUEST_CACHE[client_ip] = []
-    
-    if len(REQUEST_CACHE[client_ip]) >= MAX_REQUESTS_PER_WINDOW:
-        return False
-    
-    REQUEST_CACHE[client_ip].append(current_time)
-    return True
+    """Sliding-window rate limit per client, shared across workers when configured"""
+    return get_request_limiter('scan', MAX_REQUESTS_PER_WINDOW, RATE_LIMIT_WINDOW).allow(client_ip)
 
 def get_security_headers():
     """Get security headers for API responses"""
@@ -232,6 +415,25 @@ def get_security_headers():
         'Access-Control-Allow-Headers': 'Content-Type, X-Requested-With'
     }
 
+def get_stream_headers():
+    """Get headers for streamed NDJSON scan responses"""
+    return {
+        **get_security_headers(),
+        'Content-Type': 'application/x-ndjson',
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'  # Ask proxies not to buffer the stream
+    }
+
+def wants_stream(request, flag) -> bool:
+    """Check whether the client asked for a streamed NDJSON response"""
+    if str(flag).strip().lower() in ('1', 'true', 'yes', 'ndjson'):
+        return True
+    try:
+        accept = str(request.headers.get('Accept', ''))
+    except Exception:
+        accept = ''
+    return 'application/x-ndjson' in accept
+
 def sanitize_string(input_str: str, max_length: int = 100) -> str:
     """Sanitize string input to prevent XSS"""
     if not isinstance(input_str, str):
@@ -247,9 +449,233 @@ def sanitize_string(input_str: str, max_length: int = 100) -> str:
     
     return sanitized
 
+def format_bar_date(df: pd.DataFrame) -> str:
+    """Format the date of a symbol's latest bar"""
+    return df.index[-1].strftime('%Y-%m-%d') if hasattr(df.index[-1], 'strftime') else str(df.index[-1])[:10]
+
+def build_result_row(symbol: str, company: str, pattern: str, signal: str, value: float,
+                     date: str) -> Dict:
+    """Build the sanitized result row reported for a symbol's latest bar"""
+    return {
+        'symbol': sanitize_string(symbol, 10),
+        'company': sanitize_string(company, 100),
+        'pattern': sanitize_string(pattern, 20),
+        'signal': sanitize_string(signal, 10),
+        'value': round(float(value), 4),  # Limit precision
+        'date': date
+    }
+
+def scan_panel(pattern_analyzer: PatternAnalyzer, stocks: Dict[str, Dict[str, str]],
+               symbols: List[str], patterns: List[str], frames: Dict[str, pd.DataFrame]) -> List[Dict]:
+    """
+    Scan pre-fetched symbols for patterns with a single panel evaluation
+    
+    Symbols with missing, malformed or too little data are skipped, each
+    symbol is judged on its own latest bar (the last value of
+    ``batch_process_patterns`` on its bars), and results are ordered by
+    ``symbols`` and then by ``patterns``. Only the trailing bars the patterns
+    need are evaluated, and candle features are computed once for all
+    requested patterns.
+    """
+    required_columns = ['Open', 'High', 'Low', 'Close']
+    usable = {}
+    for symbol in symbols:
+        df = frames.get(symbol)
+        if df is None or df.empty:
+            continue
+        if not all(col in df.columns for col in required_columns):
+            logger.warning(f"Invalid data format for {symbol}")
+            continue
+        if len(df) < 5:  # Need minimum data for pattern analysis
+            continue
+        usable[symbol] = df
+    
+    if not usable:
+        return []
+    
+    latest = pattern_analyzer.process_latest(usable, patterns)
+    if latest is None:
+        return []
+    
+    results = []
+    for symbol, df in usable.items():
+        try:
+            company = stocks.get(symbol, {}).get('company', '')
+            for pattern in latest.columns:
+                last_value = latest.at[symbol, pattern]
+                signal = pattern_analyzer.get_pattern_signal(last_value)
+                if signal:
+                    results.append(build_result_row(symbol, company, pattern, signal, last_value,
+                                                    format_bar_date(df)))
+        except Exception as e:
+            logger.error(f'Failed to process {symbol}: {str(e)}')
+    
+    return results
+
+def scan_matrix(matrix: SignalMatrix, pattern_analyzer: PatternAnalyzer,
+                stocks: Dict[str, Dict[str, str]], symbols: List[str], patterns: List[str]) -> List[Dict]:
+    """
+    Answer a scan from the materialized signal matrix
+    
+    Returns the same rows as ``scan_panel`` on the data the matrix was built
+    from, without fetching bars or evaluating patterns.
+    """
+    results = []
+    for symbol, pattern, value, date in matrix.latest(symbols, patterns):
+        signal = pattern_analyzer.get_pattern_signal(value)
+        if signal:
+            company = stocks.get(symbol, {}).get('company', '')
+            results.append(build_result_row(symbol, company, pattern, signal, value, date))
+    return results
+
+def iter_scan_rows(stock_manager: StockDataManager, pattern_analyzer: PatternAnalyzer,
+                   stocks: Dict[str, Dict[str, str]], symbols: List[str], patterns: List[str],
+                   max_workers: int = SCAN_MAX_WORKERS) -> Iterator[List[Dict]]:
+    """
+    Fetch and scan symbols on a bounded thread pool, yielding as each finishes
+    
+    Yields one list of result rows per symbol, in completion order, with the
+    same rows ``scan_panel`` reports for that symbol (empty when it has no
+    signal or failed). Symbols not yet started are cancelled if the consumer
+    stops early.
+    """
+    def scan_one(symbol: str) -> List[Dict]:
+        df = stock_manager.get_stock_data(symbol)
+        if df is None:
+            return []
+        return scan_panel(pattern_analyzer, stocks, [symbol], patterns, {symbol: df})
+    
+    workers = max(1, min(max_workers, len(symbols)))
+    if workers == 1:
+        for symbol in symbols:
+            try:
+                yield scan_one(symbol)
+            except Exception as e:
+                logger.error(f'Failed to process {symbol}: {str(e)}')
+                yield []
+        return
+    
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='scan')
+    try:
+        futures = {executor.submit(scan_one, symbol): symbol for symbol in symbols}
+        for future in as_completed(futures):
+            try:
+                yield future.result()
+            except Exception as e:
+                logger.error(f'Failed to process {futures[future]}: {str(e)}')
+                yield []
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+def stream_scan(pattern_analyzer: PatternAnalyzer, stocks: Dict[str, Dict[str, str]],
+                symbols: List[str], patterns: List[str]) -> Iterator[str]:
+    """
+    Stream a scan as NDJSON lines
+    
+    Emits ``{"type": "result", "data": row}`` for every result row as soon as
+    its symbol has been analyzed, then one ``{"type": "summary", ...}`` trailer
+    with counts and timings. Failures after the stream started are reported
+    as a final ``{"type": "error", ...}`` line.
+    """
+    start = time.perf_counter()
+    first_result_ms = None
+    processed_count = 0
+    matched_symbols = set()
+    scanned_symbols = 0
+    
+    try:
+        matrix = get_signal_matrix()
+        if matrix is not None and matrix.is_fresh() and matrix.covers(symbols, patterns):
+            source = 'matrix'
+            batches = [scan_matrix(matrix, pattern_analyzer, stocks, symbols, patterns)]
+            scanned_symbols = len(symbols)
+        else:
+            source = 'live'
+            batches = iter_scan_rows(StockDataManager(), pattern_analyzer, stocks, symbols, patterns)
+        
+        for rows in batches:
+            if source == 'live':
+                scanned_symbols += 1
+            for row in rows:
+                if first_result_ms is None:
+                    first_result_ms = round((time.perf_counter() - start) * 1000, 1)
+                processed_count += 1
+                matched_symbols.add(row['symbol'])
+                yield json.dumps({'type': 'result', 'data': row}) + '\n'
+        
+        if source == 'live':
+            logger.info(f"Bar cache stats: {get_bar_cache().stats()}")
+        
+        yield json.dumps({
+            'type': 'summary',
+            'data': {
+                'patterns': [
+                    {'pattern': pattern, 'pattern_name': sanitize_string(candlestick_patterns[pattern], 100)}
+                    for pattern in patterns
+                ],
+                'processed_count': processed_count,
+                'matched_symbols': len(matched_symbols),
+                'scanned_symbols': scanned_symbols,
+                'total_symbols': min(len(stocks), 1000),  # Limit exposure
+                'source': source,
+                'first_result_ms': first_result_ms,
+                'elapsed_ms': round((time.perf_counter() - start) * 1000, 1),
+                'request_timestamp': datetime.now().isoformat()[:19]  # No microseconds
+            }
+        }) + '\n'
+        
+    except Exception as e:
+        logger.error(f"Error in streamed scan: {str(e)}")
+        yield json.dumps({
+            'type': 'error',
+            'message': 'Internal server error',
+            'error_id': hashlib.md5(str(e).encode()).hexdigest()[:8]  # Safe error reference
+        }) + '\n'
+
+def parse_patterns(raw) -> Tuple[List[str], Optional[str]]:
+    """
+    Parse the requested patterns from a request parameter
+    
+    Accepts a single pattern name, a comma-separated string or a list of
+    names, or "all" for every supported pattern. Duplicates are dropped and
+    request order is kept.
+    
+    Returns:
+        Tuple of (patterns, error message); the error is None when valid
+    """
+    if isinstance(raw, str):
+        raw = raw.split(',')
+    if not isinstance(raw, list):
+        return [], 'Invalid request format'
+    
+    names = [sanitize_string(str(name), 20) for name in raw]
+    names = [name for name in names if name]
+    if not names:
+        return [], 'Pattern parameter is required'
+    
+    if len(names) == 1 and names[0].lower() == 'all':
+        return list(candlestick_patterns), None
+    
+    if len(names) > len(candlestick_patterns):
+        return [], 'Too many patterns requested'
+    
+    patterns = []
+    for name in names:
+        if len(name) > 20 or not re.match(r'^[A-Z0-9_]+$', name):
+            return [], 'Invalid pattern format'
+        if name not in candlestick_patterns:
+            return [], 'Invalid pattern specified'
+        if name not in patterns:
+            patterns.append(name)
+    
+    return patterns, None
+
 def handler(request):
     """
     Vercel serverless function handler for pattern scanning - Secured
+    
+    With ``stream=1`` (or ``Accept: application/x-ndjson``) results are sent as
+    NDJSON lines while symbols are being scanned; see ``stream_scan``.
     """
     # Get client IP for rate limiting
     client_ip = getattr(request, 'remote_addr', 'unknown')
@@ -294,9 +720,12 @@ def handler(request):
         }
     
     try:
-        # Get pattern from query params or request body with validation
+        # Get patterns from query params or request body with validation.
+        # ``patterns`` takes a list (or comma-separated names, or "all");
+        # ``pattern`` still accepts a single name.
         if request.method == 'GET':
-            pattern = sanitize_string(request.args.get('pattern', '').strip(), 20)
+            raw_patterns = request.args.get('patterns') or request.args.get('pattern', '')
+            stream = wants_stream(request, request.args.get('stream', ''))
             try:
                 symbols_limit = min(int(request.args.get('limit', 10)), MAX_SYMBOLS_LIMIT)
             except (ValueError, TypeError):
@@ -304,7 +733,8 @@ def handler(request):
         else:  # POST
             try:
                 body = json.loads(request.body or '{}')
-                pattern = sanitize_string(str(body.get('pattern', '')).strip(), 20)
+                raw_patterns = body.get('patterns') or str(body.get('pattern', ''))
+                stream = wants_stream(request, body.get('stream', ''))
                 symbols_limit = min(int(body.get('limit', 10)), MAX_SYMBOLS_LIMIT)
             except (json.JSONDecodeError, ValueError, TypeError) as e:
                 return {
@@ -316,85 +746,46 @@ def handler(request):
                     })
                 }
         
-        # Validate pattern with enhanced security
-        if not pattern:
-            return {
-                'statusCode': 400,
-                'headers': get_security_headers(),
-                'body': json.dumps({
-                    'status': 'error',
-                    'message': 'Pattern parameter is required'
-                })
-            }
-        
-        # Additional pattern validation
-        if len(pattern) > 20 or not re.match(r'^[A-Z0-9_]+$', pattern):
+        # Validate patterns with enhanced security
+        patterns, error_message = parse_patterns(raw_patterns)
+        if error_message:
             return {
                 'statusCode': 400,
                 'headers': get_security_headers(),
                 'body': json.dumps({
                     'status': 'error',
-                    'message': 'Invalid pattern format'
+                    'message': error_message
                 })
             }
         
-        if pattern not in candlestick_patterns:
-            return {
-                'statusCode': 400,
-                'headers': get_security_headers(),
-                'body': json.dumps({
-                    'status': 'error',
-                    'message': 'Invalid pattern specified'
-                })
-            }
-        
-        # Initialize managers
-        stock_manager = StockDataManager()
         pattern_analyzer = PatternAnalyzer()
         
         # Load symbols
         stocks = load_symbols()
+        symbols = list(stocks.keys())[:symbols_limit]
         
-        # Scan for pattern
-        results = []
-        processed_count = 0
+        # Streamed responses carry an iterator of NDJSON lines as their body
+        if stream:
+            return {
+                'statusCode': 200,
+                'headers': get_stream_headers(),
+                'body': stream_scan(pattern_analyzer, stocks, symbols, patterns)
+            }
         
-        for symbol in list(stocks.keys())[:symbols_limit]:
-            try:
-                # Get stock data
-                df = stock_manager.get_stock_data(symbol)
-                
-                if df is None or df.empty:
-                    continue
-                
-                # Validate dataframe structure
-                required_columns = ['Open', 'High', 'Low', 'Close']
-                if not all(col in df.columns for col in required_columns):
-                    logger.warning(f"Invalid data format for {symbol}")
-                    continue
-                    
-                if len(df) < 5:  # Need minimum data for pattern analysis
-                    continue
-                    
-                # Process pattern
-                pattern_results = pattern_analyzer.batch_process_patterns(df, [pattern])
-                if pattern in pattern_results and not pattern_results[pattern].empty:
-                    last_value = pattern_results[pattern].iloc[-1]
-                    signal = pattern_analyzer.get_pattern_signal(last_value)
-                    
-                    if signal:  # Only include symbols with actual signals
-                        results.append({
-                            'symbol': sanitize_string(symbol, 10),
-                            'company': sanitize_string(stocks[symbol].get('company', ''), 100),
-                            'signal': sanitize_string(signal, 10),
-                            'value': round(float(last_value), 4),  # Limit precision
-                            'date': df.index[-1].strftime('%Y-%m-%d') if hasattr(df.index[-1], 'strftime') else str(df.index[-1])[:10]
-                        })
-                        processed_count += 1
-                        
-            except Exception as e:
-                logger.error(f'Failed to process {symbol}: {str(e)}')
-                continue
+        # Serve from the materialized signal matrix when it is current
+        matrix = get_signal_matrix()
+        if matrix is not None and matrix.is_fresh() and matrix.covers(symbols, patterns):
+            results = scan_matrix(matrix, pattern_analyzer, stocks, symbols, patterns)
+        else:
+            stock_manager = StockDataManager()
+            
+            # Fetch bars for the whole batch up front with multi-symbol requests
+            prefetched = stock_manager.get_stocks_data(symbols)
+            
+            # Scan for all requested patterns across the whole batch in one panel evaluation
+            results = scan_panel(pattern_analyzer, stocks, symbols, patterns, prefetched)
+            logger.info(f"Bar cache stats: {get_bar_cache().stats()}")
+        processed_count = len(results)
         
         return {
             'statusCode': 200,
@@ -402,8 +793,12 @@ def handler(request):
             'body': json.dumps({
                 'status': 'success',
                 'data': {
-                    'pattern': sanitize_string(pattern, 20),
-                    'pattern_name': sanitize_string(candlestick_patterns.get(pattern, ''), 100),
+                    'pattern': sanitize_string(patterns[0], 20) if len(patterns) == 1 else None,
+                    'pattern_name': sanitize_string(candlestick_patterns.get(patterns[0], ''), 100) if len(patterns) == 1 else None,
+                    'patterns': [
+                        {'pattern': pattern, 'pattern_name': sanitize_string(candlestick_patterns[pattern], 100)}
+                        for pattern in patterns
+                    ],
                     'results': results,
                     'processed_count': processed_count,
                     'total_symbols': min(len(stocks), 1000),  # Limit exposure
@@ -2,60 +2,11 @@
 API endpoint for getting stock symbols - Secured
 """
 import json
-import os
-import csv
 import logging
+from universe import load_universe
 
 logger = logging.getLogger(__name__)
 
-def load_symbols():
-    """Load stock symbols from CSV file with fallback"""
-    stocks = {}
-    
-    # Default symbols if file is not available
-    default_symbols = {
-        'AAPL': {'company': 'Apple Inc.'},
-        'GOOGL': {'company': 'Alphabet Inc.'},
-        'MSFT': {'company': 'Microsoft Corporation'},
-        'AMZN': {'company': 'Amazon.com Inc.'},
-        'TSLA': {'company': 'Tesla Inc.'},
-        'META': {'company': 'Meta Platforms Inc.'},
-        'NVDA': {'company': 'NVIDIA Corporation'},
-        'NFLX': {'company': 'Netflix Inc.'},
-        'SPY': {'company': 'SPDR S&P 500 ETF'},
-        'QQQ': {'company': 'Invesco QQQ Trust'},
-        'VTI': {'company': 'Vanguard Total Stock Market ETF'},
-        'IWM': {'company': 'iShares Russell 2000 ETF'},
-        'GLD': {'company': 'SPDR Gold Shares'},
-        'TLT': {'company': 'iShares 20+ Year Treasury Bond ETF'},
-        'XLE': {'company': 'Energy Select Sector SPDR Fund'}
-    }
-    
-    try:
-        symbols_file = 'datasets/symbols.csv'
-        if not os.path.exists(symbols_file):
-            logger.warning(f"Symbols file not found: {symbols_file} - using default symbols")
-            return default_symbols
-            
-        with open(symbols_file, 'r', encoding='utf-8') as f:
-            reader = csv.reader(f)
-            for row_num, row in enumerate(reader, 1):
-                try:
-                    if len(row) >= 2 and row[0].strip() and row[1].strip():
-                        symbol = row[0].strip().upper()
-                        company = row[1].strip()
-                        stocks[symbol] = {'company': company}
-                except Exception as e:
-                    logger.warning(f"Error processing row {row_num} in symbols file: {str(e)}")
-                    continue
-                    
-        logger.info(f"Loaded {len(stocks)} symbols from file")
-        return stocks if stocks else default_symbols
-        
-    except Exception as e:
-        logger.warning(f"Error loading symbols file: {str(e)} - using default symbols")
-        return default_symbols
-
 def handler(request):
     """
     Vercel serverless function handler for symbols endpoint
@@ -63,15 +14,15 @@ def handler(request):
     """
     if request.method == 'GET':
         try:
-            symbols = load_symbols()
+            universe = load_universe()
             
             # Convert to list format for easier frontend consumption
             symbols_list = [
                 {
                     'symbol': symbol,
-                    'company': data.get('company', ''),
+                    'company': company,
                 }
-                for symbol, data in symbols.items()
+                for symbol, company in zip(universe.symbols, universe.companies)
             ]
             
             return {
@@ -0,0 +1,227 @@
+"""
+Forward-return backtest of candlestick patterns
+
+Measures what happened after every signal of every pattern in
+``patterns.candlestick_patterns``: the return from the signal bar's close to
+the close N bars later, for several horizons N. Signals are evaluated on a
+(symbols x bars) panel with the native pattern engine and their forward
+returns are gathered with array indexing, so the cost grows with the panel
+size and not with the number of signals.
+
+Panels are aligned by position with ``align_tails``, so a horizon of N bars
+means each symbol's own next N bars. Returns spanning a missing close are
+left out of the statistics.
+
+Functions:
+    forward_returns: Return from each bar's close to the close N bars later
+    backtest_panel: Per-pattern forward-return statistics for an OHLC panel
+    backtest_frames: Per-pattern statistics for per-symbol OHLC DataFrames
+    backtest_directory: Per-pattern statistics for a directory of daily CSVs
+
+Constants:
+    DEFAULT_HORIZONS: Forward horizons measured, in bars
+    PATTERNS_PER_PASS: Patterns evaluated per pass on the process pool
+"""
+
+import os
+import logging
+import numpy as np
+import pandas as pd
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from chartlib import read_daily_csv
+from patterns import candlestick_patterns
+from pattern_engine import CandleFeatures, align_tails, evaluate_patterns
+from process_pool import evaluate_sharded, resolve_workers
+
+logger = logging.getLogger(__name__)
+
+# Forward horizons measured, in bars
+DEFAULT_HORIZONS = (1, 5, 10, 20)
+
+# Patterns evaluated per pass on the process pool; their signals are reduced to
+# statistics before the next pass, which bounds memory at a few signal arrays
+PATTERNS_PER_PASS = 8
+
+STAT_COLUMNS = ['signals', 'count', 'hit_rate', 'mean_return', 'median_return', 'excess_return']
+
+
+def forward_returns(close: np.ndarray, horizons: Iterable[int] = DEFAULT_HORIZONS) -> np.ndarray:
+    """
+    Compute the return from each bar's close to the close ``h`` bars later
+
+    Args:
+        close: Closes of shape (n_symbols, n_bars), or one series
+        horizons: Positive numbers of bars ahead
+
+    Returns:
+        float64 array of shape (n_horizons,) + close.shape; NaN where the
+        horizon runs past the last bar or either close is missing
+    """
+    close = np.asarray(close, dtype=np.float64)
+    horizons = [int(h) for h in horizons]
+    if not horizons or min(horizons) < 1:
+        raise ValueError("Horizons must be positive numbers of bars")
+
+    returns = np.full((len(horizons),) + close.shape, np.nan)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for i, h in enumerate(horizons):
+            if h < close.shape[-1]:
+                returns[i, ..., :-h] = close[..., h:] / close[..., :-h] - 1
+    returns[~np.isfinite(returns)] = np.nan
+    return returns
+
+
+def _iter_signals(ohlc: np.ndarray, patterns: List[str],
+                  workers: Union[int, str, None]) -> Iterator[Tuple[str, np.ndarray]]:
+    """Yield (pattern, signals) a few patterns at a time, so earlier signals can be freed"""
+    if resolve_workers(workers) <= 1:
+        # One set of candle features (and cached averages) serves every pattern
+        features = CandleFeatures(*ohlc)
+        for pattern in patterns:
+            yield from evaluate_patterns(features, [pattern]).items()
+        return
+    for start in range(0, len(patterns), PATTERNS_PER_PASS):
+        yield from evaluate_sharded(ohlc, patterns[start:start + PATTERNS_PER_PASS], workers=workers).items()
+
+
+def _summarize(returns: np.ndarray, direction: int, baseline: np.ndarray) -> Dict[str, np.ndarray]:
+    """Statistics per horizon for forward returns of shape (n_horizons, n_signals)"""
+    valid = ~np.isnan(returns)
+    count = valid.sum(axis=1)
+    hits = (returns * direction > 0).sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = np.where(count > 0, np.where(valid, returns, 0).sum(axis=1) / count, np.nan)
+    median = np.full(len(returns), np.nan)
+    for i in np.flatnonzero(count):
+        median[i] = np.median(returns[i][valid[i]])
+    return {
+        'signals': np.full(len(returns), returns.shape[1]),
+        'count': count,
+        'hit_rate': np.where(count > 0, hits / np.maximum(count, 1), np.nan),
+        'mean_return': mean,
+        'median_return': median,
+        'excess_return': mean - baseline
+    }
+
+
+def backtest_panel(ohlc: np.ndarray, patterns: Optional[List[str]] = None,
+                   horizons: Iterable[int] = DEFAULT_HORIZONS,
+                   workers: Union[int, str, None] = None) -> pd.DataFrame:
+    """
+    Measure forward returns after every bullish and bearish signal of each pattern
+
+    A hit is a bullish signal followed by a gain, or a bearish signal followed
+    by a loss. ``excess_return`` is the mean return minus the mean return after
+    every bar of the panel over the same horizon, so a pattern with an edge has
+    a positive excess when bullish and a negative one when bearish.
+
+    Args:
+        ohlc: Panel of shape (4, n_symbols, n_bars), as from ``align_tails``
+        patterns: Patterns to test, defaults to all ``candlestick_patterns``
+        horizons: Forward horizons in bars
+        workers: Process count, 'auto', or None for PATTERN_PROCESS_WORKERS
+
+    Returns:
+        DataFrame indexed by (pattern, direction, horizon) with the number of
+        signals, the number with a known forward return (count), hit_rate,
+        mean_return, median_return and excess_return. Directions without
+        signals are left out.
+    """
+    ohlc = np.asarray(ohlc, dtype=np.float64)
+    patterns = list(dict.fromkeys(patterns or candlestick_patterns))
+    horizons = [int(h) for h in horizons]
+
+    # Forward returns flattened to (horizons, symbols * bars), like the signals below
+    returns = forward_returns(ohlc[3], horizons).reshape(len(horizons), -1)
+    known = ~np.isnan(returns)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        baseline = np.where(known, returns, 0).sum(axis=1) / known.sum(axis=1)
+
+    rows = []
+    index = []
+    for pattern, signal in _iter_signals(ohlc, patterns, workers):
+        flat = signal.ravel()
+        for direction, name in ((1, 'bullish'), (-1, 'bearish')):
+            positions = np.flatnonzero(flat * direction > 0)
+            if positions.size == 0:
+                continue
+            stats = _summarize(returns[:, positions], direction, baseline)
+            for i, horizon in enumerate(horizons):
+                index.append((pattern, name, horizon))
+                rows.append([stats[column][i] for column in STAT_COLUMNS])
+
+    result = pd.DataFrame(rows, columns=STAT_COLUMNS,
+                          index=pd.MultiIndex.from_tuples(index, names=['pattern', 'direction', 'horizon']))
+    return result.astype({'signals': np.int64, 'count': np.int64})
+
+
+def backtest_frames(frames: Dict[str, pd.DataFrame], patterns: Optional[List[str]] = None,
+                    horizons: Iterable[int] = DEFAULT_HORIZONS,
+                    workers: Union[int, str, None] = None) -> pd.DataFrame:
+    """
+    Backtest patterns over per-symbol OHLC DataFrames
+
+    Args:
+        frames: Dictionary mapping symbols to DataFrames with Open, High, Low
+            and Close columns
+        patterns: Patterns to test, defaults to all ``candlestick_patterns``
+        horizons: Forward horizons in bars
+        workers: Process count, 'auto', or None for PATTERN_PROCESS_WORKERS
+
+    Returns:
+        Statistics as from ``backtest_panel``
+    """
+    frames = {symbol: df for symbol, df in frames.items() if df is not None and not df.empty}
+    bars = max((len(df) for df in frames.values()), default=0)
+    _, ohlc = align_tails(frames, bars)
+    return backtest_panel(ohlc, patterns, horizons, workers)
+
+
+def backtest_directory(data_directory: str = 'datasets/daily', patterns: Optional[List[str]] = None,
+                       horizons: Iterable[int] = DEFAULT_HORIZONS,
+                       workers: Union[int, str, None] = None) -> pd.DataFrame:
+    """
+    Backtest patterns over every daily bars CSV in a directory
+
+    Files are read with ``chartlib.read_daily_csv``, so unchanged CSVs load
+    from their binary cache. Files that cannot be read or lack OHLC columns
+    are logged and skipped.
+
+    Args:
+        data_directory: Directory containing stock CSV files
+        patterns: Patterns to test, defaults to all ``candlestick_patterns``
+        horizons: Forward horizons in bars
+        workers: Process count, 'auto', or None for PATTERN_PROCESS_WORKERS
+
+    Returns:
+        Statistics as from ``backtest_panel``
+    """
+    frames = {}
+    for filename in sorted(os.listdir(data_directory)):
+        if not filename.endswith('.csv'):
+            continue
+        try:
+            df = read_daily_csv(os.path.join(data_directory, filename))
+        except Exception as e:
+            logger.warning(f"Skipping {filename}: {str(e)}")
+            continue
+        if not all(col in df.columns for col in ['Open', 'High', 'Low', 'Close']):
+            logger.warning(f"Skipping {filename}: missing required columns")
+            continue
+        frames[filename.replace('.csv', '')] = df
+
+    logger.info(f"Backtesting {len(frames)} symbols from {data_directory}")
+    return backtest_frames(frames, patterns, horizons, workers)
+
+
+if __name__ == "__main__":
+    """Backtest every pattern on the daily CSVs and print the best by 5-bar hit rate"""
+    logging.basicConfig(level=logging.INFO)
+
+    stats = backtest_directory()
+    if stats.empty:
+        print("No signals found")
+    else:
+        five_day = stats.xs(5, level='horizon').sort_values('hit_rate', ascending=False)
+        print(five_day.to_string(float_format=lambda value: f"{value:.4f}"))
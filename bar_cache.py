@@ -0,0 +1,196 @@
+"""
+Process-level cache of fetched bars
+
+Serverless instances are reused between invocations, so bars fetched by one
+request can answer the next one without another upstream call. Entries are
+keyed by (symbol, start date, end date, source), expire according to the
+trading calendar, and are evicted least recently used first once the cache
+holds more than a fixed number of bytes.
+
+Classes:
+    BarCache: Thread-safe TTL and size-bounded LRU cache of bar DataFrames
+
+Functions:
+    trading_day_ttl: Seconds until bars for a date range may have changed
+    get_bar_cache: Factory function returning singleton cache instance
+"""
+
+from __future__ import annotations
+
+import os
+import time
+import logging
+import threading
+from collections import OrderedDict
+from datetime import date, datetime, time as dt_time, timedelta
+from typing import Callable, Dict, Hashable, Optional
+from zoneinfo import ZoneInfo
+
+from lazy_imports import lazy_import
+
+# Cached frames come from callers that already loaded pandas
+pd = lazy_import('pandas')
+
+logger = logging.getLogger(__name__)
+
+# Cache limits
+BAR_CACHE_MAX_BYTES = int(os.getenv('BAR_CACHE_MAX_BYTES', str(64 * 1024 * 1024)))
+BAR_CACHE_TTL = int(os.getenv('BAR_CACHE_TTL', '86400'))  # Longest time any entry is kept
+BAR_CACHE_INTRADAY_TTL = int(os.getenv('BAR_CACHE_INTRADAY_TTL', '300'))  # While today's bar can change
+
+# Regular US equity session. Daily bars are treated as final an hour after the close.
+MARKET_TZ = ZoneInfo('America/New_York')
+MARKET_OPEN = dt_time(9, 30)
+BARS_FINAL = dt_time(17, 0)
+
+
+def trading_day_ttl(end_date: str, now: Optional[datetime] = None) -> float:
+    """
+    Return how many seconds bars for a range ending at ``end_date`` stay valid
+
+    Ranges that end before today only hold settled bars and are kept for the
+    full TTL. Ranges reaching today change while a session is trading and
+    until its daily bar is final, so they are kept briefly then; outside
+    those hours nothing changes until the next session opens.
+
+    Args:
+        end_date: End of the cached range in 'YYYY-MM-DD' format
+        now: Current time, defaults to the wall clock
+
+    Returns:
+        Time to live in seconds
+    """
+    now = (now or datetime.now(MARKET_TZ)).astimezone(MARKET_TZ)
+    today = now.date()
+
+    if date.fromisoformat(end_date[:10]) < today:
+        return BAR_CACHE_TTL
+
+    is_session_day = today.weekday() < 5
+    if is_session_day and MARKET_OPEN <= now.time() < BARS_FINAL:
+        return min(BAR_CACHE_INTRADAY_TTL, BAR_CACHE_TTL)
+
+    # Closed: valid until the next session opens (weekends skipped, holidays not)
+    next_open = datetime.combine(today, MARKET_OPEN, tzinfo=MARKET_TZ)
+    if not is_session_day or now.time() >= MARKET_OPEN:
+        next_open += timedelta(days=1)
+    while next_open.weekday() >= 5:
+        next_open += timedelta(days=1)
+    return min((next_open - now).total_seconds(), BAR_CACHE_TTL)
+
+
+class BarCache:
+    """
+    Thread-safe cache of bar DataFrames with per-entry TTLs and a byte bound.
+
+    Cached DataFrames are shared between callers and must not be modified.
+
+    Attributes:
+        max_bytes (int): Upper bound on the memory held by cached frames
+        hits (int): Lookups answered from the cache
+        misses (int): Lookups that found no live entry
+        evictions (int): Entries dropped to stay within ``max_bytes``
+        expirations (int): Entries dropped because their TTL passed
+    """
+
+    def __init__(self, max_bytes: int = BAR_CACHE_MAX_BYTES,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        self.max_bytes = max_bytes
+        self._clock = clock
+        self._entries = OrderedDict()  # key -> (frame, expires_at, size)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: Hashable) -> Optional[pd.DataFrame]:
+        """Return the cached frame for ``key``, or None if missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            frame, expires_at, _ = entry
+            if self._clock() >= expires_at:
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return frame
+
+    def put(self, key: Hashable, frame: pd.DataFrame, ttl: Optional[float] = None) -> None:
+        """
+        Cache a frame
+
+        Args:
+            key: Cache key, (symbol, start_date, end_date, source) for bars
+            frame: Bars to cache
+            ttl: Seconds to keep the entry, defaults to ``trading_day_ttl`` of
+                the key's end date
+        """
+        if frame is None or frame.empty:
+            return
+
+        if ttl is None:
+            ttl = trading_day_ttl(key[2])
+        size = int(frame.memory_usage(index=True, deep=True).sum())
+        if ttl <= 0 or size > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (frame, self._clock() + ttl, size)
+            self._bytes += size
+
+            while self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def _remove(self, key: Hashable) -> None:
+        """Drop an entry; the caller holds the lock"""
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+
+    def clear(self) -> None:
+        """Drop every entry and reset the counters"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self.hits = self.misses = self.evictions = self.expirations = 0
+
+    def stats(self) -> Dict[str, float]:
+        """Return counters and usage for monitoring"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes
+            }
+
+
+# Global cache instance, shared by every request served by this process
+_bar_cache = None
+
+
+def get_bar_cache() -> BarCache:
+    """Get or create the global bar cache instance"""
+    global _bar_cache
+
+    if _bar_cache is None:
+        _bar_cache = BarCache()
+
+    return _bar_cache
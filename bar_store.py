@@ -0,0 +1,219 @@
+"""
+Persistent local OHLCV bar store
+
+Daily bars only change once a day, so scans keep a per-symbol copy of the
+history on disk and only fetch the trailing days that are missing. Each symbol
+is stored as one uncompressed NumPy ``.npz`` archive holding one array per
+column (timestamps as int64 nanoseconds, OHLC as float64, volume as int64)
+plus the date range that has already been synced with the upstream source.
+
+Classes:
+    BarStore: Reads, writes and plans incremental syncs of stored bars
+
+Functions:
+    get_bar_store: Factory function returning singleton store instance
+"""
+
+from __future__ import annotations
+
+import os
+import logging
+import tempfile
+import numpy as np
+from typing import Optional, Tuple
+
+from lazy_imports import lazy_import
+
+# pandas is loaded on the first read or write, not when the store is opened
+pd = lazy_import('pandas')
+
+logger = logging.getLogger(__name__)
+
+# Default location is under the temp dir, which is the writable path on serverless hosts
+DEFAULT_STORE_DIR = os.path.join(tempfile.gettempdir(), 'candlestick-screener', 'bars')
+
+COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+NS_PER_DAY = 86_400 * 10**9
+
+
+class BarStore:
+    """
+    Columnar on-disk store of daily OHLCV bars keyed by symbol.
+
+    Besides the bars themselves every file records ``covered_from`` (the
+    earliest requested start date the stored history satisfies) and
+    ``synced_through`` (the end date of the most recent upstream fetch), so
+    later requests can tell which trailing days still need fetching even when
+    the last sessions were weekends or holidays without bars.
+
+    Attributes:
+        root (str): Directory holding one ``<SYMBOL>.npz`` file per symbol
+    """
+
+    def __init__(self, root: Optional[str] = None) -> None:
+        self.root = root or os.getenv('BAR_STORE_DIR', DEFAULT_STORE_DIR)
+        os.makedirs(self.root, exist_ok=True)
+
+    def path(self, symbol: str) -> str:
+        """Return the file path holding bars for a symbol"""
+        return os.path.join(self.root, f"{symbol.upper()}.npz")
+
+    def _load(self, symbol: str) -> Optional[dict]:
+        """Load the raw column arrays for a symbol, or None if not stored"""
+        path = self.path(symbol)
+        if not os.path.exists(path):
+            return None
+
+        try:
+            with np.load(path, allow_pickle=False) as archive:
+                return {key: archive[key] for key in archive.files}
+        except Exception as e:
+            logger.warning(f"Discarding unreadable bar store file for {symbol}: {str(e)}")
+            return None
+
+    def sync_range(self, symbol: str, start_date: str, end_date: str) -> Optional[Tuple[str, bool]]:
+        """
+        Work out which part of [start_date, end_date) must be fetched upstream
+
+        Args:
+            symbol: Stock symbol
+            start_date: Requested start date in 'YYYY-MM-DD' format
+            end_date: Requested end date in 'YYYY-MM-DD' format
+
+        Returns:
+            None if the stored bars already cover the request, otherwise a
+            tuple of (fetch start date, is_delta). ``is_delta`` is False when
+            the full range has to be (re)fetched.
+        """
+        stored = self._load(symbol)
+        if stored is None:
+            return start_date, False
+
+        covered_from = str(stored['covered_from'])
+        synced_through = str(stored['synced_through'])
+
+        if start_date < covered_from:
+            return start_date, False
+
+        # Only weekdays after the last sync can hold new daily bars
+        if np.busday_count(synced_through, end_date) <= 0:
+            return None
+
+        return synced_through, True
+
+    def read(self, symbol: str, start_date: Optional[str] = None,
+             end_date: Optional[str] = None) -> Optional[pd.DataFrame]:
+        """
+        Read stored bars for a symbol as a yfinance-compatible DataFrame
+
+        Args:
+            symbol: Stock symbol
+            start_date: Inclusive start date in 'YYYY-MM-DD' format
+            end_date: Exclusive end date in 'YYYY-MM-DD' format
+
+        Returns:
+            DataFrame with columns: Open, High, Low, Close, Volume, or None
+        """
+        stored = self._load(symbol)
+        if stored is None or len(stored['timestamp']) == 0:
+            return None
+
+        timestamps = stored['timestamp']
+        lo, hi = 0, len(timestamps)
+        if start_date:
+            lo = np.searchsorted(timestamps, pd.Timestamp(start_date).value, side='left')
+        if end_date:
+            hi = np.searchsorted(timestamps, pd.Timestamp(end_date).value, side='left')
+        if lo >= hi:
+            return None
+
+        index = pd.DatetimeIndex(timestamps[lo:hi].view('datetime64[ns]'), name='timestamp')
+        if str(stored['tz']):
+            index = index.tz_localize('UTC').tz_convert(str(stored['tz']))
+
+        return pd.DataFrame({col: stored[col][lo:hi] for col in COLUMNS}, index=index)
+
+    def update(self, symbol: str, df: Optional[pd.DataFrame], start_date: str, end_date: str,
+               is_delta: bool) -> None:
+        """
+        Merge freshly fetched bars into the store
+
+        Args:
+            symbol: Stock symbol
+            df: Bars fetched for [start_date, end_date), may be None or empty
+            start_date: Start date that was fetched
+            end_date: End date that was fetched
+            is_delta: True to append to the stored history, False to replace it
+        """
+        stored = self._load(symbol) if is_delta else None
+
+        if df is not None and not df.empty:
+            new_ts, new_cols, tz = self._to_columns(df)
+        else:
+            new_ts = np.empty(0, dtype=np.int64)
+            new_cols = {col: np.empty(0, dtype=np.int64 if col == 'Volume' else np.float64) for col in COLUMNS}
+            tz = str(stored['tz']) if stored is not None else ''
+
+        if stored is not None:
+            covered_from = str(stored['covered_from'])
+
+            # Refetched trailing bars replace the stored copies of the same session,
+            # even when the sources stamp daily bars at different times of day
+            keep = ~np.isin(stored['timestamp'] // NS_PER_DAY, new_ts // NS_PER_DAY)
+            timestamps = np.concatenate([stored['timestamp'][keep], new_ts])
+            columns = {col: np.concatenate([stored[col][keep], new_cols[col]]) for col in COLUMNS}
+
+            order = np.argsort(timestamps, kind='stable')
+            timestamps = timestamps[order]
+            columns = {col: values[order] for col, values in columns.items()}
+            tz = tz or str(stored['tz'])
+        else:
+            covered_from = start_date
+            timestamps, columns = new_ts, new_cols
+
+        self._write(symbol, timestamps, columns, tz, covered_from, end_date)
+
+    def _to_columns(self, df: pd.DataFrame) -> Tuple[np.ndarray, dict, str]:
+        """Convert a bars DataFrame into UTC int64 timestamps and column arrays"""
+        index = pd.DatetimeIndex(df.index)
+        tz = ''
+        if index.tz is not None:
+            tz = str(index.tz)
+            index = index.tz_convert('UTC').tz_localize(None)
+
+        timestamps = index.values.astype('datetime64[ns]').view(np.int64)
+        columns = {col: df[col].to_numpy(dtype=np.float64) for col in COLUMNS if col != 'Volume'}
+        # yfinance reports some bars without a volume; those are stored as 0
+        columns['Volume'] = (df['Volume'].fillna(0).to_numpy(dtype=np.int64) if 'Volume' in df.columns
+                             else np.zeros(len(df), dtype=np.int64))
+        return timestamps, columns, tz
+
+    def _write(self, symbol: str, timestamps: np.ndarray, columns: dict, tz: str,
+               covered_from: str, synced_through: str) -> None:
+        """Atomically write a symbol's arrays so readers never see partial files"""
+        path = self.path(symbol)
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.savez(f, timestamp=timestamps, tz=np.array(tz),
+                         covered_from=np.array(covered_from), synced_through=np.array(synced_through),
+                         **columns)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+
+# Global store instance
+_bar_store = None
+
+
+def get_bar_store() -> BarStore:
+    """Get or create the global bar store instance"""
+    global _bar_store
+
+    if _bar_store is None:
+        _bar_store = BarStore()
+
+    return _bar_store
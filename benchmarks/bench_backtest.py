@@ -0,0 +1,52 @@
+"""
+Benchmark the pattern backtest on a synthetic universe
+
+Builds a (symbols x bars) panel of random-walk OHLC bars and times
+``backtest_panel`` over every pattern in ``patterns.candlestick_patterns``
+and the default horizons, reporting the signal count and the peak memory
+of the process.
+
+Run with: python benchmarks/bench_backtest.py [--symbols 500] [--bars 2520]
+"""
+
+import argparse
+import os
+import resource
+import sys
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_pattern_engine import generate_ohlc, time_call
+from backtest import backtest_panel
+from patterns import candlestick_patterns
+from process_pool import shutdown_process_pool
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--symbols', type=int, default=500, help='symbols in the panel')
+    parser.add_argument('--bars', type=int, default=2520, help='bars per symbol (2520 is about ten years)')
+    parser.add_argument('--workers', default=None, help="process count or 'auto' (default: PATTERN_PROCESS_WORKERS)")
+    parser.add_argument('--repeat', type=int, default=1, help='timing repetitions')
+    args = parser.parse_args()
+
+    ohlc = np.stack([np.stack(generate_ohlc(args.bars, seed)) for seed in range(args.symbols)], axis=1)
+    stats = {}
+
+    def run():
+        stats['result'] = backtest_panel(ohlc, horizons=(1, 5, 10, 20), workers=args.workers)
+
+    elapsed = time_call(run, args.repeat)
+    result = stats['result']
+    signals = result.xs(1, level='horizon')['signals'].sum()
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+    print(f"{len(candlestick_patterns)} patterns, {args.symbols} symbols x {args.bars} bars, "
+          f"{os.cpu_count() or 1} cores")
+    print(f"backtest: {elapsed:.2f} s, {signals} signals, {len(result)} result rows, peak memory {peak_mb:.0f} MB")
+    shutdown_process_pool()
+
+
+if __name__ == '__main__':
+    main()
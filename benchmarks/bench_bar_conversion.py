@@ -0,0 +1,115 @@
+"""
+Benchmark converting Alpaca bars to yfinance-compatible DataFrames
+
+Times the previous per-bar dict conversion against the columnar
+``bars_to_frame`` path on synthetic raw API bars. When alpaca-py is installed
+it also times the SDK's model mode, which builds a pydantic ``Bar`` per bar
+before converting, against the raw data mode the SDK client now uses.
+
+Run with: python benchmarks/bench_bar_conversion.py [--sizes 250 10000]
+"""
+
+import argparse
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from alpaca_client import bars_to_frame
+
+try:
+    from alpaca.data.models import BarSet
+    from alpaca_client_sdk import MODEL_BAR_FIELDS
+except ImportError:
+    BarSet = None
+
+
+def generate_bars(n_bars: int, seed: int = 0):
+    """Generate raw API bars as returned in a bars response"""
+    rng = np.random.default_rng(seed)
+    close = np.round(np.maximum(100 + np.cumsum(rng.normal(0, 1, n_bars)), 5), 2)
+    start = pd.Timestamp('2000-01-03 05:00', tz='UTC')
+    return [
+        {'t': (start + pd.Timedelta(days=i)).strftime('%Y-%m-%dT%H:%M:%SZ'),
+         'o': float(c - 0.5), 'h': float(c + 1), 'l': float(c - 1), 'c': float(c),
+         'v': int(rng.integers(1000, 10 ** 7)), 'n': 100, 'vw': float(c)}
+        for i, c in enumerate(close)
+    ]
+
+
+def legacy_convert(bars, model: bool = False):
+    """Previous conversion: a dict per bar, then coercion, sorting and cleaning"""
+    data = []
+    for bar in bars:
+        if model:
+            data.append({'timestamp': bar.timestamp, 'Open': float(bar.open), 'High': float(bar.high),
+                         'Low': float(bar.low), 'Close': float(bar.close),
+                         'Volume': int(bar.volume) if bar.volume else 0})
+        else:
+            data.append({'timestamp': bar['t'], 'Open': float(bar['o']), 'High': float(bar['h']),
+                         'Low': float(bar['l']), 'Close': float(bar['c']),
+                         'Volume': int(bar['v']) if bar['v'] else 0})
+
+    df = pd.DataFrame(data)
+    df['timestamp'] = pd.to_datetime(df['timestamp'])
+    df.set_index('timestamp', inplace=True)
+    df = df.sort_index()
+    for col in ['Open', 'High', 'Low', 'Close', 'Volume']:
+        if col == 'Volume':
+            df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0).astype(int)
+        else:
+            df[col] = pd.to_numeric(df[col], errors='coerce')
+    return df.dropna()
+
+
+def time_call(func, repeat: int) -> float:
+    """Return the best wall time of ``repeat`` calls in seconds"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[250, 10000], help='bars per conversion')
+    parser.add_argument('--repeat', type=int, default=5, help='timing repetitions')
+    args = parser.parse_args()
+
+    cases = [
+        ('REST dicts, per-bar dicts', lambda bars: legacy_convert(bars)),
+        ('REST dicts, columnar', lambda bars: bars_to_frame(bars)),
+    ]
+    if BarSet is not None:
+        cases += [
+            ('SDK models, per-bar dicts', lambda bars: legacy_convert(BarSet({'X': bars}).data['X'], model=True)),
+            ('SDK models, columnar', lambda bars: bars_to_frame(BarSet({'X': bars}).data['X'], MODEL_BAR_FIELDS)),
+            ('SDK raw data, columnar', lambda bars: bars_to_frame(bars)),
+        ]
+    else:
+        print("alpaca-py not installed - reporting REST conversion only")
+
+    header = f"{'conversion':<28}" + ''.join(f"{f'{n} bars us/bar':>20}" for n in args.sizes)
+    print(header)
+    print('-' * len(header))
+
+    data = {n: generate_bars(n) for n in args.sizes}
+    for name, convert in cases:
+        row = f"{name:<28}"
+        for n in args.sizes:
+            elapsed = time_call(lambda: convert(data[n]), args.repeat)
+            row += f"{elapsed / n * 1e6:>20.3f}"
+        print(row)
+
+    # Both paths must produce the same frame
+    for n in args.sizes:
+        pd.testing.assert_frame_equal(legacy_convert(data[n]), bars_to_frame(data[n]), check_freq=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Benchmark import time and cold start of the serverless handlers
+
+Each handler is imported in a fresh interpreter, as on a cold start, and
+then serves one request that needs no network access: the patterns and
+symbols listings, a health check (whose upstream probe runs in the
+background) and a scan answered from a freshly built signal matrix. For
+every handler it reports the median import and first-request times, which
+heavy modules ended up loaded, and the import cost per top-level package
+from ``python -X importtime``. The health check's upstream probe imports the
+Alpaca SDK on its background thread, so it may be listed for that handler.
+
+Run with: python benchmarks/bench_cold_start.py [--runs 5] [--top 8]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from collections import defaultdict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Modules the handlers should only load when a request needs them
+HEAVY_MODULES = ['pandas', 'alpaca', 'requests', 'yfinance', 'alpaca_client_sdk']
+
+# Handler module and the query of the request it serves
+HANDLERS = [
+    ('api.patterns', {}),
+    ('api.symbols', {}),
+    ('api.health', {}),
+    ('api.scan', {'patterns': 'CDLDOJI', 'limit': '10'}),
+]
+
+CHILD = """
+import importlib, json, sys, time
+from unittest.mock import Mock
+
+start = time.perf_counter()
+module = importlib.import_module(sys.argv[1])
+imported = time.perf_counter()
+request = Mock(method='GET', body=None, remote_addr='bench')
+request.args = json.loads(sys.argv[2])
+response = module.handler(request)
+served = time.perf_counter()
+
+print(json.dumps({
+    'import_ms': (imported - start) * 1e3,
+    'request_ms': (served - imported) * 1e3,
+    'status': response['statusCode'],
+    'loaded': [name for name in json.loads(sys.argv[3]) if name in sys.modules],
+}))
+"""
+
+
+def run_child(module: str, query: dict, env: dict) -> dict:
+    """Import ``module`` and serve one request in a fresh interpreter"""
+    output = subprocess.run(
+        [sys.executable, '-c', CHILD, module, json.dumps(query), json.dumps(HEAVY_MODULES)],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def package_costs(module: str, env: dict) -> dict:
+    """Return self import time in ms per top-level package, from -X importtime"""
+    stderr = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            cwd=ROOT, env=env, capture_output=True, text=True, check=True).stderr
+    costs = defaultdict(float)
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, _, name = line[len('import time:'):].split('|')
+        costs[name.strip().split('.')[0]] += int(self_us) / 1e3
+    return costs
+
+
+def build_matrix(path: str) -> None:
+    """Persist an all-zero signal matrix covering the symbols the scan request reads"""
+    from signal_matrix import build_signal_matrix
+    from universe import load_universe
+
+    symbols = list(load_universe().as_dict())[:10]
+    build_signal_matrix({}, symbols).save(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--runs', type=int, default=5, help='cold starts per handler')
+    parser.add_argument('--top', type=int, default=8, help='packages listed per handler')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        matrix_path = os.path.join(tmp, 'signals.npz')
+        build_matrix(matrix_path)
+        env = {**os.environ, 'PYTHONPATH': ROOT, 'SIGNAL_MATRIX_PATH': matrix_path,
+               'REQUEST_LIMITER_BACKEND': 'memory', 'BAR_STORE_DIR': os.path.join(tmp, 'bars')}
+
+        header = f"{'handler':<16}{'import ms':>12}{'request ms':>12}{'total ms':>10}{'status':>8}  heavy modules loaded"
+        print(header)
+        print('-' * len(header))
+        reports = []
+        for module, query in HANDLERS:
+            runs = [run_child(module, query, env) for _ in range(args.runs)]
+            import_ms = statistics.median(run['import_ms'] for run in runs)
+            request_ms = statistics.median(run['request_ms'] for run in runs)
+            loaded = ', '.join(runs[-1]['loaded']) or '-'
+            print(f"{module:<16}{import_ms:>12.1f}{request_ms:>12.1f}{import_ms + request_ms:>10.1f}"
+                  f"{runs[-1]['status']:>8}  {loaded}")
+            reports.append((module, package_costs(module, env)))
+
+        print()
+        print("Import time per top-level package (ms, self time summed over submodules)")
+        for module, costs in reports:
+            top = sorted(costs.items(), key=lambda item: item[1], reverse=True)[:args.top]
+            print(f"{module:<16}" + ', '.join(f"{name} {ms:.1f}" for name, ms in top))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""
+Benchmark sweeping consolidation windows and thresholds
+
+Times judging every (window, percentage) setting of a grid on the latest bar
+of synthetic symbols, first by calling ``is_consolidating`` and
+``is_breaking_out`` once per symbol and setting (what rerunning the scan per
+setting costs, without the file reads), and then with ``sweep_closes`` in one
+pass. Both must agree on every cell.
+
+Run with: python benchmarks/bench_consolidation_sweep.py [--symbols 200] [--bars 250]
+"""
+
+import argparse
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_pattern_engine import generate_ohlc, time_call
+from chartlib import is_breaking_out, is_consolidating, sweep_closes
+
+
+def per_setting(frames: list, windows: list, percentages: list) -> dict:
+    """Judge each symbol once per setting with the scalar checks"""
+    shape = (len(frames), len(windows), len(percentages))
+    result = {'consolidating': np.zeros(shape, dtype=bool), 'breaking_out': np.zeros(shape, dtype=bool)}
+    for s, df in enumerate(frames):
+        for w, window in enumerate(windows):
+            for p, percentage in enumerate(percentages):
+                result['consolidating'][s, w, p] = is_consolidating(df, percentage, window)
+                result['breaking_out'][s, w, p] = is_breaking_out(df, percentage, window)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--symbols', type=int, default=200, help='symbols judged')
+    parser.add_argument('--bars', type=int, default=250, help='bars per symbol')
+    parser.add_argument('--windows', type=int, nargs='+', default=list(range(5, 65, 5)), help='windows in bars')
+    parser.add_argument('--percentages', type=float, nargs='+', default=[p / 2 for p in range(1, 11)],
+                        help='threshold percentages')
+    parser.add_argument('--repeat', type=int, default=3, help='timing repetitions')
+    args = parser.parse_args()
+
+    closes = [generate_ohlc(args.bars, seed)[3] for seed in range(args.symbols)]
+    frames = [pd.DataFrame({'Close': series}) for series in closes]
+    settings = len(args.windows) * len(args.percentages)
+
+    expected = per_setting(frames, args.windows, args.percentages)
+    result = sweep_closes(closes, args.windows, args.percentages)
+    for signal in expected:
+        np.testing.assert_array_equal(result[signal], expected[signal])
+
+    print(f"{args.symbols} symbols x {args.bars} bars, {len(args.windows)} windows x "
+          f"{len(args.percentages)} percentages = {settings} settings")
+    header = f"{'method':<20}{'ms':>12}{'settings/s':>14}"
+    print(header)
+    print('-' * len(header))
+    baseline = time_call(lambda: per_setting(frames, args.windows, args.percentages), 1)
+    sweep = time_call(lambda: sweep_closes(closes, args.windows, args.percentages), args.repeat)
+    for name, elapsed in [('per setting', baseline), ('sweep_closes', sweep)]:
+        print(f"{name:<20}{elapsed * 1e3:>12.1f}{settings / elapsed:>14.0f}")
+    print(f"speedup: {baseline / sweep:.0f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""
+Benchmark daily CSV ingestion for the chartlib scanner
+
+Writes a directory of synthetic daily CSVs in the yfinance layout and times
+reading all of them with plain ``pd.read_csv(parse_dates=True)`` (the loader
+the scanner used before), with ``read_daily_csv`` on a cold cache (typed
+parse plus writing the binary cache) and on a warm cache, and a full
+``scan_for_patterns`` with a cold and a warm cache.
+
+Run with: python benchmarks/bench_csv_ingestion.py [--files 200] [--bars 2500]
+"""
+
+import argparse
+import glob
+import os
+import sys
+import tempfile
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_pattern_engine import generate_ohlc, time_call
+from chartlib import CSV_CACHE_SUFFIX, read_daily_csv, scan_for_patterns
+
+
+def write_files(directory: str, n_files: int, n_bars: int) -> list:
+    """Write ``n_files`` daily CSVs of ``n_bars`` bars and return their paths"""
+    dates = pd.bdate_range('2010-01-01', periods=n_bars, name='Date')
+    paths = []
+    for seed in range(n_files):
+        open_, high, low, close = generate_ohlc(n_bars, seed)
+        path = os.path.join(directory, f'S{seed:04d}.csv')
+        pd.DataFrame({'Open': open_, 'High': high, 'Low': low, 'Close': close, 'Adj Close': close,
+                      'Volume': (close * 1000).round()}, index=dates).to_csv(path)
+        paths.append(path)
+    return paths
+
+
+def clear_cache(directory: str) -> None:
+    """Remove every binary cache file next to the CSVs"""
+    for path in glob.glob(os.path.join(directory, f'*{CSV_CACHE_SUFFIX}')):
+        os.remove(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--files', type=int, default=200, help='CSV files in the directory')
+    parser.add_argument('--bars', type=int, default=2500, help='bars per file')
+    parser.add_argument('--repeat', type=int, default=3, help='timing repetitions')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = write_files(tmp, args.files, args.bars)
+
+        def cold_read():
+            clear_cache(tmp)
+            for path in paths:
+                read_daily_csv(path)
+
+        def cold_scan():
+            clear_cache(tmp)
+            scan_for_patterns(tmp, workers=1)
+
+        cases = [
+            ('read_csv parse_dates', lambda: [pd.read_csv(path, index_col=0, parse_dates=True) for path in paths]),
+            ('typed, cold cache', cold_read),
+            ('typed, warm cache', lambda: [read_daily_csv(path) for path in paths]),
+            ('scan, cold cache', cold_scan),
+            ('scan, warm cache', lambda: scan_for_patterns(tmp, workers=1)),
+        ]
+
+        print(f"{args.files} files x {args.bars} bars")
+        header = f"{'loader':<24}{'ms':>10}{'files/s':>10}"
+        print(header)
+        print('-' * len(header))
+        for name, func in cases:
+            func()
+            elapsed = time_call(func, args.repeat)
+            print(f"{name:<24}{elapsed * 1e3:>10.1f}{args.files / elapsed:>10.0f}")
+
+
+if __name__ == '__main__':
+    main()
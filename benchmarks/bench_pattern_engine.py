@@ -0,0 +1,105 @@
+"""
+Benchmark the native NumPy pattern engine against TA-Lib
+
+Generates synthetic OHLC series, evaluates every pattern in
+``patterns.candlestick_patterns`` with both the native engine and TA-Lib (when
+the ``TA-Lib`` package is installed) on the same inputs, and reports per-pattern
+timings and how many bars disagree. It also times evaluating all series at
+once as a single (series x bars) panel, in full and for the latest bar only.
+
+Run with: python benchmarks/bench_pattern_engine.py [--bars 250] [--series 500]
+"""
+
+import argparse
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from patterns import candlestick_patterns
+from pattern_engine import detect_latest, detect_pattern, detect_patterns
+
+try:
+    import talib
+except ImportError:
+    talib = None
+
+
+def generate_ohlc(n_bars: int, seed: int):
+    """Generate a random-walk OHLC series rounded to cents, with dojis and gaps"""
+    rng = np.random.default_rng(seed)
+    close = np.maximum(100 + np.cumsum(rng.normal(0, 1, n_bars)), 5)
+    open_ = close + rng.normal(0, 1, n_bars) * rng.choice([0.02, 0.3, 1, 2], n_bars)
+    dojis = rng.random(n_bars) < 0.1
+    open_[dojis] = close[dojis]
+    gaps = rng.random(n_bars) < 0.2
+    open_[gaps] += rng.normal(0, 3, gaps.sum())
+    high = np.maximum(open_, close) + np.abs(rng.normal(0, 1, n_bars)) * rng.choice([0, 0.05, 1, 2], n_bars)
+    low = np.minimum(open_, close) - np.abs(rng.normal(0, 1, n_bars)) * rng.choice([0, 0.05, 1, 2], n_bars)
+    return tuple(np.round(values, 2) for values in (open_, high, low, close))
+
+
+def time_call(func, repeat: int) -> float:
+    """Return the best wall time of ``repeat`` calls in seconds"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--bars', type=int, default=250, help='bars per series')
+    parser.add_argument('--series', type=int, default=200, help='number of series')
+    parser.add_argument('--repeat', type=int, default=3, help='timing repetitions')
+    args = parser.parse_args()
+
+    data = [generate_ohlc(args.bars, seed) for seed in range(args.series)]
+    patterns = list(candlestick_patterns)
+
+    print(f"{len(patterns)} patterns, {args.series} series x {args.bars} bars")
+    if talib is None:
+        print("TA-Lib not installed - reporting native engine timings only")
+
+    header = f"{'pattern':<22}{'native ms':>12}{'talib ms':>12}{'ratio':>8}{'signals':>10}{'mismatch':>10}"
+    print(header)
+    print('-' * len(header))
+
+    native_total = talib_total = 0.0
+    mismatches = 0
+    for pattern in patterns:
+        native = time_call(lambda: [detect_pattern(*ohlc, pattern) for ohlc in data], args.repeat)
+        native_total += native
+        signals = sum(int(np.count_nonzero(detect_pattern(*ohlc, pattern))) for ohlc in data)
+
+        if talib is not None:
+            func = getattr(talib, pattern)
+            reference = time_call(lambda: [func(*ohlc) for ohlc in data], args.repeat)
+            talib_total += reference
+            mismatch = sum(int(np.count_nonzero(detect_pattern(*ohlc, pattern) != func(*ohlc))) for ohlc in data)
+            mismatches += mismatch
+            print(f"{pattern:<22}{native * 1e3:>12.2f}{reference * 1e3:>12.2f}"
+                  f"{native / reference:>8.1f}{signals:>10}{mismatch:>10}")
+        else:
+            print(f"{pattern:<22}{native * 1e3:>12.2f}{'-':>12}{'-':>8}{signals:>10}{'-':>10}")
+
+    print('-' * len(header))
+    all_patterns = time_call(lambda: [detect_patterns(*ohlc, patterns) for ohlc in data], args.repeat)
+    panel = np.stack([np.stack(ohlc) for ohlc in data], axis=1)
+    panel_patterns = time_call(lambda: detect_patterns(*panel, patterns), args.repeat)
+    panel_latest = time_call(lambda: detect_latest(*panel, patterns), args.repeat)
+    print(f"native, one pattern per call: {native_total * 1e3:.1f} ms")
+    print(f"native, all patterns per call (shared candles): {all_patterns * 1e3:.1f} ms")
+    print(f"native, all patterns on one (series x bars) panel: {panel_patterns * 1e3:.1f} ms")
+    print(f"native, all patterns on the panel, latest bar only: {panel_latest * 1e3:.1f} ms")
+    if talib is not None:
+        print(f"talib: {talib_total * 1e3:.1f} ms")
+        print(f"bars disagreeing with TA-Lib: {mismatches}")
+
+
+if __name__ == '__main__':
+    main()
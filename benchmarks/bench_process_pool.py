@@ -0,0 +1,58 @@
+"""
+Benchmark process-pool sharded pattern evaluation
+
+Evaluates every pattern in ``patterns.candlestick_patterns`` on a synthetic
+(symbols x bars) panel in-process and with ``evaluate_sharded`` on 2, 4, ...
+worker processes up to the core count, and reports throughput and speedup.
+The pool is started before timing, so the numbers exclude worker start-up.
+
+Run with: python benchmarks/bench_process_pool.py [--symbols 2000] [--bars 250]
+"""
+
+import argparse
+import os
+import sys
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_pattern_engine import generate_ohlc, time_call
+from patterns import candlestick_patterns
+from process_pool import evaluate_sharded, shutdown_process_pool
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--symbols', type=int, default=2000, help='symbols in the panel')
+    parser.add_argument('--bars', type=int, default=250, help='bars per symbol')
+    parser.add_argument('--workers', type=int, nargs='+', help='process counts (default: 2, 4, ... cores)')
+    parser.add_argument('--repeat', type=int, default=3, help='timing repetitions')
+    args = parser.parse_args()
+
+    cores = os.cpu_count() or 1
+    counts = args.workers or sorted({min(2 ** i, cores) for i in range(1, cores.bit_length() + 1)} - {1})
+    patterns = list(candlestick_patterns)
+    panel = np.stack([np.stack(generate_ohlc(args.bars, seed)) for seed in range(args.symbols)], axis=1)
+
+    print(f"{len(patterns)} patterns, {args.symbols} symbols x {args.bars} bars, {cores} cores")
+    header = f"{'workers':<10}{'ms':>10}{'symbols/s':>12}{'speedup':>10}"
+    print(header)
+    print('-' * len(header))
+
+    expected = evaluate_sharded(panel, patterns, workers=1)
+    baseline = time_call(lambda: evaluate_sharded(panel, patterns, workers=1), args.repeat)
+    print(f"{'1':<10}{baseline * 1e3:>10.1f}{args.symbols / baseline:>12.0f}{1.0:>10.2f}")
+
+    for workers in counts:
+        run = lambda: evaluate_sharded(panel, patterns, workers=workers, min_symbols=0)
+        result = run()  # Starts the pool before timing
+        for pattern in patterns:
+            np.testing.assert_array_equal(result[pattern], expected[pattern])
+        elapsed = time_call(run, args.repeat)
+        print(f"{workers:<10}{elapsed * 1e3:>10.1f}{args.symbols / elapsed:>12.0f}{baseline / elapsed:>10.2f}")
+
+    shutdown_process_pool()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,23 +1,53 @@
 import os
+import logging
+import tempfile
+from functools import partial
+import numpy as np
 import pandas as pd
-from typing import Optional
+import pytz
+from typing import Dict, List, Optional, Tuple, Union
 
+from process_pool import map_sharded
 
-def is_consolidating(df: pd.DataFrame, percentage: float = 2.0) -> bool:
+logger = logging.getLogger(__name__)
+
+# Number of closes a consolidation is measured over
+CONSOLIDATION_WINDOW = 15
+
+# Explicit dtype for the column the screens read, so the parser skips inferring it.
+# Other columns are inferred as before, so a bad cell there does not fail the file
+CSV_DTYPES = {
+    'Close': np.float64
+}
+
+# Worker processes reading daily CSVs: 0 or 1 reads in-process, 'auto' uses every core.
+# Separate from PATTERN_PROCESS_WORKERS so ingestion can be enabled on its own
+CSV_INGEST_WORKERS = os.getenv('CSV_INGEST_WORKERS', '1')
+
+# Directories with fewer files are read in-process; starting workers costs more than it saves
+CSV_SHARD_MIN_FILES = int(os.getenv('CSV_SHARD_MIN_FILES', '256'))
+
+# Binary copy of a parsed CSV, kept next to it as e.g. AAPL.csv.npz
+CSV_CACHE_SUFFIX = '.npz'
+CSV_CACHE_VERSION = 2
+
+
+def is_consolidating(df: pd.DataFrame, percentage: float = 2.0, window: int = CONSOLIDATION_WINDOW) -> bool:
     """
     Check if a stock is consolidating based on recent price action.
     
     Args:
         df: DataFrame with OHLC data
         percentage: Consolidation threshold percentage
+        window: Number of recent closes measured
         
     Returns:
         bool: True if stock is consolidating
     """
-    if len(df) < 15:
+    if len(df) < window:
         return False
         
-    recent_candlesticks = df[-15:]
+    recent_candlesticks = df[-window:]
     
     max_close = recent_candlesticks['Close'].max()
     min_close = recent_candlesticks['Close'].min()
@@ -29,24 +59,25 @@ def is_consolidating(df: pd.DataFrame, percentage: float = 2.0) -> bool:
     return False
 
 
-def is_breaking_out(df: pd.DataFrame, percentage: float = 2.5) -> bool:
+def is_breaking_out(df: pd.DataFrame, percentage: float = 2.5, window: int = CONSOLIDATION_WINDOW) -> bool:
     """
     Check if a stock is breaking out of consolidation.
     
     Args:
         df: DataFrame with OHLC data
         percentage: Breakout threshold percentage
+        window: Number of closes the consolidation is measured over
         
     Returns:
         bool: True if stock is breaking out
     """
-    if len(df) < 16:
+    if len(df) < window + 1:
         return False
         
     last_close = df[-1:]['Close'].values[0]
 
-    if is_consolidating(df[:-1], percentage=percentage):
-        recent_closes = df[-16:-1]
+    if is_consolidating(df[:-1], percentage=percentage, window=window):
+        recent_closes = df[-(window + 1):-1]
 
         if last_close > recent_closes['Close'].max():
             return True
@@ -54,33 +85,254 @@ def is_breaking_out(df: pd.DataFrame, percentage: float = 2.5) -> bool:
     return False
 
 
-def scan_for_patterns(data_directory: str = 'datasets/daily') -> dict:
+def consolidation_series(df: pd.DataFrame, percentage: float = 2.0, window: int = CONSOLIDATION_WINDOW) -> pd.Series:
     """
-    Scan all stocks in directory for consolidation and breakout patterns.
+    Check every bar for consolidation in one pass.
+    
+    Uses rolling max/min of closes, so the whole history costs O(n) instead
+    of slicing the frame once per bar. Like ``is_consolidating``, missing
+    closes inside a window are skipped.
     
     Args:
-        data_directory: Directory containing stock CSV files
+        df: DataFrame with OHLC data
+        percentage: Consolidation threshold percentage
+        window: Number of recent closes measured
+        
+    Returns:
+        pd.Series: Boolean series on ``df``'s index; each value equals
+        ``is_consolidating`` on the history up to and including that bar
+    """
+    closes = df['Close'].astype(np.float64)
+    rolling = closes.rolling(window, min_periods=1)
+    threshold = 1 - (percentage / 100)
+    
+    consolidating = rolling.min() > (rolling.max() * threshold)
+    consolidating.iloc[:window - 1] = False
+    return consolidating.rename('consolidating')
+
+
+def breakout_series(df: pd.DataFrame, percentage: float = 2.5, window: int = CONSOLIDATION_WINDOW) -> pd.Series:
+    """
+    Check every bar for a breakout from consolidation in one pass.
+    
+    Args:
+        df: DataFrame with OHLC data
+        percentage: Breakout threshold percentage
+        window: Number of closes the consolidation is measured over
+        
+    Returns:
+        pd.Series: Boolean series on ``df``'s index; each value equals
+        ``is_breaking_out`` on the history up to and including that bar
+    """
+    closes = df['Close'].astype(np.float64)
+    previous_max = closes.rolling(window, min_periods=1).max().shift(1)
+    was_consolidating = consolidation_series(df, percentage, window).shift(1, fill_value=False)
+    
+    return (was_consolidating & (closes > previous_max)).rename('breaking_out')
+
+
+def _consolidating(closes: np.ndarray, percentage: float) -> np.ndarray:
+    """Vectorized ``is_consolidating`` over the last axis of a window of closes"""
+    threshold = 1 - (percentage / 100)
+    # fmax/fmin skip missing closes like the pandas max/min in is_consolidating;
+    # windows with no closes at all stay NaN and compare False
+    return np.fmin.reduce(closes, axis=-1) > (np.fmax.reduce(closes, axis=-1) * threshold)
+
+
+class ConsolidationState:
+    """
+    Incremental consolidation and breakout detection.
+    
+    Keeps only the last ``CONSOLIDATION_WINDOW + 1`` closes of a series (or
+    of every row of a panel), so each new bar is judged by recomputing the
+    max/min of that window rather than re-reading the history. Results equal
+    ``is_consolidating`` and ``is_breaking_out`` on the full history, including
+    histories with missing (NaN) closes.
+    
+    Attributes:
+        percentage (float): Consolidation threshold percentage
+        breakout_percentage (float): Consolidation threshold used for breakouts
+        closes (np.ndarray): Trailing closes, NaN padded on the left
+        bars (int): Number of closes seen, so padding is not mistaken for data
+    """
+    
+    def __init__(self, closes, percentage: float = 2.0, breakout_percentage: float = 2.5) -> None:
+        self.percentage = percentage
+        self.breakout_percentage = breakout_percentage
+        
+        window = CONSOLIDATION_WINDOW + 1
+        tail = np.asarray(closes, dtype=np.float64)[..., -window:]
+        self.closes = np.full(tail.shape[:-1] + (window,), np.nan)
+        self.closes[..., window - tail.shape[-1]:] = tail
+        self.bars = np.shape(closes)[-1]
+    
+    def latest(self) -> Dict[str, np.ndarray]:
+        """Return whether the most recent bar is consolidating or breaking out"""
+        previous = self.closes[..., :-1]
+        return {
+            'consolidating': (_consolidating(self.closes[..., 1:], self.percentage)
+                              & (self.bars >= CONSOLIDATION_WINDOW)),
+            'breaking_out': (_consolidating(previous, self.breakout_percentage)
+                             & (self.closes[..., -1] > np.fmax.reduce(previous, axis=-1))
+                             & (self.bars > CONSOLIDATION_WINDOW))
+        }
+    
+    def update(self, close) -> Dict[str, np.ndarray]:
+        """
+        Append one close (one value per series) and return the new state
+        
+        Args:
+            close: Close of the new bar, or one per panel row
+            
+        Returns:
+            Dictionary with boolean 'consolidating' and 'breaking_out' results
+        """
+        self.closes[..., :-1] = self.closes[..., 1:]
+        self.closes[..., -1] = close
+        self.bars += 1
+        return self.latest()
+
+
+def _parse_dates(index: pd.Index) -> pd.Index:
+    """Parse a CSV date column, trying the ISO fast path before inference"""
+    try:
+        return pd.DatetimeIndex(pd.to_datetime(index, format='%Y-%m-%d'), name=index.name)
+    except (ValueError, TypeError):
+        pass
+    try:
+        return pd.DatetimeIndex(pd.to_datetime(index), name=index.name)
+    except (ValueError, TypeError):
+        # Not dates: keep the column as read, as parse_dates=True would
+        return index
+
+
+def _tz_key(tz) -> str:
+    """Serialize a time zone: its name, or 'offset:<minutes>' for fixed offsets read from CSVs"""
+    name = getattr(tz, 'zone', None) or str(tz)
+    try:
+        pd.Timestamp(0, tz='UTC').tz_convert(name)
+        return name
+    except Exception:
+        return f"offset:{int(pd.Timestamp(0, tz=tz).utcoffset().total_seconds() // 60)}"
+
+
+def _tz_from_key(key: str):
+    """Inverse of ``_tz_key``"""
+    if key.startswith('offset:'):
+        return pytz.FixedOffset(int(key[len('offset:'):]))
+    return key
+
+
+def _read_csv_cache(cache_path: str, source: os.stat_result) -> Optional[pd.DataFrame]:
+    """Load a cached CSV if it was built from the current version of the source"""
+    try:
+        with np.load(cache_path, allow_pickle=False) as archive:
+            if list(archive['meta']) != [CSV_CACHE_VERSION, source.st_mtime_ns, source.st_size]:
+                return None
+            tz, index_name, *labels = [str(label) for label in archive['labels']]
+            values = archive['values']
+            timestamp = archive['timestamp']
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.debug(f"Ignoring unreadable CSV cache {cache_path}: {str(e)}")
+        return None
+
+    columns, dtypes = labels[:len(labels) // 2], labels[len(labels) // 2:]
+    index = pd.DatetimeIndex(timestamp.view('datetime64[ns]'), name=index_name or None)
+    if tz:
+        index = index.tz_localize('UTC').tz_convert(_tz_from_key(tz))
+    df = pd.DataFrame(values, index=index, columns=columns)
+    if any(dtype != 'float64' for dtype in dtypes):
+        df = df.astype(dict(zip(columns, dtypes)))
+    return df
+
+
+def _write_csv_cache(cache_path: str, df: pd.DataFrame, source: os.stat_result) -> None:
+    """
+    Atomically write a parsed CSV's bars; failures only skip caching.
+    
+    The columns are stored as one float64 block with their dtypes, so that a
+    cached read loads four arrays whatever the number of columns.
+    """
+    columns = list(df.columns)
+    if not all(pd.api.types.is_numeric_dtype(df[name]) for name in columns):
+        return  # Text columns are not cached; such files are always parsed
+    index = df.index
+    tz = ''
+    if index.tz is not None:
+        tz = _tz_key(index.tz)
+        index = index.tz_convert('UTC').tz_localize(None)
+
+    tmp_path = None
+    try:
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(cache_path) or '.', suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            np.savez(f, meta=np.array([CSV_CACHE_VERSION, source.st_mtime_ns, source.st_size], dtype=np.int64),
+                     labels=np.array([tz, df.index.name or ''] + columns + [str(df[name].dtype) for name in columns], dtype=str),
+                     timestamp=index.values.astype('datetime64[ns]').view(np.int64),
+                     values=df[columns].to_numpy(dtype=np.float64))
+        os.replace(tmp_path, cache_path)
+    except Exception as e:
+        logger.debug(f"Could not write CSV cache {cache_path}: {str(e)}")
+        if tmp_path and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def read_daily_csv(filepath: str, use_cache: bool = True) -> pd.DataFrame:
+    """
+    Read a daily bars CSV with explicit dtypes and a binary cache.
+    
+    Closes are parsed as float64 without type inference, other columns are
+    inferred, and the date column uses the ISO date fast path. Frames with only numeric
+    columns are then saved next to the CSV as ``<file>.csv.npz``. Later reads
+    load that cache for as long as the CSV's modification time and size are
+    unchanged.
+    
+    Args:
+        filepath: Path of the CSV file, dates in the first column
+        use_cache: Read and write the binary cache
         
     Returns:
-        dict: Results with consolidating and breaking_out lists
+        pd.DataFrame: Bars indexed by date
     """
+    source = os.stat(filepath)
+    cache_path = filepath + CSV_CACHE_SUFFIX
+    if use_cache:
+        cached = _read_csv_cache(cache_path, source)
+        if cached is not None:
+            return cached
+    
+    df = pd.read_csv(filepath, index_col=0, dtype=CSV_DTYPES, engine='c')
+    df.index = _parse_dates(df.index)
+    
+    if use_cache and isinstance(df.index, pd.DatetimeIndex):
+        _write_csv_cache(cache_path, df, source)
+    return df
+
+
+def _format_dates(mask: pd.Series) -> List[str]:
+    """Dates of the bars where ``mask`` is True"""
+    index = mask.index[mask.to_numpy()]
+    if isinstance(index, pd.DatetimeIndex):
+        return list(index.strftime('%Y-%m-%d'))
+    return [str(value) for value in index]
+
+
+def _screen_files(filepaths: List[str], history: bool = False, use_cache: bool = True) -> dict:
+    """Screen a shard of CSV files; runs in a worker process for sharded scans"""
     results = {
         'consolidating': [],
         'breaking_out': [],
         'errors': []
     }
+    if history:
+        results['history'] = {}
     
-    if not os.path.exists(data_directory):
-        results['errors'].append(f"Directory {data_directory} does not exist")
-        return results
-    
-    for filename in os.listdir(data_directory):
-        if not filename.endswith('.csv'):
-            continue
-            
+    for filepath in filepaths:
+        filename = os.path.basename(filepath)
         try:
-            filepath = os.path.join(data_directory, filename)
-            df = pd.read_csv(filepath, index_col=0, parse_dates=True)
+            df = read_daily_csv(filepath, use_cache=use_cache)
             
             # Validate required columns
             required_columns = ['Open', 'High', 'Low', 'Close']
@@ -90,11 +342,21 @@ def scan_for_patterns(data_directory: str = 'datasets/daily') -> dict:
             
             symbol = filename.replace('.csv', '')
             
-            if is_consolidating(df, percentage=2.5):
+            # One pass over the history gives the latest state and the timeline
+            consolidating = consolidation_series(df, percentage=2.5)
+            breaking_out = breakout_series(df)
+            
+            if len(df) and consolidating.iloc[-1]:
                 results['consolidating'].append(symbol)
 
-            if is_breaking_out(df):
+            if len(df) and breaking_out.iloc[-1]:
                 results['breaking_out'].append(symbol)
+            
+            if history:
+                results['history'][symbol] = {
+                    'consolidating': _format_dates(consolidating),
+                    'breaking_out': _format_dates(breaking_out)
+                }
                 
         except Exception as e:
             results['errors'].append(f"Error processing {filename}: {str(e)}")
@@ -102,6 +364,224 @@ def scan_for_patterns(data_directory: str = 'datasets/daily') -> dict:
     return results
 
 
+def scan_for_patterns(data_directory: str = 'datasets/daily', workers: Union[int, str, None] = None,
+                      history: bool = False, use_cache: bool = True) -> dict:
+    """
+    Scan all stocks in directory for consolidation and breakout patterns.
+    
+    Reading and screening the files is sharded across worker processes when
+    CSV_INGEST_WORKERS (or ``workers``) asks for more than one and there are
+    at least CSV_SHARD_MIN_FILES files; each worker reads its own files, so
+    only file names and symbols cross processes. Scripts that enable this
+    need an ``if __name__ == '__main__'`` guard, as for any spawned pool. Files are read with ``read_daily_csv``, so unchanged CSVs are
+    loaded from their binary cache.
+    
+    Args:
+        data_directory: Directory containing stock CSV files
+        workers: Process count, 'auto', or None for CSV_INGEST_WORKERS
+        history: Also return every symbol's consolidation and breakout timeline
+        use_cache: Read and write the binary CSV caches
+        
+    Returns:
+        dict: Results with consolidating and breaking_out lists, and with
+        ``history`` a 'history' dict mapping each symbol to the dates it was
+        consolidating and breaking out
+    """
+    results = {
+        'consolidating': [],
+        'breaking_out': [],
+        'errors': []
+    }
+    
+    if not os.path.exists(data_directory):
+        results['errors'].append(f"Directory {data_directory} does not exist")
+        return results
+    
+    filepaths = [os.path.join(data_directory, filename) for filename in os.listdir(data_directory)
+                 if filename.endswith('.csv')]
+    
+    if history:
+        results['history'] = {}
+    
+    screen = partial(_screen_files, history=history, use_cache=use_cache)
+    workers = CSV_INGEST_WORKERS if workers is None else workers
+    for shard in map_sharded(screen, filepaths, workers, min_items=CSV_SHARD_MIN_FILES):
+        for key in ('consolidating', 'breaking_out', 'errors'):
+            results[key].extend(shard[key])
+        if history:
+            results['history'].update(shard['history'])
+    
+    return results
+
+
+class ConsolidationSweep:
+    """
+    Latest consolidation and breakout state over a grid of settings.
+    
+    Holds the result of ``is_consolidating`` and ``is_breaking_out`` for
+    every symbol, consolidation window and threshold percentage as boolean
+    cubes of shape (symbols, windows, percentages).
+    
+    Attributes:
+        symbols (List[str]): Symbols, one per row
+        windows (List[int]): Consolidation windows, in bars
+        percentages (List[float]): Threshold percentages
+        consolidating (np.ndarray): Boolean cube of consolidating symbols
+        breaking_out (np.ndarray): Boolean cube of symbols breaking out
+        errors (List[str]): Files that could not be screened
+    """
+    
+    def __init__(self, symbols: List[str], windows: List[int], percentages: List[float],
+                 consolidating: np.ndarray, breaking_out: np.ndarray, errors: Optional[List[str]] = None) -> None:
+        self.symbols = list(symbols)
+        self.windows = list(windows)
+        self.percentages = list(percentages)
+        self.consolidating = consolidating
+        self.breaking_out = breaking_out
+        self.errors = list(errors or [])
+    
+    def symbols_for(self, window: int, percentage: float, signal: str = 'consolidating') -> List[str]:
+        """
+        List the symbols flagged for one setting of the grid
+        
+        Args:
+            window: One of ``windows``
+            percentage: One of ``percentages``
+            signal: 'consolidating' or 'breaking_out'
+            
+        Returns:
+            Symbols in row order
+        """
+        cube = getattr(self, signal)
+        column = cube[:, self.windows.index(window), self.percentages.index(percentage)]
+        return [self.symbols[i] for i in np.flatnonzero(column)]
+    
+    def counts(self, signal: str = 'consolidating') -> pd.DataFrame:
+        """Number of symbols flagged per setting, windows by percentages"""
+        return pd.DataFrame(getattr(self, signal).sum(axis=0), index=pd.Index(self.windows, name='window'),
+                            columns=pd.Index(self.percentages, name='percentage'))
+
+
+def sweep_closes(closes: List[np.ndarray], windows: List[int], percentages: List[float]) -> Dict[str, np.ndarray]:
+    """
+    Evaluate every (window, percentage) setting on the latest bar of each series.
+    
+    All windows end at the latest close, so the max/min of each window is a
+    running max/min taken from the latest close backwards. One pass over the
+    last ``max(windows) + 1`` closes then answers every window, and each
+    extra window or threshold only costs a lookup and a comparison per symbol.
+    
+    Args:
+        closes: Close series, one per symbol, oldest first
+        windows: Consolidation windows, in bars
+        percentages: Threshold percentages
+        
+    Returns:
+        Dictionary with boolean 'consolidating' and 'breaking_out' arrays of
+        shape (symbols, windows, percentages)
+    """
+    windows = np.asarray(windows, dtype=np.intp)
+    thresholds = 1 - np.asarray(percentages, dtype=np.float64) / 100
+    if windows.size == 0 or thresholds.size == 0 or windows.min() < 1:
+        raise ValueError("Sweeps need at least one window of 1 or more bars and one percentage")
+    
+    # Trailing closes, NaN padded on the left and newest last
+    span = int(windows.max()) + 1
+    tails = np.full((len(closes), span), np.nan)
+    lengths = np.zeros(len(closes), dtype=np.intp)
+    for i, series in enumerate(closes):
+        tail = np.asarray(series, dtype=np.float64)[-span:]
+        tails[i, span - len(tail):] = tail
+        lengths[i] = len(series)
+    
+    def window_state(window_tails: np.ndarray, available: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Consolidation cube and window highs for the bar ending ``window_tails``"""
+        # fmax/fmin skip missing closes like the pandas max/min in is_consolidating
+        newest_first = window_tails[:, ::-1]
+        highs = np.fmax.accumulate(newest_first, axis=1)[:, windows - 1]
+        lows = np.fmin.accumulate(newest_first, axis=1)[:, windows - 1]
+        with np.errstate(invalid='ignore'):
+            flags = lows[:, :, None] > highs[:, :, None] * thresholds
+        return flags & (available[:, None] >= windows)[:, :, None], highs
+    
+    latest, _ = window_state(tails[:, 1:], lengths)
+    previous, previous_highs = window_state(tails[:, :-1], lengths - 1)
+    with np.errstate(invalid='ignore'):
+        above = tails[:, -1:] > previous_highs
+    
+    return {
+        'consolidating': latest,
+        'breaking_out': previous & above[:, :, None]
+    }
+
+
+def _sweep_files(filepaths: List[str], windows: List[int], percentages: List[float],
+                 use_cache: bool = True) -> dict:
+    """Sweep a shard of CSV files; runs in a worker process for sharded sweeps"""
+    symbols = []
+    closes = []
+    errors = []
+    for filepath in filepaths:
+        filename = os.path.basename(filepath)
+        try:
+            df = read_daily_csv(filepath, use_cache=use_cache)
+            if not all(col in df.columns for col in ['Open', 'High', 'Low', 'Close']):
+                errors.append(f"Missing required columns in {filename}")
+                continue
+            symbols.append(filename.replace('.csv', ''))
+            closes.append(df['Close'].to_numpy(dtype=np.float64))
+        except Exception as e:
+            errors.append(f"Error processing {filename}: {str(e)}")
+    
+    result = sweep_closes(closes, windows, percentages)
+    result.update(symbols=symbols, errors=errors)
+    return result
+
+
+def sweep_consolidation(windows: List[int], percentages: List[float], data_directory: str = 'datasets/daily',
+                        workers: Union[int, str, None] = None, use_cache: bool = True) -> ConsolidationSweep:
+    """
+    Screen all stocks in a directory for every consolidation setting at once.
+    
+    Each file is read once (through ``read_daily_csv``) and judged for the
+    whole grid of windows and percentages, instead of rerunning
+    ``scan_for_patterns`` per setting. Files are sharded across worker
+    processes like in ``scan_for_patterns``.
+    
+    Args:
+        windows: Consolidation windows, in bars
+        percentages: Threshold percentages, used for consolidations and breakouts
+        data_directory: Directory containing stock CSV files
+        workers: Process count, 'auto', or None for CSV_INGEST_WORKERS
+        use_cache: Read and write the binary CSV caches
+        
+    Returns:
+        ConsolidationSweep: Result cubes of shape (symbols, windows, percentages)
+    """
+    windows = [int(window) for window in windows]
+    percentages = [float(percentage) for percentage in percentages]
+    empty = np.zeros((0, len(windows), len(percentages)), dtype=bool)
+    # Validates the grid before any file is read
+    sweep_closes([], windows, percentages)
+    
+    if not os.path.exists(data_directory):
+        return ConsolidationSweep([], windows, percentages, empty, empty,
+                                  [f"Directory {data_directory} does not exist"])
+    
+    filepaths = [os.path.join(data_directory, filename) for filename in os.listdir(data_directory)
+                 if filename.endswith('.csv')]
+    workers = CSV_INGEST_WORKERS if workers is None else workers
+    shards = map_sharded(partial(_sweep_files, windows=windows, percentages=percentages, use_cache=use_cache),
+                         filepaths, workers, min_items=CSV_SHARD_MIN_FILES)
+    
+    return ConsolidationSweep(
+        [symbol for shard in shards for symbol in shard['symbols']], windows, percentages,
+        np.concatenate([shard['consolidating'] for shard in shards]),
+        np.concatenate([shard['breaking_out'] for shard in shards]),
+        [error for shard in shards for error in shard['errors']]
+    )
+
+
 if __name__ == "__main__":
     """Script execution for testing purposes only"""
     results = scan_for_patterns()
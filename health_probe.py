@@ -0,0 +1,143 @@
+"""
+Cached upstream health probe
+
+Checking the Alpaca connection means fetching bars, which costs API quota and
+takes seconds. Health checks therefore report the result of the last probe
+and only start a new one once that result is older than a TTL. By default the
+new probe runs on a background thread, so a health check never waits for the
+upstream API; the refreshed result is reported by the checks that follow.
+
+Classes:
+    HealthProbe: TTL-cached probe refreshed in the background or lazily
+
+Functions:
+    get_health_probe: Factory function returning singleton probe instance
+"""
+
+import os
+import time
+import logging
+import threading
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Seconds a probe result is reused before a new probe is started
+HEALTH_PROBE_TTL = int(os.getenv('HEALTH_PROBE_TTL', '60'))
+
+# Results older than this are reported as stale, e.g. while a probe hangs
+HEALTH_PROBE_MAX_AGE = int(os.getenv('HEALTH_PROBE_MAX_AGE', '300'))
+
+
+class HealthProbe:
+    """
+    Thread-safe cache around a slow boolean health probe.
+
+    Reported statuses are 'ok' or 'error' for a probe result younger than
+    ``max_age``, 'stale' for an older one and 'pending' before the first
+    probe has finished.
+
+    Attributes:
+        ttl (float): Seconds a result is reused before probing again
+        max_age (float): Seconds after which a result is reported as stale
+        background (bool): Probe on a background thread instead of inline
+        probes (int): Number of probes started
+    """
+
+    def __init__(self, probe: Callable[[], bool], ttl: float = HEALTH_PROBE_TTL,
+                 max_age: float = HEALTH_PROBE_MAX_AGE, background: bool = True,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        self.ttl = ttl
+        self.max_age = max(max_age, ttl)
+        self.background = background
+        self._probe = probe
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._result = None  # (ok, error, finished_at, latency, checked_at)
+        self._running = False
+        self.probes = 0
+
+    def _needs_probe(self) -> bool:
+        """Check whether a new probe should start; the caller holds the lock"""
+        if self._running:
+            return False
+        return self._result is None or self._clock() - self._result[2] >= self.ttl
+
+    def refresh(self) -> None:
+        """Run the probe now and record its result"""
+        start = self._clock()
+        checked_at = datetime.now().isoformat(timespec='seconds')
+        error = None
+        try:
+            ok = bool(self._probe())
+        except Exception as e:
+            logger.error(f"Health probe failed: {str(e)}")
+            ok, error = False, str(e)
+
+        finished = self._clock()
+        with self._lock:
+            self._result = (ok, error, finished, finished - start, checked_at)
+            self._running = False
+
+    def status(self) -> Dict[str, Any]:
+        """
+        Return the cached probe result, starting a new probe when it expired
+
+        Returns:
+            Dictionary with 'status', 'checked_at', 'age_seconds', 'latency_ms'
+            and, when the probe raised, 'error'
+        """
+        with self._lock:
+            start = self._needs_probe()
+            if start:
+                self._running = True
+                self.probes += 1
+
+        if start:
+            if self.background:
+                threading.Thread(target=self.refresh, name='health-probe', daemon=True).start()
+            else:
+                self.refresh()
+
+        with self._lock:
+            result = self._result
+            refreshing = self._running
+
+        if result is None:
+            return {'status': 'pending', 'checked_at': None, 'age_seconds': None,
+                    'latency_ms': None, 'refreshing': refreshing}
+
+        ok, error, finished, latency, checked_at = result
+        age = self._clock() - finished
+        report = {
+            'status': ('ok' if ok else 'error') if age < self.max_age else 'stale',
+            'checked_at': checked_at,
+            'age_seconds': round(age, 3),
+            'latency_ms': round(latency * 1000, 1),
+            'refreshing': refreshing
+        }
+        if error:
+            report['error'] = error
+        return report
+
+
+# Global probe instance, shared by every health check served by this process
+_health_probe = None
+
+
+def get_health_probe(probe: Optional[Callable[[], bool]] = None) -> HealthProbe:
+    """
+    Get or create the global health probe
+
+    Args:
+        probe: Probe function, used only when the instance is created
+    """
+    global _health_probe
+
+    if _health_probe is None:
+        if probe is None:
+            raise ValueError("A probe function is required to create the health probe")
+        _health_probe = HealthProbe(probe)
+
+    return _health_probe
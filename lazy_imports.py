@@ -0,0 +1,76 @@
+"""
+Deferred imports for the serverless handlers
+
+Every cold start of a handler pays for the modules it imports, and pandas
+or the alpaca-py SDK take hundreds of milliseconds to load. Modules imported
+through ``lazy_import`` are only loaded when one of their attributes is
+first used, so requests that never touch them (answered from the signal
+matrix, rate limited, rejected, or health checks) do not pay for them.
+
+Modules using a lazy ``pd`` also need ``from __future__ import annotations``,
+so that ``pd.DataFrame`` in signatures is not evaluated at import time.
+
+Classes:
+    LazyModule: Module proxy importing its target on first attribute access
+
+Functions:
+    lazy_import: Return a module, or a proxy for it when not yet imported
+"""
+
+import sys
+import types
+import importlib
+import threading
+
+_load_lock = threading.RLock()
+
+
+class LazyModule(types.ModuleType):
+    """
+    Proxy for a module that is imported on first attribute access.
+
+    Attribute lookups are always forwarded to the real module, so patching
+    it (e.g. in tests) is seen through the proxy. The proxy is not put in
+    ``sys.modules``: a plain ``import`` elsewhere still gets the real module.
+    """
+
+    def __init__(self, name: str) -> None:
+        super().__init__(name)
+        self.__dict__['_lazy_module'] = None
+
+    def _load(self) -> types.ModuleType:
+        """Import the target module once, even when first used from several threads"""
+        module = self.__dict__['_lazy_module']
+        if module is None:
+            with _load_lock:
+                module = self.__dict__['_lazy_module']
+                if module is None:
+                    module = importlib.import_module(self.__name__)
+                    self.__dict__['_lazy_module'] = module
+        return module
+
+    def __getattr__(self, attr: str):
+        return getattr(self._load(), attr)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self) -> str:
+        state = 'loaded' if self.__dict__['_lazy_module'] is not None else 'not loaded'
+        return f"<lazy module '{self.__name__}' ({state})>"
+
+
+def lazy_import(name: str) -> types.ModuleType:
+    """
+    Return the module ``name``, deferring its import until first use
+
+    Args:
+        name: Absolute module name, e.g. 'pandas'
+
+    Returns:
+        The module itself when it is already imported, otherwise a LazyModule
+    """
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    return LazyModule(name)
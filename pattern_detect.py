@@ -3,12 +3,13 @@ import yfinance as yf
 from typing import Dict, List, Optional, Union
 import logging
 from datetime import datetime, timedelta
+from pattern_engine import align_panel, detect_pattern, detect_patterns
 
 logger = logging.getLogger(__name__)
 
 
 class PatternDetector:
-    """Advanced pattern detection using multiple technical analysis libraries"""
+    """Advanced pattern detection using the native NumPy pattern engine"""
     
     def __init__(self):
         self.supported_patterns = [
@@ -61,27 +62,17 @@ class PatternDetector:
             Series with pattern signals or None if error
         """
         try:
-            import pandas_ta as ta
-            
             if pattern_name not in self.supported_patterns:
                 logger.warning(f"Pattern {pattern_name} not supported")
                 return None
             
-            # Convert pattern name to pandas-ta format
-            pattern_func_name = pattern_name.replace('CDL_', '').lower()
+            # Convert pattern name to engine format (e.g., CDL_DOJI -> CDLDOJI)
+            engine_pattern = pattern_name.replace('CDL_', 'CDL')
             
-            # Get the pattern function
-            if hasattr(ta.cdl, pattern_func_name):
-                pattern_func = getattr(ta.cdl, pattern_func_name)
-                result = pattern_func(data['Open'], data['High'], data['Low'], data['Close'])
-                return result
-            else:
-                logger.error(f"Pattern function {pattern_func_name} not found")
-                return None
+            result = detect_pattern(data['Open'].to_numpy(), data['High'].to_numpy(),
+                                    data['Low'].to_numpy(), data['Close'].to_numpy(), engine_pattern)
+            return pd.Series(result, index=data.index, name=pattern_name)
                 
-        except ImportError:
-            logger.error("pandas_ta library not installed. Install with: pip install pandas_ta")
-            return None
         except Exception as e:
             logger.error(f"Error detecting pattern {pattern_name}: {str(e)}")
             return None
@@ -106,6 +97,40 @@ class PatternDetector:
                 
         return results
     
+    def analyze_panel(self, frames: Dict[str, pd.DataFrame], patterns: List[str]) -> Dict[str, pd.DataFrame]:
+        """
+        Analyze multiple patterns across many symbols at once
+        
+        Args:
+            frames: Dictionary mapping symbols to OHLC DataFrames
+            patterns: List of pattern names to analyze
+            
+        Returns:
+            Dictionary mapping pattern names to signal matrices indexed by
+            symbol with one column per date (0 where a symbol has no bar)
+        """
+        results = {}
+        
+        try:
+            symbols, dates, ohlc = align_panel(frames)
+        except Exception as e:
+            logger.error(f"Error aligning data panel: {str(e)}")
+            return results
+        
+        engine_patterns = {}
+        for pattern in patterns:
+            if pattern not in self.supported_patterns:
+                logger.warning(f"Pattern {pattern} not supported")
+                continue
+            engine_patterns[pattern.replace('CDL_', 'CDL')] = pattern
+        
+        signals = detect_patterns(*ohlc, list(engine_patterns))
+        for engine_pattern, result in signals.items():
+            pattern = engine_patterns[engine_pattern]
+            results[pattern] = pd.DataFrame(result, index=symbols, columns=dates)
+                
+        return results
+    
     def get_recent_signals(self, data: pd.DataFrame, pattern_name: str, days: int = 30) -> pd.DataFrame:
         """
         Get recent pattern signals
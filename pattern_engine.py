@@ -0,0 +1,1083 @@
+"""
+Native NumPy candlestick pattern engine
+
+Vectorized implementations of every pattern in ``patterns.candlestick_patterns``
+following TA-Lib's candle definitions and default candle settings, so pattern
+detection no longer depends on TA-Lib being installed behind pandas_ta.
+
+Every pattern is evaluated on raw OHLC arrays with whole-array operations: no
+per-row Python loops. Results use TA-Lib's conventions: int32 arrays where
+100 is bullish, -100 is bearish, +/-200 marks a confirmed hikkake, and bars
+inside the pattern's lookback period are 0.
+
+Inputs may be 1D series or 2D ``(n_symbols, n_days)`` panels built with
+``align_panel``; a panel is evaluated for the whole universe in one pass and
+each row matches evaluating that symbol on its own.
+
+Classes:
+    CandleFeatures: Candle geometry and averages shared across patterns
+    PatternState: Trailing bars needed to update latest signals bar by bar
+
+Functions:
+    detect_pattern: Evaluate a single pattern on OHLC arrays
+    detect_patterns: Evaluate several patterns on the same OHLC arrays
+    evaluate_patterns: Evaluate several patterns on precomputed candle features
+    detect_latest: Evaluate patterns on the latest bar only
+    get_lookback: Number of leading bars a pattern cannot be evaluated on
+    get_window: Number of trailing bars needed to evaluate the latest bar
+    align_panel: Align per-symbol OHLC DataFrames into a symbols x days panel
+    align_tails: Stack the trailing bars of per-symbol OHLC DataFrames
+
+Constants:
+    CANDLE_SETTINGS: TA-Lib default candle settings used by the patterns
+    SUPPORTED_PATTERNS: Names of the patterns this engine implements
+"""
+
+from __future__ import annotations
+
+import logging
+import numpy as np
+from typing import Dict, Iterable, List, Tuple
+
+from lazy_imports import lazy_import
+
+# pandas is only needed to align DataFrames, not to evaluate patterns
+pd = lazy_import('pandas')
+
+logger = logging.getLogger(__name__)
+
+# Range types used by candle settings (TA_RangeType)
+RANGE_REALBODY = 'RealBody'
+RANGE_HIGHLOW = 'HighLow'
+RANGE_SHADOWS = 'Shadows'
+
+# TA-Lib default candle settings: (range type, averaging period, factor)
+CANDLE_SETTINGS: Dict[str, Tuple[str, int, float]] = {
+    'BodyLong': (RANGE_REALBODY, 10, 1.0),
+    'BodyVeryLong': (RANGE_REALBODY, 10, 3.0),
+    'BodyShort': (RANGE_REALBODY, 10, 1.0),
+    'BodyDoji': (RANGE_HIGHLOW, 10, 0.1),
+    'ShadowLong': (RANGE_REALBODY, 0, 1.0),
+    'ShadowVeryLong': (RANGE_REALBODY, 0, 2.0),
+    'ShadowShort': (RANGE_SHADOWS, 10, 1.0),
+    'ShadowVeryShort': (RANGE_HIGHLOW, 10, 0.1),
+    'Near': (RANGE_HIGHLOW, 5, 0.2),
+    'Far': (RANGE_HIGHLOW, 5, 0.6),
+    'Equal': (RANGE_HIGHLOW, 5, 0.05),
+}
+
+
+class CandleFeatures:
+    """
+    Candle features shared by every pattern evaluated on the same bars.
+
+    Body size, body top and bottom, upper and lower shadows, range and colour
+    are computed once on construction; the trailing candle-setting averages
+    (body, shadow and range averages) are computed on first use and cached, so
+    evaluating many patterns on one instance does each of these only once.
+
+    All arrays are float64 and indexed along the last axis, so the same code
+    evaluates a single series or a stack of aligned series. ``at(x, k)``
+    returns ``x`` as seen from ``k`` bars back; positions without history are
+    NaN so every comparison against them is False.
+    """
+
+    def __init__(self, open_, high, low, close) -> None:
+        self.open = np.asarray(open_, dtype=np.float64)
+        self.high = np.asarray(high, dtype=np.float64)
+        self.low = np.asarray(low, dtype=np.float64)
+        self.close = np.asarray(close, dtype=np.float64)
+
+        self.body = np.abs(self.close - self.open)
+        self.body_top = np.maximum(self.open, self.close)
+        self.body_bottom = np.minimum(self.open, self.close)
+        self.upper_shadow = self.high - self.body_top
+        self.lower_shadow = self.body_bottom - self.low
+        self.range = self.high - self.low
+        self.color = np.where(self.close >= self.open, 1.0, -1.0)
+        self.color[np.isnan(self.close) | np.isnan(self.open)] = np.nan
+
+        self.valid = ~(np.isnan(self.open) | np.isnan(self.high) | np.isnan(self.low) | np.isnan(self.close))
+        # Position of the first complete bar of each series (n when there is none)
+        self.first_valid = np.where(self.valid.any(axis=-1), self.valid.argmax(axis=-1), self.valid.shape[-1])
+
+        self._averages = {}
+
+    @property
+    def n(self) -> int:
+        return self.close.shape[-1]
+
+    def at(self, values: np.ndarray, k: int) -> np.ndarray:
+        """Shift ``values`` k bars forward along the last axis"""
+        if k == 0:
+            return values
+        shifted = np.full(values.shape, np.nan)
+        if k < values.shape[-1]:
+            shifted[..., k:] = values[..., :-k]
+        return shifted
+
+    def candle_range(self, range_type: str) -> np.ndarray:
+        """TA_CANDLERANGE for every bar"""
+        if range_type == RANGE_REALBODY:
+            return self.body
+        if range_type == RANGE_HIGHLOW:
+            return self.range
+        return self.upper_shadow + self.lower_shadow
+
+    def avg(self, setting: str, k: int = 0) -> np.ndarray:
+        """
+        TA_CANDLEAVERAGE of a candle setting for the candle k bars back
+
+        The average for a candle covers the ``period`` candles before it. Each
+        window is summed oldest first, independently of earlier windows, so a
+        bar's value never depends on how much history precedes it.
+        """
+        if setting not in self._averages:
+            range_type, period, factor = CANDLE_SETTINGS[setting]
+            ranges = self.candle_range(range_type)
+            if period:
+                total = self.at(ranges, period).copy()
+                for lag in range(period - 1, 0, -1):
+                    total += self.at(ranges, lag)
+                average = factor * (total / period)
+            else:
+                average = factor * ranges
+            if range_type == RANGE_SHADOWS:
+                average = average / 2.0
+            self._averages[setting] = average
+        return self.at(self._averages[setting], k)
+
+    # Candle accessors for the bar k candles back
+    def o(self, k: int = 0) -> np.ndarray:
+        return self.at(self.open, k)
+
+    def h(self, k: int = 0) -> np.ndarray:
+        return self.at(self.high, k)
+
+    def l(self, k: int = 0) -> np.ndarray:
+        return self.at(self.low, k)
+
+    def c(self, k: int = 0) -> np.ndarray:
+        return self.at(self.close, k)
+
+    def rb(self, k: int = 0) -> np.ndarray:
+        return self.at(self.body, k)
+
+    def top(self, k: int = 0) -> np.ndarray:
+        return self.at(self.body_top, k)
+
+    def bottom(self, k: int = 0) -> np.ndarray:
+        return self.at(self.body_bottom, k)
+
+    def us(self, k: int = 0) -> np.ndarray:
+        return self.at(self.upper_shadow, k)
+
+    def ls(self, k: int = 0) -> np.ndarray:
+        return self.at(self.lower_shadow, k)
+
+    def hl(self, k: int = 0) -> np.ndarray:
+        return self.at(self.range, k)
+
+    def col(self, k: int = 0) -> np.ndarray:
+        return self.at(self.color, k)
+
+    def body_gap_up(self, k: int, j: int) -> np.ndarray:
+        """TA_REALBODYGAPUP(i-k, i-j)"""
+        return self.bottom(k) > self.top(j)
+
+    def body_gap_down(self, k: int, j: int) -> np.ndarray:
+        """TA_REALBODYGAPDOWN(i-k, i-j)"""
+        return self.top(k) < self.bottom(j)
+
+    def gap_up(self, k: int, j: int) -> np.ndarray:
+        """TA_CANDLEGAPUP(i-k, i-j)"""
+        return self.l(k) > self.h(j)
+
+    def gap_down(self, k: int, j: int) -> np.ndarray:
+        """TA_CANDLEGAPDOWN(i-k, i-j)"""
+        return self.h(k) < self.l(j)
+
+
+def _signal(condition: np.ndarray, value) -> np.ndarray:
+    """Return ``value`` where ``condition`` holds and 0 elsewhere"""
+    return np.where(condition, value, 0.0)
+
+
+def _cdl2crows(k: CandleFeatures) -> np.ndarray:
+    cond = ((k.col(2) == 1) & (k.rb(2) > k.avg('BodyLong', 2)) &
+            (k.col(1) == -1) & k.body_gap_up(1, 2) &
+            (k.col(0) == -1) & (k.o() < k.o(1)) & (k.o() > k.c(1)) &
+            (k.c() > k.o(2)) & (k.c() < k.c(2)))
+    return _signal(cond, -100)
+
+
+def _cdl3blackcrows(k: CandleFeatures) -> np.ndarray:
+    cond = ((k.col(3) == 1) &
+            (k.col(2) == -1) & (k.ls(2) < k.avg('ShadowVeryShort', 2)) &
+            (k.col(1) == -1) & (k.ls(1) < k.avg('ShadowVeryShort', 1)) &
+            (k.col(0) == -1) & (k.ls() < k.avg('ShadowVeryShort')) &
+            (k.o(1) < k.o(2)) & (k.o(1) > k.c(2)) &
+            (k.o() < k.o(1)) & (k.o() > k.c(1)) &
+            (k.h(3) > k.c(2)) &
+            (k.c(2) > k.c(1)) & (k.c(1) > k.c()))
+    return _signal(cond, -100)
+
+
+def _cdl3inside(k: CandleFeatures) -> np.ndarray:
+    cond = ((k.rb(2) > k.avg('BodyLong', 2)) &
+            (k.rb(1) <= k.avg('BodyShort', 1)) &
+            (k.top(1) < k.top(2)) & (k.bottom(1) > k.bottom(2)) &
+            (((k.col(2) == 1) & (k.col() == -1) & (k.c() < k.o(2))) |
+             ((k.col(2) == -1) & (k.col() == 1) & (k.c() > k.o(2)))))
+    return _signal(cond, -k.col(2) * 100)
+
+
+def _cdl3linestrike(k: CandleFeatures) -> np.ndarray:
+    cond = ((k.col(3) == k.col(2)) & (k.col(2) == k.col(1)) & (k.col() == -k.col(1)) &
+            (k.o(2) >= k.bottom(3) - k.avg('Near', 3)) & (k.o(2) <= k.top(3) + k.avg('Near', 3)) &
+            (k.o(1) >= k.bottom(2) - k.avg('Near', 2)) & (k.o(1) <= k.top(2) + k.avg('Near', 2)) &
+            (((k.col(1) == 1) & (k.c(1) > k.c(2)) & (k.c(2) > k.c(3)) &
+              (k.o() > k.c(1)) & (k.c() < k.o(3))) |
+             ((k.col(1) == -1) & (k.c(1) < k.c(2)) & (k.c(2) < k.c(3)) &
+              (k.o() < k.c(1)) & (k.c() > k.o(3)))))
+    return _signal(cond, k.col(1) * 100)
+
+
+def _cdl3outside(k: CandleFeatures) -> np.ndarray:
+    cond = (((k.col(1) == 1) & (k.col(2) == -1) & (k.c(1) > k.o(2)) & (k.o(1) < k.c(2)) &
+             (k.c() > k.c(1))) |
+            ((k.col(1) == -1) & (k.col(2) == 1) & (k.o(1) > k.c(2)) & (k.c(1) < k.o(2)) &
+             (k.c() < k.c(1))))
+    return _signal(cond, k.col(1) * 100)
+
+
+def _cdl3starsinsouth(k: CandleFeatures) -> np.ndarray:
+    cond = ((k.col(2) == -1) & (k.col(1) == -1) & (k.col() == -1) &
+            # 1st: long black candle with a long lower shadow
+            (k.rb(2) > k.avg('BodyLong', 2)) & (k.ls(2) > k.avg('ShadowLong', 2)) &
+            # 2nd: smaller candle opening above the prior close, low above the prior low
+            (k.rb(1) < k.rb(2)) & (k.o(1) > k.c(2)) & (k.o(1) <= k.h(2)) &
+            (k.l(1) < k.c(2)) & (k.l(1) >= k.l(2)) & (k.ls(1) > k.avg('ShadowVeryShort', 1)) &
+            # 3rd: small marubozu engulfed by the prior candle's range
+            (k.rb() < k.avg('BodyShort')) & (k.ls() < k.avg('ShadowVeryShort')) &
+            (k.us() < k.avg('ShadowVeryShort')) & (k.l() > k.l(1)) & (k.h() < k.h(1)))
+    return _signal(cond, 100)
+
+
+def _cdl3whitesoldiers(k: CandleFeatures) -> np.ndarray:
+    cond = ((k.col(2) == 1) & (k.us(2) < k.avg('ShadowVeryShort', 2)) &
+            (k.col(1) == 1) & (k.us(1) < k.avg('ShadowVeryShort', 1)) &
+            (k.col() == 1) & (k.us() < k.avg('ShadowVeryShort')) &
+            (k.c() > k.c(1)) & (k.c(1) > k.c(2)) &
+            (k.o(1) > k.o(2)) & (k.o(1) <= k.c(2) + k.avg('Near', 2)) &
+            (k.o() > k.o(1)) & (k.o() <= k.c(1) + k.avg('Near', 1)) &
+            (k.rb(1) > k.rb(2) - k.avg('Far', 2)) &
+            (k.rb() > k.rb(1) - k.avg('Far', 1)) &
+            (k.rb() > k.avg('BodyShort')))
+    return _signal(cond, 100)
+
+
+def _cdlabandonedbaby(k: CandleFeatures, penetration: float = 0.3) -> np.ndarray:
+    cond = ((k.rb(2) > k.avg('BodyLong', 2)) &
+            (k.rb(1) <= k.avg('BodyDoji', 1)) &
+            (k.rb() > k.avg('BodyShort')) &
+            (((k.col(2) == 1) & (k.col() == -1) & (k.c() < k.c(2) - k.rb(2) * penetration) &
+              k.gap_up(1, 2) & k.gap_down(0, 1)) |
+             ((k.col(2) == -1) & (k.col() == 1) & (k.c() > k.c(2) + k.rb(2) * penetration) &
+              k.gap_down(1, 2) & k.gap_up(0, 1))))
+    return _signal(cond, k.col() * 100)
+
+
+def _cdladvanceblock(k: CandleFeatures) -> np.ndarray:
+    cond = ((k.col(2) == 1) & (k.col(1) == 1) & (k.col() == 1) &
+            (k.c() > k.c(1)) & (k.c(1) > k.c(2)) &
+            (k.o(1) > k.o(2)) & (k.o(1) <= k.c(2) + k.avg('Near', 2)) &
+            (k.o() > k.o(1)) & (k.o() <= k.c(1) + k.avg('Near', 1)) &
+            (k.rb(2) > k.avg('BodyLong', 2)) &
+            (k.us(2) < k.avg('ShadowShort', 2)) &
+            (
+                # 2nd far smaller than 1st and 3rd not longer than 2nd
+                ((k.rb(1) < k.rb(2) - k.avg('Far', 2)) & (k.rb() < k.rb(1) + k.avg('Near', 1))) |
+                # 3rd far smaller than 2nd
+                (k.rb() < k.rb(1) - k.avg('Far', 1)) |
+                # 3rd smaller than 2nd, 2nd smaller than 1st, 3rd or 2nd with long upper shadow
+                ((k.rb() < k.rb(1)) & (k.rb(1) < k.rb(2)) &
+                 ((k.us() > k.avg('ShadowShort')) | (k.us(1) > k.avg('ShadowShort', 1)))) |
+                # 3rd smaller than 2nd with a long upper shadow
+                ((k.rb() < k.rb(1)) & (k.us() > k.avg('ShadowLong')))
+            ))
+    return _signal(cond, -100)
+
+
+def _cdlbelthold(k: CandleFeatures) -> np.ndarray:
+    cond = ((k.rb() > k.avg('BodyLong')) &
+            (((k.col() == 1) & (k.ls() < k.avg('ShadowVeryShort'))) |
+             ((k.col() == -1) & (k.us() < k.avg('ShadowVeryShort')))))
+    return _signal(cond, k.col() * 100)
+
+
+def _cdlbreakaway(k: CandleFeatures) -> np.ndarray:
+    cond = ((k.rb(4) > k.avg('BodyLong', 4)) &
+            (k.col(4) == k.col(3)) & (k.col(3) == k.col(1)) & (k.col(1) == -k.col()) &
+            (((k.col(4) == -1) & k.body_gap_down(3, 4) &
+              (k.h(2) < k.h(3)) & (k.l(2) < k.l(3)) & (k.h(1) < k.h(2)) & (k.l(1) < k.l(2)) &
+              (k.c() > k.o(3)) & (k.c() < k.c(4))) |
+             ((k.col(4) == 1) & k.body_gap_up(3, 4) &
+              (k.h(2) > k.h(3)) & (k.l(2) > k.l(3)) & (k.h(1) > k.h(2)) & (k.l(1) > k.l(2)) &
+              (k.c() < k.o(3)) & (k.c() > k.c(4)))))
+    return _signal(cond, k.col() * 100)
+
+
+def _cdlclosingmarubozu(k: CandleFeatures) -> np.ndarray:
+    cond = ((k.rb() > k.avg('BodyLong')) &
+            (((k.col() == 1) & (k.us() < k.avg('ShadowVeryShort'))) |
+             ((k.col() == -1) & (k.ls() < k.avg('ShadowVeryShort')))))
+    return _signal(cond, k.col() * 100)
+
+
+def _cdlconcealbabyswall(k: CandleFeatures) -> np.ndarray:
+    cond = ((k.col(3) == -1) & (k.col(2) == -1) & (k.col(1) == -1) & (k.col() == -1) &
+            # 1st and 2nd: marubozu
+            (k.ls(3) < k.avg('ShadowVeryShort', 3)) & (k.us(3) < k.avg('ShadowVeryShort', 3)) &
+            (k.ls(2) < k.avg('ShadowVeryShort', 2)) & (k.us(2) < k.avg('ShadowVeryShort', 2)) &
+            # 3rd: opens gapping down with an upper shadow reaching into the prior body
+            k.body_gap_down(1, 2) & (k.us(1) > k.avg('ShadowVeryShort', 1)) & (k.h(1) > k.c(2)) &
+            # 4th: engulfs the 3rd including its shadows
+            (k.h() > k.h(1)) & (k.l() < k.l(1)))
+    return _signal(cond, 100)
+
+
+def _cdlcounterattack(k: CandleFeatures) -> np.ndarray:
+    cond = ((k.col(1) == -k.col()) &
+            (k.rb(1) > k.avg('BodyLong', 1)) & (k.rb() > k.avg('BodyLong')) &
+            (k.c() <= k.c(1) + k.avg('Equal', 1)) & (k.c() >= k.c(1) - k.avg('Equal', 1)))
+    return _signal(cond, k.col() * 100)
+
+
+def _cdldarkcloudcover(k: CandleFeatures, penetration: float = 0.5) -> np.ndarray:
+    cond = ((k.col(1) == 1) & (k.rb(1) > k.avg('BodyLong', 1)) &
+            (k.col() == -1) & (k.o() > k.h(1)) &
+            (k.c() > k.o(1)) & (k.c() < k.c(1) - k.rb(1) * penetration))
+    return _signal(cond, -100)
+
+
+def _cdldoji(k: CandleFeatures) -> np.ndarray:
+    return _signal(k.rb() <= k.avg('BodyDoji'), 100)
+
+
+def _cdldojistar(k: CandleFeatures) -> np.ndarray:
+    cond = ((k.rb(1) > k.avg('BodyLong', 1)) & (k.rb() <= k.avg('BodyDoji')) &
+            (((k.col(1) == 1) & k.body_gap_up(0, 1)) |
+             ((k.col(1) == -1) & k.body_gap_down(0, 1))))
+    return _signal(cond, -k.col(1) * 100)
+
+
+def _cdldragonflydoji(k: CandleFeatures) -> np.ndarray:
+    cond = ((k.rb() <= k.avg('BodyDoji')) &
+            (k.us() < k.avg('ShadowVeryShort')) & (k.ls() > k.avg('ShadowVeryShort')))
+    return _signal(cond, 100)
+
+
+def _cdlengulfing(k: CandleFeatures) -> np.ndarray:
+    bull = ((k.col() == 1) & (k.col(1) == -1) &
+            (((k.c() >= k.o(1)) & (k.o() < k.c(1))) | ((k.c() > k.o(1)) & (k.o() <= k.c(1)))))
+    bear = ((k.col() == -1) & (k.col(1) == 1) &
+            (((k.o() >= k.c(1)) & (k.c() < k.o(1))) | ((k.o() > k.c(1)) & (k.c() <= k.o(1)))))
+    # Engulfing with a matching open or close is reported with reduced strength
+    strength = np.where((k.o() != k.c(1)) & (k.c() != k.o(1)), 100, 80)
+    return _signal(bull | bear, k.col() * strength)
+
+
+def _cdleveningdojistar(k: CandleFeatures, penetration: float = 0.3) -> np.ndarray:
+    cond = ((k.rb(2) > k.avg('BodyLong', 2)) & (k.col(2) == 1) &
+            (k.rb(1) <= k.avg('BodyDoji', 1)) & k.body_gap_up(1, 2) &
+            (k.rb() > k.avg('BodyShort')) & (k.col() == -1) &
+            (k.c() < k.c(2) - k.rb(2) * penetration))
+    return _signal(cond, -100)
+
+
+def _cdleveningstar(k: CandleFeatures, penetration: float = 0.3) -> np.ndarray:
+    cond = ((k.rb(2) > k.avg('BodyLong', 2)) & (k.col(2) == 1) &
+            (k.rb(1) <= k.avg('BodyShort', 1)) & k.body_gap_up(1, 2) &
+            (k.rb() > k.avg('BodyShort')) & (k.col() == -1) &
+            (k.c() < k.c(2) - k.rb(2) * penetration))
+    return _signal(cond, -100)
+
+
+def _cdlgapsidesidewhite(k: CandleFeatures) -> np.ndarray:
+    gap_up = k.body_gap_up(1, 2) & k.body_gap_up(0, 2)
+    gap_down = k.body_gap_down(1, 2) & k.body_gap_down(0, 2)
+    cond = ((gap_up | gap_down) &
+            (k.col(1) == 1) & (k.col() == 1) &
+            (k.rb() >= k.rb(1) - k.avg('Near', 1)) & (k.rb() <= k.rb(1) + k.avg('Near', 1)) &
+            (k.o() >= k.o(1) - k.avg('Equal', 1)) & (k.o() <= k.o(1) + k.avg('Equal', 1)))
+    return _signal(cond, np.where(k.body_gap_up(1, 2), 100, -100))
+
+
+def _cdlgravestonedoji(k: CandleFeatures) -> np.ndarray:
+    cond = ((k.rb() <= k.avg('BodyDoji')) &
+            (k.ls() < k.avg('ShadowVeryShort')) & (k.us() > k.avg('ShadowVeryShort')))
+    return _signal(cond, 100)
+
+
+def _cdlhammer(k: CandleFeatures) -> np.ndarray:
+    cond = ((k.rb() < k.avg('BodyShort')) & (k.ls() > k.avg('ShadowLong')) &
+            (k.us() < k.avg('ShadowVeryShort')) &
+            (k.bottom() <= k.l(1) + k.avg('Near', 1)))
+    return _signal(cond, 100)
+
+
+def _cdlhangingman(k: CandleFeatures) -> np.ndarray:
+    cond = ((k.rb() < k.avg('BodyShort')) & (k.ls() > k.avg('ShadowLong')) &
+            (k.us() < k.avg('ShadowVeryShort')) &
+            (k.bottom() >= k.h(1) - k.avg('Near', 1)))
+    return _signal(cond, -100)
+
+
+def _harami(k: CandleFeatures, second: np.ndarray) -> np.ndarray:
+    """Shared harami logic; ``second`` says whether the 2nd body is small enough"""
+    base = (k.rb(1) > k.avg('BodyLong', 1)) & second
+    strict = (k.top() < k.top(1)) & (k.bottom() > k.bottom(1))
+    loose = (k.top() <= k.top(1)) & (k.bottom() >= k.bottom(1))
+    # A body sharing an edge with the prior body is reported with reduced strength
+    return np.where(base & strict, -k.col(1) * 100,
+                    np.where(base & loose, -k.col(1) * 80, 0.0))
+
+
+def _cdlharami(k: CandleFeatures) -> np.ndarray:
+    return _harami(k, k.rb() <= k.avg('BodyShort'))
+
+
+def _cdlharamicross(k: CandleFeatures) -> np.ndarray:
+    return _harami(k, k.rb() <= k.avg('BodyDoji'))
+
+
+def _cdlhighwave(k: CandleFeatures) -> np.ndarray:
+    cond = ((k.rb() < k.avg('BodyShort')) &
+            (k.us() > k.avg('ShadowVeryLong')) & (k.ls() > k.avg('ShadowVeryLong')))
+    return _signal(cond, k.col() * 100)
+
+
+def _hikkake_confirmation(k: CandleFeatures, pattern: np.ndarray) -> np.ndarray:
+    """
+    Add TA-Lib's hikkake confirmations to a pattern signal array
+
+    A pattern is confirmed (+/-200) by the first of the next three bars that
+    closes beyond the high (bullish) or low (bearish) of the bar before the
+    pattern bar, unless a newer pattern appears first.
+    """
+    n = k.n
+    idx = np.arange(n)
+    is_pattern = pattern != 0
+
+    # Index of the most recent pattern strictly before each bar
+    last = np.where(is_pattern, idx, -1)
+    last = np.maximum.accumulate(last, axis=-1)
+    last = np.concatenate([np.full(last.shape[:-1] + (1,), -1), last[..., :-1]], axis=-1)
+
+    has_pattern = last >= 1
+    ref = np.clip(last - 1, 0, None)
+    sign = np.take_along_axis(pattern, np.clip(last, 0, None), axis=-1)
+    ref_high = np.take_along_axis(k.high, ref, axis=-1)
+    ref_low = np.take_along_axis(k.low, ref, axis=-1)
+
+    breaks = (((sign > 0) & (k.close > ref_high)) | ((sign < 0) & (k.close < ref_low)))
+    raw = has_pattern & (idx - last <= 3) & ~is_pattern & breaks
+
+    # Only the first break after each pattern confirms it
+    confirmed = raw.copy()
+    for lag in (1, 2):
+        prior = np.zeros_like(raw)
+        prior[..., lag:] = raw[..., :-lag]
+        confirmed &= ~(prior & (idx - lag > last))
+
+    return np.where(confirmed, sign + np.where(sign > 0, 100, -100), pattern)
+
+
+def _cdlhikkake(k: CandleFeatures) -> np.ndarray:
+    inside = (k.h(1) < k.h(2)) & (k.l(1) > k.l(2))
+    bull = inside & (k.h() < k.h(1)) & (k.l() < k.l(1))
+    bear = inside & (k.h() > k.h(1)) & (k.l() > k.l(1))
+    pattern = np.where(bull, 100.0, np.where(bear, -100.0, 0.0))
+    return _hikkake_confirmation(k, pattern)
+
+
+def _cdlhikkakemod(k: CandleFeatures) -> np.ndarray:
+    inside = ((k.h(2) < k.h(3)) & (k.l(2) > k.l(3)) &
+              (k.h(1) < k.h(2)) & (k.l(1) > k.l(2)))
+    bull = (inside & (k.h() < k.h(1)) & (k.l() < k.l(1)) &
+            (k.c(2) <= k.l(2) + k.avg('Near', 2)))
+    bear = (inside & (k.h() > k.h(1)) & (k.l() > k.l(1)) &
+            (k.c(2) >= k.h(2) - k.avg('Near', 2)))
+    pattern = np.where(bull, 100.0, np.where(bear, -100.0, 0.0))
+    return _hikkake_confirmation(k, pattern)
+
+
+def _cdlhomingpigeon(k: CandleFeatures) -> np.ndarray:
+    cond = ((k.col(1) == -1) & (k.col() == -1) &
+            (k.rb(1) > k.avg('BodyLong', 1)) & (k.rb() <= k.avg('BodyShort')) &
+            (k.o() < k.o(1)) & (k.c() > k.c(1)))
+    return _signal(cond, 100)
+
+
+def _cdlidentical3crows(k: CandleFeatures) -> np.ndarray:
+    cond = ((k.col(2) == -1) & (k.ls(2) < k.avg('ShadowVeryShort', 2)) &
+            (k.col(1) == -1) & (k.ls(1) < k.avg('ShadowVeryShort', 1)) &
+            (k.col() == -1) & (k.ls() < k.avg('ShadowVeryShort')) &
+            (k.c(2) > k.c(1)) & (k.c(1) > k.c()) &
+            (k.o(1) <= k.c(2) + k.avg('Equal', 2)) & (k.o(1) >= k.c(2) - k.avg('Equal', 2)) &
+            (k.o() <= k.c(1) + k.avg('Equal', 1)) & (k.o() >= k.c(1) - k.avg('Equal', 1)))
+    return _signal(cond, -100)
+
+
+def _cdlinneck(k: CandleFeatures) -> np.ndarray:
+    cond = ((k.col(1) == -1) & (k.rb(1) > k.avg('BodyLong', 1)) &
+            (k.col() == 1) & (k.o() < k.l(1)) &
+            (k.c() <= k.c(1) + k.avg('Equal', 1)) & (k.c() >= k.c(1)))
+    return _signal(cond, -100)
+
+
+def _cdlinvertedhammer(k: CandleFeatures) -> np.ndarray:
+    cond = ((k.rb() < k.avg('BodyShort')) & (k.us() > k.avg('ShadowLong')) &
+            (k.ls() < k.avg('ShadowVeryShort')) & k.body_gap_down(0, 1))
+    return _signal(cond, 100)
+
+
+def _kicking(k: CandleFeatures) -> np.ndarray:
+    """Shared kicking logic: two opposite marubozu separated by a gap"""
+    return ((k.col(1) == -k.col()) &
+            (k.rb(1) > k.avg('BodyLong', 1)) &
+            (k.us(1) < k.avg('ShadowVeryShort', 1)) & (k.ls(1) < k.avg('ShadowVeryShort', 1)) &
+            (k.rb() > k.avg('BodyLong')) &
+            (k.us() < k.avg('ShadowVeryShort')) & (k.ls() < k.avg('ShadowVeryShort')) &
+            (((k.col(1) == -1) & k.gap_up(0, 1)) | ((k.col(1) == 1) & k.gap_down(0, 1))))
+
+
+def _cdlkicking(k: CandleFeatures) -> np.ndarray:
+    return _signal(_kicking(k), k.col() * 100)
+
+
+def _cdlkickingbylength(k: CandleFeatures) -> np.ndarray:
+    longer = np.where(k.rb() > k.rb(1), k.col(), k.col(1))
+    return _signal(_kicking(k), longer * 100)
+
+
+def _cdlladderbottom(k: CandleFeatures) -> np.ndarray:
+    cond = ((k.col(4) == -1) & (k.col(3) == -1) & (k.col(2) == -1) &
+            (k.o(4) > k.o(3)) & (k.o(3) > k.o(2)) &
+            (k.c(4) > k.c(3)) & (k.c(3) > k.c(2)) &
+            (k.col(1) == -1) & (k.us(1) > k.avg('ShadowVeryShort', 1)) &
+            (k.col() == 1) & (k.o() > k.o(1)) & (k.c() > k.h(1)))
+    return _signal(cond, 100)
+
+
+def _cdllongleggeddoji(k: CandleFeatures) -> np.ndarray:
+    cond = ((k.rb() <= k.avg('BodyDoji')) &
+            ((k.ls() > k.avg('ShadowLong')) | (k.us() > k.avg('ShadowLong'))))
+    return _signal(cond, 100)
+
+
+def _cdllongline(k: CandleFeatures) -> np.ndarray:
+    cond = ((k.rb() > k.avg('BodyLong')) &
+            (k.us() < k.avg('ShadowShort')) & (k.ls() < k.avg('ShadowShort')))
+    return _signal(cond, k.col() * 100)
+
+
+def _cdlmarubozu(k: CandleFeatures) -> np.ndarray:
+    cond = ((k.rb() > k.avg('BodyLong')) &
+            (k.us() < k.avg('ShadowVeryShort')) & (k.ls() < k.avg('ShadowVeryShort')))
+    return _signal(cond, k.col() * 100)
+
+
+def _cdlmatchinglow(k: CandleFeatures) -> np.ndarray:
+    cond = ((k.col(1) == -1) & (k.col() == -1) &
+            (k.c() <= k.c(1) + k.avg('Equal', 1)) & (k.c() >= k.c(1) - k.avg('Equal', 1)))
+    return _signal(cond, 100)
+
+
+def _cdlmathold(k: CandleFeatures, penetration: float = 0.5) -> np.ndarray:
+    cond = ((k.rb(4) > k.avg('BodyLong', 4)) &
+            (k.rb(3) < k.avg('BodyShort', 3)) & (k.rb(2) < k.avg('BodyShort', 2)) &
+            (k.rb(1) < k.avg('BodyShort', 1)) &
+            (k.col(4) == 1) & (k.col(3) == -1) & (k.col() == 1) &
+            k.body_gap_up(3, 4) &
+            # 3rd and 4th hold within the 1st body
+            (k.bottom(2) < k.c(4)) & (k.bottom(1) < k.c(4)) &
+            (k.bottom(2) > k.c(4) - k.rb(4) * penetration) &
+            (k.bottom(1) > k.c(4) - k.rb(4) * penetration) &
+            # 2nd to 4th are falling
+            (k.top(2) < k.o(3)) & (k.top(1) < k.top(2)) &
+            # 5th opens above the prior close and closes above the reaction highs
+            (k.o() > k.c(1)) &
+            (k.c() > np.maximum(np.maximum(k.h(3), k.h(2)), k.h(1))))
+    return _signal(cond, 100)
+
+
+def _cdlmorningdojistar(k: CandleFeatures, penetration: float = 0.3) -> np.ndarray:
+    cond = ((k.rb(2) > k.avg('BodyLong', 2)) & (k.col(2) == -1) &
+            (k.rb(1) <= k.avg('BodyDoji', 1)) & k.body_gap_down(1, 2) &
+            (k.rb() > k.avg('BodyShort')) & (k.col() == 1) &
+            (k.c() > k.c(2) + k.rb(2) * penetration))
+    return _signal(cond, 100)
+
+
+def _cdlmorningstar(k: CandleFeatures, penetration: float = 0.3) -> np.ndarray:
+    cond = ((k.rb(2) > k.avg('BodyLong', 2)) & (k.col(2) == -1) &
+            (k.rb(1) <= k.avg('BodyShort', 1)) & k.body_gap_down(1, 2) &
+            (k.rb() > k.avg('BodyShort')) & (k.col() == 1) &
+            (k.c() > k.c(2) + k.rb(2) * penetration))
+    return _signal(cond, 100)
+
+
+def _cdlonneck(k: CandleFeatures) -> np.ndarray:
+    cond = ((k.col(1) == -1) & (k.rb(1) > k.avg('BodyLong', 1)) &
+            (k.col() == 1) & (k.o() < k.l(1)) &
+            (k.c() <= k.l(1) + k.avg('Equal', 1)) & (k.c() >= k.l(1) - k.avg('Equal', 1)))
+    return _signal(cond, -100)
+
+
+def _cdlpiercing(k: CandleFeatures) -> np.ndarray:
+    cond = ((k.col(1) == -1) & (k.rb(1) > k.avg('BodyLong', 1)) &
+            (k.col() == 1) & (k.rb() > k.avg('BodyLong')) &
+            (k.o() < k.l(1)) & (k.c() < k.o(1)) & (k.c() > k.c(1) + k.rb(1) * 0.5))
+    return _signal(cond, 100)
+
+
+def _cdlrickshawman(k: CandleFeatures) -> np.ndarray:
+    mid = k.l() + k.hl() / 2
+    cond = ((k.rb() <= k.avg('BodyDoji')) &
+            (k.ls() > k.avg('ShadowLong')) & (k.us() > k.avg('ShadowLong')) &
+            (k.bottom() <= mid + k.avg('Near')) & (k.top() >= mid - k.avg('Near')))
+    return _signal(cond, 100)
+
+
+def _cdlrisefall3methods(k: CandleFeatures) -> np.ndarray:
+    first = k.col(4)
+    cond = ((k.rb(4) > k.avg('BodyLong', 4)) &
+            (k.rb(3) < k.avg('BodyShort', 3)) & (k.rb(2) < k.avg('BodyShort', 2)) &
+            (k.rb(1) < k.avg('BodyShort', 1)) & (k.rb() > k.avg('BodyLong')) &
+            (first == -k.col(3)) & (k.col(3) == k.col(2)) & (k.col(2) == k.col(1)) &
+            (k.col(1) == -k.col()) &
+            # 2nd to 4th hold within the 1st range
+            (k.bottom(3) < k.h(4)) & (k.top(3) > k.l(4)) &
+            (k.bottom(2) < k.h(4)) & (k.top(2) > k.l(4)) &
+            (k.bottom(1) < k.h(4)) & (k.top(1) > k.l(4)) &
+            # 2nd to 4th move against the 1st
+            (k.c(2) * first < k.c(3) * first) & (k.c(1) * first < k.c(2) * first) &
+            # 5th opens beyond the prior close and closes beyond the 1st close
+            (k.o() * first > k.c(1) * first) & (k.c() * first > k.c(4) * first))
+    return _signal(cond, first * 100)
+
+
+def _cdlseparatinglines(k: CandleFeatures) -> np.ndarray:
+    cond = ((k.col(1) == -k.col()) &
+            (k.o() <= k.o(1) + k.avg('Equal', 1)) & (k.o() >= k.o(1) - k.avg('Equal', 1)) &
+            (k.rb() > k.avg('BodyLong')) &
+            (((k.col() == 1) & (k.ls() < k.avg('ShadowVeryShort'))) |
+             ((k.col() == -1) & (k.us() < k.avg('ShadowVeryShort')))))
+    return _signal(cond, k.col() * 100)
+
+
+def _cdlshootingstar(k: CandleFeatures) -> np.ndarray:
+    cond = ((k.rb() < k.avg('BodyShort')) & (k.us() > k.avg('ShadowLong')) &
+            (k.ls() < k.avg('ShadowVeryShort')) & k.body_gap_up(0, 1))
+    return _signal(cond, -100)
+
+
+def _cdlshortline(k: CandleFeatures) -> np.ndarray:
+    cond = ((k.rb() < k.avg('BodyShort')) &
+            (k.us() < k.avg('ShadowShort')) & (k.ls() < k.avg('ShadowShort')))
+    return _signal(cond, k.col() * 100)
+
+
+def _cdlspinningtop(k: CandleFeatures) -> np.ndarray:
+    cond = (k.rb() < k.avg('BodyShort')) & (k.us() > k.rb()) & (k.ls() > k.rb())
+    return _signal(cond, k.col() * 100)
+
+
+def _cdlstalledpattern(k: CandleFeatures) -> np.ndarray:
+    cond = ((k.col(2) == 1) & (k.col(1) == 1) & (k.col() == 1) &
+            (k.c() > k.c(1)) & (k.c(1) > k.c(2)) &
+            (k.rb(2) > k.avg('BodyLong', 2)) & (k.rb(1) > k.avg('BodyLong', 1)) &
+            (k.us(1) < k.avg('ShadowVeryShort', 1)) &
+            (k.o(1) > k.o(2)) & (k.o(1) <= k.c(2) + k.avg('Near', 2)) &
+            (k.rb() < k.avg('BodyShort')) &
+            (k.o() >= k.c(1) - k.rb() - k.avg('Near', 1)))
+    return _signal(cond, -100)
+
+
+def _cdlsticksandwich(k: CandleFeatures) -> np.ndarray:
+    cond = ((k.col(2) == -1) & (k.col(1) == 1) & (k.col() == -1) &
+            (k.l(1) > k.c(2)) &
+            (k.c() <= k.c(2) + k.avg('Equal', 2)) & (k.c() >= k.c(2) - k.avg('Equal', 2)))
+    return _signal(cond, 100)
+
+
+def _cdltakuri(k: CandleFeatures) -> np.ndarray:
+    cond = ((k.rb() <= k.avg('BodyDoji')) &
+            (k.us() < k.avg('ShadowVeryShort')) & (k.ls() > k.avg('ShadowVeryLong')))
+    return _signal(cond, 100)
+
+
+def _cdltasukigap(k: CandleFeatures) -> np.ndarray:
+    near = np.abs(k.rb(1) - k.rb()) < k.avg('Near', 1)
+    up = (k.body_gap_up(1, 2) & (k.col(1) == 1) & (k.col() == -1) &
+          (k.o() < k.c(1)) & (k.o() > k.o(1)) & (k.c() < k.o(1)) & (k.c() > k.top(2)) & near)
+    down = (k.body_gap_down(1, 2) & (k.col(1) == -1) & (k.col() == 1) &
+            (k.o() < k.o(1)) & (k.o() > k.c(1)) & (k.c() > k.o(1)) & (k.c() < k.bottom(2)) & near)
+    return _signal(up | down, k.col(1) * 100)
+
+
+def _cdlthrusting(k: CandleFeatures) -> np.ndarray:
+    cond = ((k.col(1) == -1) & (k.rb(1) > k.avg('BodyLong', 1)) &
+            (k.col() == 1) & (k.o() < k.l(1)) &
+            (k.c() > k.c(1) + k.avg('Equal', 1)) & (k.c() <= k.c(1) + k.rb(1) * 0.5))
+    return _signal(cond, -100)
+
+
+def _cdltristar(k: CandleFeatures) -> np.ndarray:
+    # All three dojis are measured against the average ending at the 1st candle
+    doji = k.avg('BodyDoji', 2)
+    three_doji = (k.rb(2) <= doji) & (k.rb(1) <= doji) & (k.rb() <= doji)
+    bear = three_doji & k.body_gap_up(1, 2) & (k.top() < k.top(1))
+    bull = three_doji & k.body_gap_down(1, 2) & (k.bottom() > k.bottom(1))
+    return np.where(bear, -100.0, np.where(bull, 100.0, 0.0))
+
+
+def _cdlunique3river(k: CandleFeatures) -> np.ndarray:
+    cond = ((k.col(2) == -1) & (k.rb(2) > k.avg('BodyLong', 2)) &
+            (k.col(1) == -1) & (k.c(1) > k.c(2)) & (k.o(1) <= k.o(2)) & (k.l(1) < k.l(2)) &
+            (k.col() == 1) & (k.rb() < k.avg('BodyShort')) & (k.o() > k.l(1)))
+    return _signal(cond, 100)
+
+
+def _cdlupsidegap2crows(k: CandleFeatures) -> np.ndarray:
+    cond = ((k.col(2) == 1) & (k.rb(2) > k.avg('BodyLong', 2)) &
+            (k.col(1) == -1) & (k.rb(1) <= k.avg('BodyShort', 1)) & k.body_gap_up(1, 2) &
+            (k.col() == -1) & (k.o() > k.o(1)) & (k.c() < k.c(1)) & (k.c() > k.c(2)))
+    return _signal(cond, -100)
+
+
+def _cdlxsidegap3methods(k: CandleFeatures) -> np.ndarray:
+    cond = ((k.col(2) == k.col(1)) & (k.col(1) == -k.col()) &
+            (k.o() < k.top(1)) & (k.o() > k.bottom(1)) &
+            (k.c() < k.top(2)) & (k.c() > k.bottom(2)) &
+            (((k.col(2) == 1) & k.body_gap_up(1, 2)) |
+             ((k.col(2) == -1) & k.body_gap_down(1, 2))))
+    return _signal(cond, k.col(2) * 100)
+
+
+# Pattern name -> (function, candle settings used, candles in the pattern - 1)
+_PATTERNS = {
+    'CDL2CROWS': (_cdl2crows, ('BodyLong',), 2),
+    'CDL3BLACKCROWS': (_cdl3blackcrows, ('ShadowVeryShort',), 3),
+    'CDL3INSIDE': (_cdl3inside, ('BodyShort', 'BodyLong'), 2),
+    'CDL3LINESTRIKE': (_cdl3linestrike, ('Near',), 3),
+    'CDL3OUTSIDE': (_cdl3outside, (), 3),
+    'CDL3STARSINSOUTH': (_cdl3starsinsouth, ('ShadowVeryShort', 'ShadowLong', 'BodyLong', 'BodyShort'), 2),
+    'CDL3WHITESOLDIERS': (_cdl3whitesoldiers, ('ShadowVeryShort', 'BodyShort', 'Far', 'Near'), 2),
+    'CDLABANDONEDBABY': (_cdlabandonedbaby, ('BodyDoji', 'BodyLong', 'BodyShort'), 2),
+    'CDLADVANCEBLOCK': (_cdladvanceblock, ('ShadowLong', 'ShadowShort', 'Far', 'Near', 'BodyLong'), 2),
+    'CDLBELTHOLD': (_cdlbelthold, ('BodyLong', 'ShadowVeryShort'), 0),
+    'CDLBREAKAWAY': (_cdlbreakaway, ('BodyLong',), 4),
+    'CDLCLOSINGMARUBOZU': (_cdlclosingmarubozu, ('BodyLong', 'ShadowVeryShort'), 0),
+    'CDLCONCEALBABYSWALL': (_cdlconcealbabyswall, ('ShadowVeryShort',), 3),
+    'CDLCOUNTERATTACK': (_cdlcounterattack, ('Equal', 'BodyLong'), 1),
+    'CDLDARKCLOUDCOVER': (_cdldarkcloudcover, ('BodyLong',), 1),
+    'CDLDOJI': (_cdldoji, ('BodyDoji',), 0),
+    'CDLDOJISTAR': (_cdldojistar, ('BodyDoji', 'BodyLong'), 1),
+    'CDLDRAGONFLYDOJI': (_cdldragonflydoji, ('BodyDoji', 'ShadowVeryShort'), 0),
+    'CDLENGULFING': (_cdlengulfing, (), 2),
+    'CDLEVENINGDOJISTAR': (_cdleveningdojistar, ('BodyDoji', 'BodyLong', 'BodyShort'), 2),
+    'CDLEVENINGSTAR': (_cdleveningstar, ('BodyShort', 'BodyLong'), 2),
+    'CDLGAPSIDESIDEWHITE': (_cdlgapsidesidewhite, ('Near', 'Equal'), 2),
+    'CDLGRAVESTONEDOJI': (_cdlgravestonedoji, ('BodyDoji', 'ShadowVeryShort'), 0),
+    'CDLHAMMER': (_cdlhammer, ('BodyShort', 'ShadowLong', 'ShadowVeryShort', 'Near'), 1),
+    'CDLHANGINGMAN': (_cdlhangingman, ('BodyShort', 'ShadowLong', 'ShadowVeryShort', 'Near'), 1),
+    'CDLHARAMI': (_cdlharami, ('BodyShort', 'BodyLong'), 1),
+    'CDLHARAMICROSS': (_cdlharamicross, ('BodyDoji', 'BodyLong'), 1),
+    'CDLHIGHWAVE': (_cdlhighwave, ('BodyShort', 'ShadowVeryLong'), 0),
+    'CDLHIKKAKE': (_cdlhikkake, (), 5),
+    'CDLHIKKAKEMOD': (_cdlhikkakemod, ('Near',), 5),
+    'CDLHOMINGPIGEON': (_cdlhomingpigeon, ('BodyShort', 'BodyLong'), 1),
+    'CDLIDENTICAL3CROWS': (_cdlidentical3crows, ('ShadowVeryShort', 'Equal'), 2),
+    'CDLINNECK': (_cdlinneck, ('Equal', 'BodyLong'), 1),
+    'CDLINVERTEDHAMMER': (_cdlinvertedhammer, ('BodyShort', 'ShadowLong', 'ShadowVeryShort'), 1),
+    'CDLKICKING': (_cdlkicking, ('ShadowVeryShort', 'BodyLong'), 1),
+    'CDLKICKINGBYLENGTH': (_cdlkickingbylength, ('ShadowVeryShort', 'BodyLong'), 1),
+    'CDLLADDERBOTTOM': (_cdlladderbottom, ('ShadowVeryShort',), 4),
+    'CDLLONGLEGGEDDOJI': (_cdllongleggeddoji, ('BodyDoji', 'ShadowLong'), 0),
+    'CDLLONGLINE': (_cdllongline, ('BodyLong', 'ShadowShort'), 0),
+    'CDLMARUBOZU': (_cdlmarubozu, ('BodyLong', 'ShadowVeryShort'), 0),
+    'CDLMATCHINGLOW': (_cdlmatchinglow, ('Equal',), 1),
+    'CDLMATHOLD': (_cdlmathold, ('BodyShort', 'BodyLong'), 4),
+    'CDLMORNINGDOJISTAR': (_cdlmorningdojistar, ('BodyDoji', 'BodyLong', 'BodyShort'), 2),
+    'CDLMORNINGSTAR': (_cdlmorningstar, ('BodyShort', 'BodyLong'), 2),
+    'CDLONNECK': (_cdlonneck, ('Equal', 'BodyLong'), 1),
+    'CDLPIERCING': (_cdlpiercing, ('BodyLong',), 1),
+    'CDLRICKSHAWMAN': (_cdlrickshawman, ('BodyDoji', 'ShadowLong', 'Near'), 0),
+    'CDLRISEFALL3METHODS': (_cdlrisefall3methods, ('BodyShort', 'BodyLong'), 4),
+    'CDLSEPARATINGLINES': (_cdlseparatinglines, ('ShadowVeryShort', 'BodyLong', 'Equal'), 1),
+    'CDLSHOOTINGSTAR': (_cdlshootingstar, ('BodyShort', 'ShadowLong', 'ShadowVeryShort'), 1),
+    'CDLSHORTLINE': (_cdlshortline, ('BodyShort', 'ShadowShort'), 0),
+    'CDLSPINNINGTOP': (_cdlspinningtop, ('BodyShort',), 0),
+    'CDLSTALLEDPATTERN': (_cdlstalledpattern, ('BodyLong', 'BodyShort', 'ShadowVeryShort', 'Near'), 2),
+    'CDLSTICKSANDWICH': (_cdlsticksandwich, ('Equal',), 2),
+    'CDLTAKURI': (_cdltakuri, ('BodyDoji', 'ShadowVeryShort', 'ShadowVeryLong'), 0),
+    'CDLTASUKIGAP': (_cdltasukigap, ('Near',), 2),
+    'CDLTHRUSTING': (_cdlthrusting, ('Equal', 'BodyLong'), 1),
+    'CDLTRISTAR': (_cdltristar, ('BodyDoji',), 2),
+    'CDLUNIQUE3RIVER': (_cdlunique3river, ('BodyShort', 'BodyLong'), 2),
+    'CDLUPSIDEGAP2CROWS': (_cdlupsidegap2crows, ('BodyShort', 'BodyLong'), 2),
+    'CDLXSIDEGAP3METHODS': (_cdlxsidegap3methods, (), 2),
+}
+
+SUPPORTED_PATTERNS = tuple(_PATTERNS)
+
+
+def get_lookback(pattern: str) -> int:
+    """
+    Return TA-Lib's lookback for a pattern: the number of leading bars that
+    are always reported as 0 because the pattern's candles or candle averages
+    are not yet available.
+    """
+    _, settings, candles = _PATTERNS[pattern]
+    period = max((CANDLE_SETTINGS[setting][1] for setting in settings), default=0)
+    if pattern == 'CDLHIKKAKEMOD':
+        period = max(1, period)
+    return period + candles
+
+
+def get_window(patterns: Iterable[str]) -> int:
+    """
+    Return the number of trailing bars needed to evaluate the latest bar of
+    every given pattern exactly as a full-history evaluation would.
+
+    Candle averages are summed per window rather than carried forward, and
+    hikkake confirmations only look back as far as the lookback already
+    covers, so no bar before the lookback influences the latest value.
+    """
+    return max((get_lookback(pattern) for pattern in patterns if pattern in _PATTERNS), default=0) + 1
+
+
+def _evaluate(candles: CandleFeatures, pattern: str) -> np.ndarray:
+    """
+    Evaluate one pattern on prepared candles, zeroing the lookback period
+
+    The lookback is counted from each series' first complete bar, so rows of a
+    panel padded with NaN before a symbol's history starts get the same values
+    as evaluating that symbol's bars alone. Bars that are themselves missing
+    never signal.
+    """
+    func = _PATTERNS[pattern][0]
+    result = func(candles)
+    result = np.nan_to_num(result, nan=0.0).astype(np.int32)
+    result[(np.arange(candles.n) < candles.first_valid[..., None] + get_lookback(pattern)) | ~candles.valid] = 0
+    return result
+
+
+def detect_pattern(open_, high, low, close, pattern: str) -> np.ndarray:
+    """
+    Evaluate a candlestick pattern on OHLC arrays
+
+    Args:
+        open_: Open prices, 1D or ``(n_symbols, n_days)``
+        high: High prices
+        low: Low prices
+        close: Close prices
+        pattern: Pattern name from ``patterns.candlestick_patterns`` (e.g. 'CDLDOJI')
+
+    Returns:
+        int32 array of the same shape with 0, +/-100 (and +/-200 for
+        confirmed hikkake patterns)
+
+    Raises:
+        ValueError: If the pattern is not supported
+    """
+    if pattern not in _PATTERNS:
+        raise ValueError(f"Unsupported pattern: {pattern}")
+
+    return _evaluate(CandleFeatures(open_, high, low, close), pattern)
+
+
+def detect_patterns(open_, high, low, close, patterns: Iterable[str]) -> Dict[str, np.ndarray]:
+    """
+    Evaluate several candlestick patterns on the same OHLC arrays
+
+    Args:
+        open_: Open prices, 1D or ``(n_symbols, n_days)``
+        high: High prices
+        low: Low prices
+        close: Close prices
+        patterns: Pattern names from ``patterns.candlestick_patterns``
+
+    Returns:
+        Dictionary mapping pattern names to int32 signal arrays. Unsupported
+        patterns are logged and skipped. Candle geometry and averages are
+        computed once and shared by all patterns.
+    """
+    return evaluate_patterns(CandleFeatures(open_, high, low, close), patterns)
+
+
+def evaluate_patterns(features: CandleFeatures, patterns: Iterable[str]) -> Dict[str, np.ndarray]:
+    """
+    Evaluate several candlestick patterns on precomputed candle features
+
+    Args:
+        features: Candle features of the bars to evaluate
+        patterns: Pattern names from ``patterns.candlestick_patterns``
+
+    Returns:
+        Dictionary mapping pattern names to int32 signal arrays. Unsupported
+        patterns are logged and skipped.
+    """
+    results = {}
+    for pattern in patterns:
+        if pattern not in _PATTERNS:
+            logger.warning(f"Unsupported pattern: {pattern}")
+            continue
+        results[pattern] = _evaluate(features, pattern)
+    return results
+
+
+def detect_latest(open_, high, low, close, patterns: Iterable[str]) -> Dict[str, np.ndarray]:
+    """
+    Evaluate candlestick patterns on the latest bar only
+
+    Only the trailing ``get_window(patterns)`` bars are evaluated, so the cost
+    depends on the patterns' lookback rather than on the length of history.
+    The values equal the last bar of a full-history evaluation.
+
+    Args:
+        open_: Open prices, 1D or ``(n_symbols, n_days)``
+        high: High prices
+        low: Low prices
+        close: Close prices
+        patterns: Pattern names from ``patterns.candlestick_patterns``
+
+    Returns:
+        Dictionary mapping pattern names to the latest signal: an int32
+        scalar for a single series or one value per row of a panel.
+        Unsupported patterns are logged and skipped.
+    """
+    patterns = list(patterns)
+    window = get_window(patterns)
+    tails = [np.asarray(values, dtype=np.float64)[..., -window:] for values in (open_, high, low, close)]
+    results = evaluate_patterns(CandleFeatures(*tails), patterns)
+    return {pattern: result[..., -1] for pattern, result in results.items()}
+
+
+class PatternState:
+    """
+    Incremental latest-bar pattern evaluation.
+
+    Keeps only the trailing ``get_window(patterns)`` bars of a series (or of
+    every row of a panel). Appending a new bar drops the oldest one and
+    re-evaluates just that window, so each update costs O(lookback) per
+    series however long the history is, and gives the same signals as
+    re-running the full history with the new bar appended.
+
+    Attributes:
+        patterns (List[str]): Patterns evaluated on every update
+        window (int): Number of trailing bars kept
+        ohlc (np.ndarray): Trailing bars, shape (4, ..., window), NaN padded on
+            the left when the history is shorter than the window
+    """
+
+    def __init__(self, patterns: Iterable[str], open_, high, low, close) -> None:
+        self.patterns = list(patterns)
+        self.window = get_window(self.patterns)
+
+        history = np.stack([np.asarray(values, dtype=np.float64) for values in (open_, high, low, close)])
+        tail = history[..., -self.window:]
+        self.ohlc = np.full(tail.shape[:-1] + (self.window,), np.nan)
+        self.ohlc[..., self.window - tail.shape[-1]:] = tail
+
+    def latest(self) -> Dict[str, np.ndarray]:
+        """Return the signals of the most recent bar"""
+        return detect_latest(*self.ohlc, self.patterns)
+
+    def update(self, open_, high, low, close) -> Dict[str, np.ndarray]:
+        """
+        Append one bar (one value per series) and return its signals
+
+        Args:
+            open_: Open price of the new bar, or one per panel row
+            high: High price of the new bar
+            low: Low price of the new bar
+            close: Close price of the new bar
+
+        Returns:
+            Dictionary mapping pattern names to the new bar's signals
+        """
+        self.ohlc[..., :-1] = self.ohlc[..., 1:]
+        self.ohlc[..., -1] = np.stack([np.asarray(values, dtype=np.float64) for values in (open_, high, low, close)])
+        return self.latest()
+
+
+def align_panel(frames: Dict[str, pd.DataFrame]) -> Tuple[List[str], pd.DatetimeIndex, np.ndarray]:
+    """
+    Align per-symbol OHLC DataFrames on a shared daily calendar
+
+    Bars are matched by session date, so sources stamping daily bars at
+    different times of day still line up. Days a symbol has no bar for (before
+    its history starts, or missing sessions) are NaN; patterns whose candles
+    or candle averages would include a missing bar are not reported.
+
+    Args:
+        frames: Dictionary mapping symbols to DataFrames with Open, High, Low
+            and Close columns
+
+    Returns:
+        Tuple of (symbols, dates, ohlc) where ``ohlc`` has shape
+        ``(4, n_symbols, n_days)`` so ``detect_pattern(*ohlc, pattern)``
+        evaluates the whole panel. Empty frames are left out.
+    """
+    columns = ['Open', 'High', 'Low', 'Close']
+    days = {}
+    for symbol, df in frames.items():
+        if df is None or df.empty:
+            continue
+        index = pd.DatetimeIndex(df.index)
+        if index.tz is not None:
+            index = index.tz_convert('UTC').tz_localize(None)
+        days[symbol] = index.normalize()
+
+    symbols = list(days)
+    dates = pd.DatetimeIndex(sorted(set().union(*days.values()))) if symbols else pd.DatetimeIndex([])
+    ohlc = np.full((len(columns), len(symbols), len(dates)), np.nan)
+
+    for row, symbol in enumerate(symbols):
+        positions = dates.get_indexer(days[symbol])
+        ohlc[:, row, positions] = frames[symbol][columns].to_numpy(dtype=np.float64).T
+
+    return symbols, dates, ohlc
+
+
+def align_tails(frames: Dict[str, pd.DataFrame], bars: int) -> Tuple[List[str], np.ndarray]:
+    """
+    Stack the last ``bars`` bars of each symbol into a panel
+
+    Unlike ``align_panel`` the rows are aligned by position, not by date: the
+    last column holds each symbol's own latest bar, and symbols with less
+    history are NaN padded on the left. Evaluating this panel gives every
+    symbol's latest signal exactly as evaluating its own bars would.
+
+    Args:
+        frames: Dictionary mapping symbols to DataFrames with Open, High, Low
+            and Close columns
+        bars: Number of trailing bars to keep, typically ``get_window(patterns)``
+
+    Returns:
+        Tuple of (symbols, ohlc) where ``ohlc`` has shape
+        ``(4, n_symbols, bars)``. Empty frames are left out.
+    """
+    columns = ['Open', 'High', 'Low', 'Close']
+    symbols = [symbol for symbol, df in frames.items() if df is not None and not df.empty]
+    ohlc = np.full((len(columns), len(symbols), bars), np.nan)
+
+    for row, symbol in enumerate(symbols):
+        tail = frames[symbol][columns].to_numpy(dtype=np.float64)[-bars:]
+        ohlc[:, row, bars - len(tail):] = tail.T
+
+    return symbols, ohlc
@@ -0,0 +1,277 @@
+"""
+Process-pool sharded pattern evaluation
+
+Pattern evaluation runs many small NumPy operations per pattern, so threads
+spend most of a multi-pattern, full-universe scan waiting on the GIL. This
+module shards the symbols of a (4, n_symbols, n_days) OHLC panel across a
+pool of worker processes instead. The panel is copied once into shared
+memory and each worker evaluates a contiguous block of rows in place,
+writing its signals into a shared output block. Nothing but shared memory
+names and row bounds is pickled, and the shards need no merge step because
+every row of a panel is evaluated independently of the others.
+
+The pool is off unless PATTERN_PROCESS_WORKERS is set, since serverless
+functions usually get a single core. Small panels and hosts where the pool
+cannot start are evaluated in-process with identical results.
+
+Classes:
+    SharedArray: NumPy array backed by a named shared memory block
+
+Functions:
+    resolve_workers: Number of worker processes for a requested setting
+    get_process_pool: Return the process pool, creating it on first use
+    get_running_pool: Return the running process pool and its size, without resizing it
+    shutdown_process_pool: Stop the process pool
+    evaluate_sharded: Evaluate patterns on a panel sharded across processes
+    map_sharded: Apply a function to contiguous shards of a list in parallel
+"""
+
+import os
+import atexit
+import logging
+import threading
+import multiprocessing
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from pattern_engine import SUPPORTED_PATTERNS, CandleFeatures, evaluate_patterns
+
+logger = logging.getLogger(__name__)
+
+# Worker processes for pattern evaluation: 0 or 1 evaluates in-process, 'auto' uses every core
+PATTERN_PROCESS_WORKERS = os.getenv('PATTERN_PROCESS_WORKERS', '0')
+
+# Panels with fewer symbols are evaluated in-process; sharding them costs more than it saves
+PATTERN_SHARD_MIN_SYMBOLS = int(os.getenv('PATTERN_SHARD_MIN_SYMBOLS', '256'))
+
+# 'spawn' is safe alongside the scan thread pools; 'forkserver' starts workers faster on Linux
+PATTERN_PROCESS_START_METHOD = os.getenv('PATTERN_PROCESS_START_METHOD', 'spawn')
+
+# (shared memory name, shape, dtype) identifying a SharedArray in another process
+SharedSpec = Tuple[str, Tuple[int, ...], str]
+
+
+class SharedArray:
+    """
+    NumPy array backed by a named shared memory block.
+
+    The creating process owns the block and unlinks it on ``close``; other
+    processes attach to it by ``spec`` and only close their mapping.
+
+    Attributes:
+        array (np.ndarray): Array viewing the shared block
+        spec (tuple): (name, shape, dtype) to attach to the block elsewhere
+    """
+
+    def __init__(self, shape: Tuple[int, ...], dtype: Union[str, np.dtype] = np.float64,
+                 name: Optional[str] = None) -> None:
+        dtype = np.dtype(dtype)
+        self._owner = name is None
+        if self._owner:
+            size = max(1, int(np.prod(shape)) * dtype.itemsize)
+            self._shm = shared_memory.SharedMemory(create=True, size=size)
+        else:
+            self._shm = shared_memory.SharedMemory(name=name)
+        self.array = np.ndarray(shape, dtype=dtype, buffer=self._shm.buf)
+        self.spec = (self._shm.name, tuple(shape), dtype.str)
+
+    @classmethod
+    def attach(cls, spec: SharedSpec) -> 'SharedArray':
+        """Attach to a block created by another process"""
+        name, shape, dtype = spec
+        return cls(shape, dtype, name=name)
+
+    def close(self) -> None:
+        """Release the mapping, and the block itself in the owning process"""
+        self.array = None
+        self._shm.close()
+        if self._owner:
+            self._shm.unlink()
+
+    def __enter__(self) -> 'SharedArray':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def resolve_workers(workers: Union[int, str, None] = None) -> int:
+    """
+    Return the number of worker processes for a setting
+
+    Args:
+        workers: Process count, 'auto' for every core, or None to use
+            PATTERN_PROCESS_WORKERS
+    """
+    if workers is None:
+        workers = PATTERN_PROCESS_WORKERS
+    if str(workers).strip().lower() == 'auto':
+        return os.cpu_count() or 1
+    try:
+        return max(1, int(workers))
+    except (TypeError, ValueError):
+        logger.warning(f"Invalid process worker count {workers!r}, evaluating in-process")
+        return 1
+
+
+def _shard_bounds(n_items: int, shards: int) -> List[Tuple[int, int]]:
+    """Split ``n_items`` into at most ``shards`` contiguous, non-empty (start, stop) ranges"""
+    shards = max(1, min(shards, n_items))
+    edges = np.linspace(0, n_items, shards + 1).astype(int)
+    return [(int(start), int(stop)) for start, stop in zip(edges[:-1], edges[1:]) if stop > start]
+
+
+# Global pool, shared by every scan served by this process
+_process_pool = None
+_process_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+def get_process_pool(workers: int) -> ProcessPoolExecutor:
+    """Get the process pool, (re)creating it for a new size or after it broke"""
+    global _process_pool, _process_pool_workers
+
+    with _pool_lock:
+        broken = _process_pool is not None and getattr(_process_pool, '_broken', False)
+        if _process_pool is None or broken or _process_pool_workers != workers:
+            if _process_pool is not None:
+                # Other threads may still be waiting on the old pool; it exits once their work drains
+                _process_pool.shutdown(wait=False)
+            context = multiprocessing.get_context(PATTERN_PROCESS_START_METHOD)
+            _process_pool = ProcessPoolExecutor(max_workers=workers, mp_context=context)
+            _process_pool_workers = workers
+            logger.info(f"Started pattern process pool with {workers} workers "
+                        f"({PATTERN_PROCESS_START_METHOD})")
+        return _process_pool
+
+
+def get_running_pool(workers: int) -> Tuple[ProcessPoolExecutor, int]:
+    """
+    Get the running process pool and its size, starting one only if none runs
+
+    Callers that merely want some parallelism use this instead of
+    ``get_process_pool`` so they never resize the pool pattern evaluation uses.
+    """
+    with _pool_lock:
+        broken = _process_pool is not None and getattr(_process_pool, '_broken', False)
+        if _process_pool is not None and not broken:
+            return _process_pool, _process_pool_workers
+    pool = get_process_pool(workers)
+    return pool, workers
+
+
+def shutdown_process_pool() -> None:
+    """Stop the process pool and its workers"""
+    global _process_pool, _process_pool_workers
+
+    with _pool_lock:
+        if _process_pool is not None:
+            _process_pool.shutdown(wait=True, cancel_futures=True)
+        _process_pool = None
+        _process_pool_workers = 0
+
+
+atexit.register(shutdown_process_pool)
+
+
+def _evaluate_shard(ohlc_spec: SharedSpec, out_spec: SharedSpec, patterns: List[str],
+                    start: int, stop: int) -> int:
+    """Worker: evaluate rows ``start:stop`` of the shared panel into the shared output"""
+    ohlc = SharedArray.attach(ohlc_spec)
+    out = SharedArray.attach(out_spec)
+    try:
+        days = out.array.shape[-1]
+        signals = evaluate_patterns(CandleFeatures(*ohlc.array[:, start:stop]), patterns)
+        for i, pattern in enumerate(patterns):
+            out.array[i, start:stop] = signals[pattern][:, -days:]
+    finally:
+        ohlc.close()
+        out.close()
+    return stop - start
+
+
+def _evaluate_local(ohlc: np.ndarray, patterns: List[str], days: Optional[int]) -> Dict[str, np.ndarray]:
+    """Evaluate the whole panel in this process, keeping the last ``days`` columns"""
+    signals = evaluate_patterns(CandleFeatures(*ohlc), patterns)
+    if days is None:
+        return signals
+    return {pattern: result[..., -days:] for pattern, result in signals.items()}
+
+
+def evaluate_sharded(ohlc: np.ndarray, patterns: Iterable[str], days: Optional[int] = None,
+                     workers: Union[int, str, None] = None,
+                     min_symbols: int = PATTERN_SHARD_MIN_SYMBOLS) -> Dict[str, np.ndarray]:
+    """
+    Evaluate patterns on a panel, sharding its symbols across worker processes
+
+    Args:
+        ohlc: Panel of shape (4, n_symbols, n_days), as from ``align_panel``
+            or ``align_tails``
+        patterns: Pattern names from ``patterns.candlestick_patterns``
+        days: Keep only the last ``days`` columns of each result, which also
+            limits what workers write back; None keeps every column
+        workers: Process count, 'auto', or None for PATTERN_PROCESS_WORKERS
+        min_symbols: Panels with fewer symbols are evaluated in-process
+
+    Returns:
+        Dictionary mapping pattern names to int32 arrays of shape
+        (n_symbols, days), equal to ``evaluate_patterns`` on the whole panel.
+        Unsupported patterns are logged and skipped.
+    """
+    ohlc = np.asarray(ohlc, dtype=np.float64)
+    patterns = list(dict.fromkeys(patterns))
+    supported = [pattern for pattern in patterns if pattern in SUPPORTED_PATTERNS]
+    for pattern in patterns:
+        if pattern not in SUPPORTED_PATTERNS:
+            logger.warning(f"Unsupported pattern: {pattern}")
+
+    n_symbols, n_days = ohlc.shape[1], ohlc.shape[-1]
+    workers = resolve_workers(workers)
+    if workers <= 1 or n_symbols < max(2, min_symbols) or not supported or n_days == 0:
+        return _evaluate_local(ohlc, supported, days)
+
+    out_days = n_days if days is None else min(days, n_days)
+    try:
+        with SharedArray(ohlc.shape) as shared_ohlc, \
+                SharedArray((len(supported), n_symbols, out_days), np.int32) as shared_out:
+            shared_ohlc.array[...] = ohlc
+            pool = get_process_pool(workers)
+            futures = [pool.submit(_evaluate_shard, shared_ohlc.spec, shared_out.spec, supported, start, stop)
+                       for start, stop in _shard_bounds(n_symbols, workers)]
+            for future in futures:
+                future.result()
+            return {pattern: shared_out.array[i].copy() for i, pattern in enumerate(supported)}
+    except (BrokenProcessPool, OSError) as e:
+        logger.warning(f"Process pool unavailable, evaluating {n_symbols} symbols in-process: {str(e)}")
+        return _evaluate_local(ohlc, supported, days)
+
+
+def map_sharded(func: Callable[[Sequence], Any], items: Sequence,
+                workers: Union[int, str, None] = None, min_items: int = 2) -> List[Any]:
+    """
+    Apply ``func`` to contiguous shards of ``items`` on the process pool
+
+    ``func`` must be a module-level function so workers can import it, and
+    should take and return small values (e.g. file names and symbol lists).
+    Shards run on the pool that is already running, at most one per worker,
+    so mapping never resizes it.
+
+    Returns:
+        ``func``'s result for each shard, in order; a single in-process call
+        when the pool is off or ``items`` has fewer than ``min_items`` entries
+    """
+    workers = resolve_workers(workers)
+    if workers <= 1 or len(items) < max(2, min_items):
+        return [func(items)]
+
+    try:
+        pool, size = get_running_pool(workers)
+        shards = _shard_bounds(len(items), min(workers, size))
+        futures = [pool.submit(func, items[start:stop]) for start, stop in shards]
+        return [future.result() for future in futures]
+    except (BrokenProcessPool, OSError) as e:
+        logger.warning(f"Process pool unavailable, running {len(items)} items in-process: {str(e)}")
+        return [func(items)]
@@ -0,0 +1,187 @@
+"""
+Shared token-bucket rate limiter for Alpaca API calls
+
+Every Alpaca client in the process draws from one bucket, so concurrent
+workers together stay under the account's request ceiling. The bucket refills
+at the per-minute limit and is corrected from the ``X-RateLimit-*`` headers
+Alpaca sends with each response: the remaining quota caps how many requests
+may still start before the window resets, so requests are paced down as the
+quota runs low instead of running into 429 responses.
+
+Classes:
+    TokenBucket: Thread-safe token bucket adjusted from rate-limit headers
+
+Functions:
+    get_rate_limiter: Factory function returning singleton limiter instance
+"""
+
+import os
+import time
+import logging
+import threading
+from typing import Callable, Dict, Mapping, Optional
+
+logger = logging.getLogger(__name__)
+
+# Alpaca's default data API allowance and how many requests may start at once
+ALPACA_RATE_LIMIT = int(os.getenv('ALPACA_RATE_LIMIT', '200'))  # requests per window
+ALPACA_RATE_BURST = int(os.getenv('ALPACA_RATE_BURST', '10'))
+RATE_LIMIT_WINDOW = 60.0  # seconds
+
+# Response headers describing the current window
+LIMIT_HEADER = 'X-RateLimit-Limit'
+REMAINING_HEADER = 'X-RateLimit-Remaining'
+RESET_HEADER = 'X-RateLimit-Reset'
+
+
+def _header_number(headers: Mapping[str, str], name: str) -> Optional[float]:
+    """Read a numeric header, returning None when it is missing or malformed"""
+    value = headers.get(name)
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket shared by the blocking and asyncio clients.
+
+    ``reserve`` takes a token immediately and returns how long the caller has
+    to wait before sending, so the bucket never sleeps while holding its lock
+    and asyncio callers can wait with ``asyncio.sleep``. Reservations may drive
+    the balance negative; later callers then queue behind earlier ones.
+
+    Attributes:
+        limit (float): Requests allowed per window
+        burst (int): Most requests that may start back to back
+        window (float): Window length in seconds
+        waits (int): Reservations that had to wait
+        waited (float): Total seconds callers were asked to wait
+    """
+
+    def __init__(self, limit: float = ALPACA_RATE_LIMIT, burst: int = ALPACA_RATE_BURST,
+                 window: float = RATE_LIMIT_WINDOW,
+                 clock: Callable[[], float] = time.monotonic,
+                 wall_clock: Callable[[], float] = time.time,
+                 sleep: Callable[[float], None] = time.sleep) -> None:
+        self.limit = float(limit)
+        self.burst = max(1, int(burst))
+        self.window = window
+        self._clock = clock
+        self._wall_clock = wall_clock
+        self._sleep = sleep
+        self._tokens = float(self.burst)
+        self._updated = clock()
+        self._lock = threading.Lock()
+        self.waits = 0
+        self.waited = 0.0
+
+    @property
+    def rate(self) -> float:
+        """Refill rate in tokens per second"""
+        return self.limit / self.window
+
+    def _refill(self, now: float) -> None:
+        """Add the tokens earned since the last update; the caller holds the lock"""
+        elapsed = now - self._updated
+        if elapsed > 0:
+            self._tokens = min(float(self.burst), self._tokens + elapsed * self.rate)
+            self._updated = now
+
+    def reserve(self, tokens: int = 1) -> float:
+        """
+        Take tokens for a request that is about to be sent
+
+        Args:
+            tokens: Number of requests being made
+
+        Returns:
+            Seconds the caller must wait before sending, 0.0 if it may go now
+        """
+        with self._lock:
+            self._refill(self._clock())
+            self._tokens -= tokens
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            if wait > 0:
+                self.waits += 1
+                self.waited += wait
+            return wait
+
+    def acquire(self, tokens: int = 1) -> float:
+        """Block until tokens are available and return the time spent waiting"""
+        wait = self.reserve(tokens)
+        if wait > 0:
+            self._sleep(wait)
+        return wait
+
+    def update_from_headers(self, headers: Mapping[str, str]) -> None:
+        """
+        Correct the bucket from a response's rate-limit headers
+
+        The limit header sets the refill rate. The remaining quota bounds the
+        balance so that it plus what refills before the reset time never
+        exceeds what the server will still accept; once the quota is used up,
+        new reservations wait until the window resets.
+
+        Args:
+            headers: Response headers; lookups must accept the canonical names
+        """
+        limit = _header_number(headers, LIMIT_HEADER)
+        remaining = _header_number(headers, REMAINING_HEADER)
+        reset = _header_number(headers, RESET_HEADER)
+
+        with self._lock:
+            now = self._clock()
+            self._refill(now)
+
+            if limit is not None and limit > 0 and limit != self.limit:
+                logger.info(f"Alpaca rate limit is {limit:.0f} requests per {self.window:.0f}s")
+                self.limit = limit
+
+            if remaining is None:
+                return
+
+            if reset is None:
+                until_reset = 0.0
+            elif reset > 1e9:
+                # Unix timestamp of the window reset
+                until_reset = min(max(0.0, reset - self._wall_clock()), self.window)
+            else:
+                until_reset = min(max(0.0, reset), self.window)
+
+            allowed = max(0.0, remaining) - until_reset * self.rate
+            if allowed < self._tokens:
+                self._tokens = allowed
+                if remaining <= 0:
+                    logger.warning(f"Alpaca rate limit exhausted, pausing requests for {until_reset:.1f}s")
+
+    def stats(self) -> Dict[str, float]:
+        """Return the current balance and wait counters for monitoring"""
+        with self._lock:
+            self._refill(self._clock())
+            return {
+                'limit': self.limit,
+                'burst': self.burst,
+                'tokens': round(self._tokens, 3),
+                'waits': self.waits,
+                'waited': round(self.waited, 3)
+            }
+
+
+# Global limiter instance, shared by every Alpaca client in this process
+_rate_limiter = None
+_rate_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> TokenBucket:
+    """Get or create the global Alpaca rate limiter"""
+    global _rate_limiter
+
+    with _rate_limiter_lock:
+        if _rate_limiter is None:
+            _rate_limiter = TokenBucket()
+
+    return _rate_limiter
@@ -0,0 +1,280 @@
+"""
+Sliding-window request limiter for the API endpoints
+
+Each client is tracked with two counters, for the current and the previous
+fixed window, and the previous count is weighted by how much of it still
+overlaps the sliding window. A check therefore touches one record no matter
+how many clients or requests are tracked, and the state per client has a
+fixed size.
+
+Counters live in a pluggable backend: an in-process LRU map bounded to a
+maximum number of clients, or a SQLite database so that every worker process
+on a host enforces the same limits.
+
+Classes:
+    MemoryBackend: Bounded in-process counter store
+    SQLiteBackend: Counter store shared between processes through SQLite
+    SlidingWindowLimiter: Per-client sliding-window limit over a backend
+
+Functions:
+    get_limiter_backend: Return the backend configured by REQUEST_LIMITER_BACKEND
+    get_request_limiter: Factory function returning one limiter per endpoint
+"""
+
+import os
+import time
+import logging
+import sqlite3
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 'memory' keeps counters per process, 'sqlite' shares them between processes
+REQUEST_LIMITER_BACKEND = os.getenv('REQUEST_LIMITER_BACKEND', 'memory').lower()
+REQUEST_LIMITER_DB = os.getenv('REQUEST_LIMITER_DB', os.path.join(
+    tempfile.gettempdir(), 'candlestick-screener', 'request_limits.sqlite3'))
+
+# Most clients the in-process backend tracks before evicting the least recent
+REQUEST_LIMITER_MAX_KEYS = int(os.getenv('REQUEST_LIMITER_MAX_KEYS', '10000'))
+
+
+def _position(now: float, window: float) -> Tuple[int, float]:
+    """Index of the fixed window containing ``now`` and the fraction of it elapsed"""
+    window_id = int(now // window)
+    return window_id, (now - window_id * window) / window
+
+
+def _slide(state: Optional[Tuple[int, int, int]], window_id: int) -> Tuple[int, int]:
+    """
+    Move stored counters to the window ``window_id``
+
+    Args:
+        state: Stored (window id, current count, previous count), or None
+
+    Returns:
+        (current, previous) counts as seen from ``window_id``
+    """
+    if state is None:
+        return 0, 0
+    stored_id, current, previous = state
+    if stored_id == window_id:
+        return current, previous
+    if stored_id == window_id - 1:
+        return 0, current
+    return 0, 0
+
+
+def _estimate(current: int, previous: int, elapsed: float) -> float:
+    """Requests in the sliding window, given the fraction of the current window elapsed"""
+    return previous * (1.0 - elapsed) + current
+
+
+class MemoryBackend:
+    """
+    Thread-safe in-process counter store holding at most ``max_keys`` clients.
+
+    Records are kept in least recently used order, so both expired records and
+    evictions come off the front of the map. Each record carries the time at
+    which it stops counting, so limiters with different window lengths can
+    share one backend.
+
+    Attributes:
+        max_keys (int): Most client records kept
+        evictions (int): Records dropped to stay within ``max_keys``
+    """
+
+    def __init__(self, max_keys: int = REQUEST_LIMITER_MAX_KEYS) -> None:
+        self.max_keys = max(1, max_keys)
+        self._records = OrderedDict()  # key -> (window id, current, previous, expires)
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def hit(self, key: str, now: float, window: float, limit: int) -> Tuple[bool, float]:
+        """
+        Count a request for ``key`` if it is within ``limit``
+
+        Args:
+            key: Client key
+            now: Current time in seconds
+            window: Window length in seconds of the calling limiter
+            limit: Requests allowed per sliding window
+
+        Returns:
+            (allowed, requests in the sliding window before this one)
+        """
+        window_id, elapsed = _position(now, window)
+        with self._lock:
+            record = self._records.pop(key, None)
+            current, previous = _slide(record[:3] if record else None, window_id)
+            estimate = _estimate(current, previous, elapsed)
+            allowed = estimate < limit
+            if allowed:
+                current += 1
+            # Nothing counts once two windows have passed since this one began
+            self._records[key] = (window_id, current, previous, (window_id + 2) * window)
+
+            while self._records:
+                oldest_key, oldest = next(iter(self._records.items()))
+                expired = oldest[3] <= now
+                if not expired and len(self._records) <= self.max_keys:
+                    break
+                if not expired:
+                    self.evictions += 1
+                del self._records[oldest_key]
+
+            return allowed, estimate
+
+
+class SQLiteBackend:
+    """
+    Counter store in a SQLite database shared by every process on the host.
+
+    Each check runs in one immediate transaction, so concurrent processes see
+    each other's counts. Rows store the time at which they stop counting, and
+    expired rows are deleted every ``prune_every`` checks.
+
+    Attributes:
+        path (str): Database file path
+        prune_every (int): Checks between deletions of expired rows
+    """
+
+    def __init__(self, path: str = REQUEST_LIMITER_DB, prune_every: int = 1000,
+                 timeout: float = 5.0) -> None:
+        self.path = path
+        self.prune_every = max(1, prune_every)
+        self._timeout = timeout
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._checks = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(request_limits)")}
+            if columns and 'expires' not in columns:
+                # Counters are short-lived, so a table in an older layout is recreated
+                conn.execute("DROP TABLE request_limits")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS request_limits ("
+                "key TEXT PRIMARY KEY, window_id INTEGER NOT NULL, "
+                "current INTEGER NOT NULL, previous INTEGER NOT NULL, expires REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS request_limits_expires ON request_limits (expires)")
+
+    def _connect(self) -> sqlite3.Connection:
+        """Return this thread's connection, opened on first use"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or getattr(self._local, 'pid', None) != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=self._timeout, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def __len__(self) -> int:
+        return self._connect().execute("SELECT COUNT(*) FROM request_limits").fetchone()[0]
+
+    def hit(self, key: str, now: float, window: float, limit: int) -> Tuple[bool, float]:
+        """Count a request for ``key`` if it is within ``limit``; see MemoryBackend.hit"""
+        window_id, elapsed = _position(now, window)
+        with self._lock:
+            self._checks += 1
+            prune = self._checks % self.prune_every == 0
+
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT window_id, current, previous FROM request_limits WHERE key = ?",
+                               (key,)).fetchone()
+            current, previous = _slide(row, window_id)
+            estimate = _estimate(current, previous, elapsed)
+            allowed = estimate < limit
+            if allowed:
+                current += 1
+            conn.execute("INSERT OR REPLACE INTO request_limits (key, window_id, current, previous, expires) "
+                         "VALUES (?, ?, ?, ?, ?)", (key, window_id, current, previous, (window_id + 2) * window))
+            if prune:
+                conn.execute("DELETE FROM request_limits WHERE expires <= ?", (now,))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+        return allowed, estimate
+
+
+class SlidingWindowLimiter:
+    """
+    Allow at most ``limit`` requests per client in any ``window`` seconds.
+
+    Attributes:
+        name (str): Prefix separating this limiter's clients in a shared backend
+        limit (int): Requests allowed per sliding window
+        window (float): Window length in seconds
+    """
+
+    def __init__(self, name: str, limit: int, window: float, backend=None,
+                 clock: Callable[[], float] = time.time) -> None:
+        self.name = name
+        self.limit = limit
+        self.window = window
+        self.backend = backend if backend is not None else MemoryBackend()
+        self._clock = clock
+
+    def allow(self, client: str) -> bool:
+        """Record a request from ``client`` and return whether it is allowed"""
+        try:
+            allowed, _ = self.backend.hit(f"{self.name}:{client}", self._clock(), self.window, self.limit)
+        except Exception as e:
+            # A broken shared store must not take the API down with it
+            logger.error(f"Request limiter backend failed, allowing request: {str(e)}")
+            return True
+        return allowed
+
+
+# Global backend and limiters, shared by every request served by this process
+_limiter_backend = None
+_request_limiters: Dict[str, SlidingWindowLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter_backend():
+    """Get or create the backend selected by REQUEST_LIMITER_BACKEND"""
+    global _limiter_backend
+
+    with _limiters_lock:
+        if _limiter_backend is None:
+            if REQUEST_LIMITER_BACKEND == 'sqlite':
+                try:
+                    _limiter_backend = SQLiteBackend(REQUEST_LIMITER_DB)
+                except Exception as e:
+                    logger.warning(f"SQLite request limiter unavailable at {REQUEST_LIMITER_DB}: {str(e)} "
+                                   f"- limiting per process")
+            if _limiter_backend is None:
+                _limiter_backend = MemoryBackend()
+        return _limiter_backend
+
+
+def get_request_limiter(name: str, limit: int, window: float) -> SlidingWindowLimiter:
+    """
+    Get or create the limiter for an endpoint
+
+    Args:
+        name: Endpoint name, used to keep its clients apart in the backend
+        limit: Requests allowed per client per window
+        window: Window length in seconds
+    """
+    backend = get_limiter_backend()
+    with _limiters_lock:
+        limiter = _request_limiters.get(name)
+        if limiter is None:
+            limiter = _request_limiters[name] = SlidingWindowLimiter(name, limit, window, backend)
+        return limiter
@@ -0,0 +1,398 @@
+"""
+Asynchronous scan jobs
+
+A synchronous scan has to finish within the request deadline, which caps it
+at ``MAX_SYMBOLS_LIMIT`` symbols. Jobs lift that cap: a scan is submitted,
+answered with a job id straight away and executed by a local worker pool,
+which appends each symbol's result rows to a SQLite store as the symbol
+completes. Clients poll the job (or stream it) with a cursor over the rows
+they have already seen, and results outlive the request that submitted them.
+
+Jobs whose worker process has died before they finished are reported as
+failed, since nothing will complete them. Each job records its owner's pid
+and start time, so a process that was given a dead owner's pid (as PID 1 is
+after a container restart) is not mistaken for it.
+
+Classes:
+    JobStore: SQLite store of job specs, progress and result rows
+    ScanJobRunner: Local worker pool executing submitted jobs
+
+Functions:
+    get_job_store: Factory function returning the store at SCAN_JOB_DB
+    get_job_runner: Factory function returning singleton runner instance
+"""
+
+import os
+import json
+import time
+import uuid
+import hashlib
+import logging
+import sqlite3
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+SCAN_JOB_DB = os.getenv('SCAN_JOB_DB', os.path.join(
+    tempfile.gettempdir(), 'candlestick-screener', 'scan_jobs.sqlite3'))
+
+# Jobs executed at the same time by one process; each one scans on its own thread pool
+SCAN_JOB_WORKERS = max(1, int(os.getenv('SCAN_JOB_WORKERS', '2')))
+
+# Most unfinished jobs accepted at once, so submissions cannot queue unbounded work
+SCAN_JOB_MAX_PENDING = max(1, int(os.getenv('SCAN_JOB_MAX_PENDING', '20')))
+
+# Seconds finished jobs and their results are kept
+SCAN_JOB_RETENTION = int(os.getenv('SCAN_JOB_RETENTION', '86400'))
+
+ACTIVE_STATUSES = ('queued', 'running')
+
+# Scan callable: (symbols, patterns) -> one list of result rows per completed symbol
+ScanFunction = Callable[[List[str], List[str]], Iterable[List[Dict]]]
+
+
+def _spec_key(symbols: List[str], patterns: List[str]) -> str:
+    """Key identifying identical scans, so resubmissions reuse the active job"""
+    spec = json.dumps([symbols, patterns], separators=(',', ':'))
+    return hashlib.sha1(spec.encode()).hexdigest()
+
+
+def _pid_alive(pid: int) -> bool:
+    """Check whether a process with ``pid`` still runs on this host"""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    except OSError:
+        return False
+    return True
+
+
+def _process_started(pid: int) -> Optional[str]:
+    """Start time of process ``pid`` in clock ticks after boot, or None where /proc is unavailable"""
+    try:
+        with open(f'/proc/{pid}/stat') as f:
+            stat = f.read()
+    except OSError:
+        return None
+    # starttime is the 22nd field; the command name before it may contain spaces
+    return stat.rsplit(')', 1)[1].split()[19]
+
+
+# Fallback owner token where process start times cannot be read
+_PROCESS_TOKEN = uuid.uuid4().hex
+
+
+def _owner_token() -> str:
+    """Token telling this process apart from any earlier one with the same pid"""
+    return _process_started(os.getpid()) or _PROCESS_TOKEN
+
+
+def _owner_alive(pid: int, token: Optional[str]) -> bool:
+    """Check whether the process that created a job, not just one with its pid, still runs"""
+    if pid == os.getpid():
+        return token is None or token == _owner_token()
+    if not _pid_alive(pid):
+        return False
+    # Jobs recorded before owner tokens, or by hosts without /proc, are checked by pid alone
+    started = _process_started(pid)
+    return token is None or started is None or token == started
+
+
+class JobStore:
+    """
+    Scan jobs and their result rows in a SQLite database.
+
+    Rows are numbered per job in completion order, so ``results(after=...)``
+    is a stable cursor for polling. Every write runs in one immediate
+    transaction and connections are kept per thread, as in the request
+    limiter's SQLite backend.
+
+    Attributes:
+        path (str): Database file path
+        retention (float): Seconds finished jobs are kept
+    """
+
+    def __init__(self, path: str = SCAN_JOB_DB, retention: float = SCAN_JOB_RETENTION,
+                 clock: Callable[[], float] = time.time, timeout: float = 5.0) -> None:
+        self.path = path
+        self.retention = retention
+        self._clock = clock
+        self._timeout = timeout
+        self._local = threading.local()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._connect()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS scan_jobs ("
+            "id TEXT PRIMARY KEY, spec_key TEXT NOT NULL, status TEXT NOT NULL, "
+            "symbols TEXT NOT NULL, patterns TEXT NOT NULL, total INTEGER NOT NULL, "
+            "scanned INTEGER NOT NULL DEFAULT 0, result_count INTEGER NOT NULL DEFAULT 0, "
+            "owner_pid INTEGER NOT NULL, owner_token TEXT, error TEXT, created_at REAL NOT NULL, "
+            "started_at REAL, finished_at REAL)"
+        )
+        columns = [row['name'] for row in conn.execute("PRAGMA table_info(scan_jobs)")]
+        if 'owner_token' not in columns:
+            try:
+                conn.execute("ALTER TABLE scan_jobs ADD COLUMN owner_token TEXT")
+            except sqlite3.OperationalError:
+                # Added by another process opening the same database
+                pass
+        conn.execute("CREATE INDEX IF NOT EXISTS scan_jobs_status ON scan_jobs (status, spec_key)")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS scan_job_results ("
+            "job_id TEXT NOT NULL, seq INTEGER NOT NULL, row TEXT NOT NULL, "
+            "PRIMARY KEY (job_id, seq))"
+        )
+
+    def _connect(self) -> sqlite3.Connection:
+        """Return this thread's connection, opened on first use"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or getattr(self._local, 'pid', None) != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=self._timeout, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _write(self, statements) -> None:
+        """Run (sql, params) statements in one immediate transaction"""
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for sql, params in statements:
+                conn.execute(sql, params)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _fail_orphans(self) -> None:
+        """Mark unfinished jobs whose owning process has exited as failed"""
+        rows = self._connect().execute(
+            "SELECT id, owner_pid, owner_token FROM scan_jobs WHERE status IN (?, ?)", ACTIVE_STATUSES).fetchall()
+        orphans = [row['id'] for row in rows if not _owner_alive(row['owner_pid'], row['owner_token'])]
+        if orphans:
+            now = self._clock()
+            self._write([
+                ("UPDATE scan_jobs SET status = 'failed', error = ?, finished_at = ? "
+                 "WHERE id = ? AND status IN (?, ?)", ('Job interrupted', now, job_id, *ACTIVE_STATUSES))
+                for job_id in orphans
+            ])
+            logger.warning(f"Marked {len(orphans)} interrupted scan jobs as failed")
+
+    def prune(self) -> int:
+        """Delete finished jobs older than the retention period, returning how many"""
+        cutoff = self._clock() - self.retention
+        expired = [row['id'] for row in self._connect().execute(
+            "SELECT id FROM scan_jobs WHERE status NOT IN (?, ?) AND finished_at < ?",
+            (*ACTIVE_STATUSES, cutoff)).fetchall()]
+        if expired:
+            statements = []
+            for job_id in expired:
+                statements.append(("DELETE FROM scan_job_results WHERE job_id = ?", (job_id,)))
+                statements.append(("DELETE FROM scan_jobs WHERE id = ?", (job_id,)))
+            self._write(statements)
+        return len(expired)
+
+    def active_count(self) -> int:
+        """Number of queued or running jobs"""
+        self._fail_orphans()
+        return self._connect().execute(
+            "SELECT COUNT(*) FROM scan_jobs WHERE status IN (?, ?)", ACTIVE_STATUSES).fetchone()[0]
+
+    def find_active(self, symbols: List[str], patterns: List[str]) -> Optional[str]:
+        """Return the id of a queued or running job for the same scan, if any"""
+        self._fail_orphans()
+        row = self._connect().execute(
+            "SELECT id FROM scan_jobs WHERE spec_key = ? AND status IN (?, ?) ORDER BY created_at LIMIT 1",
+            (_spec_key(symbols, patterns), *ACTIVE_STATUSES)).fetchone()
+        return row['id'] if row else None
+
+    def create(self, symbols: List[str], patterns: List[str]) -> str:
+        """Record a new queued job owned by this process and return its id"""
+        job_id = uuid.uuid4().hex
+        self._write([(
+            "INSERT INTO scan_jobs (id, spec_key, status, symbols, patterns, total, owner_pid, owner_token, "
+            "created_at) VALUES (?, ?, 'queued', ?, ?, ?, ?, ?, ?)",
+            (job_id, _spec_key(symbols, patterns), json.dumps(symbols), json.dumps(patterns),
+             len(symbols), os.getpid(), _owner_token(), self._clock())
+        )])
+        return job_id
+
+    def spec(self, job_id: str) -> Optional[Dict[str, List[str]]]:
+        """Return the symbols and patterns a job scans"""
+        row = self._connect().execute(
+            "SELECT symbols, patterns FROM scan_jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        return {'symbols': json.loads(row['symbols']), 'patterns': json.loads(row['patterns'])}
+
+    def start(self, job_id: str) -> None:
+        """Mark a job as running"""
+        self._write([("UPDATE scan_jobs SET status = 'running', started_at = ? WHERE id = ?",
+                      (self._clock(), job_id))])
+
+    def append(self, job_id: str, rows: List[Dict], scanned: int = 1) -> None:
+        """Append a completed symbol's result rows and advance the job's progress"""
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            count = conn.execute("SELECT result_count FROM scan_jobs WHERE id = ?", (job_id,)).fetchone()[0]
+            conn.executemany(
+                "INSERT INTO scan_job_results (job_id, seq, row) VALUES (?, ?, ?)",
+                [(job_id, count + i + 1, json.dumps(row)) for i, row in enumerate(rows)])
+            conn.execute("UPDATE scan_jobs SET scanned = scanned + ?, result_count = ? WHERE id = ?",
+                         (scanned, count + len(rows), job_id))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def finish(self, job_id: str, error: Optional[str] = None) -> None:
+        """Mark a job as completed, or as failed with ``error``"""
+        self._write([("UPDATE scan_jobs SET status = ?, error = ?, finished_at = ? WHERE id = ?",
+                      ('failed' if error else 'completed', error, self._clock(), job_id))])
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Return a job's status and progress
+
+        Returns:
+            Dictionary with 'job_id', 'status', 'total_symbols', 'scanned_symbols',
+            'result_count', 'patterns', timestamps and 'error', or None if unknown
+        """
+        self._fail_orphans()
+        row = self._connect().execute("SELECT * FROM scan_jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        return {
+            'job_id': row['id'],
+            'status': row['status'],
+            'patterns': json.loads(row['patterns']),
+            'total_symbols': row['total'],
+            'scanned_symbols': row['scanned'],
+            'result_count': row['result_count'],
+            'created_at': row['created_at'],
+            'started_at': row['started_at'],
+            'finished_at': row['finished_at'],
+            'error': row['error']
+        }
+
+    def results(self, job_id: str, after: int = 0, limit: int = 1000) -> List[Dict]:
+        """
+        Return up to ``limit`` result rows numbered after the cursor ``after``
+
+        Returns:
+            List of {'seq': cursor of the row, 'row': result row}
+        """
+        rows = self._connect().execute(
+            "SELECT seq, row FROM scan_job_results WHERE job_id = ? AND seq > ? ORDER BY seq LIMIT ?",
+            (job_id, after, limit)).fetchall()
+        return [{'seq': row['seq'], 'row': json.loads(row['row'])} for row in rows]
+
+
+class ScanJobRunner:
+    """
+    Local worker pool executing scan jobs recorded in a JobStore.
+
+    Attributes:
+        store (JobStore): Store the jobs and their results are written to
+        workers (int): Jobs executed at the same time
+        max_pending (int): Most unfinished jobs accepted at once
+    """
+
+    def __init__(self, store: JobStore, scan: ScanFunction, workers: int = SCAN_JOB_WORKERS,
+                 max_pending: int = SCAN_JOB_MAX_PENDING) -> None:
+        self.store = store
+        self.workers = workers
+        self.max_pending = max_pending
+        self._scan = scan
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='scan-job')
+
+    def submit(self, symbols: List[str], patterns: List[str]) -> Optional[str]:
+        """
+        Queue a scan and return its job id
+
+        An identical scan that is still queued or running is reused instead of
+        starting another one.
+
+        Returns:
+            Job id, or None when ``max_pending`` jobs are already unfinished
+        """
+        with self._lock:
+            existing = self.store.find_active(symbols, patterns)
+            if existing:
+                return existing
+            if self.store.active_count() >= self.max_pending:
+                return None
+            self.store.prune()
+            job_id = self.store.create(symbols, patterns)
+
+        self._executor.submit(self.run, job_id)
+        logger.info(f"Queued scan job {job_id}: {len(symbols)} symbols, {len(patterns)} patterns")
+        return job_id
+
+    def run(self, job_id: str) -> None:
+        """Execute a job, recording each symbol's rows as it completes"""
+        spec = self.store.spec(job_id)
+        if spec is None:
+            return
+        start = time.perf_counter()
+        try:
+            self.store.start(job_id)
+            for rows in self._scan(spec['symbols'], spec['patterns']):
+                self.store.append(job_id, rows)
+            self.store.finish(job_id)
+            logger.info(f"Scan job {job_id} completed in {time.perf_counter() - start:.1f}s")
+        except Exception as e:
+            logger.error(f"Scan job {job_id} failed: {str(e)}")
+            self.store.finish(job_id, error='Scan failed')
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop accepting jobs, optionally waiting for running ones"""
+        self._executor.shutdown(wait=wait)
+
+
+# Global store and runner instances, shared by every request served by this process
+_job_store = None
+_job_runner = None
+_jobs_lock = threading.Lock()
+
+
+def get_job_store() -> JobStore:
+    """Get or create the job store at SCAN_JOB_DB"""
+    global _job_store
+
+    with _jobs_lock:
+        if _job_store is None:
+            _job_store = JobStore(SCAN_JOB_DB)
+        return _job_store
+
+
+def get_job_runner(scan: Optional[ScanFunction] = None) -> ScanJobRunner:
+    """
+    Get or create the global job runner
+
+    Args:
+        scan: Scan function, used only when the instance is created
+    """
+    global _job_runner
+
+    store = get_job_store()
+    with _jobs_lock:
+        if _job_runner is None:
+            if scan is None:
+                raise ValueError("A scan function is required to create the job runner")
+            _job_runner = ScanJobRunner(store, scan)
+        return _job_runner
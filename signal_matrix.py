@@ -0,0 +1,254 @@
+"""
+Materialized candlestick signal matrix
+
+Scan results only change when a new daily bar arrives, so a job run after the
+close evaluates every pattern in ``candlestick_patterns`` for every symbol and
+persists the signals. Scans then answer from a lookup in this matrix instead of
+fetching bars and evaluating patterns on every request.
+
+Signals are stored as an int8 array of shape (symbols, patterns, days) holding
+the engine's signal divided by ``SIGNAL_SCALE`` (so -10..10, keeping the
+reduced-strength +/-80 signals exact), together with each symbol's bar dates
+for those days, in one uncompressed NumPy ``.npz`` file.
+
+Classes:
+    SignalMatrix: Signals of all patterns for all symbols over recent days
+
+Functions:
+    build_signal_matrix: Evaluate patterns for prefetched bars into a matrix
+    materialize_signal_matrix: Fetch bars, build the matrix and persist it
+    get_signal_matrix: Return the persisted matrix, reloading it when it changes
+"""
+
+from __future__ import annotations
+
+import os
+import logging
+import tempfile
+import numpy as np
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from lazy_imports import lazy_import
+from patterns import candlestick_patterns
+from pattern_engine import align_tails, get_window
+from process_pool import evaluate_sharded
+
+# pandas is only needed to build the matrix; scans served from it use NumPy alone
+pd = lazy_import('pandas')
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MATRIX_PATH = os.path.join(tempfile.gettempdir(), 'candlestick-screener', 'signals.npz')
+
+# Number of recent sessions kept per symbol
+SIGNAL_MATRIX_DAYS = max(1, int(os.getenv('SIGNAL_MATRIX_DAYS', '5')))
+
+# Matrices older than this (in seconds) are not served; scans compute live instead
+SIGNAL_MATRIX_MAX_AGE = int(os.getenv('SIGNAL_MATRIX_MAX_AGE', '86400'))
+
+# Engine signals are multiples of 20 (+/-80, +/-100, +/-200), stored divided by this
+SIGNAL_SCALE = 20
+
+# Minimum bars a symbol needs before its patterns are reported, as in live scans
+MIN_BARS = 5
+
+
+class SignalMatrix:
+    """
+    Signals of every pattern for every symbol over the most recent sessions.
+
+    Days are aligned per symbol by position: the last day is each symbol's own
+    latest bar. Symbols that had no usable data when the matrix was built are
+    kept with no dates and all-zero signals, so the matrix still covers them.
+
+    Attributes:
+        symbols (List[str]): Symbols, one per row
+        patterns (List[str]): Patterns, one per column
+        signals (np.ndarray): int8 array (symbols, patterns, days) of signal / scale
+        dates (np.ndarray): datetime64[D] array (symbols, days), NaT where missing
+        generated_at (str): ISO timestamp of when the matrix was built
+        scale (int): Factor turning stored signals back into engine signals
+    """
+
+    def __init__(self, symbols: List[str], patterns: List[str], signals: np.ndarray,
+                 dates: np.ndarray, generated_at: str, scale: int = SIGNAL_SCALE) -> None:
+        self.symbols = list(symbols)
+        self.patterns = list(patterns)
+        self.signals = signals
+        self.dates = dates
+        self.generated_at = generated_at
+        self.scale = scale
+        self._symbol_index = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self._pattern_index = {pattern: i for i, pattern in enumerate(self.patterns)}
+
+    def covers(self, symbols: List[str], patterns: List[str]) -> bool:
+        """Check whether every requested symbol and pattern is in the matrix"""
+        return (all(symbol in self._symbol_index for symbol in symbols)
+                and all(pattern in self._pattern_index for pattern in patterns))
+
+    def is_fresh(self, max_age: int = SIGNAL_MATRIX_MAX_AGE) -> bool:
+        """Check whether the matrix was built less than ``max_age`` seconds ago"""
+        try:
+            age = datetime.now() - datetime.fromisoformat(self.generated_at)
+        except ValueError:
+            return False
+        return age.total_seconds() < max_age
+
+    def latest(self, symbols: List[str], patterns: List[str]) -> List[Tuple[str, str, int, str]]:
+        """
+        Look up the latest-bar signals for symbols and patterns
+
+        Returns:
+            List of (symbol, pattern, value, date) for every non-zero signal,
+            ordered by ``symbols`` and then by ``patterns``. ``value`` uses the
+            engine's scale (+/-80, +/-100, +/-200).
+        """
+        rows = np.array([self._symbol_index[symbol] for symbol in symbols], dtype=np.intp)
+        cols = np.array([self._pattern_index[pattern] for pattern in patterns], dtype=np.intp)
+        if rows.size == 0 or cols.size == 0:
+            return []
+
+        latest = self.signals[rows[:, None], cols[None, :], -1]
+        hits = np.argwhere(latest != 0)
+        return [
+            (symbols[i], patterns[j], int(latest[i, j]) * self.scale, str(self.dates[rows[i], -1]))
+            for i, j in hits
+        ]
+
+    def save(self, path: Optional[str] = None) -> str:
+        """Atomically write the matrix to ``path`` and return the path"""
+        path = path or os.getenv('SIGNAL_MATRIX_PATH', DEFAULT_MATRIX_PATH)
+        directory = os.path.dirname(path) or '.'
+        os.makedirs(directory, exist_ok=True)
+
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.savez(f, symbols=np.array(self.symbols, dtype=str), patterns=np.array(self.patterns, dtype=str),
+                         signals=self.signals, dates=self.dates, generated_at=np.array(self.generated_at),
+                         scale=np.array(self.scale))
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return path
+
+    @classmethod
+    def load(cls, path: str) -> 'SignalMatrix':
+        """Read a matrix written by ``save``"""
+        with np.load(path, allow_pickle=False) as archive:
+            # Matrices saved before the scale was stored hold signal / 100
+            scale = int(archive['scale']) if 'scale' in archive.files else 100
+            return cls(archive['symbols'].tolist(), archive['patterns'].tolist(), archive['signals'],
+                       archive['dates'], str(archive['generated_at']), scale)
+
+
+def build_signal_matrix(frames: Dict[str, pd.DataFrame], symbols: List[str],
+                        patterns: Optional[List[str]] = None,
+                        days: int = SIGNAL_MATRIX_DAYS) -> SignalMatrix:
+    """
+    Evaluate patterns for prefetched bars into a signal matrix
+
+    Only the trailing bars needed for the last ``days`` sessions are evaluated,
+    sharded across worker processes when PATTERN_PROCESS_WORKERS is set.
+
+    Args:
+        frames: Dictionary mapping symbols to OHLC DataFrames
+        symbols: Symbols the matrix should cover, including ones without data
+        patterns: Patterns to evaluate, defaults to all ``candlestick_patterns``
+        days: Number of recent sessions to keep per symbol
+
+    Returns:
+        SignalMatrix with one row per symbol
+    """
+    patterns = list(patterns or candlestick_patterns)
+    signals = np.zeros((len(symbols), len(patterns), days), dtype=np.int8)
+    dates = np.full((len(symbols), days), np.datetime64('NaT'), dtype='datetime64[D]')
+
+    usable = {}
+    for symbol in symbols:
+        df = frames.get(symbol)
+        if df is None or len(df) < MIN_BARS or not all(col in df.columns for col in ['Open', 'High', 'Low', 'Close']):
+            continue
+        usable[symbol] = df
+
+    if usable:
+        row_of = {symbol: i for i, symbol in enumerate(symbols)}
+        tail_symbols, ohlc = align_tails(usable, get_window(patterns) + days - 1)
+        rows = np.array([row_of[symbol] for symbol in tail_symbols], dtype=np.intp)
+
+        results = evaluate_sharded(ohlc, patterns, days=days)
+        for col, pattern in enumerate(patterns):
+            if pattern in results:
+                signals[rows, col, :] = results[pattern] // SIGNAL_SCALE
+
+        for symbol in tail_symbols:
+            index = pd.DatetimeIndex(usable[symbol].index[-days:])
+            if index.tz is not None:
+                # Keep the exchange-local calendar date the bar is stamped with
+                index = index.tz_localize(None)
+            dates[row_of[symbol], days - len(index):] = index.values.astype('datetime64[D]')
+
+    return SignalMatrix(symbols, patterns, signals, dates, datetime.now().isoformat(timespec='seconds'))
+
+
+def materialize_signal_matrix(stock_manager, stocks: Dict[str, Dict[str, str]],
+                              path: Optional[str] = None) -> SignalMatrix:
+    """
+    Fetch bars for every symbol, build the signal matrix and persist it
+
+    Args:
+        stock_manager: Object with a ``get_stocks_data(symbols)`` method
+        stocks: Symbols to cover, as loaded from ``datasets/symbols.csv``
+        path: Output path, defaults to SIGNAL_MATRIX_PATH
+
+    Returns:
+        The materialized SignalMatrix
+    """
+    symbols = list(stocks)
+    frames = stock_manager.get_stocks_data(symbols)
+    matrix = build_signal_matrix(frames, symbols)
+    saved_to = matrix.save(path)
+    logger.info(f"Materialized signals for {len(frames)}/{len(symbols)} symbols and "
+                f"{len(matrix.patterns)} patterns to {saved_to}")
+    return matrix
+
+
+# Global matrix instance and the (path, modification time) it was loaded from
+_signal_matrix = None
+_signal_matrix_key = None
+
+
+def get_signal_matrix(path: Optional[str] = None) -> Optional[SignalMatrix]:
+    """Get the persisted signal matrix, reloading it when the file changes"""
+    global _signal_matrix, _signal_matrix_key
+
+    path = path or os.getenv('SIGNAL_MATRIX_PATH', DEFAULT_MATRIX_PATH)
+    try:
+        key = (path, os.path.getmtime(path))
+    except OSError:
+        return None
+
+    if _signal_matrix is None or key != _signal_matrix_key:
+        try:
+            _signal_matrix = SignalMatrix.load(path)
+            _signal_matrix_key = key
+        except Exception as e:
+            logger.warning(f"Failed to load signal matrix from {path}: {str(e)}")
+            return None
+
+    return _signal_matrix
+
+
+if __name__ == "__main__":
+    """Materialize the signal matrix, e.g. from a scheduled job after the close"""
+    logging.basicConfig(level=logging.INFO)
+
+    from api.scan import StockDataManager
+    from universe import load_universe
+
+    matrix = materialize_signal_matrix(StockDataManager(), load_universe().as_dict())
+    print(f"Signal matrix generated at {matrix.generated_at}: "
+          f"{len(matrix.symbols)} symbols x {len(matrix.patterns)} patterns x {matrix.signals.shape[2]} days")
@@ -0,0 +1,255 @@
+"""
+Tests for paginated fetching and bar conversion in the REST Alpaca data client
+"""
+
+import pytest
+import pandas as pd
+import requests
+from unittest.mock import Mock, patch
+
+from alpaca_client import AlpacaConfig, AlpacaDataClient, bars_to_frame, concat_pages, retry_on_error
+from rate_limiter import TokenBucket
+
+
+def create_bars(start_day, num_bars):
+    """Helper function to create raw Alpaca bars for consecutive days"""
+    return [
+        {'t': (pd.Timestamp('2020-01-01', tz='UTC') + pd.Timedelta(days=day)).isoformat(),
+         'o': 100.0 + day, 'h': 105.0 + day, 'l': 95.0 + day, 'c': 101.0 + day, 'v': 1000 + day}
+        for day in range(start_day, start_day + num_bars)
+    ]
+
+
+def create_response(payload):
+    """Helper function to create a mock requests response"""
+    response = Mock()
+    response.headers = {}
+    response.json.return_value = payload
+    response.raise_for_status = Mock()
+    return response
+
+
+def create_http_error(status_code):
+    """Helper function to create the HTTPError raise_for_status raises for ``status_code``"""
+    return requests.exceptions.HTTPError(f'{status_code} error', response=Mock(status_code=status_code))
+
+
+@pytest.fixture
+def client():
+    """Client with fake credentials and an unthrottled limiter"""
+    with patch.object(AlpacaConfig, 'API_KEY', 'key'), \
+            patch.object(AlpacaConfig, 'SECRET_KEY', 'secret'), \
+            patch('alpaca_client.time.sleep'), \
+            patch('alpaca_client.get_rate_limiter', return_value=TokenBucket(limit=60000, burst=100)):
+        yield AlpacaDataClient()
+
+
+class TestSingleSymbolPagination:
+    """Test following next_page_token for one symbol"""
+
+    def test_pages_are_followed_and_joined(self, client):
+        """Test that every page is requested and the bars are joined in order"""
+        client.session.get = Mock(side_effect=[
+            create_response({'bars': create_bars(0, 3), 'next_page_token': 'p2'}),
+            create_response({'bars': create_bars(3, 3), 'next_page_token': 'p3'}),
+            create_response({'bars': create_bars(6, 2), 'next_page_token': None}),
+        ])
+
+        df = client.get_stock_data('AAPL', '2020-01-01', '2020-01-31')
+
+        assert len(df) == 8
+        assert df.index.is_monotonic_increasing
+        assert df['Close'].tolist() == [101.0 + day for day in range(8)]
+        tokens = [call.kwargs['params'].get('page_token') for call in client.session.get.call_args_list]
+        assert tokens == [None, 'p2', 'p3']
+
+    def test_iter_bar_pages_streams_one_frame_per_page(self, client):
+        """Test that pages are yielded before the next one is requested"""
+        client.session.get = Mock(side_effect=[
+            create_response({'bars': create_bars(0, 2), 'next_page_token': 'p2'}),
+            create_response({'bars': create_bars(2, 2)}),
+        ])
+
+        pages = client.iter_bar_pages('AAPL', '2020-01-01', '2020-01-31', timeframe='1Hour')
+        first = next(pages)
+
+        assert len(first) == 2
+        assert client.session.get.call_count == 1
+        assert client.session.get.call_args.kwargs['params']['timeframe'] == '1Hour'
+        assert len(list(pages)) == 1
+
+    def test_failed_page_is_retried(self, client):
+        """Test that a failing page is retried instead of truncating the history"""
+        failing = create_response({})
+        failing.raise_for_status.side_effect = create_http_error(503)
+        client.session.get = Mock(side_effect=[
+            create_response({'bars': create_bars(0, 2), 'next_page_token': 'p2'}),
+            failing,
+            create_response({'bars': create_bars(2, 2)}),
+        ])
+
+        df = client.get_stock_data('AAPL', '2020-01-01', '2020-01-31')
+
+        assert len(df) == 4
+
+    def test_no_bars_returns_none(self, client):
+        """Test that an empty response yields no data"""
+        client.session.get = Mock(return_value=create_response({'bars': None, 'next_page_token': None}))
+
+        assert client.get_stock_data('AAPL') is None
+
+
+class TestRetryOnError:
+    """Test which failures are retried and how long retries wait"""
+
+    @staticmethod
+    def call_with_retries(errors):
+        """Helper function to call a function failing with ``errors`` before succeeding"""
+        func = Mock(side_effect=errors + ['ok'])
+        with patch('alpaca_client.time.sleep') as sleep:
+            try:
+                result = retry_on_error(max_retries=3, delay=1.0)(func)()
+            except Exception as e:
+                result = e
+        return result, func.call_count, [call.args[0] for call in sleep.call_args_list]
+
+    @pytest.mark.parametrize('status_code', [400, 401, 403, 404, 422])
+    def test_client_errors_are_raised_at_once(self, status_code):
+        """Test that non-transient 4xx responses are neither retried nor waited for"""
+        result, calls, sleeps = self.call_with_retries([create_http_error(status_code)])
+
+        assert isinstance(result, requests.exceptions.HTTPError)
+        assert calls == 1
+        assert sleeps == []
+
+    def test_other_exceptions_are_raised_at_once(self):
+        """Test that errors unrelated to the transport are not retried"""
+        result, calls, sleeps = self.call_with_retries([ValueError('bad payload')])
+
+        assert isinstance(result, ValueError)
+        assert (calls, sleeps) == (1, [])
+
+    @pytest.mark.parametrize('error', [create_http_error(429), create_http_error(503),
+                                       requests.exceptions.ConnectionError('reset'),
+                                       requests.exceptions.Timeout('slow')])
+    def test_transient_errors_are_retried(self, error):
+        """Test that rate limits, server errors and connection failures are retried with backoff"""
+        result, calls, sleeps = self.call_with_retries([error, error])
+
+        assert result == 'ok'
+        assert calls == 3
+        assert sleeps == [1.0, 2.0]
+
+    def test_no_wait_after_final_attempt(self):
+        """Test that the last failed attempt raises without sleeping"""
+        result, calls, sleeps = self.call_with_retries([create_http_error(429)] * 3)
+
+        assert isinstance(result, requests.exceptions.HTTPError)
+        assert calls == 3
+        assert sleeps == [1.0, 2.0]
+
+
+class TestMultiSymbolPagination:
+    """Test multi-symbol requests whose symbols span pages"""
+
+    def test_symbol_split_across_pages_is_joined(self, client):
+        """Test that a symbol's bars continue from one page onto the next"""
+        client.session.get = Mock(side_effect=[
+            create_response({'bars': {'AAPL': create_bars(0, 3), 'MSFT': create_bars(0, 1)},
+                             'next_page_token': 'p2'}),
+            create_response({'bars': {'MSFT': create_bars(1, 3)}, 'next_page_token': None}),
+        ])
+
+        results = client.get_stocks_data(['msft', 'AAPL', 'BAD-1', 'EMPTY'], '2020-01-01', '2020-01-31')
+
+        assert list(results) == ['MSFT', 'AAPL']
+        assert len(results['MSFT']) == 4
+        assert len(results['AAPL']) == 3
+        params = client.session.get.call_args_list[0].kwargs['params']
+        assert params['symbols'] == 'MSFT,AAPL,EMPTY'
+
+    def test_symbols_are_chunked(self, client):
+        """Test that large universes are split into several requests"""
+        symbols = [f'S{i}' for i in range(5)]
+        client.session.get = Mock(side_effect=lambda url, params, timeout: create_response(
+            {'bars': {symbol: create_bars(0, 2) for symbol in params['symbols'].split(',')}}))
+
+        with patch.object(AlpacaConfig, 'MAX_SYMBOLS_PER_REQUEST', 2):
+            results = client.get_stocks_data(symbols)
+
+        assert list(results) == symbols
+        assert client.session.get.call_count == 3
+
+    def test_failed_chunk_is_dropped_not_truncated(self, client):
+        """Test that a chunk failing mid-stream returns nothing for its symbols"""
+        failing = create_response({})
+        failing.raise_for_status.side_effect = create_http_error(503)
+        client.session.get = Mock(side_effect=[
+            create_response({'bars': {'AAPL': create_bars(0, 2)}, 'next_page_token': 'p2'}),
+            failing, failing, failing,
+        ])
+
+        assert client.get_stocks_data(['AAPL']) == {}
+
+
+class TestConcatPages:
+    """Test joining converted pages"""
+
+    def test_overlapping_bar_is_kept_once(self):
+        """Test that a bar repeated on a page boundary appears once"""
+        index = pd.date_range('2020-01-01', periods=4, freq='D')
+        first = pd.DataFrame({'Close': [1.0, 2.0, 3.0]}, index=index[:3])
+        second = pd.DataFrame({'Close': [3.5, 4.0]}, index=index[2:])
+
+        df = concat_pages([first, None, second])
+
+        assert df['Close'].tolist() == [1.0, 2.0, 3.5, 4.0]
+
+    def test_no_pages(self):
+        """Test that no usable pages give None"""
+        assert concat_pages([None, pd.DataFrame()]) is None
+
+
+class TestBarsToFrame:
+    """Test the columnar bar conversion"""
+
+    def test_columns_and_types(self):
+        """Test that bars become typed OHLCV columns indexed by timestamp"""
+        df = bars_to_frame(create_bars(0, 3))
+
+        assert list(df.columns) == ['Open', 'High', 'Low', 'Close', 'Volume']
+        assert df.index.name == 'timestamp'
+        assert str(df.index.tz) == 'UTC'
+        assert df['Close'].dtype == 'float64'
+        assert df['Volume'].dtype == 'int64'
+        assert df['Volume'].tolist() == [1000, 1001, 1002]
+
+    def test_unsorted_bars_are_sorted(self):
+        """Test that out-of-order bars are put in time order"""
+        bars = create_bars(0, 4)
+
+        df = bars_to_frame([bars[2], bars[0], bars[3], bars[1]])
+
+        assert df['Open'].tolist() == [100.0, 101.0, 102.0, 103.0]
+
+    def test_missing_values(self):
+        """Test that bars without a price are dropped and missing volume is zero"""
+        bars = create_bars(0, 3)
+        bars[1]['c'] = None
+        bars[2]['v'] = None
+
+        df = bars_to_frame(bars)
+
+        assert df['Open'].tolist() == [100.0, 102.0]
+        assert df['Volume'].tolist() == [1000, 0]
+        assert bars_to_frame([dict(bars[1])]) is None
+
+    def test_model_fields(self):
+        """Test that SDK bar objects convert with an attribute getter"""
+        from operator import attrgetter
+
+        bar = Mock(timestamp=pd.Timestamp('2024-01-02', tz='UTC'), open=1.0, high=2.0, low=0.5, close=1.5, volume=10)
+
+        df = bars_to_frame([bar], attrgetter('timestamp', 'open', 'high', 'low', 'close', 'volume'))
+
+        assert df.iloc[0].tolist() == [1.0, 2.0, 0.5, 1.5, 10]
@@ -0,0 +1,177 @@
+"""
+Tests for the asyncio Alpaca data client
+"""
+
+import time
+import asyncio
+import pytest
+from unittest.mock import patch
+
+aiohttp = pytest.importorskip('aiohttp')
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from alpaca_client import AlpacaConfig
+from alpaca_client_async import AsyncAlpacaDataClient
+from rate_limiter import TokenBucket
+
+
+def create_bars(num_bars=5):
+    """Helper function to create raw Alpaca bars"""
+    return [
+        {'t': f'2024-01-{day + 1:02d}T05:00:00Z', 'o': 100.0 + day, 'h': 105.0 + day,
+         'l': 95.0 + day, 'c': 101.0 + day, 'v': 1000 + day}
+        for day in range(num_bars)
+    ]
+
+
+class FakeAlpacaServer:
+    """In-process HTTP server answering the bars endpoint"""
+
+    def __init__(self, delays=None, fail_first=(), rate_headers=None):
+        self.delays = delays or {}
+        self.fail_first = set(fail_first)
+        self.rate_headers = rate_headers
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.requests = []
+        self.peers = set()
+
+    async def bars(self, request):
+        symbol = request.match_info['symbol']
+        self.requests.append(symbol)
+        self.peers.add(request.transport.get_extra_info('peername'))
+        assert request.headers['APCA-API-KEY-ID'] == 'key'
+
+        if symbol in self.fail_first:
+            self.fail_first.discard(symbol)
+            return web.json_response({'message': 'too many requests'}, status=429)
+        if symbol == 'EMPTY':
+            return web.json_response({'bars': [], 'symbol': symbol})
+        if symbol == 'ZZZZ':
+            return web.json_response({'message': 'not found'}, status=404)
+        if symbol == 'LONG':
+            # Three pages of five bars each
+            page = int(request.query.get('page_token', '0'))
+            bars = [dict(bar, t=f'2024-0{page + 1}-{bar["t"][8:]}') for bar in create_bars()]
+            return web.json_response({'bars': bars, 'symbol': symbol,
+                                      'next_page_token': str(page + 1) if page < 2 else None})
+
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delays.get(symbol, 0.05))
+        finally:
+            self.in_flight -= 1
+        headers = self.rate_headers() if self.rate_headers else None
+        return web.json_response({'bars': create_bars(), 'symbol': symbol}, headers=headers)
+
+    def app(self):
+        app = web.Application()
+        app.router.add_get('/v2/stocks/{symbol}/bars', self.bars)
+        return app
+
+
+def run_client(fake, coro_factory, max_concurrency=4, limiter=None):
+    """Helper function to run a client coroutine against the fake server"""
+    limiter = limiter or TokenBucket(limit=60000, burst=100)
+
+    async def run():
+        server = TestServer(fake.app())
+        await server.start_server()
+        try:
+            with patch.object(AlpacaConfig, 'API_KEY', 'key'), \
+                    patch.object(AlpacaConfig, 'SECRET_KEY', 'secret'), \
+                    patch.object(AlpacaConfig, 'BASE_URL', str(server.make_url('')).rstrip('/')), \
+                    patch('alpaca_client_async.get_rate_limiter', return_value=limiter), \
+                    patch.object(AlpacaConfig, 'RETRY_DELAY', 0.01):
+                async with AsyncAlpacaDataClient(max_concurrency=max_concurrency) as client:
+                    return await coro_factory(client)
+        finally:
+            await server.close()
+
+    return asyncio.run(run())
+
+
+class TestAsyncAlpacaDataClient:
+    """Test concurrent bar fetching"""
+
+    def test_requires_credentials(self):
+        """Test that missing credentials are rejected like the blocking client"""
+        with patch.object(AlpacaConfig, 'API_KEY', None):
+            with pytest.raises(ValueError):
+                AsyncAlpacaDataClient()
+
+    def test_single_symbol_matches_blocking_format(self):
+        """Test that bars are converted to the yfinance-compatible format"""
+        df = run_client(FakeAlpacaServer(), lambda client: client.get_stock_data('aapl', '2024-01-01', '2024-01-10'))
+
+        assert list(df.columns) == ['Open', 'High', 'Low', 'Close', 'Volume']
+        assert len(df) == 5
+        assert df['Close'].iloc[0] == 101.0
+
+    def test_multiple_symbols_run_concurrently_within_cap(self):
+        """Test that requests overlap up to the concurrency cap and keep input order"""
+        symbols = [f'S{i}' for i in range(12)]
+        fake = FakeAlpacaServer(delays={'S0': 0.15})
+
+        results = run_client(fake, lambda client: client.get_multiple_stocks_data(symbols), max_concurrency=4)
+
+        assert list(results) == symbols
+        assert fake.max_in_flight == 4
+        # Requests reuse the pooled keep-alive connections
+        assert len(fake.peers) <= 4
+
+    def test_rate_limited_request_is_retried(self):
+        """Test that a 429 response is retried with backoff"""
+        fake = FakeAlpacaServer(fail_first={'AAPL'})
+
+        df = run_client(fake, lambda client: client.get_stock_data('AAPL'))
+
+        assert df is not None
+        assert fake.requests == ['AAPL', 'AAPL']
+
+    def test_permanent_error_is_not_retried(self):
+        """Test that a 404 response is attempted exactly once"""
+        fake = FakeAlpacaServer()
+
+        df = run_client(fake, lambda client: client.get_stock_data('ZZZZ'))
+
+        assert df is None
+        assert fake.requests == ['ZZZZ']
+
+    def test_next_page_token_is_followed(self):
+        """Test that every page of a long history is fetched and joined"""
+        fake = FakeAlpacaServer()
+
+        df = run_client(fake, lambda client: client.get_stock_data('LONG'))
+
+        assert fake.requests == ['LONG'] * 3
+        assert len(df) == 15
+        assert df.index.is_monotonic_increasing
+
+    def test_missing_and_invalid_symbols_are_skipped(self):
+        """Test that empty responses and invalid symbols are left out"""
+        fake = FakeAlpacaServer()
+
+        results = run_client(fake, lambda client: client.get_multiple_stocks_data(['AAPL', 'EMPTY', 'BAD-1']))
+
+        assert list(results) == ['AAPL']
+        assert 'BAD-1' not in fake.requests
+
+    def test_rate_limit_headers_pace_requests(self):
+        """Test that an exhausted quota makes the next request wait for the reset"""
+        fake = FakeAlpacaServer(rate_headers=lambda: {
+            'X-RateLimit-Limit': '6000',
+            'X-RateLimit-Remaining': '0',
+            'X-RateLimit-Reset': f'{time.time() + 0.3:.3f}'
+        })
+        limiter = TokenBucket(limit=60000, burst=100)
+
+        results = run_client(fake, lambda client: client.get_multiple_stocks_data(['AAPL', 'MSFT']),
+                             max_concurrency=1, limiter=limiter)
+
+        assert list(results) == ['AAPL', 'MSFT']
+        assert limiter.limit == 6000
+        assert limiter.waits == 1
+        assert limiter.waited > 0.2
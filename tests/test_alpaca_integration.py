@@ -121,6 +121,72 @@ class TestAlpacaDataFetching:
         assert mock_client.get_stock_data(None) is None
 
 
+class TestBulkDataFetching:
+    """Test fetching many symbols with multi-symbol bars requests"""
+    
+    @pytest.fixture
+    def mock_client(self):
+        """Create a mock Alpaca client for testing"""
+        with patch.dict(os.environ, {
+            'ALPACA_API_KEY': 'PKV759RYS7G6DTHFFQK1',
+            'ALPACA_SECRET_KEY': 'hQI5lHekr89ilSVAgCbJCOP4EcsqtuGMeKpN'
+        }):
+            return AlpacaSDKClient()
+    
+    def test_bulk_fetch_splits_response_per_symbol(self, mock_client):
+        """Test that one combined response is split into per-symbol DataFrames"""
+        mock_response = Mock()
+        mock_response.data = {
+            'AAPL': setup_mock_response(mock_client, 'AAPL', 5).data['AAPL'],
+            'MSFT': setup_mock_response(mock_client, 'MSFT', 3).data['MSFT']
+        }
+        mock_client.client.get_stock_bars = Mock(return_value=mock_response)
+        
+        data = mock_client.get_stocks_data(['AAPL', 'msft', 'NODATA'], '2024-01-01', '2024-01-31')
+        
+        assert mock_client.client.get_stock_bars.call_count == 1
+        assert set(data.keys()) == {'AAPL', 'MSFT'}
+        assert len(data['AAPL']) == 5
+        assert len(data['MSFT']) == 3
+        assert list(data['AAPL'].columns) == ['Open', 'High', 'Low', 'Close', 'Volume']
+        assert isinstance(data['MSFT'].index, pd.DatetimeIndex)
+    
+    def test_bulk_fetch_chunks_symbols(self, mock_client):
+        """Test that large universes are split into multiple requests"""
+        mock_response = Mock()
+        mock_response.data = {}
+        mock_client.client.get_stock_bars = Mock(return_value=mock_response)
+        symbols = [f'S{i}' for i in range(5)]
+        
+        with patch('alpaca_client_sdk.MAX_SYMBOLS_PER_REQUEST', 2):
+            mock_client.get_stocks_data(symbols, '2024-01-01', '2024-01-31')
+        
+        requested = [call.args[0].symbol_or_symbols for call in mock_client.client.get_stock_bars.call_args_list]
+        assert requested == [['S0', 'S1'], ['S2', 'S3'], ['S4']]
+    
+    def test_bulk_fetch_skips_invalid_symbols(self, mock_client):
+        """Test that invalid symbols are dropped before any request is made"""
+        mock_client.client.get_stock_bars = Mock()
+        
+        assert mock_client.get_stocks_data(['', 'INVALID_SYMBOL_123']) == {}
+        mock_client.client.get_stock_bars.assert_not_called()
+    
+    def test_bulk_fetch_reads_raw_data_response(self, mock_client):
+        """Test that raw-data responses of API bar dicts are converted directly"""
+        raw_bars = [
+            {'t': f'2024-01-0{day}T05:00:00Z', 'o': 150.0, 'h': 155.0, 'l': 149.0, 'c': 154.0 + day,
+             'v': 1000, 'n': 10, 'vw': 152.0}
+            for day in range(1, 4)
+        ]
+        mock_client.client.get_stock_bars = Mock(return_value={'AAPL': raw_bars})
+        
+        data = mock_client.get_stocks_data(['AAPL'], '2024-01-01', '2024-01-31')
+        
+        assert list(data['AAPL'].columns) == ['Open', 'High', 'Low', 'Close', 'Volume']
+        assert data['AAPL']['Close'].tolist() == [155.0, 156.0, 157.0]
+        assert str(data['AAPL'].index.tz) == 'UTC'
+
+
 class TestDataFormatCompatibility:
     """Test that Alpaca data format matches yfinance structure"""
     
@@ -0,0 +1,157 @@
+"""
+Tests for the pattern forward-return backtest
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+from unittest.mock import patch
+
+import backtest
+from backtest import backtest_directory, backtest_frames, backtest_panel, forward_returns
+from pattern_engine import detect_patterns
+from process_pool import shutdown_process_pool
+
+PATTERNS = ['CDLDOJI', 'CDLENGULFING', 'CDLHAMMER', 'CDLHIKKAKE']
+
+
+def create_panel(n_symbols, n_days, seed=0):
+    """Helper function to create a random OHLC panel with some missing bars"""
+    rng = np.random.default_rng(seed)
+    close = np.maximum(100 + np.cumsum(rng.normal(0, 1, (n_symbols, n_days)), axis=1), 5)
+    open_ = close + rng.normal(0, 1, close.shape)
+    high = np.maximum(open_, close) + np.abs(rng.normal(0, 1, close.shape))
+    low = np.minimum(open_, close) - np.abs(rng.normal(0, 1, close.shape))
+    ohlc = np.round(np.stack([open_, high, low, close]), 2)
+    ohlc[:, ::5, n_days // 3:n_days // 3 + 3] = np.nan
+    return ohlc
+
+
+def create_frame(n_days, seed):
+    """Helper function to create an OHLC DataFrame from one row of a random panel"""
+    open_, high, low, close = create_panel(1, n_days, seed)[:, 0]
+    return pd.DataFrame({'Open': open_, 'High': high, 'Low': low, 'Close': close},
+                        index=pd.bdate_range('2020-01-01', periods=n_days, name='Date'))
+
+
+def naive_stats(series, patterns, horizons):
+    """Helper function to compute the statistics with one loop iteration per signal"""
+    everything = {h: [ohlc[3][t + h] / ohlc[3][t] - 1 for ohlc in series
+                      for t in range(len(ohlc[3]) - h)] for h in horizons}
+    rows = {}
+    for ohlc in series:
+        close = ohlc[3]
+        signals = detect_patterns(*ohlc, patterns)
+        for pattern, values in signals.items():
+            for t in np.flatnonzero(values):
+                direction = 'bullish' if values[t] > 0 else 'bearish'
+                for h in horizons:
+                    forward = close[t + h] / close[t] - 1 if t + h < len(close) else np.nan
+                    rows.setdefault((pattern, direction, h), []).append(forward)
+
+    expected = {}
+    for (pattern, direction, h), returns in rows.items():
+        returns = np.array(returns)
+        known = returns[~np.isnan(returns)]
+        sign = 1 if direction == 'bullish' else -1
+        expected[(pattern, direction, h)] = {
+            'signals': len(returns),
+            'count': len(known),
+            'hit_rate': np.mean(known * sign > 0) if len(known) else np.nan,
+            'mean_return': known.mean() if len(known) else np.nan,
+            'median_return': np.median(known) if len(known) else np.nan,
+            'excess_return': (known.mean() if len(known) else np.nan) - np.nanmean(everything[h])
+        }
+    return expected
+
+
+def assert_matches(result, expected):
+    """Helper function to compare a backtest table with naive_stats"""
+    assert set(result.index) == set(expected)
+    for key, stats in expected.items():
+        for column, value in stats.items():
+            np.testing.assert_allclose(result.loc[key, column], value, err_msg=f"{key} {column}")
+
+
+@pytest.fixture(scope='module', autouse=True)
+def stop_pool():
+    """Stop worker processes started by these tests"""
+    yield
+    shutdown_process_pool()
+
+
+class TestForwardReturns:
+    """Test forward return computation"""
+
+    def test_returns_per_horizon(self):
+        """Test returns, the unknown tail and missing closes"""
+        close = np.array([100.0, 110.0, np.nan, 121.0])
+
+        returns = forward_returns(close, [1, 3, 5])
+
+        np.testing.assert_allclose(returns[0], [0.1, np.nan, np.nan, np.nan])
+        np.testing.assert_allclose(returns[1], [0.21, np.nan, np.nan, np.nan])
+        assert np.isnan(returns[2]).all()
+
+    def test_invalid_horizons(self):
+        """Test that empty and non-positive horizons raise"""
+        for horizons in ([], [0], [5, -1]):
+            with pytest.raises(ValueError):
+                forward_returns(np.ones(10), horizons)
+
+
+class TestBacktestPanel:
+    """Test per-pattern statistics"""
+
+    def test_matches_per_signal_loop(self):
+        """Test that the statistics equal a loop over every signal"""
+        ohlc = create_panel(6, 120, seed=3)
+        horizons = [1, 5, 20]
+
+        result = backtest_panel(ohlc, PATTERNS, horizons, workers=1)
+        expected = naive_stats(list(ohlc.transpose(1, 0, 2)), PATTERNS, horizons)
+
+        assert_matches(result, expected)
+
+    def test_sharded_matches_in_process(self):
+        """Test that evaluating patterns on the process pool gives the same statistics"""
+        ohlc = create_panel(8, 80, seed=4)
+
+        local = backtest_panel(ohlc, PATTERNS, workers=1)
+        with patch.object(backtest, 'PATTERNS_PER_PASS', 3), \
+                patch('process_pool.PATTERN_SHARD_MIN_SYMBOLS', 2):
+            sharded = backtest_panel(ohlc, PATTERNS, workers=2)
+
+        pd.testing.assert_frame_equal(sharded.sort_index(), local.sort_index())
+
+    def test_no_signals(self):
+        """Test that a panel too short for any pattern gives an empty table"""
+        result = backtest_panel(create_panel(2, 3), ['CDLENGULFING', 'CDLNOTAPATTERN'])
+
+        assert result.empty
+        assert list(result.columns) == backtest.STAT_COLUMNS
+
+
+class TestBacktestFrames:
+    """Test backtests over DataFrames and CSV directories"""
+
+    def test_histories_are_aligned_by_position(self):
+        """Test that symbols with shorter histories are measured on their own bars"""
+        frames = {'LONG': create_frame(90, 0), 'SHORT': create_frame(40, 1), 'EMPTY': create_frame(0, 2)}
+
+        result = backtest_frames(frames, PATTERNS, [1, 5, 20])
+        expected = naive_stats([frame[['Open', 'High', 'Low', 'Close']].to_numpy().T
+                                for frame in frames.values() if len(frame)], PATTERNS, [1, 5, 20])
+
+        assert_matches(result, expected)
+
+    def test_directory_skips_unusable_files(self, tmp_path):
+        """Test that CSVs are read and files without OHLC columns are skipped"""
+        frames = {f'S{seed}': create_frame(60, seed) for seed in range(3)}
+        for symbol, frame in frames.items():
+            frame.to_csv(tmp_path / f'{symbol}.csv')
+        (tmp_path / 'BAD.csv').write_text('Date,Close\n2024-01-01,1\n')
+
+        result = backtest_directory(str(tmp_path), PATTERNS, [1, 5])
+
+        pd.testing.assert_frame_equal(result, backtest_frames(frames, PATTERNS, [1, 5]), check_exact=False)
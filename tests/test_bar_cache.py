@@ -0,0 +1,149 @@
+"""
+Tests for the process-level bar cache
+"""
+
+import pandas as pd
+from datetime import datetime
+from unittest.mock import Mock
+
+from bar_cache import BAR_CACHE_INTRADAY_TTL, BAR_CACHE_TTL, MARKET_TZ, BarCache, trading_day_ttl
+
+
+def create_bars(periods=10):
+    """Helper function to create a small OHLCV DataFrame"""
+    index = pd.date_range('2024-01-01', periods=periods, freq='D')
+    return pd.DataFrame({
+        'Open': [100.0] * periods,
+        'High': [105.0] * periods,
+        'Low': [95.0] * periods,
+        'Close': [101.0] * periods,
+        'Volume': [1000] * periods
+    }, index=index)
+
+
+class FakeClock:
+    """Manually advanced monotonic clock"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def frame_size(frame):
+    """Helper function to compute the bytes a frame is accounted for"""
+    return int(frame.memory_usage(index=True, deep=True).sum())
+
+
+class TestTradingDayTTL:
+    """Test that expiry follows the trading calendar"""
+
+    def test_settled_range_uses_full_ttl(self):
+        """Test that ranges ending before today are kept for the full TTL"""
+        now = datetime(2024, 3, 6, 12, 0, tzinfo=MARKET_TZ)
+        assert trading_day_ttl('2024-03-05', now) == BAR_CACHE_TTL
+
+    def test_trading_hours_use_short_ttl(self):
+        """Test that ranges reaching today expire quickly while the session trades"""
+        now = datetime(2024, 3, 6, 11, 0, tzinfo=MARKET_TZ)
+        assert trading_day_ttl('2024-03-06', now) == BAR_CACHE_INTRADAY_TTL
+
+    def test_overnight_expires_at_next_open(self):
+        """Test that after the daily bar is final entries live until the next open"""
+        now = datetime(2024, 3, 6, 21, 30, tzinfo=MARKET_TZ)
+        assert trading_day_ttl('2024-03-06', now) == 12 * 3600
+
+    def test_weekend_expires_at_monday_open(self):
+        """Test that weekends do not count as sessions"""
+        now = datetime(2024, 3, 8, 21, 30, tzinfo=MARKET_TZ)  # Friday evening
+        assert trading_day_ttl('2024-03-09', now) == min(60 * 3600, BAR_CACHE_TTL)
+
+
+class TestBarCache:
+    """Test TTL expiry, LRU eviction and counters"""
+
+    def test_hit_and_miss_counters(self):
+        """Test that lookups are counted"""
+        cache = BarCache()
+        key = ('AAPL', '2024-01-01', '2024-02-01', 'alpaca')
+
+        assert cache.get(key) is None
+        cache.put(key, create_bars(), ttl=60)
+
+        assert cache.get(key) is not None
+        stats = cache.stats()
+        assert (stats['hits'], stats['misses'], stats['entries']) == (1, 1, 1)
+        assert stats['hit_rate'] == 0.5
+
+    def test_entries_expire(self):
+        """Test that entries are dropped once their TTL passes"""
+        clock = FakeClock()
+        cache = BarCache(clock=clock)
+        key = ('AAPL', '2024-01-01', '2024-02-01', 'alpaca')
+        cache.put(key, create_bars(), ttl=60)
+
+        clock.now = 59
+        assert cache.get(key) is not None
+        clock.now = 60
+        assert cache.get(key) is None
+        assert cache.stats()['expirations'] == 1
+        assert cache.stats()['bytes'] == 0
+
+    def test_least_recently_used_is_evicted(self):
+        """Test that the byte bound evicts the least recently used entry"""
+        frame = create_bars()
+        cache = BarCache(max_bytes=2 * frame_size(frame))
+        keys = [(symbol, '2024-01-01', '2024-02-01', 'alpaca') for symbol in ['A', 'B', 'C']]
+
+        cache.put(keys[0], frame, ttl=60)
+        cache.put(keys[1], frame, ttl=60)
+        cache.get(keys[0])
+        cache.put(keys[2], frame, ttl=60)
+
+        assert cache.get(keys[1]) is None
+        assert cache.get(keys[0]) is not None
+        assert cache.get(keys[2]) is not None
+        assert cache.stats()['evictions'] == 1
+        assert cache.stats()['bytes'] <= cache.max_bytes
+
+    def test_oversized_frames_are_not_cached(self):
+        """Test that a frame larger than the whole cache is skipped"""
+        cache = BarCache(max_bytes=10)
+        key = ('AAPL', '2024-01-01', '2024-02-01', 'alpaca')
+        cache.put(key, create_bars(), ttl=60)
+
+        assert cache.get(key) is None
+
+
+class TestStockDataManagerWithBarCache:
+    """Test that StockDataManager reuses cached bars across instances"""
+
+    @staticmethod
+    def create_manager(cache):
+        """Helper function to build a manager without the bar store"""
+        from api.scan import StockDataManager
+
+        manager = StockDataManager.__new__(StockDataManager)
+        manager._cache = cache
+        manager._bar_store = None
+        manager._use_alpaca = True
+        manager._use_yfinance_fallback = False
+        manager._alpaca_client = Mock()
+        return manager
+
+    def test_repeated_requests_skip_upstream(self):
+        """Test that a second manager sharing the cache makes no upstream call"""
+        cache = BarCache()
+        first = self.create_manager(cache)
+        first._alpaca_client.get_stocks_data.return_value = {'AAPL': create_bars(), 'MSFT': create_bars()}
+        first.get_stocks_data(['AAPL', 'MSFT'], '2024-01-01', '2024-02-01')
+
+        second = self.create_manager(cache)
+        second._alpaca_client.get_stocks_data.return_value = {'NVDA': create_bars()}
+        result = second.get_stocks_data(['MSFT', 'NVDA', 'AAPL'], '2024-01-01', '2024-02-01')
+
+        second._alpaca_client.get_stocks_data.assert_called_once_with(['NVDA'], '2024-01-01', '2024-02-01')
+        assert list(result) == ['MSFT', 'NVDA', 'AAPL']
+        assert second.get_stock_data('AAPL', '2024-01-01', '2024-02-01') is result['AAPL']
+        second._alpaca_client.get_stock_data.assert_not_called()
@@ -0,0 +1,186 @@
+"""
+Tests for the persistent local bar store
+"""
+
+import threading
+import numpy as np
+import pandas as pd
+import pytest
+from unittest.mock import Mock, patch
+
+from bar_cache import BarCache
+from bar_store import BarStore
+
+
+def create_bars(start, periods, tz='UTC'):
+    """Helper function to create daily bars stamped like Alpaca's (04:00 UTC)"""
+    index = pd.bdate_range(start, periods=periods) + pd.Timedelta(hours=4)
+    if tz:
+        index = index.tz_localize(tz)
+    values = np.arange(periods, dtype=float) + 100.0
+    return pd.DataFrame({
+        'Open': values,
+        'High': values + 2,
+        'Low': values - 2,
+        'Close': values + 1,
+        'Volume': np.arange(periods) * 1000
+    }, index=index)
+
+
+@pytest.fixture
+def store(tmp_path):
+    """Create a bar store in a temporary directory"""
+    return BarStore(str(tmp_path))
+
+
+class TestBarStore:
+    """Test reading, writing and incremental syncing of stored bars"""
+
+    def test_missing_symbol_needs_full_fetch(self, store):
+        """Test that an unknown symbol requires fetching the whole range"""
+        assert store.sync_range('AAPL', '2024-01-01', '2024-02-01') == ('2024-01-01', False)
+        assert store.read('AAPL') is None
+
+    def test_round_trip_preserves_bars(self, store):
+        """Test that stored bars read back with the same values and index"""
+        bars = create_bars('2024-01-01', 20)
+        store.update('AAPL', bars, '2024-01-01', '2024-02-01', is_delta=False)
+
+        result = store.read('AAPL', '2024-01-01', '2024-02-01')
+
+        pd.testing.assert_frame_equal(result, bars, check_names=False, check_freq=False)
+        assert pd.api.types.is_integer_dtype(result['Volume'])
+
+    def test_missing_volume_is_stored_as_zero(self, store):
+        """Test that bars with a NaN volume are persisted with a volume of 0"""
+        df = create_bars('2024-01-01', 5)
+        df['Volume'] = [1000.0, np.nan, 3000.0, np.nan, 5000.0]
+
+        store.update('AAPL', df, '2024-01-01', '2024-01-08', is_delta=False)
+        stored = store.read('AAPL')
+
+        assert stored['Volume'].tolist() == [1000, 0, 3000, 0, 5000]
+        np.testing.assert_array_equal(stored['Close'].to_numpy(), df['Close'].to_numpy())
+
+    def test_synced_range_needs_no_fetch(self, store):
+        """Test that a request inside the synced range is served locally"""
+        store.update('AAPL', create_bars('2024-01-01', 20), '2024-01-01', '2024-02-01', is_delta=False)
+
+        assert store.sync_range('AAPL', '2024-01-10', '2024-02-01') is None
+        # 2024-02-03 is a Saturday, so only Thursday and Friday are new
+        assert store.sync_range('AAPL', '2024-01-01', '2024-02-03') == ('2024-02-01', True)
+        # An earlier start than was ever fetched needs the full range again
+        assert store.sync_range('AAPL', '2023-12-01', '2024-02-01') == ('2023-12-01', False)
+
+    def test_weekend_needs_no_fetch(self, store):
+        """Test that days without sessions do not trigger a fetch"""
+        store.update('AAPL', create_bars('2024-01-01', 5), '2024-01-01', '2024-01-06', is_delta=False)
+
+        # Saturday to Monday holds no completed session
+        assert store.sync_range('AAPL', '2024-01-01', '2024-01-08') is None
+
+    def test_delta_appends_and_replaces_overlap(self, store):
+        """Test that a delta appends new sessions and replaces refetched ones"""
+        full = create_bars('2024-01-01', 10)
+        store.update('AAPL', full.iloc[:8], '2024-01-01', '2024-01-11', is_delta=False)
+
+        delta = full.iloc[7:].copy()
+        delta['Close'] += 0.5
+        store.update('AAPL', delta, '2024-01-11', '2024-01-13', is_delta=True)
+
+        result = store.read('AAPL')
+        assert len(result) == 10
+        assert result.index.is_monotonic_increasing
+        assert result['Close'].iloc[7] == full['Close'].iloc[7] + 0.5
+        assert result['Close'].iloc[6] == full['Close'].iloc[6]
+        assert store.sync_range('AAPL', '2024-01-01', '2024-01-13') is None
+
+    def test_read_slices_requested_range(self, store):
+        """Test that reads return only bars within [start, end)"""
+        store.update('AAPL', create_bars('2024-01-01', 20), '2024-01-01', '2024-02-01', is_delta=False)
+
+        result = store.read('AAPL', '2024-01-08', '2024-01-15')
+
+        assert [ts.strftime('%Y-%m-%d') for ts in result.index] == [
+            '2024-01-08', '2024-01-09', '2024-01-10', '2024-01-11', '2024-01-12'
+        ]
+
+
+class TestStockDataManagerWithBarStore:
+    """Test that StockDataManager serves bars from the store after the first load"""
+
+    def test_second_request_reads_locally(self, store):
+        """Test that a repeated request makes no upstream call"""
+        from api.scan import StockDataManager
+
+        manager = StockDataManager.__new__(StockDataManager)
+        manager._bar_store = store
+        manager._cache = BarCache(max_bytes=0)  # Disabled so the store is exercised
+        manager._use_alpaca = True
+        manager._use_yfinance_fallback = False
+        manager._alpaca_client = Mock()
+        manager._alpaca_client.get_stock_data.return_value = create_bars('2024-01-01', 20)
+
+        first = manager.get_stock_data('AAPL', '2024-01-01', '2024-02-01')
+        second = manager.get_stock_data('AAPL', '2024-01-01', '2024-02-01')
+
+        assert manager._alpaca_client.get_stock_data.call_count == 1
+        pd.testing.assert_frame_equal(first, second)
+        assert len(second) == 20
+
+    @staticmethod
+    def create_manager(store, alpaca_client):
+        """Helper function to create a manager without a process-level cache"""
+        from api.scan import StockDataManager
+
+        manager = StockDataManager.__new__(StockDataManager)
+        manager._bar_store = store
+        manager._cache = BarCache(max_bytes=0)
+        manager._use_alpaca = True
+        manager._use_yfinance_fallback = True
+        manager._alpaca_client = alpaca_client
+        return manager
+
+    def test_single_symbol_fetches_overlap(self, store):
+        """Test that symbols with different sync dates are fetched concurrently"""
+        symbols = ['AAA', 'BBB', 'CCC', 'DDD']
+        for days, symbol in enumerate(symbols):
+            store.update(symbol, create_bars('2024-01-01', 5 + days), '2024-01-01', f'2024-01-{8 + days:02d}', False)
+        # Each fetch waits until all four are in flight, so serial fetches break the barrier
+        barrier = threading.Barrier(len(symbols), timeout=5)
+
+        def get_stock_data(symbol, start_date, end_date):
+            barrier.wait()
+            return create_bars(start_date, 3)
+
+        alpaca_client = Mock()
+        alpaca_client.get_stock_data.side_effect = get_stock_data
+        manager = self.create_manager(store, alpaca_client)
+        manager._use_yfinance_fallback = False
+
+        with patch('api.scan.SCAN_MAX_WORKERS', 8):
+            results = manager.get_stocks_data(symbols, '2024-01-01', '2024-02-01')
+
+        # Stored bars plus the three fetched ones, which a broken barrier would have lost
+        assert [len(results[symbol]) for symbol in symbols] == [8, 9, 10, 11]
+        assert alpaca_client.get_stock_data.call_count == len(symbols)
+
+    def test_yfinance_fallback_overlaps(self, store):
+        """Test that per-symbol yfinance downloads run concurrently when Alpaca fails"""
+        symbols = ['AAA', 'BBB', 'CCC']
+        barrier = threading.Barrier(len(symbols), timeout=5)
+
+        def download(symbol, start_date, end_date):
+            barrier.wait()
+            return create_bars(start_date, 10)
+
+        alpaca_client = Mock()
+        alpaca_client.get_stocks_data.side_effect = RuntimeError('no credentials')
+        manager = self.create_manager(store, alpaca_client)
+
+        with patch('api.scan.SCAN_MAX_WORKERS', 8), \
+                patch.object(manager, '_get_yfinance_data', side_effect=download) as yfinance:
+            results = manager.get_stocks_data(symbols, '2024-01-01', '2024-02-01')
+
+        assert list(results) == symbols
+        assert yfinance.call_count == len(symbols)
@@ -0,0 +1,328 @@
+"""
+Tests for consolidation and breakout detection
+"""
+
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from unittest.mock import patch
+
+from chartlib import (CSV_SHARD_MIN_FILES, ConsolidationState, breakout_series, consolidation_series,
+                      is_breaking_out, is_consolidating, read_daily_csv, scan_for_patterns, sweep_closes,
+                      sweep_consolidation)
+
+
+def create_closes(num_bars, seed, volatility=0.006):
+    """Helper function to create a random walk of closes that often consolidates"""
+    rng = np.random.default_rng(seed)
+    return np.round(100 * np.cumprod(1 + rng.normal(0, volatility, num_bars)), 2)
+
+
+class TestConsolidationState:
+    """Test incremental consolidation and breakout updates"""
+
+    def test_updates_match_full_history(self):
+        """Test that every update equals re-running the functions on the full history"""
+        seen = {'consolidating': 0, 'breaking_out': 0}
+        for seed in range(20):
+            closes = create_closes(80, seed)
+            df = pd.DataFrame({'Close': closes})
+            state = ConsolidationState(closes[:1], percentage=2.5)
+
+            for end in range(2, 81):
+                result = state.update(closes[end - 1])
+                assert bool(result['consolidating']) == is_consolidating(df[:end], percentage=2.5)
+                assert bool(result['breaking_out']) == is_breaking_out(df[:end])
+                seen['consolidating'] += bool(result['consolidating'])
+                seen['breaking_out'] += bool(result['breaking_out'])
+
+        assert seen['consolidating'] and seen['breaking_out']
+
+    def test_breakout_after_flat_range(self):
+        """Test that a close above a tight range is reported as a breakout"""
+        state = ConsolidationState(np.full(15, 100.0))
+
+        assert state.latest()['consolidating']
+        result = state.update(103.0)
+
+        assert result['breaking_out']
+        assert not result['consolidating']
+
+    def test_short_history_is_not_consolidating(self):
+        """Test that fewer than 15 closes never consolidate"""
+        state = ConsolidationState(np.full(14, 100.0))
+
+        assert not state.latest()['consolidating']
+        assert state.update(100.0)['consolidating']
+
+    def test_missing_closes_are_skipped(self):
+        """Test that a NaN close inside the window is skipped like is_consolidating does"""
+        closes = create_closes(40, 7, volatility=0.002)
+        closes[30] = np.nan
+        df = pd.DataFrame({'Close': closes})
+        state = ConsolidationState(closes[:20])
+
+        for end in range(21, 41):
+            result = state.update(closes[end - 1])
+            assert bool(result['consolidating']) == is_consolidating(df[:end])
+            assert bool(result['breaking_out']) == is_breaking_out(df[:end])
+        assert result['consolidating']
+
+    def test_panel_updates_each_row(self):
+        """Test that a panel of symbols is updated with one value per row"""
+        histories = np.stack([create_closes(40, seed) for seed in range(5)])
+        state = ConsolidationState(histories[:, :-1])
+
+        result = state.update(histories[:, -1])
+
+        for row in range(5):
+            df = pd.DataFrame({'Close': histories[row]})
+            assert result['consolidating'][row] == is_consolidating(df)
+            assert result['breaking_out'][row] == is_breaking_out(df)
+
+
+class TestRollingSeries:
+    """Test consolidation and breakout timelines computed in one pass"""
+
+    def test_series_match_per_bar_checks(self):
+        """Test that every bar equals the last-bar functions on the history up to it"""
+        seen = {'consolidating': 0, 'breaking_out': 0}
+        for seed in range(10):
+            closes = create_closes(120, seed)
+            closes[[30, 31, 77]] = np.nan  # Missing closes are skipped, as by the per-bar checks
+            df = pd.DataFrame({'Close': closes}, index=pd.bdate_range('2024-01-01', periods=120))
+
+            consolidating = consolidation_series(df, percentage=2.5)
+            breaking_out = breakout_series(df)
+
+            for end in range(1, 121):
+                assert consolidating.iloc[end - 1] == is_consolidating(df[:end], percentage=2.5)
+                assert breaking_out.iloc[end - 1] == is_breaking_out(df[:end])
+            seen['consolidating'] += int(consolidating.sum())
+            seen['breaking_out'] += int(breaking_out.sum())
+
+        assert seen['consolidating'] and seen['breaking_out']
+
+    @pytest.mark.parametrize('window', [5, 25])
+    def test_series_match_per_bar_checks_at_other_windows(self, window):
+        """Test that the timelines honour a non-default window like the per-bar checks"""
+        seen = {'consolidating': 0, 'breaking_out': 0}
+        for seed in range(5):
+            closes = create_closes(120, seed)
+            closes[[30, 77]] = np.nan
+            df = pd.DataFrame({'Close': closes}, index=pd.bdate_range('2024-01-01', periods=120))
+
+            consolidating = consolidation_series(df, percentage=2.5, window=window)
+            breaking_out = breakout_series(df, window=window)
+
+            for end in range(1, 121):
+                assert consolidating.iloc[end - 1] == is_consolidating(df[:end], percentage=2.5, window=window)
+                assert breaking_out.iloc[end - 1] == is_breaking_out(df[:end], window=window)
+            seen['consolidating'] += int(consolidating.sum())
+            seen['breaking_out'] += int(breaking_out.sum())
+
+        assert seen['consolidating'] and seen['breaking_out']
+
+    def test_series_keep_index(self):
+        """Test that the timelines are boolean series aligned with the input"""
+        df = pd.DataFrame({'Close': create_closes(30, 0)}, index=pd.bdate_range('2024-01-01', periods=30))
+
+        result = breakout_series(df)
+
+        assert result.dtype == bool
+        assert result.index.equals(df.index)
+        assert not consolidation_series(df[:14]).any()
+
+    def test_scan_reports_history(self, tmp_path):
+        """Test that the directory scan can return each symbol's timeline"""
+        closes = np.concatenate([np.full(20, 100.0), [104.0], np.full(15, 104.0)])
+        dates = pd.bdate_range('2024-01-01', periods=len(closes))
+        pd.DataFrame({'Open': closes, 'High': closes, 'Low': closes, 'Close': closes},
+                     index=dates).to_csv(tmp_path / 'FLAT.csv')
+
+        results = scan_for_patterns(str(tmp_path), workers=1, history=True)
+
+        assert results['history']['FLAT']['breaking_out'] == [dates[20].strftime('%Y-%m-%d')]
+        assert results['history']['FLAT']['consolidating'][0] == dates[14].strftime('%Y-%m-%d')
+        assert results['consolidating'] == ['FLAT']
+        assert 'history' not in scan_for_patterns(str(tmp_path), workers=1)
+
+
+def write_csv(path, num_bars=30, seed=0, **kwargs):
+    """Helper function to write a yfinance-style daily bars CSV"""
+    closes = create_closes(num_bars, seed)
+    df = pd.DataFrame({'Open': closes, 'High': closes + 1, 'Low': closes - 1, 'Close': closes,
+                       'Adj Close': closes, 'Volume': np.arange(num_bars) * 1000},
+                      index=pd.bdate_range('2024-01-01', periods=num_bars, name='Date'))
+    df.to_csv(path, **kwargs)
+    return df
+
+
+class TestReadDailyCsv:
+    """Test typed CSV ingestion and its binary cache"""
+
+    def test_matches_inferred_parse(self, tmp_path):
+        """Test that typed parsing gives the same bars as inference"""
+        path = str(tmp_path / 'AAA.csv')
+        write_csv(path)
+
+        expected = pd.read_csv(path, index_col=0, parse_dates=True)
+        result = read_daily_csv(path, use_cache=False)
+
+        pd.testing.assert_frame_equal(result, expected, check_freq=False)
+        assert result['Volume'].dtype == np.int64
+        assert not os.path.exists(path + '.npz')
+
+    def test_cache_is_reused_until_source_changes(self, tmp_path):
+        """Test that the cache is served while mtime is unchanged and rebuilt after"""
+        path = str(tmp_path / 'AAA.csv')
+        write_csv(path, seed=0)
+        first = read_daily_csv(path)
+        cached = read_daily_csv(path)
+
+        write_csv(path, seed=1)
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+        refreshed = read_daily_csv(path)
+
+        assert os.path.exists(path + '.npz')
+        pd.testing.assert_frame_equal(cached, first)
+        pd.testing.assert_frame_equal(refreshed, read_daily_csv(path, use_cache=False))
+        assert not refreshed['Close'].equals(first['Close'])
+
+    def test_extra_columns_keep_dtypes(self, tmp_path):
+        """Test that inferred columns come back from the cache with their dtypes"""
+        path = str(tmp_path / 'AAA.csv')
+        df = write_csv(path)
+        df['Trades'] = np.arange(len(df))
+        df.to_csv(path)
+
+        parsed = read_daily_csv(path)
+        cached = read_daily_csv(path)
+
+        assert parsed['Trades'].dtype == np.int64
+        assert cached['Volume'].dtype == np.int64
+        pd.testing.assert_frame_equal(cached, parsed)
+
+    def test_text_columns_are_not_cached(self, tmp_path):
+        """Test that files with text columns are always parsed in full"""
+        path = str(tmp_path / 'AAA.csv')
+        df = write_csv(path)
+        df['Note'] = 'x'
+        df.to_csv(path)
+
+        result = read_daily_csv(path)
+
+        assert list(result['Note'].unique()) == ['x']
+        assert not os.path.exists(path + '.npz')
+
+    def test_non_iso_and_timezone_dates(self, tmp_path):
+        """Test that other date formats fall back to inference and survive the cache"""
+        us_path = str(tmp_path / 'US.csv')
+        write_csv(us_path, date_format='%m/%d/%Y')
+        tz_path = str(tmp_path / 'TZ.csv')
+        df = write_csv(tz_path)
+        df.index = df.index.tz_localize('America/New_York')
+        df.to_csv(tz_path)
+
+        us = read_daily_csv(us_path)
+        parsed = read_daily_csv(tz_path)
+        with patch('chartlib.pd.read_csv', side_effect=AssertionError('cache not used')):
+            cached = read_daily_csv(tz_path)
+
+        assert us.index[0] == pd.Timestamp('2024-01-01')
+        pd.testing.assert_frame_equal(cached, parsed)
+        assert cached.index[0] == pd.Timestamp('2024-01-01', tz='America/New_York')
+
+    def test_scan_reports_bad_files(self, tmp_path):
+        """Test that unparseable files are still reported in the errors list"""
+        write_csv(str(tmp_path / 'GOOD.csv'))
+        (tmp_path / 'BAD.csv').write_text('Date,Open,High,Low,Close\n2024-01-01,1,2,1,x\n')
+
+        first = scan_for_patterns(str(tmp_path), workers=1)
+        second = scan_for_patterns(str(tmp_path), workers=1)
+
+        assert len(first['errors']) == 1 and 'BAD.csv' in first['errors'][0]
+        assert second == first
+        assert sorted(os.listdir(tmp_path)) == ['BAD.csv', 'GOOD.csv', 'GOOD.csv.npz']
+
+    def test_bad_cell_outside_close_is_still_screened(self, tmp_path):
+        """Test that a non-numeric cell in a column the screen does not read keeps the file"""
+        df = write_csv(str(tmp_path / 'ODD.csv'), num_bars=20)
+        df['Low'] = df['Low'].astype(object)
+        df.iloc[3, df.columns.get_loc('Low')] = 'x'
+        df.to_csv(tmp_path / 'ODD.csv')
+
+        results = scan_for_patterns(str(tmp_path), workers=1, history=True)
+
+        assert results['errors'] == []
+        assert 'ODD' in results['history']
+
+    def test_scan_ingests_in_process_by_default(self, tmp_path):
+        """Test that files are read in-process unless ingestion workers and enough files are configured"""
+        for i in range(3):
+            write_csv(str(tmp_path / f'S{i}.csv'), seed=i)
+
+        def run_in_process(func, items, workers, min_items):
+            return [func(items)]
+
+        with patch('chartlib.map_sharded', side_effect=run_in_process) as mapped:
+            scan_for_patterns(str(tmp_path))
+            sweep_consolidation([15], [2.5], str(tmp_path))
+            with patch('chartlib.CSV_INGEST_WORKERS', 'auto'):
+                scan_for_patterns(str(tmp_path))
+
+        assert [call.args[2] for call in mapped.call_args_list] == ['1', '1', 'auto']
+        assert all(call.kwargs['min_items'] == CSV_SHARD_MIN_FILES for call in mapped.call_args_list)
+
+
+class TestConsolidationSweep:
+    """Test sweeping a grid of consolidation windows and thresholds"""
+
+    WINDOWS = [1, 5, 15, 30]
+    PERCENTAGES = [0.5, 1.0, 2.5, 5.0]
+
+    def test_cube_matches_per_setting_checks(self):
+        """Test that every cell equals is_consolidating and is_breaking_out for that setting"""
+        series = [create_closes(num_bars, seed) for seed, num_bars in enumerate([3, 14, 15, 16, 31, 60] * 4)]
+        series[5][-3] = np.nan
+
+        cube = sweep_closes(series, self.WINDOWS, self.PERCENTAGES)
+
+        assert cube['consolidating'].shape == (len(series), len(self.WINDOWS), len(self.PERCENTAGES))
+        for s, closes in enumerate(series):
+            df = pd.DataFrame({'Close': closes})
+            for w, window in enumerate(self.WINDOWS):
+                for p, percentage in enumerate(self.PERCENTAGES):
+                    assert cube['consolidating'][s, w, p] == is_consolidating(df, percentage, window)
+                    assert cube['breaking_out'][s, w, p] == is_breaking_out(df, percentage, window)
+        assert cube['consolidating'].any() and cube['breaking_out'].any()
+
+    def test_invalid_grid_is_rejected(self):
+        """Test that empty grids and windows under one bar raise"""
+        for windows, percentages in [([], [2.0]), ([15], []), ([0, 15], [2.0])]:
+            with pytest.raises(ValueError):
+                sweep_closes([create_closes(20, 0)], windows, percentages)
+
+    def test_directory_sweep_matches_scan(self, tmp_path):
+        """Test that the scan's own setting of the sweep finds the scan's symbols"""
+        for seed in range(12):
+            write_csv(str(tmp_path / f'S{seed}.csv'), num_bars=40, seed=seed)
+        (tmp_path / 'BAD.csv').write_text('Date,Close\n2024-01-01,1\n')
+
+        sweep = sweep_consolidation([10, 15], [1.0, 2.5], str(tmp_path), workers=1)
+        scan = scan_for_patterns(str(tmp_path), workers=1)
+
+        assert sorted(sweep.symbols_for(15, 2.5)) == sorted(scan['consolidating'])
+        assert sorted(sweep.symbols_for(15, 2.5, 'breaking_out')) == sorted(scan['breaking_out'])
+        assert sweep.errors == ['Missing required columns in BAD.csv']
+        assert sweep.counts().loc[15, 2.5] == len(scan['consolidating'])
+        assert sweep.counts().shape == (2, 2)
+
+    def test_missing_directory(self, tmp_path):
+        """Test that a missing directory gives an empty cube and an error"""
+        sweep = sweep_consolidation([15], [2.0], str(tmp_path / 'missing'))
+
+        assert sweep.consolidating.shape == (0, 1, 1)
+        assert sweep.errors
@@ -0,0 +1,154 @@
+"""
+Tests for the cached health probe and the health endpoint
+"""
+
+import json
+import time
+import threading
+import pytest
+from unittest.mock import Mock, patch
+
+from health_probe import HealthProbe
+
+
+class FakeClock:
+    """Manually advanced monotonic clock"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def create_probe(results, clock, **kwargs):
+    """Helper function to create an inline probe returning ``results`` in turn"""
+    probe = Mock(side_effect=list(results))
+    return HealthProbe(probe, ttl=60, max_age=300, background=False, clock=clock, **kwargs), probe
+
+
+class TestHealthProbe:
+    """Test caching and refreshing of probe results"""
+
+    def test_result_is_reused_within_ttl(self):
+        """Test that repeated checks within the TTL do not probe again"""
+        clock = FakeClock()
+        health, probe = create_probe([True, False], clock)
+
+        assert health.status()['status'] == 'ok'
+        clock.now = 59
+        report = health.status()
+
+        assert report['status'] == 'ok'
+        assert report['age_seconds'] == 59
+        assert probe.call_count == 1
+
+    def test_expired_result_is_refreshed(self):
+        """Test that a result older than the TTL triggers a new probe"""
+        clock = FakeClock()
+        health, probe = create_probe([True, False], clock)
+
+        health.status()
+        clock.now = 60
+
+        assert health.status()['status'] == 'error'
+        assert probe.call_count == 2
+
+    def test_probe_exception_is_reported(self):
+        """Test that a raising probe counts as an error and keeps its message"""
+        clock = FakeClock()
+        health, _ = create_probe([RuntimeError('boom')], clock)
+
+        report = health.status()
+
+        assert report['status'] == 'error'
+        assert report['error'] == 'boom'
+
+    def test_latency_is_measured(self):
+        """Test that the probe duration is reported in milliseconds"""
+        clock = FakeClock()
+
+        def slow_probe():
+            clock.now += 1.5
+            return True
+
+        report = HealthProbe(slow_probe, background=False, clock=clock).status()
+
+        assert report['latency_ms'] == 1500.0
+        assert report['age_seconds'] == 0
+
+    def test_background_probe_does_not_block(self):
+        """Test that checks answer immediately while the probe runs on a thread"""
+        release = threading.Event()
+        done = threading.Event()
+
+        def probe():
+            release.wait(5)
+            done.set()
+            return True
+
+        health = HealthProbe(probe, ttl=60)
+
+        first = health.status()
+        second = health.status()
+        release.set()
+        done.wait(5)
+        for _ in range(100):
+            if health.status()['status'] == 'ok':
+                break
+            time.sleep(0.01)
+
+        assert first['status'] == 'pending'
+        assert second['refreshing'] is True
+        assert health.probes == 1
+        assert health.status()['status'] == 'ok'
+
+    def test_old_result_is_stale(self):
+        """Test that a result past max_age is no longer reported as ok"""
+        clock = FakeClock()
+        health, _ = create_probe([True], clock)
+        health.status()
+
+        # A refresh that never finishes leaves the old result in place
+        health._running = True
+        clock.now = 301
+
+        assert health.status()['status'] == 'stale'
+
+
+class TestHealthHandler:
+    """Test the health endpoint response"""
+
+    @pytest.fixture
+    def handler(self):
+        """Health handler with an inline probe and no signal matrix"""
+        from api import health
+
+        probe = HealthProbe(Mock(return_value=True), background=False)
+        with patch.object(health, 'get_health_probe', return_value=probe), \
+                patch.object(health, 'get_signal_matrix', return_value=None):
+            yield health.handler, probe
+
+    def test_reports_probe_and_storage(self, handler):
+        """Test that the response carries probe age, latency and readiness"""
+        handle, probe = handler
+
+        response = handle(Mock(method='GET'))
+        body = json.loads(response['body'])
+
+        assert response['statusCode'] == 200
+        assert body['status'] == 'healthy'
+        assert body['checks']['alpaca_api'] == 'ok'
+        assert body['checks']['signal_matrix'] == 'missing'
+        assert body['checks']['bar_store'] in ('ok', 'read_only', 'unavailable')
+        assert set(body['alpaca_probe']) >= {'age_seconds', 'latency_ms', 'checked_at'}
+        assert 'hit_rate' in body['bar_cache']
+
+    def test_repeated_checks_probe_once(self, handler):
+        """Test that polling the endpoint does not call the upstream API each time"""
+        handle, probe = handler
+
+        for _ in range(5):
+            handle(Mock(method='GET'))
+
+        assert probe.probes == 1
@@ -0,0 +1,66 @@
+"""
+Tests for deferred imports and the handlers' import footprint
+"""
+
+import json
+import os
+import subprocess
+import sys
+import pytest
+from unittest.mock import patch
+
+from lazy_imports import LazyModule, lazy_import
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def loaded_after_import(module, candidates):
+    """Helper function to list which ``candidates`` a fresh interpreter loads with ``module``"""
+    code = (f"import json, sys, {module}; "
+            f"print(json.dumps([name for name in {candidates!r} if name in sys.modules]))")
+    output = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True,
+                            check=True, env={**os.environ, 'PYTHONPATH': ROOT}).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+class TestLazyModule:
+    """Test the deferred module proxy"""
+
+    def test_module_loads_on_first_attribute(self):
+        """Test that the import happens on first use and is then reused"""
+        module = LazyModule('json')
+
+        assert 'not loaded' in repr(module)
+        assert module.dumps([1]) == '[1]'
+        assert module._load() is sys.modules['json']
+        assert 'not loaded' not in repr(module)
+
+    def test_patches_of_real_module_are_seen(self):
+        """Test that attribute lookups go to the real module every time"""
+        module = LazyModule('json')
+        module.dumps({})
+
+        with patch('json.dumps', return_value='patched'):
+            assert module.dumps({}) == 'patched'
+
+    def test_imported_module_is_returned_directly(self):
+        """Test that no proxy is created for a module that is already loaded"""
+        assert lazy_import('os') is os
+
+    def test_missing_module_fails_on_use(self):
+        """Test that a missing module raises when first used, not when declared"""
+        module = lazy_import('module_that_does_not_exist')
+
+        with pytest.raises(ImportError):
+            module.anything
+
+
+class TestHandlerImports:
+    """Test that handlers do not load the data stack at import time"""
+
+    HEAVY = ['pandas', 'alpaca', 'requests', 'alpaca_client_sdk']
+
+    @pytest.mark.parametrize('module', ['api.scan', 'api.health', 'api.patterns', 'api.symbols', 'api.jobs'])
+    def test_heavy_modules_are_not_imported(self, module):
+        """Test that importing a handler leaves pandas and the Alpaca SDK unloaded"""
+        assert loaded_after_import(module, self.HEAVY) == []
@@ -0,0 +1,256 @@
+"""
+Tests for the native NumPy candlestick pattern engine
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from patterns import candlestick_patterns
+from pattern_engine import (SUPPORTED_PATTERNS, PatternState, align_panel, align_tails, detect_latest,
+                            detect_pattern, detect_patterns, get_lookback, get_window)
+
+
+def create_flat_candles(num_bars=20):
+    """Helper function to create unremarkable candles with a 2 point body and 1 point shadows"""
+    open_ = np.full(num_bars, 100.0)
+    close = np.full(num_bars, 102.0)
+    high = np.full(num_bars, 103.0)
+    low = np.full(num_bars, 99.0)
+    return open_, high, low, close
+
+
+def create_random_candles(num_bars, seed):
+    """Helper function to create a random-walk OHLC series rounded to cents"""
+    rng = np.random.default_rng(seed)
+    close = np.maximum(100 + np.cumsum(rng.normal(0, 1, num_bars)), 5)
+    open_ = close + rng.normal(0, 1, num_bars) * rng.choice([0.02, 0.3, 1, 2], num_bars)
+    dojis = rng.random(num_bars) < 0.1
+    open_[dojis] = close[dojis]
+    high = np.maximum(open_, close) + np.abs(rng.normal(0, 1, num_bars)) * rng.choice([0, 0.05, 1, 2], num_bars)
+    low = np.minimum(open_, close) - np.abs(rng.normal(0, 1, num_bars)) * rng.choice([0, 0.05, 1, 2], num_bars)
+    return tuple(np.round(values, 2) for values in (open_, high, low, close))
+
+
+class TestPatternEngine:
+    """Test the native pattern engine on handcrafted candles"""
+
+    def test_all_screener_patterns_supported(self):
+        """Test that every pattern offered by the screener is implemented"""
+        assert set(candlestick_patterns) <= set(SUPPORTED_PATTERNS)
+
+    def test_unknown_pattern_raises(self):
+        """Test that unsupported patterns raise ValueError"""
+        with pytest.raises(ValueError):
+            detect_pattern(*create_flat_candles(), 'CDLNOTAPATTERN')
+
+    def test_doji_detected(self):
+        """Test that a candle with no body is a doji"""
+        open_, high, low, close = create_flat_candles()
+        close[-1] = open_[-1]
+
+        result = detect_pattern(open_, high, low, close, 'CDLDOJI')
+
+        assert result.dtype == np.int32
+        assert result[-1] == 100
+        assert not result[:-1].any()
+
+    def test_bullish_engulfing_detected(self):
+        """Test that a white body engulfing a black body is bullish engulfing"""
+        open_, high, low, close = create_flat_candles()
+        open_[-2], close[-2], high[-2], low[-2] = 102.0, 101.0, 102.5, 100.5
+        open_[-1], close[-1], high[-1], low[-1] = 100.0, 104.0, 104.5, 99.5
+
+        result = detect_pattern(open_, high, low, close, 'CDLENGULFING')
+
+        assert result[-1] == 100
+
+    def test_bearish_engulfing_detected(self):
+        """Test that a black body engulfing a white body is bearish engulfing"""
+        open_, high, low, close = create_flat_candles()
+        open_[-2], close[-2], high[-2], low[-2] = 101.0, 102.0, 102.5, 100.5
+        open_[-1], close[-1], high[-1], low[-1] = 104.0, 100.0, 104.5, 99.5
+
+        result = detect_pattern(open_, high, low, close, 'CDLENGULFING')
+
+        assert result[-1] == -100
+
+    def test_lookback_bars_are_zero(self):
+        """Test that bars without enough history never signal"""
+        open_, high, low, close = create_flat_candles()
+        close[:] = open_
+
+        result = detect_pattern(open_, high, low, close, 'CDLDOJI')
+        lookback = get_lookback('CDLDOJI')
+
+        assert lookback == 10
+        assert not result[:lookback].any()
+        assert result[lookback:].all()
+
+    def test_short_input_returns_zeros(self):
+        """Test that inputs shorter than the lookback produce all zeros"""
+        result = detect_pattern(*create_flat_candles(5), 'CDLENGULFING')
+
+        assert len(result) == 5
+        assert not result.any()
+
+    def test_detect_patterns_matches_single_calls(self):
+        """Test that shared-candle evaluation matches evaluating each pattern alone"""
+        ohlc = create_random_candles(300, seed=1)
+
+        results = detect_patterns(*ohlc, list(candlestick_patterns) + ['CDLNOTAPATTERN'])
+
+        assert 'CDLNOTAPATTERN' not in results
+        for pattern in candlestick_patterns:
+            np.testing.assert_array_equal(results[pattern], detect_pattern(*ohlc, pattern))
+
+
+class TestPanelEvaluation:
+    """Test evaluating a symbols x days panel in one pass"""
+
+    @staticmethod
+    def create_frames():
+        """Helper function to create symbols with histories of different lengths"""
+        dates = pd.bdate_range('2024-01-01', periods=120)
+        frames = {}
+        for seed, num_bars in enumerate([120, 90, 30, 8, 1]):
+            open_, high, low, close = create_random_candles(num_bars, seed)
+            frames[f'SYM{seed}'] = pd.DataFrame(
+                {'Open': open_, 'High': high, 'Low': low, 'Close': close}, index=dates[-num_bars:]
+            )
+        return frames
+
+    def test_align_panel_shapes_and_padding(self):
+        """Test that symbols are aligned on the union of dates with NaN padding"""
+        frames = self.create_frames()
+
+        symbols, dates, ohlc = align_panel(frames)
+
+        assert symbols == list(frames)
+        assert ohlc.shape == (4, 5, 120)
+        assert np.isnan(ohlc[:, 1, :30]).all()
+        np.testing.assert_array_equal(ohlc[3, 1, 30:], frames['SYM1']['Close'].to_numpy())
+
+    def test_align_panel_matches_sessions_by_date(self):
+        """Test that bars stamped at different times of day share a column"""
+        alpaca = pd.DataFrame({'Open': [1.0], 'High': [2.0], 'Low': [0.5], 'Close': [1.5]},
+                              index=pd.DatetimeIndex(['2024-01-02 05:00'], tz='UTC'))
+        yahoo = pd.DataFrame({'Open': [3.0], 'High': [4.0], 'Low': [2.5], 'Close': [3.5]},
+                             index=pd.DatetimeIndex(['2024-01-02']))
+
+        symbols, dates, ohlc = align_panel({'AAA': alpaca, 'BBB': yahoo})
+
+        assert list(dates) == [pd.Timestamp('2024-01-02')]
+        np.testing.assert_array_equal(ohlc[3, :, 0], [1.5, 3.5])
+
+    @pytest.mark.parametrize('pattern', sorted(candlestick_patterns))
+    def test_panel_rows_match_single_series(self, pattern):
+        """Test that each panel row equals evaluating that symbol alone"""
+        frames = self.create_frames()
+        symbols, dates, ohlc = align_panel(frames)
+
+        panel = detect_pattern(*ohlc, pattern)
+
+        for row, symbol in enumerate(symbols):
+            df = frames[symbol]
+            single = detect_pattern(df['Open'], df['High'], df['Low'], df['Close'], pattern)
+            np.testing.assert_array_equal(panel[row, -len(df):], single)
+            assert not panel[row, :-len(df)].any()
+
+
+class TestLatestEvaluation:
+    """Test evaluating only the latest bar over the minimal trailing window"""
+
+    def test_window_covers_longest_lookback(self):
+        """Test that the window is the longest lookback plus the latest bar"""
+        assert get_window(['CDLDOJI']) == 11
+        assert get_window(['CDLDOJI', 'CDLMATHOLD']) == get_lookback('CDLMATHOLD') + 1
+        assert get_window(['CDLHIKKAKE']) == 6
+
+    @pytest.mark.parametrize('pattern', sorted(candlestick_patterns))
+    def test_latest_matches_full_history(self, pattern):
+        """Test that the latest value equals the last bar of a full evaluation"""
+        for seed in range(3):
+            ohlc = create_random_candles(150, seed)
+            full = detect_pattern(*ohlc, pattern)
+            for end in range(1, 151):
+                latest = detect_latest(*(values[:end] for values in ohlc), [pattern])
+                assert latest[pattern] == full[end - 1]
+
+    def test_align_tails_right_aligns_latest_bars(self):
+        """Test that each row ends with the symbol's own latest bar"""
+        dates = pd.bdate_range('2024-01-01', periods=30)
+        frames = {
+            'LONG': pd.DataFrame({col: np.arange(30.0) for col in ['Open', 'High', 'Low', 'Close']}, index=dates),
+            'SHORT': pd.DataFrame({col: np.arange(4.0) for col in ['Open', 'High', 'Low', 'Close']}, index=dates[:4]),
+        }
+
+        symbols, ohlc = align_tails(frames, 10)
+
+        assert symbols == ['LONG', 'SHORT']
+        np.testing.assert_array_equal(ohlc[3, 0], np.arange(20.0, 30.0))
+        assert np.isnan(ohlc[3, 1, :6]).all()
+        np.testing.assert_array_equal(ohlc[3, 1, 6:], np.arange(4.0))
+
+    def test_latest_on_tails_matches_each_symbol(self):
+        """Test that a tail panel gives each symbol's own latest signals"""
+        frames = TestPanelEvaluation.create_frames()
+        patterns = list(candlestick_patterns)
+        symbols, ohlc = align_tails(frames, get_window(patterns))
+
+        latest = detect_latest(*ohlc, patterns)
+
+        for row, symbol in enumerate(symbols):
+            df = frames[symbol]
+            full = detect_patterns(df['Open'], df['High'], df['Low'], df['Close'], patterns)
+            for pattern in patterns:
+                assert latest[pattern][row] == full[pattern][-1]
+
+
+class TestPatternState:
+    """Test incremental evaluation as new bars are appended"""
+
+    def test_updates_match_full_history(self):
+        """Test that each appended bar gets the signals of a full re-evaluation"""
+        patterns = list(candlestick_patterns)
+        open_, high, low, close = create_random_candles(200, seed=11)
+        full = detect_patterns(open_, high, low, close, patterns)
+        state = PatternState(patterns, open_[:3], high[:3], low[:3], close[:3])
+
+        for i in range(3, 200):
+            signals = state.update(open_[i], high[i], low[i], close[i])
+            for pattern in patterns:
+                assert signals[pattern] == full[pattern][i]
+
+    def test_state_keeps_only_window(self):
+        """Test that the state holds the trailing window however long the history"""
+        ohlc = create_random_candles(500, seed=2)
+        state = PatternState(['CDLDOJI', 'CDLENGULFING'], *ohlc)
+
+        assert state.ohlc.shape == (4, get_window(['CDLDOJI', 'CDLENGULFING']))
+        assert state.latest()['CDLDOJI'] == detect_pattern(*ohlc, 'CDLDOJI')[-1]
+
+    def test_panel_updates_each_row(self):
+        """Test that a panel state is updated with one bar per symbol"""
+        histories = [create_random_candles(60, seed) for seed in range(4)]
+        panel = np.stack([np.stack(ohlc) for ohlc in histories], axis=1)
+        state = PatternState(['CDLHIKKAKE', 'CDLSPINNINGTOP'], *panel[..., :-1])
+
+        signals = state.update(*panel[..., -1])
+
+        for row, ohlc in enumerate(histories):
+            assert signals['CDLHIKKAKE'][row] == detect_pattern(*ohlc, 'CDLHIKKAKE')[-1]
+            assert signals['CDLSPINNINGTOP'][row] == detect_pattern(*ohlc, 'CDLSPINNINGTOP')[-1]
+
+
+class TestTalibParity:
+    """Test that the engine reproduces TA-Lib's output"""
+
+    @pytest.mark.parametrize('pattern', sorted(candlestick_patterns))
+    def test_matches_talib(self, pattern):
+        """Test that every pattern agrees with TA-Lib bar for bar"""
+        talib = pytest.importorskip('talib')
+
+        for seed in range(5):
+            ohlc = create_random_candles(500, seed)
+            np.testing.assert_array_equal(detect_pattern(*ohlc, pattern), getattr(talib, pattern)(*ohlc))
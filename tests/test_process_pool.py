@@ -0,0 +1,165 @@
+"""
+Tests for process-pool sharded pattern evaluation
+"""
+
+import time
+import numpy as np
+import pandas as pd
+import pytest
+from unittest.mock import patch
+
+import process_pool
+from chartlib import scan_for_patterns
+from patterns import candlestick_patterns
+from pattern_engine import CandleFeatures, evaluate_patterns
+from process_pool import SharedArray, evaluate_sharded, map_sharded, resolve_workers
+
+
+def create_panel(n_symbols, n_days, seed=0):
+    """Helper function to create a random OHLC panel with some short histories"""
+    rng = np.random.default_rng(seed)
+    close = np.maximum(100 + np.cumsum(rng.normal(0, 1, (n_symbols, n_days)), axis=1), 5)
+    open_ = close + rng.normal(0, 1, close.shape)
+    high = np.maximum(open_, close) + np.abs(rng.normal(0, 1, close.shape))
+    low = np.minimum(open_, close) - np.abs(rng.normal(0, 1, close.shape))
+    ohlc = np.round(np.stack([open_, high, low, close]), 2)
+    ohlc[:, ::7, :n_days // 2] = np.nan
+    return ohlc
+
+
+def shard_sizes(items):
+    """Module-level shard function for map_sharded"""
+    return list(items)
+
+
+@pytest.fixture(scope='module', autouse=True)
+def stop_pool():
+    """Stop worker processes started by these tests"""
+    yield
+    process_pool.shutdown_process_pool()
+
+
+class TestEvaluateSharded:
+    """Test that sharded evaluation matches evaluating the whole panel"""
+
+    def test_matches_in_process_evaluation(self):
+        """Test that every pattern's signals equal the unsharded panel"""
+        ohlc = create_panel(23, 60)
+        patterns = list(candlestick_patterns)
+
+        sharded = evaluate_sharded(ohlc, patterns, workers=3, min_symbols=2)
+        expected = evaluate_patterns(CandleFeatures(*ohlc), patterns)
+
+        assert list(sharded) == patterns
+        for pattern in patterns:
+            np.testing.assert_array_equal(sharded[pattern], expected[pattern])
+
+    def test_days_keeps_latest_columns(self):
+        """Test that only the requested trailing columns are returned"""
+        ohlc = create_panel(10, 40, seed=1)
+        patterns = ['CDLDOJI', 'CDLENGULFING', 'CDLHIKKAKE']
+
+        sharded = evaluate_sharded(ohlc, patterns, days=3, workers=2, min_symbols=2)
+        local = evaluate_sharded(ohlc, patterns, days=3, workers=1)
+
+        for pattern in patterns:
+            assert sharded[pattern].shape == (10, 3)
+            np.testing.assert_array_equal(sharded[pattern], local[pattern])
+
+    def test_unsupported_patterns_are_skipped(self):
+        """Test that unknown patterns are left out as in evaluate_patterns"""
+        result = evaluate_sharded(create_panel(4, 20), ['CDLDOJI', 'CDLNOTAPATTERN'], workers=2, min_symbols=2)
+
+        assert list(result) == ['CDLDOJI']
+
+    def test_small_panels_stay_in_process(self):
+        """Test that panels below min_symbols do not use the pool"""
+        with patch.object(process_pool, 'get_process_pool') as get_pool:
+            evaluate_sharded(create_panel(4, 20), ['CDLDOJI'], workers=4, min_symbols=10)
+
+        get_pool.assert_not_called()
+
+    def test_unavailable_pool_falls_back(self):
+        """Test that a pool that cannot start still produces results"""
+        ohlc = create_panel(8, 30)
+
+        with patch.object(process_pool, 'get_process_pool', side_effect=OSError('no /dev/shm')):
+            result = evaluate_sharded(ohlc, ['CDLDOJI'], workers=4, min_symbols=2)
+
+        np.testing.assert_array_equal(result['CDLDOJI'], evaluate_patterns(CandleFeatures(*ohlc), ['CDLDOJI'])['CDLDOJI'])
+
+
+class TestSharding:
+    """Test shard helpers and shared memory"""
+
+    def test_map_sharded_keeps_order(self):
+        """Test that shards cover every item once and come back in order"""
+        items = list(range(11))
+        process_pool.shutdown_process_pool()
+
+        shards = map_sharded(shard_sizes, items, workers=3)
+
+        assert len(shards) == 3
+        assert [item for shard in shards for item in shard] == items
+
+    def test_map_sharded_does_not_resize_running_pool(self):
+        """Test that mapping reuses the running pool, with at most one shard per worker"""
+        pool = process_pool.get_process_pool(2)
+
+        shards = map_sharded(shard_sizes, list(range(11)), workers=4)
+
+        assert process_pool.get_running_pool(4) == (pool, 2)
+        assert len(shards) == 2
+
+    def test_shared_array_is_visible_when_attached(self):
+        """Test that an attached array views the owner's data"""
+        with SharedArray((2, 3)) as owner:
+            owner.array[...] = np.arange(6).reshape(2, 3)
+            other = SharedArray.attach(owner.spec)
+            other.array[0, 0] = 42.0
+
+            assert owner.array[0, 0] == 42.0
+            np.testing.assert_array_equal(other.array[1], [3, 4, 5])
+            other.close()
+
+    def test_resizing_pool_keeps_running_work(self):
+        """Test that another caller's futures complete when the pool is recreated at a new size"""
+        old_pool = process_pool.get_process_pool(1)
+        # One worker, so the later tasks are still queued when the pool is replaced
+        futures = [old_pool.submit(time.sleep, 0.1) for _ in range(4)]
+
+        new_pool = process_pool.get_process_pool(2)
+
+        assert new_pool is not old_pool
+        assert [future.result(timeout=30) for future in futures] == [None] * 4
+
+    @pytest.mark.parametrize('setting, expected', [('0', 1), (1, 1), ('4', 4), ('bad', 1)])
+    def test_resolve_workers(self, setting, expected):
+        """Test that worker settings are parsed, with anything invalid meaning in-process"""
+        assert resolve_workers(setting) == expected
+
+
+class TestShardedChartlibScan:
+    """Test the sharded consolidation screen"""
+
+    def test_sharded_scan_matches_serial(self, tmp_path):
+        """Test that screening files in worker processes finds the same symbols"""
+        rng = np.random.default_rng(0)
+        dates = pd.bdate_range('2024-01-01', periods=40)
+        for i in range(9):
+            volatility = 0.001 if i % 3 == 0 else 0.03
+            close = 100 * np.cumprod(1 + rng.normal(0, volatility, len(dates)))
+            pd.DataFrame({'Open': close, 'High': close, 'Low': close, 'Close': close},
+                         index=dates).to_csv(tmp_path / f'S{i}.csv')
+        (tmp_path / 'BAD.csv').write_text('Date,Close\n2024-01-01,1\n')
+
+        serial = scan_for_patterns(str(tmp_path), workers=1)
+        with patch('chartlib.CSV_SHARD_MIN_FILES', 2), \
+                patch('chartlib.map_sharded', wraps=process_pool.map_sharded) as mapped:
+            sharded = scan_for_patterns(str(tmp_path), workers=3)
+
+        assert mapped.call_args.kwargs['min_items'] == 2
+
+        assert serial['consolidating']
+        for key in serial:
+            assert sorted(sharded[key]) == sorted(serial[key])
@@ -0,0 +1,219 @@
+"""
+Tests for the shared Alpaca rate limiter
+"""
+
+import json
+import os
+import threading
+from unittest.mock import Mock, patch
+
+from rate_limiter import TokenBucket
+
+
+class FakeClock:
+    """Manually advanced clock; sleeping advances it"""
+
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+def create_bucket(limit=60, burst=2, now=1_700_000_000.0):
+    """Helper function to create a bucket whose clocks and sleep are fake"""
+    clock = FakeClock(now)
+    bucket = TokenBucket(limit=limit, burst=burst, window=60.0,
+                         clock=clock, wall_clock=clock, sleep=clock.sleep)
+    return bucket, clock
+
+
+class TestTokenBucket:
+    """Test local pacing"""
+
+    def test_burst_then_refill_rate(self):
+        """Test that the burst goes immediately and later requests follow the rate"""
+        bucket, clock = create_bucket(limit=60, burst=2)
+
+        assert bucket.reserve() == 0.0
+        assert bucket.reserve() == 0.0
+        assert bucket.reserve() == 1.0
+        assert bucket.reserve() == 2.0
+
+        clock.now += 2.0
+        assert bucket.reserve() == 1.0
+
+    def test_acquire_sleeps_for_reserved_wait(self):
+        """Test that blocking callers sleep exactly the reserved wait"""
+        bucket, clock = create_bucket(limit=120, burst=1)
+        start = clock.now
+
+        bucket.acquire()
+        waited = bucket.acquire()
+
+        assert waited == 0.5
+        assert clock.now - start == 0.5
+        assert bucket.stats()['waits'] == 1
+
+    def test_refill_is_capped_at_burst(self):
+        """Test that idle time does not bank more than a burst"""
+        bucket, clock = create_bucket(limit=60, burst=3)
+        clock.now += 600
+
+        waits = [bucket.reserve() for _ in range(4)]
+
+        assert waits == [0.0, 0.0, 0.0, 1.0]
+
+    def test_concurrent_reservations_are_serialized(self):
+        """Test that threads never receive overlapping slots"""
+        bucket, _ = create_bucket(limit=60, burst=1)
+        waits = []
+        lock = threading.Lock()
+
+        def worker():
+            for _ in range(25):
+                wait = bucket.reserve()
+                with lock:
+                    waits.append(wait)
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert sorted(waits) == [float(i) for i in range(200)]
+
+
+class TestUpdateFromHeaders:
+    """Test adapting to Alpaca's rate-limit headers"""
+
+    def test_limit_header_sets_rate(self):
+        """Test that the advertised limit replaces the configured one"""
+        bucket, _ = create_bucket(limit=60, burst=1)
+
+        bucket.update_from_headers({'X-RateLimit-Limit': '120'})
+        bucket.reserve()
+
+        assert bucket.limit == 120
+        assert bucket.reserve() == 0.5
+
+    def test_exhausted_quota_waits_for_reset(self):
+        """Test that no request starts before the window resets once the quota is used"""
+        bucket, clock = create_bucket(limit=60, burst=5)
+
+        bucket.update_from_headers({
+            'X-RateLimit-Limit': '60',
+            'X-RateLimit-Remaining': '0',
+            'X-RateLimit-Reset': str(int(clock.now) + 10)
+        })
+
+        assert bucket.reserve() == 11.0
+
+    def test_low_quota_spreads_remaining_requests(self):
+        """Test that requests granted before the reset never exceed the remaining quota"""
+        bucket, clock = create_bucket(limit=60, burst=5)
+        reset = clock.now + 10
+
+        bucket.update_from_headers({
+            'X-RateLimit-Remaining': '12',
+            'X-RateLimit-Reset': str(reset)
+        })
+
+        started = 0
+        while True:
+            wait = bucket.reserve()
+            if clock.now + wait >= reset:
+                break
+            clock.sleep(wait)
+            started += 1
+
+        assert started <= 12
+        assert started >= 11
+
+    def test_ample_quota_keeps_local_balance(self):
+        """Test that a large remaining quota does not slow requests down"""
+        bucket, clock = create_bucket(limit=60, burst=3)
+
+        bucket.update_from_headers({
+            'X-RateLimit-Remaining': '55',
+            'X-RateLimit-Reset': str(clock.now + 5)
+        })
+
+        assert [bucket.reserve() for _ in range(3)] == [0.0, 0.0, 0.0]
+
+    def test_missing_or_malformed_headers_are_ignored(self):
+        """Test that responses without usable headers leave the bucket unchanged"""
+        bucket, _ = create_bucket(limit=60, burst=2)
+
+        bucket.update_from_headers({})
+        bucket.update_from_headers({'X-RateLimit-Limit': 'n/a', 'X-RateLimit-Remaining': ''})
+
+        assert bucket.limit == 60
+        assert bucket.stats()['tokens'] == 2
+
+
+class TestAlpacaDataClient:
+    """Test that the blocking client paces through the limiter"""
+
+    def test_get_stock_data_acquires_and_reports_headers(self):
+        """Test that each request takes a token and feeds back its headers"""
+        from alpaca_client import AlpacaConfig, AlpacaDataClient
+
+        limiter = Mock()
+        response = Mock()
+        response.headers = {'X-RateLimit-Remaining': '199'}
+        response.json.return_value = {'bars': [
+            {'t': '2024-01-02T05:00:00Z', 'o': 1.0, 'h': 2.0, 'l': 0.5, 'c': 1.5, 'v': 100}
+        ]}
+
+        with patch.object(AlpacaConfig, 'API_KEY', 'key'), \
+                patch.object(AlpacaConfig, 'SECRET_KEY', 'secret'), \
+                patch('alpaca_client.get_rate_limiter', return_value=limiter):
+            client = AlpacaDataClient()
+            client.session.get = Mock(return_value=response)
+            df = client.get_stock_data('AAPL', '2024-01-01', '2024-01-03')
+
+        assert len(df) == 1
+        limiter.acquire.assert_called_once_with()
+        limiter.update_from_headers.assert_called_once_with(response.headers)
+
+
+class TestAlpacaSDKClient:
+    """Test that the SDK client paces every page it requests"""
+
+    @staticmethod
+    def create_response(body, remaining):
+        """Helper function to create an HTTP response as the adapter would return it"""
+        import requests
+
+        response = requests.Response()
+        response.status_code = 200
+        response._content = json.dumps(body).encode()
+        response.headers['X-RateLimit-Remaining'] = str(remaining)
+        return response
+
+    def test_each_page_takes_a_token(self):
+        """Test that a request the SDK pages through takes one token per page"""
+        from alpaca_client_sdk import AlpacaSDKClient
+
+        bar = {'t': '2024-01-02T05:00:00Z', 'o': 1.0, 'h': 2.0, 'l': 0.5, 'c': 1.5, 'v': 100}
+        pages = [
+            self.create_response({'bars': {'AAPL': [bar]}, 'next_page_token': 'page-2'}, 199),
+            self.create_response({'bars': {'AAPL': [{**bar, 't': '2024-01-03T05:00:00Z'}]},
+                                  'next_page_token': None}, 198)
+        ]
+        limiter = Mock()
+
+        with patch.dict(os.environ, {'ALPACA_API_KEY': 'key', 'ALPACA_SECRET_KEY': 'secret'}), \
+                patch('alpaca_client_sdk.get_rate_limiter', return_value=limiter), \
+                patch('requests.adapters.HTTPAdapter.send', side_effect=pages) as send:
+            df = AlpacaSDKClient().get_stock_data('AAPL', '2024-01-01', '2024-01-05')
+
+        assert len(df) == 2
+        assert send.call_count == 2
+        assert limiter.acquire.call_count == 2
+        assert [c.args[0]['X-RateLimit-Remaining'] for c in limiter.update_from_headers.call_args_list] == ['199', '198']
@@ -0,0 +1,164 @@
+"""
+Tests for the sliding-window request limiter
+"""
+
+import multiprocessing
+import pytest
+
+from request_limiter import MemoryBackend, SQLiteBackend, SlidingWindowLimiter
+
+
+class FakeClock:
+    """Manually advanced wall clock"""
+
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def backend(request, tmp_path):
+    """Each limiter test runs against both backends"""
+    if request.param == 'memory':
+        return MemoryBackend()
+    return SQLiteBackend(str(tmp_path / 'limits.sqlite3'))
+
+
+def count_allowed(limiter, client, attempts):
+    """Helper function to count allowed requests out of ``attempts``"""
+    return sum(limiter.allow(client) for _ in range(attempts))
+
+
+class TestSlidingWindowLimiter:
+    """Test the sliding-window limit on each backend"""
+
+    def test_limit_within_window(self, backend):
+        """Test that requests past the limit are refused"""
+        limiter = SlidingWindowLimiter('scan', 10, 60, backend, clock=FakeClock())
+
+        assert count_allowed(limiter, '1.2.3.4', 15) == 10
+
+    def test_clients_and_endpoints_are_independent(self, backend):
+        """Test that each client and each endpoint has its own budget"""
+        clock = FakeClock()
+        scan = SlidingWindowLimiter('scan', 3, 60, backend, clock=clock)
+        patterns = SlidingWindowLimiter('patterns', 3, 60, backend, clock=clock)
+
+        assert count_allowed(scan, 'a', 5) == 3
+        assert count_allowed(scan, 'b', 5) == 3
+        assert count_allowed(patterns, 'a', 5) == 3
+
+    def test_limiters_with_different_windows_share_backend(self, backend):
+        """Test that a short-window limiter does not expire a long-window limiter's records"""
+        clock = FakeClock()
+        scan = SlidingWindowLimiter('scan', 10, 300, backend, clock=clock)
+        patterns = SlidingWindowLimiter('patterns', 30, 60, backend, clock=clock)
+        if isinstance(backend, SQLiteBackend):
+            backend.prune_every = 1
+
+        allowed = 0
+        for _ in range(50):
+            allowed += scan.allow('a')
+            patterns.allow('a')
+
+        assert allowed == 10
+
+    def test_previous_window_is_weighted(self, backend):
+        """Test that requests from the previous window still count in proportion"""
+        clock = FakeClock(now=600.0)
+        limiter = SlidingWindowLimiter('scan', 10, 60, backend, clock=clock)
+        assert count_allowed(limiter, 'a', 10) == 10
+
+        # A quarter into the next window, 75% of the previous 10 still count
+        clock.now = 675.0
+        assert count_allowed(limiter, 'a', 10) == 3
+
+        # Two windows later nothing counts
+        clock.now = 780.0
+        assert count_allowed(limiter, 'a', 20) == 10
+
+    def test_refused_requests_are_not_counted(self, backend):
+        """Test that hammering while limited does not extend the block"""
+        clock = FakeClock(now=600.0)
+        limiter = SlidingWindowLimiter('scan', 2, 60, backend, clock=clock)
+        count_allowed(limiter, 'a', 50)
+
+        clock.now = 690.0
+        assert count_allowed(limiter, 'a', 5) == 1
+
+    def test_backend_failure_allows_request(self):
+        """Test that a failing backend does not block traffic"""
+        class BrokenBackend:
+            def hit(self, *args):
+                raise RuntimeError('disk full')
+
+        assert SlidingWindowLimiter('scan', 1, 60, BrokenBackend()).allow('a') is True
+
+
+class TestMemoryBackend:
+    """Test that in-process state stays bounded"""
+
+    def test_clients_are_bounded(self):
+        """Test that the least recently seen clients are evicted past max_keys"""
+        backend = MemoryBackend(max_keys=100)
+        limiter = SlidingWindowLimiter('scan', 5, 60, backend, clock=FakeClock())
+
+        for i in range(1000):
+            limiter.allow(f'10.0.{i // 256}.{i % 256}')
+
+        assert len(backend) == 100
+        assert backend.evictions == 900
+
+    def test_expired_clients_are_dropped(self):
+        """Test that clients idle for two windows are removed without eviction"""
+        clock = FakeClock(now=600.0)
+        backend = MemoryBackend()
+        limiter = SlidingWindowLimiter('scan', 5, 60, backend, clock=clock)
+        for i in range(50):
+            limiter.allow(f'client-{i}')
+
+        clock.now = 800.0
+        limiter.allow('late')
+
+        assert len(backend) == 1
+        assert backend.evictions == 0
+
+
+def _hammer(path, attempts, results):
+    """Worker process making requests against a shared SQLite backend"""
+    limiter = SlidingWindowLimiter('scan', 40, 3600, SQLiteBackend(path), clock=FakeClock())
+    results.put(count_allowed(limiter, 'shared', attempts))
+
+
+class TestSQLiteBackend:
+    """Test limits shared between processes"""
+
+    def test_limit_holds_across_processes(self, tmp_path):
+        """Test that concurrent worker processes share one budget"""
+        path = str(tmp_path / 'limits.sqlite3')
+        SQLiteBackend(path)
+        ctx = multiprocessing.get_context('spawn')
+        results = ctx.Queue()
+
+        workers = [ctx.Process(target=_hammer, args=(path, 25, results)) for _ in range(4)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join(60)
+
+        assert sum(results.get(timeout=5) for _ in workers) == 40
+
+    def test_expired_rows_are_pruned(self, tmp_path):
+        """Test that rows of idle clients are deleted periodically"""
+        clock = FakeClock(now=600.0)
+        backend = SQLiteBackend(str(tmp_path / 'limits.sqlite3'), prune_every=10)
+        limiter = SlidingWindowLimiter('scan', 5, 60, backend, clock=clock)
+        for i in range(9):
+            limiter.allow(f'client-{i}')
+
+        clock.now = 800.0
+        limiter.allow('late')
+
+        assert len(backend) == 1
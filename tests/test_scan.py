@@ -0,0 +1,298 @@
+"""
+Tests for the scan endpoint's per-symbol execution
+"""
+
+import json
+import time
+import numpy as np
+import pandas as pd
+from unittest.mock import Mock, patch
+
+from api import scan
+from api.scan import PatternAnalyzer, iter_scan_rows, parse_patterns, scan_panel, stream_scan
+from patterns import candlestick_patterns
+
+
+def create_ohlc_data(num_bars=10):
+    """Helper function to create a small OHLC DataFrame"""
+    index = pd.date_range('2024-01-01', periods=num_bars, freq='D')
+    return pd.DataFrame({
+        'Open': [100.0] * num_bars,
+        'High': [105.0] * num_bars,
+        'Low': [95.0] * num_bars,
+        'Close': [101.0] * num_bars,
+        'Volume': [1000] * num_bars
+    }, index=index)
+
+
+def create_mock_analyzer(value=100):
+    """Helper function to create an analyzer whose latest signal is always ``value``"""
+    analyzer = Mock()
+    analyzer.process_latest.side_effect = lambda frames, patterns: pd.DataFrame(
+        value, index=list(frames), columns=patterns)
+    analyzer.get_pattern_signal.side_effect = lambda v: 'bullish' if v > 0 else ('bearish' if v < 0 else None)
+    return analyzer
+
+
+def scan_each_symbol(stocks, symbols, pattern, frames):
+    """Helper function to scan symbols one at a time on their full history, as a reference"""
+    analyzer = PatternAnalyzer()
+    rows = []
+    for symbol in symbols:
+        df = frames.get(symbol)
+        if df is None or len(df) < 5:
+            continue
+        value = analyzer.batch_process_patterns(df, [pattern])[pattern].iloc[-1]
+        signal = analyzer.get_pattern_signal(value)
+        if signal:
+            rows.append(scan.build_result_row(symbol, stocks.get(symbol, {}).get('company', ''), pattern,
+                                              signal, value, scan.format_bar_date(df)))
+    return rows
+
+
+class TestScanPanelRows:
+    """Test which rows a scan of prefetched bars reports"""
+
+    def test_results_keep_symbol_order(self):
+        """Test that results follow the requested order, not the order bars arrived in"""
+        symbols = ['AAA', 'BBB', 'CCC', 'DDD']
+        frames = {symbol: create_ohlc_data() for symbol in reversed(symbols)}
+        stocks = {symbol: {'company': f'{symbol} Inc.'} for symbol in symbols}
+
+        results = scan_panel(create_mock_analyzer(), stocks, symbols, ['CDLDOJI'], frames)
+
+        assert [row['symbol'] for row in results] == symbols
+        assert results[0]['company'] == 'AAA Inc.'
+        assert results[0]['signal'] == 'bullish'
+
+    def test_unusable_symbols_are_skipped(self):
+        """Test that missing, malformed and too short data is skipped without aborting the scan"""
+        frames = {
+            'AAA': create_ohlc_data(),
+            'BAD': create_ohlc_data().drop(columns=['Close']),
+            'SHORT': create_ohlc_data(3),
+            'CCC': create_ohlc_data()
+        }
+        stocks = {symbol: {'company': ''} for symbol in list(frames) + ['MISSING']}
+
+        results = scan_panel(create_mock_analyzer(), stocks, list(stocks), ['CDLDOJI'], frames)
+
+        assert [row['symbol'] for row in results] == ['AAA', 'CCC']
+
+    def test_serial_and_concurrent_streams_match(self):
+        """Test that a single worker streams the same rows as the thread pool"""
+        symbols = ['AAA', 'BBB', 'CCC']
+        manager = Mock()
+        manager.get_stock_data.side_effect = lambda symbol: create_ohlc_data()
+        stocks = {symbol: {'company': ''} for symbol in symbols}
+
+        serial = list(iter_scan_rows(manager, create_mock_analyzer(-100), stocks, symbols, ['CDLDOJI'], max_workers=1))
+        concurrent = list(iter_scan_rows(manager, create_mock_analyzer(-100), stocks, symbols, ['CDLDOJI'],
+                                         max_workers=8))
+
+        key = lambda batch: batch[0]['symbol']
+        assert sorted(serial, key=key) == sorted(concurrent, key=key)
+        assert all(batch[0]['signal'] == 'bearish' for batch in serial)
+
+    def test_symbols_without_signal_are_omitted(self):
+        """Test that symbols with a zero pattern value are not reported"""
+        stocks = {'AAA': {'company': ''}}
+
+        assert scan_panel(create_mock_analyzer(0), stocks, ['AAA'], ['CDLDOJI'], {'AAA': create_ohlc_data()}) == []
+
+
+class TestScanPanel:
+    """Test scanning the whole batch with one panel evaluation"""
+
+    @staticmethod
+    def create_frames():
+        """Helper function to create random bars for symbols with different history lengths"""
+        rng = np.random.default_rng(7)
+        frames = {}
+        for i, num_bars in enumerate([60, 60, 45, 3, 60, 30] * 5):
+            index = pd.bdate_range(end='2024-06-28', periods=num_bars, tz='UTC')
+            close = 100 + np.cumsum(rng.normal(0, 1, num_bars))
+            open_ = close + rng.normal(0, 1, num_bars) * rng.choice([0.01, 1], num_bars)
+            frames[f'S{i:02d}'] = pd.DataFrame({
+                'Open': open_,
+                'High': np.maximum(open_, close) + rng.random(num_bars),
+                'Low': np.minimum(open_, close) - rng.random(num_bars),
+                'Close': close,
+                'Volume': [1000] * num_bars
+            }, index=index)
+        # A symbol whose data stopped early is judged on its own latest bar
+        frames['S00'] = frames['S00'].iloc[:-5]
+        return frames
+
+    def test_panel_scan_matches_per_symbol_scan(self):
+        """Test that the panel scan reports the same rows as scanning symbols one by one"""
+        frames = self.create_frames()
+        symbols = list(frames) + ['MISSING']
+        stocks = {symbol: {'company': f'{symbol} Inc.'} for symbol in symbols}
+
+        for pattern in ['CDLDOJI', 'CDLENGULFING', 'CDLHAMMER', 'CDLSPINNINGTOP', 'CDLHIKKAKE']:
+            expected = scan_each_symbol(stocks, symbols, pattern, frames)
+            assert scan_panel(PatternAnalyzer(), stocks, symbols, [pattern], frames) == expected
+
+    def test_no_usable_data_returns_no_rows(self):
+        """Test that an empty or too short batch yields no results"""
+        frames = {'AAA': create_ohlc_data(3)}
+
+        assert scan_panel(PatternAnalyzer(), {}, ['AAA', 'BBB'], ['CDLDOJI'], frames) == []
+
+    def test_multi_pattern_scan_combines_single_pattern_scans(self):
+        """Test that scanning several patterns at once reports every single-pattern row"""
+        frames = self.create_frames()
+        symbols = list(frames)
+        patterns = ['CDLDOJI', 'CDLSPINNINGTOP', 'CDLHIGHWAVE']
+
+        combined = scan_panel(PatternAnalyzer(), {}, symbols, patterns, frames)
+
+        singles = [row for pattern in patterns for row in scan_panel(PatternAnalyzer(), {}, symbols, [pattern], frames)]
+        key = lambda row: (symbols.index(row['symbol']), patterns.index(row['pattern']))
+        assert combined == sorted(singles, key=key)
+        assert {row['pattern'] for row in combined} == set(patterns)
+
+
+class TestBatchProcessPatterns:
+    """Test evaluating several patterns on one symbol's bars"""
+
+    def test_batch_matches_single_pattern_processing(self):
+        """Test that shared-feature batch results equal processing each pattern alone"""
+        df = TestScanPanel.create_frames()['S01']
+        patterns = list(candlestick_patterns)
+
+        results = PatternAnalyzer.batch_process_patterns(df, patterns)
+
+        assert list(results) == patterns
+        for pattern in patterns:
+            pd.testing.assert_series_equal(results[pattern], PatternAnalyzer.process_pattern(df, pattern))
+
+    def test_unknown_pattern_yields_zeros(self):
+        """Test that an unknown pattern falls back to zeros without affecting the others"""
+        df = create_ohlc_data(20)
+
+        results = PatternAnalyzer.batch_process_patterns(df, ['CDLDOJI', 'CDLNOTAPATTERN'])
+
+        assert (results['CDLNOTAPATTERN'] == 0).all()
+        assert len(results['CDLDOJI']) == 20
+
+
+class TestProcessLatest:
+    """Test latest-bar-only pattern processing"""
+
+    def test_latest_matches_full_history_last_bar(self):
+        """Test that latest values equal the last bar of full-history processing"""
+        frames = TestScanPanel.create_frames()
+        patterns = list(candlestick_patterns)
+
+        latest = PatternAnalyzer.process_latest(frames, patterns)
+
+        assert list(latest.index) == list(frames)
+        for symbol, df in frames.items():
+            full = PatternAnalyzer.batch_process_patterns(df, patterns)
+            for pattern, series in full.items():
+                assert latest.at[symbol, pattern] == series.iloc[-1]
+
+
+class TestParsePatterns:
+    """Test parsing of requested scan patterns"""
+
+    def test_single_pattern(self):
+        """Test that a single pattern name is accepted"""
+        assert parse_patterns('CDLDOJI') == (['CDLDOJI'], None)
+
+    def test_comma_separated_and_list(self):
+        """Test that comma-separated names and lists keep order and drop duplicates"""
+        assert parse_patterns('CDLDOJI,CDLHAMMER,CDLDOJI') == (['CDLDOJI', 'CDLHAMMER'], None)
+        assert parse_patterns(['CDLHAMMER', 'CDLDOJI']) == (['CDLHAMMER', 'CDLDOJI'], None)
+
+    def test_all_patterns(self):
+        """Test that "all" selects every supported pattern"""
+        assert parse_patterns('all') == (list(candlestick_patterns), None)
+
+    def test_invalid_patterns(self):
+        """Test that missing, malformed and unknown patterns are rejected"""
+        assert parse_patterns('')[1] == 'Pattern parameter is required'
+        assert parse_patterns('CDL<script>')[1] == 'Invalid pattern format'
+        assert parse_patterns('CDLDOJI,CDLNOTAPATTERN')[1] == 'Invalid pattern specified'
+        assert parse_patterns({'pattern': 'CDLDOJI'})[1] == 'Invalid request format'
+
+
+def read_stream(lines):
+    """Helper function to parse NDJSON lines"""
+    return [json.loads(line) for line in lines]
+
+
+class TestStreamScan:
+    """Test streaming scan results as symbols complete"""
+
+    @staticmethod
+    def create_manager(delays, frames):
+        """Helper function to create a manager whose fetches take ``delays``"""
+        def get_stock_data(symbol):
+            time.sleep(delays.get(symbol, 0))
+            if symbol == 'FAIL':
+                raise RuntimeError('upstream error')
+            return frames.get(symbol)
+
+        manager = Mock()
+        manager.get_stock_data.side_effect = get_stock_data
+        return manager
+
+    def test_rows_are_yielded_in_completion_order(self):
+        """Test that a fast symbol is reported before a slow one"""
+        frames = TestScanPanel.create_frames()
+        symbols = ['S01', 'S02']
+        manager = self.create_manager({'S01': 0.2}, frames)
+        patterns = list(candlestick_patterns)
+        stocks = {symbol: {'company': ''} for symbol in symbols}
+
+        batches = list(iter_scan_rows(manager, PatternAnalyzer(), stocks, symbols, patterns, max_workers=2))
+
+        expected = {symbol: scan_panel(PatternAnalyzer(), stocks, [symbol], patterns, frames) for symbol in symbols}
+        assert batches == [expected['S02'], expected['S01']]
+
+    def test_stream_emits_results_then_summary(self):
+        """Test that every result row is streamed and followed by a trailer"""
+        frames = TestScanPanel.create_frames()
+        symbols = list(frames)[:8] + ['FAIL', 'NODATA']
+        stocks = {symbol: {'company': f'{symbol} Inc.'} for symbol in symbols}
+        patterns = list(candlestick_patterns)
+        manager = self.create_manager({}, frames)
+
+        with patch.object(scan, 'get_signal_matrix', return_value=None), \
+                patch.object(scan, 'StockDataManager', return_value=manager):
+            lines = read_stream(stream_scan(PatternAnalyzer(), stocks, symbols, patterns))
+
+        rows = [line['data'] for line in lines if line['type'] == 'result']
+        summary = lines[-1]
+        expected = scan_panel(PatternAnalyzer(), stocks, symbols, patterns, frames)
+        assert sorted(rows, key=lambda row: (row['symbol'], row['pattern'])) == \
+            sorted(expected, key=lambda row: (row['symbol'], row['pattern']))
+        assert summary['type'] == 'summary'
+        assert summary['data']['processed_count'] == len(expected)
+        assert summary['data']['scanned_symbols'] == len(symbols)
+        assert summary['data']['source'] == 'live'
+        assert summary['data']['elapsed_ms'] >= summary['data']['first_result_ms']
+
+    def test_stream_error_is_reported_as_last_line(self):
+        """Test that a failure after the stream started ends it with an error line"""
+        with patch.object(scan, 'get_signal_matrix', side_effect=RuntimeError('boom')):
+            lines = read_stream(stream_scan(PatternAnalyzer(), {}, ['AAA'], ['CDLDOJI']))
+
+        assert lines[-1]['type'] == 'error'
+        assert 'boom' not in json.dumps(lines)
+
+    def test_handler_streams_on_request(self):
+        """Test that stream=1 returns an NDJSON body iterator"""
+        request = Mock(method='GET', body=None, remote_addr='stream-test')
+        request.args = {'patterns': 'CDLDOJI', 'stream': '1', 'limit': '5'}
+
+        with patch.object(scan, 'stream_scan', return_value=iter(['{}\n'])) as stream:
+            response = scan.handler(request)
+
+        assert response['statusCode'] == 200
+        assert response['headers']['Content-Type'] == 'application/x-ndjson'
+        assert list(response['body']) == ['{}\n']
+        assert stream.call_args.args[3] == ['CDLDOJI']
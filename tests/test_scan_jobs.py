@@ -0,0 +1,290 @@
+"""
+Tests for asynchronous scan jobs and the jobs endpoint
+"""
+
+import os
+import json
+import time
+import threading
+import pytest
+from unittest.mock import Mock, patch
+
+from scan_jobs import JobStore, ScanJobRunner
+
+
+def make_row(symbol, pattern='CDLDOJI'):
+    """Helper function to create a result row"""
+    return {'symbol': symbol, 'company': '', 'pattern': pattern, 'signal': 'bullish',
+            'value': 100.0, 'date': '2024-01-02'}
+
+
+def fake_scan(symbols, patterns):
+    """Scan function reporting a signal for every other symbol"""
+    for i, symbol in enumerate(symbols):
+        yield [make_row(symbol, pattern) for pattern in patterns] if i % 2 == 0 else []
+
+
+def wait_for(store, job_id, timeout=5.0):
+    """Helper function to wait until a job has finished"""
+    for _ in range(int(timeout / 0.01)):
+        job = store.get(job_id)
+        if job['status'] not in ('queued', 'running'):
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"Job {job_id} did not finish")
+
+
+@pytest.fixture
+def store(tmp_path):
+    """Job store in a temporary database"""
+    return JobStore(str(tmp_path / 'jobs.sqlite3'))
+
+
+class TestJobStore:
+    """Test job records and result cursors"""
+
+    def test_results_are_read_after_cursor(self, store):
+        """Test that polling with the last cursor returns only new rows"""
+        job_id = store.create(['AAA', 'BBB', 'CCC'], ['CDLDOJI'])
+        store.append(job_id, [make_row('AAA')])
+        store.append(job_id, [])
+        store.append(job_id, [make_row('CCC'), make_row('CCC', 'CDLHAMMER')])
+
+        first = store.results(job_id, after=0, limit=2)
+        rest = store.results(job_id, after=first[-1]['seq'])
+        job = store.get(job_id)
+
+        assert [item['row']['symbol'] for item in first + rest] == ['AAA', 'CCC', 'CCC']
+        assert [item['seq'] for item in first + rest] == [1, 2, 3]
+        assert job['scanned_symbols'] == 3
+        assert job['result_count'] == 3
+
+    def test_jobs_outlive_the_store_instance(self, store):
+        """Test that another process opening the database sees the results"""
+        job_id = store.create(['AAA'], ['CDLDOJI'])
+        store.append(job_id, [make_row('AAA')])
+        store.finish(job_id)
+
+        reopened = JobStore(store.path)
+
+        assert reopened.get(job_id)['status'] == 'completed'
+        assert reopened.results(job_id)[0]['row'] == make_row('AAA')
+
+    def test_orphaned_jobs_are_failed(self, store):
+        """Test that unfinished jobs of an exited process are reported as failed"""
+        job_id = store.create(['AAA'], ['CDLDOJI'])
+        store._write([("UPDATE scan_jobs SET owner_pid = ? WHERE id = ?", (2 ** 22 + 1, job_id))])
+
+        job = store.get(job_id)
+
+        assert job['status'] == 'failed'
+        assert job['error'] == 'Job interrupted'
+
+    def test_job_of_earlier_process_with_same_pid_is_failed(self, store):
+        """Test that a job is failed when its pid now belongs to a different process"""
+        job_id = store.create(['AAA'], ['CDLDOJI'])
+        # Same pid as this process, as after a container restart, but another owner token
+        store._write([("UPDATE scan_jobs SET owner_pid = ?, owner_token = ? WHERE id = ?",
+                       (os.getpid(), 'earlier-process', job_id))])
+
+        assert store.find_active(['AAA'], ['CDLDOJI']) is None
+        assert store.get(job_id)['status'] == 'failed'
+        assert store.active_count() == 0
+
+    @pytest.mark.skipif(not os.path.exists(f'/proc/{os.getppid()}/stat'), reason="needs /proc")
+    def test_live_owner_is_told_apart_by_start_time(self, store):
+        """Test that a job of another live process is kept only while its start time matches"""
+        from scan_jobs import _process_started
+
+        kept = store.create(['AAA'], ['CDLDOJI'])
+        reused = store.create(['BBB'], ['CDLDOJI'])
+        parent = os.getppid()
+        store._write([
+            ("UPDATE scan_jobs SET owner_pid = ?, owner_token = ? WHERE id = ?",
+             (parent, _process_started(parent), kept)),
+            ("UPDATE scan_jobs SET owner_pid = ?, owner_token = ? WHERE id = ?",
+             (parent, '0', reused)),
+        ])
+
+        assert store.get(kept)['status'] == 'queued'
+        assert store.get(reused)['status'] == 'failed'
+
+    def test_jobs_without_owner_token_are_checked_by_pid(self, tmp_path):
+        """Test that a database created before owner tokens is upgraded and still usable"""
+        import sqlite3
+
+        path = str(tmp_path / 'old.sqlite3')
+        conn = sqlite3.connect(path)
+        conn.execute(
+            "CREATE TABLE scan_jobs (id TEXT PRIMARY KEY, spec_key TEXT NOT NULL, status TEXT NOT NULL, "
+            "symbols TEXT NOT NULL, patterns TEXT NOT NULL, total INTEGER NOT NULL, "
+            "scanned INTEGER NOT NULL DEFAULT 0, result_count INTEGER NOT NULL DEFAULT 0, "
+            "owner_pid INTEGER NOT NULL, error TEXT, created_at REAL NOT NULL, "
+            "started_at REAL, finished_at REAL)")
+        conn.execute("INSERT INTO scan_jobs (id, spec_key, status, symbols, patterns, total, owner_pid, "
+                     "created_at) VALUES ('old', 'key', 'running', '[]', '[]', 0, ?, 0)", (os.getpid(),))
+        conn.commit()
+        conn.close()
+
+        store = JobStore(path)
+
+        assert store.get('old')['status'] == 'running'
+        assert store.get(store.create(['AAA'], ['CDLDOJI']))['status'] == 'queued'
+
+    def test_finished_jobs_are_pruned(self, tmp_path):
+        """Test that finished jobs past the retention period are deleted"""
+        clock = Mock(return_value=1000.0)
+        store = JobStore(str(tmp_path / 'jobs.sqlite3'), retention=60, clock=clock)
+        old = store.create(['AAA'], ['CDLDOJI'])
+        store.append(old, [make_row('AAA')])
+        store.finish(old)
+        running = store.create(['BBB'], ['CDLDOJI'])
+
+        clock.return_value = 1100.0
+
+        assert store.prune() == 1
+        assert store.get(old) is None
+        assert store.results(old) == []
+        assert store.get(running)['status'] == 'queued'
+
+
+class TestScanJobRunner:
+    """Test executing jobs on the local worker pool"""
+
+    def test_job_runs_to_completion(self, store):
+        """Test that a submitted job stores every symbol's rows"""
+        runner = ScanJobRunner(store, fake_scan, workers=2)
+        symbols = [f'S{i:03d}' for i in range(500)]
+
+        job = wait_for(store, runner.submit(symbols, ['CDLDOJI']))
+        runner.shutdown()
+
+        assert job['status'] == 'completed'
+        assert job['scanned_symbols'] == 500
+        assert job['result_count'] == 250
+        assert len(store.results(job['job_id'])) == 250
+
+    def test_identical_active_job_is_reused(self, store):
+        """Test that resubmitting a running scan returns the same job"""
+        release = threading.Event()
+
+        def blocking_scan(symbols, patterns):
+            release.wait(5)
+            yield []
+
+        runner = ScanJobRunner(store, blocking_scan, workers=1)
+        first = runner.submit(['AAA'], ['CDLDOJI'])
+        second = runner.submit(['AAA'], ['CDLDOJI'])
+        other = runner.submit(['BBB'], ['CDLDOJI'])
+        release.set()
+        runner.shutdown()
+
+        assert first == second
+        assert other != first
+
+    def test_pending_jobs_are_bounded(self, store):
+        """Test that submissions are refused once max_pending jobs are unfinished"""
+        release = threading.Event()
+
+        def blocking_scan(symbols, patterns):
+            release.wait(5)
+            yield []
+
+        runner = ScanJobRunner(store, blocking_scan, workers=1, max_pending=2)
+        accepted = [runner.submit([f'S{i}'], ['CDLDOJI']) for i in range(3)]
+        release.set()
+        runner.shutdown()
+
+        assert accepted[2] is None
+        assert None not in accepted[:2]
+
+    def test_failed_scan_keeps_partial_results(self, store):
+        """Test that a failing scan is reported and its earlier rows remain"""
+        def failing_scan(symbols, patterns):
+            yield [make_row('AAA')]
+            raise RuntimeError('upstream down')
+
+        runner = ScanJobRunner(store, failing_scan, workers=1)
+        job = wait_for(store, runner.submit(['AAA', 'BBB'], ['CDLDOJI']))
+        runner.shutdown()
+
+        assert job['status'] == 'failed'
+        assert job['error'] == 'Scan failed'
+        assert len(store.results(job['job_id'])) == 1
+
+
+class TestJobsHandler:
+    """Test submitting and polling through the jobs endpoint"""
+
+    @pytest.fixture
+    def jobs(self, store):
+        """Jobs endpoint backed by a temporary store and the fake scan"""
+        from api import jobs
+
+        runner = ScanJobRunner(store, fake_scan, workers=1)
+        stocks = {f'S{i:03d}': {'company': ''} for i in range(120)}
+        with patch.object(jobs, 'get_job_store', return_value=store), \
+                patch.object(jobs, 'get_job_runner', return_value=runner), \
+                patch.object(jobs, 'load_symbols', return_value=stocks), \
+                patch.object(jobs, 'get_request_limiter', return_value=Mock(allow=Mock(return_value=True))):
+            yield jobs
+        runner.shutdown()
+
+    @staticmethod
+    def post(jobs, body):
+        request = Mock(method='POST', body=json.dumps(body), remote_addr='jobs-test')
+        return jobs.handler(request)
+
+    @staticmethod
+    def get(jobs, **args):
+        request = Mock(method='GET', body=None, remote_addr='jobs-test')
+        request.args = args
+        return jobs.handler(request)
+
+    def test_submit_and_poll(self, jobs, store):
+        """Test that a job beyond MAX_SYMBOLS_LIMIT is accepted and polled to completion"""
+        response = self.post(jobs, {'patterns': ['CDLDOJI']})
+        submitted = json.loads(response['body'])['data']
+        wait_for(store, submitted['job_id'])
+
+        first = json.loads(self.get(jobs, id=submitted['job_id'], after='0')['body'])['data']
+        second = json.loads(self.get(jobs, id=submitted['job_id'],
+                                     after=str(first['next_cursor']))['body'])['data']
+
+        assert response['statusCode'] == 202
+        assert submitted['total_symbols'] == 120
+        assert first['status'] == 'completed'
+        assert len(first['results']) == 60
+        assert second['results'] == []
+        assert second['next_cursor'] == first['next_cursor']
+
+    def test_stream_ends_with_summary(self, jobs, store):
+        """Test that a streamed poll sends every row and then the job summary"""
+        job_id = json.loads(self.post(jobs, {'patterns': 'CDLDOJI', 'limit': 10})['body'])['data']['job_id']
+        wait_for(store, job_id)
+
+        response = self.get(jobs, id=job_id, stream='1')
+        lines = [json.loads(line) for line in response['body']]
+
+        assert response['headers']['Content-Type'] == 'application/x-ndjson'
+        assert [line['type'] for line in lines] == ['result'] * 5 + ['summary']
+        assert lines[-1]['data']['status'] == 'completed'
+
+    def test_stream_stops_at_deadline(self, store):
+        """Test that a stream of a running job ends with a resumable status line"""
+        from api.jobs import stream_job
+
+        job_id = store.create(['AAA', 'BBB'], ['CDLDOJI'])
+        store.append(job_id, [make_row('AAA')])
+
+        lines = [json.loads(line) for line in stream_job(store, job_id, max_seconds=0)]
+
+        assert [line['type'] for line in lines] == ['result', 'status']
+        assert lines[-1]['next_cursor'] == 1
+
+    def test_invalid_requests(self, jobs):
+        """Test that malformed ids, unknown jobs and bad patterns are rejected"""
+        assert self.get(jobs, id='../etc')['statusCode'] == 400
+        assert self.get(jobs, id='0' * 32)['statusCode'] == 404
+        assert self.post(jobs, {'patterns': 'NOT_A_PATTERN'})['statusCode'] == 400
+        assert self.post(jobs, {'patterns': 'CDLDOJI', 'limit': 'many'})['statusCode'] == 400
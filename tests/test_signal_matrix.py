@@ -0,0 +1,162 @@
+"""
+Tests for the materialized signal matrix
+"""
+
+import json
+import os
+import numpy as np
+import pandas as pd
+from datetime import datetime, timedelta
+from unittest.mock import Mock, patch
+
+from api.scan import PatternAnalyzer, scan_matrix, scan_panel
+from patterns import candlestick_patterns
+from signal_matrix import SignalMatrix, build_signal_matrix, get_signal_matrix, materialize_signal_matrix
+
+
+def create_frames(num_symbols=12, seed=3):
+    """Helper function to create random daily bars stamped like Alpaca's"""
+    rng = np.random.default_rng(seed)
+    frames = {}
+    for i in range(num_symbols):
+        num_bars = [80, 80, 40, 4][i % 4]
+        index = pd.bdate_range(end='2024-06-28', periods=num_bars, tz='UTC') + pd.Timedelta(hours=4)
+        close = 100 + np.cumsum(rng.normal(0, 1, num_bars))
+        open_ = close + rng.normal(0, 1, num_bars) * rng.choice([0.01, 1], num_bars)
+        frames[f'S{i:02d}'] = pd.DataFrame({
+            'Open': open_,
+            'High': np.maximum(open_, close) + rng.random(num_bars),
+            'Low': np.minimum(open_, close) - rng.random(num_bars),
+            'Close': close,
+            'Volume': [1000] * num_bars
+        }, index=index)
+    return frames
+
+
+class TestSignalMatrix:
+    """Test building, persisting and querying the signal matrix"""
+
+    def test_matrix_answers_match_live_scan(self):
+        """Test that lookups return exactly the rows a live scan computes"""
+        frames = create_frames()
+        symbols = list(frames) + ['NODATA']
+        stocks = {symbol: {'company': f'{symbol} Corp'} for symbol in symbols}
+        patterns = list(candlestick_patterns)
+
+        matrix = build_signal_matrix(frames, symbols)
+
+        assert matrix.signals.dtype == np.int8
+        assert matrix.signals.shape == (len(symbols), len(patterns), 5)
+        assert matrix.covers(symbols, patterns)
+        expected = scan_panel(PatternAnalyzer(), stocks, symbols, patterns, frames)
+        assert expected
+        assert scan_matrix(matrix, PatternAnalyzer(), stocks, symbols, patterns) == expected
+
+    def test_recent_days_match_full_history(self):
+        """Test that every stored day equals the full-history signal for that bar"""
+        frames = create_frames()
+        matrix = build_signal_matrix(frames, list(frames), days=3)
+
+        for row, (symbol, df) in enumerate(frames.items()):
+            if len(df) < 5:
+                assert not matrix.signals[row].any()
+                continue
+            full = PatternAnalyzer.batch_process_patterns(df, matrix.patterns)
+            for col, pattern in enumerate(matrix.patterns):
+                np.testing.assert_array_equal(matrix.signals[row, col] * matrix.scale, full[pattern].iloc[-3:].to_numpy())
+            assert str(matrix.dates[row, -1]) == df.index[-1].strftime('%Y-%m-%d')
+
+    def test_save_and_load_round_trip(self, tmp_path):
+        """Test that a saved matrix loads back unchanged"""
+        frames = create_frames(4)
+        matrix = build_signal_matrix(frames, list(frames))
+        path = matrix.save(str(tmp_path / 'signals.npz'))
+
+        loaded = SignalMatrix.load(path)
+
+        assert loaded.symbols == matrix.symbols
+        assert loaded.patterns == matrix.patterns
+        assert loaded.generated_at == matrix.generated_at
+        np.testing.assert_array_equal(loaded.signals, matrix.signals)
+        np.testing.assert_array_equal(loaded.dates, matrix.dates)
+
+    def test_reduced_strength_signals_round_trip(self, tmp_path):
+        """Test that +/-80 engulfing signals survive storage and lookup exactly"""
+        index = pd.bdate_range(end='2024-06-28', periods=6)
+        bull = pd.DataFrame({
+            'Open': [10.0, 10.0, 10.0, 10.0, 10.0, 9.0],
+            'High': [10.5, 10.5, 10.5, 10.5, 10.5, 11.5],
+            'Low': [8.5, 8.5, 8.5, 8.5, 8.5, 8.5],
+            'Close': [9.0, 9.0, 9.0, 9.0, 9.0, 11.0],
+            'Volume': [1000] * 6
+        }, index=index)
+        bear = bull.rename(columns={'Open': 'Close', 'Close': 'Open'})
+        frames = {'BULL': bull, 'BEAR': bear}
+
+        matrix = build_signal_matrix(frames, list(frames), patterns=['CDLENGULFING'])
+        loaded = SignalMatrix.load(matrix.save(str(tmp_path / 'signals.npz')))
+
+        assert loaded.latest(['BULL', 'BEAR'], ['CDLENGULFING']) == [
+            ('BULL', 'CDLENGULFING', 80, '2024-06-28'),
+            ('BEAR', 'CDLENGULFING', -80, '2024-06-28'),
+        ]
+
+    def test_freshness_and_coverage(self):
+        """Test that stale matrices and unknown symbols or patterns are reported"""
+        matrix = build_signal_matrix(create_frames(2), ['S00', 'S01'], patterns=['CDLDOJI'])
+
+        assert matrix.is_fresh()
+        matrix.generated_at = (datetime.now() - timedelta(days=2)).isoformat()
+        assert not matrix.is_fresh()
+        assert not matrix.covers(['S00', 'OTHER'], ['CDLDOJI'])
+        assert not matrix.covers(['S00'], ['CDLHAMMER'])
+
+    def test_get_signal_matrix_reloads_changed_file(self, tmp_path):
+        """Test that the cached matrix is replaced when the file changes"""
+        path = str(tmp_path / 'signals.npz')
+        assert get_signal_matrix(path) is None
+
+        build_signal_matrix(create_frames(2), ['S00', 'S01']).save(path)
+        first = get_signal_matrix(path)
+        assert get_signal_matrix(path) is first
+
+        build_signal_matrix(create_frames(3), ['S00', 'S01', 'S02']).save(path)
+        os.utime(path, (0, os.path.getmtime(path) + 10))
+        assert get_signal_matrix(path).symbols == ['S00', 'S01', 'S02']
+
+    def test_materialize_fetches_and_persists(self, tmp_path):
+        """Test that the job fetches bars for every symbol and writes the matrix"""
+        frames = create_frames(3)
+        manager = Mock()
+        manager.get_stocks_data.return_value = frames
+        path = str(tmp_path / 'signals.npz')
+
+        matrix = materialize_signal_matrix(manager, {symbol: {} for symbol in frames}, path)
+
+        manager.get_stocks_data.assert_called_once_with(list(frames))
+        assert SignalMatrix.load(path).symbols == matrix.symbols
+
+
+class TestScanHandlerWithMatrix:
+    """Test that the scan endpoint answers from a fresh matrix"""
+
+    def test_handler_serves_matrix_without_fetching(self):
+        """Test that no bars are fetched when the matrix covers the request"""
+        from api import scan
+
+        frames = create_frames()
+        stocks = {symbol: {'company': ''} for symbol in frames}
+        matrix = build_signal_matrix(frames, list(frames))
+        request = Mock(method='GET', body=None, remote_addr='matrix-test')
+        request.args = {'patterns': 'all', 'limit': '50'}
+
+        with patch.object(scan, 'get_signal_matrix', return_value=matrix), \
+                patch.object(scan, 'load_symbols', return_value=stocks), \
+                patch.object(scan, 'StockDataManager') as manager:
+            response = scan.handler(request)
+
+        manager.assert_not_called()
+        body = json.loads(response['body'])
+        assert response['statusCode'] == 200
+        assert body['data']['results'] == scan_panel(PatternAnalyzer(), stocks, list(frames),
+                                                     list(candlestick_patterns), frames)
@@ -0,0 +1,79 @@
+"""
+Tests for the shared symbol universe loader
+"""
+
+import os
+from unittest.mock import patch
+
+import universe
+from universe import DEFAULT_SYMBOLS, Universe, load_universe
+
+
+def write_symbols(path, rows):
+    """Helper function to write a symbols CSV file"""
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(rows) + '\n')
+
+
+class TestUniverse:
+    """Test the universe structure"""
+
+    def test_parallel_arrays_and_index(self):
+        """Test that symbols, companies and the index map line up"""
+        u = Universe([('AAPL', 'Apple Inc.'), ('MSFT', 'Microsoft Corporation')])
+
+        assert u.symbols == ('AAPL', 'MSFT')
+        assert u.companies == ('Apple Inc.', 'Microsoft Corporation')
+        assert u.index == {'AAPL': 0, 'MSFT': 1}
+        assert u.company('MSFT') == 'Microsoft Corporation'
+        assert u.company('NVDA') == ''
+        assert 'AAPL' in u and len(u) == 2
+        assert u.as_dict() == {'AAPL': {'company': 'Apple Inc.'}, 'MSFT': {'company': 'Microsoft Corporation'}}
+
+    def test_duplicate_symbol_keeps_first_position(self):
+        """Test that a repeated symbol updates its company but not its row"""
+        u = Universe([('AAPL', 'Apple'), ('MSFT', 'Microsoft'), ('AAPL', 'Apple Inc.')])
+
+        assert u.symbols == ('AAPL', 'MSFT')
+        assert u.company('AAPL') == 'Apple Inc.'
+
+
+class TestLoadUniverse:
+    """Test parsing, memoization and invalidation"""
+
+    def test_parses_file_once(self, tmp_path):
+        """Test that repeated loads reuse the parsed universe"""
+        path = str(tmp_path / 'symbols.csv')
+        write_symbols(path, ['aapl,Apple Inc.', 'MSFT,Microsoft Corporation', 'bad-row', ',Missing'])
+
+        with patch.object(universe, '_parse_symbols_file', wraps=universe._parse_symbols_file) as parse:
+            first = load_universe(path)
+            second = load_universe(path)
+
+        assert parse.call_count == 1
+        assert second is first
+        assert first.symbols == ('AAPL', 'MSFT')
+        assert not first.is_default
+
+    def test_reloads_when_file_changes(self, tmp_path):
+        """Test that a new modification time triggers a reload"""
+        path = str(tmp_path / 'symbols.csv')
+        write_symbols(path, ['AAPL,Apple Inc.'])
+        first = load_universe(path)
+
+        write_symbols(path, ['AAPL,Apple Inc.', 'NVDA,NVIDIA Corporation'])
+        os.utime(path, (0, os.path.getmtime(path) + 10))
+        second = load_universe(path)
+
+        assert second is not first
+        assert second.symbols == ('AAPL', 'NVDA')
+
+    def test_missing_or_empty_file_uses_defaults(self, tmp_path):
+        """Test that the defaults are used when the file has no symbols"""
+        missing = load_universe(str(tmp_path / 'missing.csv'))
+        assert missing.is_default
+        assert missing.symbols == tuple(symbol for symbol, _ in DEFAULT_SYMBOLS)
+
+        path = str(tmp_path / 'empty.csv')
+        write_symbols(path, [''])
+        assert load_universe(path).is_default
@@ -0,0 +1,148 @@
+"""
+Shared symbol universe loader
+
+``datasets/symbols.csv`` is parsed once per process and re-read only when the
+file's modification time changes. The universe is held as parallel symbol and
+company tuples plus a symbol -> row index map, so a symbol's index can address
+rows of panel arrays and signal matrices built over the same universe.
+
+Classes:
+    Universe: Immutable symbol universe with parallel arrays and index map
+
+Functions:
+    load_universe: Return the memoized universe, reloading it when the file changes
+"""
+
+import os
+import csv
+import logging
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+SYMBOLS_FILE = 'datasets/symbols.csv'
+
+# Used when the symbols file is missing, unreadable or empty
+DEFAULT_SYMBOLS = (
+    ('AAPL', 'Apple Inc.'),
+    ('GOOGL', 'Alphabet Inc.'),
+    ('MSFT', 'Microsoft Corporation'),
+    ('AMZN', 'Amazon.com Inc.'),
+    ('TSLA', 'Tesla Inc.'),
+    ('META', 'Meta Platforms Inc.'),
+    ('NVDA', 'NVIDIA Corporation'),
+    ('NFLX', 'Netflix Inc.'),
+    ('SPY', 'SPDR S&P 500 ETF'),
+    ('QQQ', 'Invesco QQQ Trust'),
+    ('VTI', 'Vanguard Total Stock Market ETF'),
+    ('IWM', 'iShares Russell 2000 ETF'),
+    ('GLD', 'SPDR Gold Shares'),
+    ('TLT', 'iShares 20+ Year Treasury Bond ETF'),
+    ('XLE', 'Energy Select Sector SPDR Fund'),
+)
+
+
+class Universe:
+    """
+    Symbols and company names in file order.
+
+    Attributes:
+        symbols (Tuple[str, ...]): Upper-case symbols
+        companies (Tuple[str, ...]): Company names, parallel to ``symbols``
+        index (Dict[str, int]): Row of each symbol in ``symbols``
+        is_default (bool): True when the built-in default symbols are used
+    """
+
+    def __init__(self, rows: Iterable[Tuple[str, str]], is_default: bool = False) -> None:
+        companies = {}
+        for symbol, company in rows:
+            # Later rows update the company but a symbol keeps its first position
+            companies[symbol] = company
+
+        self.symbols = tuple(companies)
+        self.companies = tuple(companies.values())
+        self.index = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self.is_default = is_default
+        self._stocks = None
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self.index
+
+    def company(self, symbol: str) -> str:
+        """Return a symbol's company name, or '' when it is not in the universe"""
+        i = self.index.get(symbol)
+        return self.companies[i] if i is not None else ''
+
+    def as_dict(self) -> Dict[str, Dict[str, str]]:
+        """
+        Return the universe as the ``{symbol: {'company': name}}`` mapping the
+        endpoints have always used. The mapping is built once and shared, so it
+        must not be modified.
+        """
+        if self._stocks is None:
+            self._stocks = {symbol: {'company': company}
+                            for symbol, company in zip(self.symbols, self.companies)}
+        return self._stocks
+
+
+def _parse_symbols_file(path: str) -> List[Tuple[str, str]]:
+    """Parse (symbol, company) rows, skipping malformed ones"""
+    rows = []
+    with open(path, 'r', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        for row_num, row in enumerate(reader, 1):
+            try:
+                if len(row) >= 2 and row[0].strip() and row[1].strip():
+                    rows.append((row[0].strip().upper(), row[1].strip()))
+            except Exception as e:
+                logger.warning(f"Error processing row {row_num} in symbols file: {str(e)}")
+    return rows
+
+
+# Memoized universe and the (path, modification time) it was loaded from
+_universe = None
+_universe_key = None
+_universe_lock = threading.Lock()
+
+
+def load_universe(path: Optional[str] = None) -> Universe:
+    """
+    Get the symbol universe, parsing the symbols file only when it changed
+
+    Args:
+        path: Symbols CSV path, defaults to ``datasets/symbols.csv``
+
+    Returns:
+        Universe from the file, or the default symbols when the file is
+        missing, unreadable or holds no valid rows
+    """
+    global _universe, _universe_key
+
+    path = path or SYMBOLS_FILE
+    try:
+        key = (path, os.path.getmtime(path))
+    except OSError:
+        key = (path, None)
+
+    with _universe_lock:
+        if _universe is not None and key == _universe_key:
+            return _universe
+
+        if key[1] is None:
+            logger.warning(f"Symbols file not found: {path} - using default symbols")
+            universe = Universe(DEFAULT_SYMBOLS, is_default=True)
+        else:
+            try:
+                rows = _parse_symbols_file(path)
+                universe = Universe(rows) if rows else Universe(DEFAULT_SYMBOLS, is_default=True)
+                logger.info(f"Loaded {len(universe)} symbols from file")
+            except Exception as e:
+                logger.warning(f"Error loading symbols file: {str(e)} - using default symbols")
+                universe = Universe(DEFAULT_SYMBOLS, is_default=True)
+
+        _universe, _universe_key = universe, key
+        return universe